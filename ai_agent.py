@@ -7,6 +7,8 @@ import os
 from typing import List, Dict, Optional
 from datetime import datetime
 
+from conversation_log import ConversationLog, is_jsonl, log_from_config
+
 
 class AIAgent:
     """
@@ -30,6 +32,9 @@ class AIAgent:
             'system_prompt', 
             'You are a helpful AI assistant.'
         )
+        # With save_conversations + conversation_dir every message is appended to a JSONL transcript
+        self.conversation_log = log_from_config(self.config, name, self.config.get('session_id', 'default'))
+        self._saved_logs: Dict[str, ConversationLog] = {}
         
     def add_message(self, role: str, content: str) -> None:
         """
@@ -45,6 +50,11 @@ class AIAgent:
             'timestamp': datetime.now().isoformat()
         }
         self.conversation_history.append(message)
+        if self.conversation_log is not None:
+            try:
+                self.conversation_log.append(message)
+            except OSError as e:
+                print(f"Warning: could not append to {self.conversation_log.path}: {e}")
         
     def process_message(self, user_message: str) -> str:
         """
@@ -113,6 +123,9 @@ class AIAgent:
         """
         Save the conversation history to a JSON file.
         
+        Paths ending in .jsonl (or .jsonl.gz) are written as JSON lines instead:
+        saving again to the same path only appends the new messages.
+        
         Args:
             filepath: Path to save the conversation
             
@@ -121,6 +134,11 @@ class AIAgent:
             PermissionError: If insufficient permissions to write file
         """
         try:
+            if is_jsonl(filepath):
+                if filepath not in self._saved_logs:
+                    self._saved_logs[filepath] = ConversationLog(filepath, agent_name=self.name)
+                self._saved_logs[filepath].save(self.conversation_history)
+                return
             with open(filepath, 'w') as f:
                 json.dump({
                     'agent_name': self.name,
@@ -129,12 +147,16 @@ class AIAgent:
         except (IOError, PermissionError) as e:
             raise IOError(f"Failed to save conversation to {filepath}: {e}")
     
-    def load_conversation(self, filepath: str) -> None:
+    def load_conversation(self, filepath: str, last: Optional[int] = None) -> None:
         """
         Load conversation history from a JSON file.
         
+        .jsonl (or .jsonl.gz) files are streamed line by line; with `last` only
+        the end of the file is read.
+        
         Args:
             filepath: Path to load the conversation from
+            last: Only load the last this many messages
             
         Raises:
             FileNotFoundError: If the file does not exist
@@ -142,9 +164,21 @@ class AIAgent:
             IOError: If the file cannot be read
         """
         try:
+            if is_jsonl(filepath):
+                log = ConversationLog(filepath, agent_name=self.name)
+                if last is not None:
+                    self.conversation_history = log.load_tail(last)
+                else:
+                    self.conversation_history = list(log.iter_messages())
+                    log.mark_saved(self.conversation_history)
+                # Saving back to this file appends from here (and keeps anything before a partial load)
+                self._saved_logs[filepath] = log
+                return
             with open(filepath, 'r') as f:
                 data = json.load(f)
                 self.conversation_history = data.get('conversation', [])
+            if last is not None:
+                self.conversation_history = self.conversation_history[-last:] if last > 0 else []
         except FileNotFoundError:
             raise FileNotFoundError(f"Conversation file not found: {filepath}")
         except json.JSONDecodeError as e:
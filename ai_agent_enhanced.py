@@ -7,83 +7,34 @@ import json
 import os
 import re
 import subprocess
-from typing import List, Dict, Optional, Any
+import threading
+import time
+from typing import List, Dict, Optional, Any, Iterator, Tuple
 from datetime import datetime
 from dotenv import load_dotenv
 import random
 
+# Heavy/optional packages (openai, anthropic, ollama, duckduckgo_search, wikipedia,
+# bs4, requests, voice/learning/code-gen modules) are imported on first use via
+# optional_import so importing this module - and booting a worker - stays fast
+from lazy_imports import optional_import
+from prompt_builder import PromptBuilder
+from conversation_summary import RollingSummarizer
+from conversation_log import ConversationLog, is_jsonl, log_from_config
+from usage_metrics import UsageTracker
+from ollama_dispatcher import get_ollama_dispatcher
+from session_store import get_session_store
+from request_timing import span
+
 # Load environment variables
 load_dotenv()
 
-# AI Model Clients
-try:
-    from openai import OpenAI
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-
-try:
-    from anthropic import Anthropic
-    ANTHROPIC_AVAILABLE = True
-except ImportError:
-    ANTHROPIC_AVAILABLE = False
-
-try:
-    import ollama
-    OLLAMA_AVAILABLE = True
-except ImportError:
-    OLLAMA_AVAILABLE = False
-
-# Web Search and Internet
-try:
-    from duckduckgo_search import DDGS
-    DDGS_AVAILABLE = True
-except ImportError:
-    DDGS_AVAILABLE = False
-
-try:
-    import wikipedia
-    WIKIPEDIA_AVAILABLE = True
-except ImportError:
-    WIKIPEDIA_AVAILABLE = False
-
-try:
-    from bs4 import BeautifulSoup
-    import requests as web_requests
-    WEB_SCRAPING_AVAILABLE = True
-except ImportError:
-    WEB_SCRAPING_AVAILABLE = False
-
-# Voice and Self-Learning
-try:
-    from voice_module import VoiceGenerator
-    VOICE_AVAILABLE = True
-except ImportError:
-    VOICE_AVAILABLE = False
-    print("⚠️  Voice module not available - install: pip install pyttsx3")
-
-try:
-    from self_learning import SelfLearningSystem
-    SELF_LEARNING_AVAILABLE = True
-except ImportError:
-    SELF_LEARNING_AVAILABLE = False
-    print("⚠️  Self-learning module not available")
-
-# Code Generation
-try:
-    from llm_code_generator import get_code_generator
-    CODE_GEN_AVAILABLE = True
-except ImportError:
-    CODE_GEN_AVAILABLE = False
-    print("⚠️  Code generator module not available")
-
 
 class EnhancedAIAgent:
     """
     Enhanced AI Agent with HARDCORE intelligence, web access, gangster personality, 
     VOICE, and SELF-LEARNING/IMPROVEMENT capabilities
     """
-    """
 
     # GANGSTER DICTIONARY - Street Slang & Hood Talk
     GANGSTER_SLANG = {
@@ -187,6 +138,12 @@ async def get_{endpoint}(item_id: int):
 '''
     }
 
+    # Most recent messages considered for a prompt (the token budget decides how many fit).
+    # The window slides HISTORY_STEP messages at a time so the history prefix stays
+    # byte-identical between calls and provider prompt caches keep hitting
+    HISTORY_WINDOW = 20
+    HISTORY_STEP = 10
+
     # Self-Learning Knowledge Base
     LEARNED_PATTERNS = []
     CODE_SNIPPETS_CACHE = {}
@@ -196,6 +153,22 @@ async def get_{endpoint}(item_id: int):
         self.name = name
         self.config = config or {}
         self.conversation_history: List[Dict] = []
+        # Chats run in a threadpool - history, memory and summary indexes are only
+        # changed under this (provider calls run outside it)
+        self._state_lock = threading.RLock()
+
+        # Shared history/counters across gunicorn workers (SESSION_STORE_URL)
+        self.session_id = self.config.get('session_id', 'default')
+        self.session_store = None
+        try:
+            self.session_store = get_session_store()
+        except (ImportError, ValueError) as e:
+            print(f"⚠️  Session store not available, history stays per worker: {e}")
+
+        # With save_conversations + conversation_dir every message is appended to a JSONL
+        # transcript (one write per message, so workers can share the file)
+        self.conversation_log = log_from_config(self.config, name, self.session_id)
+        self._saved_logs: Dict[str, ConversationLog] = {}
 
         # Personality settings
         self.swearing_enabled = os.getenv("SWEARING_ENABLED", "true").lower() == "true"
@@ -207,36 +180,79 @@ async def get_{endpoint}(item_id: int):
         
         # Voice settings
         self.voice_enabled = os.getenv("VOICE_ENABLED", "false").lower() == "true"
+        # Speech is played sentence by sentence, so long answers don't delay the first audio
+        self.voice_max_chars = int(os.getenv("VOICE_MAX_CHARS", "2000"))
         self.voice = None
-        if self.voice_enabled and VOICE_AVAILABLE:
-            self.voice = VoiceGenerator()
-            if not self.voice.is_available():
-                print("⚠️  Voice enabled but no TTS engine available")
-                self.voice = None
+        if self.voice_enabled:
+            voice_module = optional_import("voice_module")
+            if voice_module:
+                self.voice = voice_module.VoiceGenerator()
+                if not self.voice.is_available():
+                    print("⚠️  Voice enabled but no TTS engine available")
+                    self.voice = None
+            else:
+                print("⚠️  Voice module not available - install: pip install pyttsx3")
         
         # Self-learning system
         self.learning_system = None
-        if SELF_LEARNING_AVAILABLE:
-            self.learning_system = SelfLearningSystem()
+        self_learning = optional_import("self_learning")
+        if self_learning:
+            self.learning_system = self_learning.SelfLearningSystem(store=self.session_store)
+        else:
+            print("⚠️  Self-learning module not available")
         
         # Code generator
         self.code_generator = None
-        if CODE_GEN_AVAILABLE:
-            self.code_generator = get_code_generator()
+        llm_code_generator = optional_import("llm_code_generator")
+        if llm_code_generator:
+            self.code_generator = llm_code_generator.get_code_generator()
+        else:
+            print("⚠️  Code generator module not available")
 
-        # Initialize AI clients
+        # Initialize AI clients - SDKs only get imported when a key is configured.
+        # *_BASE_URL points them at a proxy, a compatible server or fake_llm_server.py
         self.openai_client = None
         self.anthropic_client = None
 
-        if OPENAI_AVAILABLE and os.getenv("OPENAI_API_KEY"):
-            self.openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-        if ANTHROPIC_AVAILABLE and os.getenv("ANTHROPIC_API_KEY"):
-            self.anthropic_client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        if os.getenv("OPENAI_API_KEY"):
+            openai = optional_import("openai")
+            if openai:
+                self.openai_client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"),
+                                                   base_url=os.getenv("OPENAI_BASE_URL") or None)
+
+        if os.getenv("ANTHROPIC_API_KEY"):
+            anthropic = optional_import("anthropic")
+            if anthropic:
+                self.anthropic_client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"),
+                                                            base_url=os.getenv("ANTHROPIC_BASE_URL") or None)
+
+        # Vector memory of this conversation - lets prompts pull in relevant older
+        # turns instead of only the last 10 messages (needs numpy)
+        self.memory = None
+        self.memory_recall_k = int(os.getenv("MEMORY_RECALL_K", "3"))
+        if os.getenv("MEMORY_ENABLED", "true").lower() == "true":
+            vector_memory = optional_import("vector_memory")
+            if vector_memory:
+                self.memory = vector_memory.VectorMemory()
+
+        # Packs history and context into PROMPT_MAX_TOKENS instead of a fixed message count
+        self.prompt_builder = PromptBuilder()
+
+        # Provider prompt caching - the system prompt is big and the same on every call
+        self.prompt_cache_enabled = os.getenv("PROMPT_CACHE_ENABLED", "true").lower() == "true"
+        self.usage = UsageTracker()
+
+        # Rolling summary of older turns, made in the background once history gets long
+        self.summarizer = None
+        if os.getenv("SUMMARY_ENABLED", "true").lower() == "true":
+            self.summarizer = RollingSummarizer(summarize_fn=self._provider_summary)
 
         # System prompt with personality
         self.system_prompt = self._build_system_prompt()
 
+        # Pick up history other workers already wrote
+        self.sync_history()
+
     def _build_system_prompt(self) -> str:
         """Build the HARDCORE system prompt with gangster personality"""
         base_prompt = f"""You are {self.name}, the most INTELLIGENT and REALEST AI in the fucking game. You're a GANGSTER AI with PhD-level intelligence.
@@ -296,20 +312,104 @@ EXAMPLES OF YOUR SPEECH:
 
     def add_message(self, role: str, content: str) -> None:
         """Add a message to conversation history"""
-        message = {
-            'role': role,
-            'content': content,
-            'timestamp': datetime.now().isoformat()
-        }
+        with self._state_lock:
+            message = {
+                'role': role,
+                'content': content,
+                'timestamp': datetime.now().isoformat()
+            }
+            self._log_message(message)
+            if self.session_store is None:
+                self._append_local(message)
+                return
+
+            self.sync_history()
+            self._append_local(message)
+            if self.session_store.append_message(self.session_id, message) != len(self.conversation_history):
+                # Another worker wrote in between - take the store's order
+                self._reload_history()
+
+    def _log_message(self, message: Dict) -> None:
+        """Append a message this worker added to the conversation_dir transcript"""
+        if self.conversation_log is None:
+            return
+        try:
+            self.conversation_log.append(message)
+        except OSError as e:
+            print(f"⚠️  Could not append to {self.conversation_log.path}: {e}")
+
+    def _append_local(self, message: Dict) -> None:
+        """Add a message to this worker's history, memory and summary"""
         self.conversation_history.append(message)
+        if self.memory is not None:
+            self.memory.add(message.get('content', ''), {'index': len(self.conversation_history) - 1})
+        if self.summarizer is not None:
+            self.summarizer.maybe_summarize(self.conversation_history)
+
+    def sync_history(self) -> None:
+        """
+        Catch up with the shared session store (no-op without one)
+
+        Messages other workers appended are added locally; if the session got
+        shorter (cleared or replaced elsewhere) the whole history is reloaded.
+        """
+        with self._state_lock:
+            if self.session_store is None:
+                return
+
+            count = self.session_store.count_messages(self.session_id)
+            local = len(self.conversation_history)
+            if count > local:
+                for message in self.session_store.get_messages(self.session_id, start=local):
+                    self._append_local(message)
+            elif count < local:
+                self._reload_history()
+
+    def _reload_history(self) -> None:
+        """Replace local history with the shared session and redo memory/summary (under _state_lock)"""
+        self.conversation_history = self.session_store.get_messages(self.session_id)
+        self._rebuild_memory()
+        if self.summarizer is not None:
+            self.summarizer.reset()
+            self.summarizer.maybe_summarize(self.conversation_history)
+
+    def recall(self, message: str, recent: int = HISTORY_WINDOW) -> List[Dict]:
+        """
+        Find older messages relevant to the current one
+
+        Args:
+            message: The message being answered
+            recent: How many latest messages are already in the prompt (not searched)
+
+        Returns:
+            Relevant older messages, in conversation order
+        """
+        with self._state_lock:
+            if self.memory is None:
+                return []
+
+            older = len(self.conversation_history) - recent
+            hits = self.memory.search(message, k=self.memory_recall_k, limit=older)
+            indexes = sorted(meta['index'] for _, _, meta in hits)
+            return [self.conversation_history[i] for i in indexes]
+
+    def _memory_context(self, message: str, recent: int = HISTORY_WINDOW) -> str:
+        """Format recalled older turns (before the last `recent` messages) as prompt context"""
+        recalled = self.recall(message, recent=recent)
+        if not recalled:
+            return ""
+        return "[EARLIER IN THIS CONVERSATION]:\n" + "\n".join(
+            f"{msg['role']}: {msg['content']}" for msg in recalled
+        )
 
     def web_search(self, query: str, num_results: int = 5) -> List[Dict]:
         """Search the web using DuckDuckGo"""
-        if not DDGS_AVAILABLE:
+        duckduckgo_search = optional_import("duckduckgo_search")
+        if not duckduckgo_search:
             return [{"error": "Web search not available - install duckduckgo-search"}]
 
         try:
-            with DDGS() as ddgs:
+            with duckduckgo_search.DDGS() as ddgs:
                 results = list(ddgs.text(query, max_results=num_results))
                 return results
         except Exception as e:
@@ -317,7 +417,8 @@ EXAMPLES OF YOUR SPEECH:
 
     def wikipedia_search(self, query: str) -> str:
         """Search Wikipedia for information"""
-        if not WIKIPEDIA_AVAILABLE:
+        wikipedia = optional_import("wikipedia")
+        if not wikipedia:
             return "Wikipedia search not available - install wikipedia package"
 
         try:
@@ -336,14 +437,16 @@ EXAMPLES OF YOUR SPEECH:
 
     def scrape_webpage(self, url: str) -> str:
         """Scrape content from a webpage"""
-        if not WEB_SCRAPING_AVAILABLE:
+        bs4 = optional_import("bs4")
+        web_requests = optional_import("requests")
+        if not bs4 or not web_requests:
             return "Web scraping not available - install beautifulsoup4 and requests"
 
         try:
             response = web_requests.get(url, timeout=10, headers={
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
             })
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = bs4.BeautifulSoup(response.content, 'html.parser')
 
             # Remove script and style elements
             for script in soup(["script", "style"]):
@@ -479,41 +582,49 @@ EXAMPLES OF YOUR SPEECH:
             Agent's response
         """
         # Add user message to history
-        self.add_message('user', user_message)
+        with span('history'):
+            self.add_message('user', user_message)
         
         # Check if we have a learned response
         learned_hint = ""
         if self.learning_system:
-            learned_hint = self.learning_system.get_learned_response(user_message)
+            with span('learned_hint'):
+                learned_hint = self.learning_system.get_learned_response(user_message)
 
         # Detect intent
-        intent = self.detect_intent(user_message)
+        with span('intent'):
+            intent = self.detect_intent(user_message)
 
         # Gather context from tools
         context = learned_hint + "\n" if learned_hint else ""
         
         # Handle CODE GENERATION (Priority - if user wants code generated)
         if intent['needs_code_generation'] and self.code_generator:
-            code, explanation = self.code_generator.generate_code_from_request(user_message)
+            with span('codegen'):
+                code, explanation = self.code_generator.generate_code_from_request(user_message)
             if code:
                 # Return the generated code with gangster explanation
                 response = f"{explanation}\n\n```python\n{code}\n```"
-                self.add_message('assistant', response)
+                with span('history'):
+                    self.add_message('assistant', response)
                 
                 # Learn from this
                 if self.learning_system:
-                    self.learning_system.learn_from_conversation(user_message, response, was_helpful=True)
+                    with span('learning'):
+                        self.learning_system.learn_from_conversation(user_message, response, was_helpful=True)
                 
                 # Speak if enabled
                 should_speak = speak_response if speak_response is not None else self.voice_enabled
                 if should_speak and self.voice:
-                    speech_text = self._prepare_for_speech(explanation)
-                    self.voice.speak(speech_text)
+                    with span('tts'):
+                        speech_text = self._prepare_for_speech(explanation)
+                        self.voice.speak_async(speech_text)
                 
                 return response
 
         if intent['needs_web_search'] and intent['search_query']:
-            search_results = self.web_search(intent['search_query'])
+            with span('search'):
+                search_results = self.web_search(intent['search_query'])
             if search_results:
                 context += "\n\n[WEB SEARCH RESULTS]:\n"
                 for i, result in enumerate(search_results[:3], 1):
@@ -523,33 +634,54 @@ EXAMPLES OF YOUR SPEECH:
                         context += f"Search error: {result['error']}\n"
 
         if intent['needs_wikipedia'] and intent['search_query']:
-            wiki_result = self.wikipedia_search(intent['search_query'])
+            with span('wikipedia'):
+                wiki_result = self.wikipedia_search(intent['search_query'])
             context += f"\n\n[WIKIPEDIA]:\n{wiki_result}\n"
 
         if intent['needs_code_execution'] and intent['code']:
-            exec_result = self.execute_code(intent['code'], intent['language'])
+            with span('exec'):
+                exec_result = self.execute_code(intent['code'], intent['language'])
             context += f"\n\n[CODE EXECUTION RESULT]:\n{exec_result}\n"
 
         if intent['needs_url_scrape'] and intent['url']:
-            scrape_result = self.scrape_webpage(intent['url'])
+            with span('scrape'):
+                scrape_result = self.scrape_webpage(intent['url'])
             context += f"\n\n[WEBPAGE CONTENT]:\n{scrape_result}\n"
 
+        # Start speaking while the response is still coming in - providers that
+        # stream push their tokens straight to the speech worker
+        should_speak = speak_response if speak_response is not None else self.voice_enabled
+        speech = None
+        if should_speak and self.voice:
+            speech = optional_import("voice_module").ChunkStream()
+            if not self.voice.speak_stream_async(speech, max_chars=self.voice_max_chars):
+                speech = None
+
         # Generate response with AI or fallback
-        response = self._generate_ai_response(user_message, context)
+        try:
+            with span('provider'):
+                response = self._generate_ai_response(user_message, context, speech)
+            if speech is not None and speech.aborted:
+                # The stream broke off mid-response - cut off the partial answer and
+                # speak the fallback that replaced it
+                speech = optional_import("voice_module").ChunkStream()
+                if not self.voice.speak_stream_async(speech, max_chars=self.voice_max_chars):
+                    speech = None
+            if speech is not None and not speech.written:
+                # Nothing was streamed (Ollama, fallback) - speak the whole response
+                speech.put(response)
+        finally:
+            if speech is not None:
+                speech.close()
 
         # Add assistant response to history
-        self.add_message('assistant', response)
+        with span('history'):
+            self.add_message('assistant', response)
         
         # Learn from this interaction
         if self.learning_system:
-            self.learning_system.learn_from_conversation(user_message, response, was_helpful=True)
-        
-        # Speak response if voice is enabled
-        should_speak = speak_response if speak_response is not None else self.voice_enabled
-        if should_speak and self.voice:
-            # Remove markdown and code blocks for speech
-            speech_text = self._prepare_for_speech(response)
-            self.voice.speak(speech_text)
+            with span('learning'):
+                self.learning_system.learn_from_conversation(user_message, response, was_helpful=True)
 
         return response
     
@@ -561,105 +693,321 @@ EXAMPLES OF YOUR SPEECH:
         text = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', text)
         # Remove excessive whitespace
         text = ' '.join(text.split())
-        # Limit length for speech (don't want it to talk forever)
-        if len(text) > 500:
-            text = text[:500] + "... and more."
+        # Limit length for speech (don't want it to talk forever), cutting at a sentence end
+        if len(text) > self.voice_max_chars:
+            cut = text[:self.voice_max_chars]
+            sentence_end = max(cut.rfind('. '), cut.rfind('! '), cut.rfind('? '))
+            if sentence_end > 0:
+                cut = cut[:sentence_end + 1]
+            text = cut + " ... and more."
         return text
-            context += f"\n\n[CODE EXECUTION RESULT]:\n{exec_result}\n"
 
-        if intent['needs_url_scrape'] and intent['url']:
-            scrape_result = self.scrape_webpage(intent['url'])
-            context += f"\n\n[WEBPAGE CONTENT]:\n{scrape_result}\n"
+    # Code fence language for streamed project files
+    PROJECT_FENCE_LANGUAGES = {
+        '.py': 'python',
+        '.jsx': 'jsx',
+        '.js': 'javascript',
+        '.txt': 'text',
+        '.json': 'json'
+    }
 
-        # Generate response with AI or fallback
-        response = self._generate_ai_response(user_message, context)
+    def stream_project(self, user_message: str) -> Iterator[str]:
+        """
+        Generate a multi-file project and stream it back as markdown, file by file
 
-        # Add assistant response to history
+        The README is streamed as plain markdown, every other file as a fenced
+        code block. Only a short file listing is kept in conversation history
+        so big scaffolds never sit in memory as a whole.
+
+        Args:
+            user_message: The user's message
+
+        Yields:
+            Markdown chunks
+        """
+        current_path = None
+        current_is_code = False
+
+        for path, chunk in self._iter_project(user_message):
+            if path != current_path:
+                if current_is_code:
+                    yield "\n```\n"
+                current_path = path
+                current_is_code = not path.endswith('.md')
+                if current_is_code:
+                    extension = os.path.splitext(path)[1]
+                    language = self.PROJECT_FENCE_LANGUAGES.get(extension, '')
+                    yield f"\n**`{path}`**\n\n```{language}\n"
+            yield chunk
+
+        if current_is_code:
+            yield "\n```\n"
+
+    def stream_project_archive(self, user_message: str) -> Iterator[bytes]:
+        """
+        Generate a multi-file project and stream it back as a zip archive
+
+        Args:
+            user_message: The user's message
+
+        Yields:
+            Zip archive bytes
+        """
+        llm_code_generator = optional_import("llm_code_generator")
+        yield from llm_code_generator.stream_project_zip(self._iter_project(user_message))
+
+    def can_generate_project(self, user_message: str) -> bool:
+        """Check if the message asks for something we can scaffold as a project"""
+        if not self.code_generator:
+            return False
+        return self.code_generator.detect_generation_request(user_message) is not None
+
+    def _iter_project(self, user_message: str) -> Iterator[Tuple[str, str]]:
+        """Stream (path, chunk) pairs and record a file listing in history when done"""
+        self.add_message('user', user_message)
+
+        files = []
+        for path, chunk in self.code_generator.generate_project_from_request(user_message):
+            if not files or files[-1] != path:
+                files.append(path)
+            yield path, chunk
+
+        response = "Generated project files:\n" + "\n".join(f"- {path}" for path in files)
         self.add_message('assistant', response)
 
-        return response
+        if self.learning_system:
+            self.learning_system.learn_from_conversation(user_message, response, was_helpful=True)
+
+    def _generate_ai_response(self, message: str, context: str = "", speech: Optional[Any] = None) -> str:
+        """
+        Generate response using AI models
 
-    def _generate_ai_response(self, message: str, context: str = "") -> str:
-        """Generate response using AI models"""
+        Args:
+            message: The user's message
+            context: Tool context
+            speech: voice_module.ChunkStream that OpenAI/Anthropic stream their tokens into
+        """
         # Try different AI providers
         if self.ai_provider == "openai" and self.openai_client:
-            return self._openai_response(message, context)
+            return self._openai_response(message, context, speech)
         elif self.ai_provider == "anthropic" and self.anthropic_client:
-            return self._anthropic_response(message, context)
-        elif self.ai_provider == "ollama" and OLLAMA_AVAILABLE:
+            return self._anthropic_response(message, context, speech)
+        elif self.ai_provider == "ollama" and optional_import("ollama"):
             return self._ollama_response(message, context)
         else:
             # Fallback to enhanced pattern matching
             return self._fallback_response(message, context)
 
-    def _openai_response(self, message: str, context: str = "") -> str:
-        """Generate response using OpenAI"""
-        try:
-            messages = [{"role": "system", "content": self.system_prompt}]
-
-            # Add conversation history (last 10 messages)
-            history = self.conversation_history[-10:]
-            for msg in history:
-                if msg['role'] in ['user', 'assistant']:
-                    messages.append({"role": msg['role'], "content": msg['content']})
-
-            # Add context if available
-            if context:
-                messages.append({"role": "system", "content": f"Additional context:\n{context}"})
-
-            response = self.openai_client.chat.completions.create(
-                model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
-                messages=messages,
-                temperature=0.9,
-                max_tokens=1000
+    def _build_prompt(self, message: str, context: str = "", with_history: bool = True) -> Dict:
+        """
+        Pack system prompt, history, context and recalled older turns into the token budget
+
+        Args:
+            message: The message being answered
+            context: Tool context (search results, scraped pages...) - kept ahead of recalled turns
+            with_history: Include earlier messages (False sends just the current message)
+
+        Returns:
+            PromptBuilder.build() result
+        """
+        with self._state_lock:
+            history = []
+            summary_context = ""
+            # How many of the latest messages end up in the prompt - everything before is left to recall
+            kept = 1 if self.conversation_history and self.conversation_history[-1]['content'] == message else 0
+            if with_history:
+                # Turns covered by the rolling summary are sent as the summary instead
+                start = 0
+                if self.summarizer is not None and self.summarizer.summary:
+                    start = self.summarizer.summarized_upto
+                    summary_context = f"[CONVERSATION SUMMARY SO FAR]:\n{self.summarizer.summary}"
+                    # Only the summarized turns the window would have sent count as saved
+                    self.summarizer.record_prompt(self.conversation_history[self._window_start(0):start])
+                recent = self.conversation_history[self._window_start(start):]
+                kept = len(recent)
+                history = [msg for msg in recent if msg['role'] in ('user', 'assistant')]
+            if not history or history[-1]['content'] != message:
+                history.append({'role': 'user', 'content': message})
+
+            return self.prompt_builder.build(
+                self.system_prompt, history, [context, summary_context, self._memory_context(message, kept)]
             )
 
+    def _window_start(self, start: int) -> int:
+        """Index of the first message the history window keeps out of conversation_history[start:]"""
+        excess = len(self.conversation_history) - start - self.HISTORY_WINDOW
+        if excess <= 0:
+            return start
+        # Drop whole steps of old messages rather than exactly the excess
+        return start + -(-excess // self.HISTORY_STEP) * self.HISTORY_STEP
+
+    def _provider_summary(self, previous_summary: str, transcript: str) -> Optional[str]:
+        """
+        Summarize older turns with the configured AI provider (runs in the background)
+
+        Returns:
+            The new summary, or None when no provider is available (extractive fallback)
+        """
+        instructions = ("Update the running summary of this conversation. Keep names, facts, decisions, "
+                        "code the user is working on and open questions. Be brief - at most 10 bullet points.")
+        content = f"Current summary:\n{previous_summary or '(none)'}\n\nNew turns:\n{transcript}"
+
+        provider = self.ai_provider
+        start = time.perf_counter()
+        try:
+            if provider == "openai" and self.openai_client:
+                response = self.openai_client.chat.completions.create(
+                    model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+                    messages=[{"role": "system", "content": instructions}, {"role": "user", "content": content}],
+                    temperature=0.2,
+                    max_tokens=400
+                )
+                self.usage.record_openai(response, time.perf_counter() - start)
+                return response.choices[0].message.content
+            elif provider == "anthropic" and self.anthropic_client:
+                response = self.anthropic_client.messages.create(
+                    model=os.getenv("ANTHROPIC_MODEL", "claude-3-5-sonnet-20241022"),
+                    max_tokens=400,
+                    system=instructions,
+                    messages=[{"role": "user", "content": content}]
+                )
+                self.usage.record_anthropic(response, time.perf_counter() - start)
+                return response.content[0].text
+            elif provider == "ollama" and optional_import("ollama"):
+                response = get_ollama_dispatcher().chat(
+                    model=os.getenv("OLLAMA_MODEL", "llama3.2"),
+                    messages=[{"role": "system", "content": instructions}, {"role": "user", "content": content}]
+                )
+                self.usage.record_ollama(response, time.perf_counter() - start)
+                return response['message']['content']
+        except Exception:
+            # The summarizer falls back to an extractive summary - still count the failed call
+            self.usage.record_error(provider)
+            raise
+        return None
+
+    def _openai_response(self, message: str, context: str = "", speech: Optional[Any] = None) -> str:
+        """Generate response using OpenAI (streamed into `speech` when given)"""
+        try:
+            prompt = self._build_prompt(message, context)
+            messages = [{"role": "system", "content": prompt['system']}] + prompt['messages']
+
+            # Context goes last: OpenAI caches prompt prefixes automatically, so everything
+            # that changes per request has to come after the system prompt and history
+            if prompt['context']:
+                messages.append({"role": "system", "content": f"Additional context:\n{prompt['context']}"})
+
+            request = dict(model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"), messages=messages,
+                           temperature=0.9, max_tokens=1000)
+            start = time.perf_counter()
+            if speech is not None:
+                # Only the final chunk carries usage
+                parts, final = [], None
+                for chunk in self.openai_client.chat.completions.create(
+                        **request, stream=True, stream_options={"include_usage": True}):
+                    if chunk.choices:
+                        text = chunk.choices[0].delta.content or ""
+                        parts.append(text)
+                        speech.put(text)
+                    if getattr(chunk, 'usage', None):
+                        final = chunk
+                self.usage.record_openai(final, time.perf_counter() - start)
+                return "".join(parts)
+
+            response = self.openai_client.chat.completions.create(**request)
+            self.usage.record_openai(response, time.perf_counter() - start)
+
             return response.choices[0].message.content
         except Exception as e:
+            self.usage.record_error('openai')
+            if speech is not None and speech.written:
+                speech.abort()
             return self._fallback_response(message, context, error=str(e))
 
-    def _anthropic_response(self, message: str, context: str = "") -> str:
-        """Generate response using Anthropic Claude"""
+    def _anthropic_response(self, message: str, context: str = "", speech: Optional[Any] = None) -> str:
+        """Generate response using Anthropic Claude (streamed into `speech` when given)"""
         try:
-            # Build messages
-            messages = []
-            history = self.conversation_history[-10:]
-            for msg in history:
-                if msg['role'] in ['user', 'assistant']:
-                    messages.append({"role": msg['role'], "content": msg['content']})
+            # Build messages - Claude wants the conversation to start with a user turn
+            prompt = self._build_prompt(message, context)
+            messages = prompt['messages']
+            while messages and messages[0]['role'] != 'user':
+                messages.pop(0)
 
             # Add context to the last user message if available
-            if context and messages:
-                messages[-1]['content'] += f"\n\nAdditional context:\n{context}"
-
-            response = self.anthropic_client.messages.create(
-                model=os.getenv("ANTHROPIC_MODEL", "claude-3-5-sonnet-20241022"),
-                max_tokens=1000,
-                system=self.system_prompt,
-                messages=messages
-            )
+            if prompt['context'] and messages:
+                messages[-1]['content'] += f"\n\nAdditional context:\n{prompt['context']}"
+
+            system = prompt['system']
+            if self.prompt_cache_enabled:
+                system, messages = self._anthropic_cache_breakpoints(system, messages)
+
+            request = dict(model=os.getenv("ANTHROPIC_MODEL", "claude-3-5-sonnet-20241022"), max_tokens=1000,
+                           system=system, messages=messages)
+            start = time.perf_counter()
+            if speech is not None:
+                with self.anthropic_client.messages.stream(**request) as stream:
+                    for text in stream.text_stream:
+                        speech.put(text)
+                    response = stream.get_final_message()
+            else:
+                response = self.anthropic_client.messages.create(**request)
+            self.usage.record_anthropic(response, time.perf_counter() - start)
 
             return response.content[0].text
         except Exception as e:
+            self.usage.record_error('anthropic')
+            if speech is not None and speech.written:
+                speech.abort()
             return self._fallback_response(message, context, error=str(e))
 
+    @staticmethod
+    def _anthropic_cache_breakpoints(system: str, messages: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Mark the system prompt and the history before the current message as cacheable
+
+        Claude caches everything up to a cache_control breakpoint, so repeat calls
+        only pay full price for the new turn (prefixes under the model's minimum
+        cacheable size are just sent uncached).
+
+        Returns:
+            (system blocks, messages) ready for messages.create
+        """
+        cache_control = {"type": "ephemeral"}
+        system_blocks = [{"type": "text", "text": system, "cache_control": cache_control}]
+
+        if len(messages) > 1:
+            messages = list(messages)
+            prefix_end = messages[-2]
+            messages[-2] = {
+                "role": prefix_end['role'],
+                "content": [{"type": "text", "text": prefix_end['content'], "cache_control": cache_control}]
+            }
+
+        return system_blocks, messages
+
     def _ollama_response(self, message: str, context: str = "") -> str:
         """Generate response using Ollama (local LLM)"""
         try:
-            full_message = message
-            if context:
-                full_message += f"\n\nContext:\n{context}"
-
-            response = ollama.chat(
+            prompt = self._build_prompt(message, context, with_history=False)
+            full_message = prompt['messages'][-1]['content']
+            if prompt['context']:
+                full_message += f"\n\nContext:\n{prompt['context']}"
+
+            # Goes through the shared dispatcher so concurrent chats are batched
+            # onto the loaded model instead of each hitting Ollama on its own
+            start = time.perf_counter()
+            response = get_ollama_dispatcher().chat(
                 model=os.getenv("OLLAMA_MODEL", "llama3.2"),
                 messages=[
-                    {"role": "system", "content": self.system_prompt},
+                    {"role": "system", "content": prompt['system']},
                     {"role": "user", "content": full_message}
                 ]
             )
+            self.usage.record_ollama(response, time.perf_counter() - start)
 
             return response['message']['content']
         except Exception as e:
+            self.usage.record_error('ollama')
             return self._fallback_response(message, context, error=str(e))
 
     def _fallback_response(self, message: str, context: str = "", error: str = "") -> str:
@@ -677,7 +1025,7 @@ EXAMPLES OF YOUR SPEECH:
 
         # Greetings
         if any(word in message_lower for word in ['hello', 'hi', 'hey', 'sup', 'yo', 'wassup']):
-            return random.choice(self.SASSY_GREETINGS).format(name=self.name)
+            return random.choice(self.GANGSTER_SLANG['greetings']).format(name=self.name)
 
         # Help requests
         if 'help' in message_lower:
@@ -811,35 +1159,135 @@ Example: "Write a Python function that takes a list and returns only even number
 
 Give me the deets and I'll code it up for you. 💻"""
 
+    def get_prompt_stats(self) -> Dict[str, Any]:
+        """Prompt size stats - budget packing, tokens saved by the rolling summary, memory size"""
+        return {
+            'builder': self.prompt_builder.get_stats(),
+            'summary': self.summarizer.get_stats() if self.summarizer is not None else None,
+            'memory_entries': len(self.memory) if self.memory is not None else 0,
+            'usage': self.usage.get_stats(),
+            'ollama': get_ollama_dispatcher().get_stats() if self.ai_provider == "ollama" else None
+        }
+
     def get_conversation_history(self) -> List[Dict]:
         """Get conversation history"""
-        return self.conversation_history
+        with self._state_lock:
+            self.sync_history()
+            return list(self.conversation_history)
 
     def clear_history(self) -> None:
         """Clear conversation history"""
-        self.conversation_history = []
+        with self._state_lock:
+            self.conversation_history = []
+            if self.memory is not None:
+                self.memory.clear()
+            if self.summarizer is not None:
+                self.summarizer.reset()
+            if self.session_store is not None:
+                self.session_store.clear_session(self.session_id)
 
     def save_conversation(self, filepath: str) -> None:
-        """Save conversation to file"""
-        try:
-            with open(filepath, 'w') as f:
-                json.dump({
-                    'agent_name': self.name,
-                    'conversation': self.conversation_history
-                }, f, indent=2)
-        except Exception as e:
-            raise IOError(f"Failed to save conversation: {e}")
+        """
+        Save conversation to file (.jsonl/.jsonl.gz: JSON lines, appending to earlier saves)
 
-    def load_conversation(self, filepath: str) -> None:
-        """Load conversation from file"""
-        try:
-            with open(filepath, 'r') as f:
-                data = json.load(f)
-                self.conversation_history = data.get('conversation', [])
-        except FileNotFoundError:
-            raise FileNotFoundError(f"Conversation file not found: {filepath}")
-        except json.JSONDecodeError as e:
-            raise json.JSONDecodeError(f"Invalid JSON in conversation file: {filepath}", e.doc, e.pos)
+        The vector memory is saved next to it, so loading it back skips re-embedding.
+        """
+        with self._state_lock:
+            try:
+                if is_jsonl(filepath):
+                    if filepath not in self._saved_logs:
+                        self._saved_logs[filepath] = ConversationLog(filepath, agent_name=self.name)
+                    self._saved_logs[filepath].save(self.conversation_history)
+                else:
+                    with open(filepath, 'w') as f:
+                        json.dump({
+                            'agent_name': self.name,
+                            'conversation': self.conversation_history
+                        }, f, indent=2)
+                self.save_memory(self._memory_path(filepath))
+            except Exception as e:
+                raise IOError(f"Failed to save conversation: {e}")
+
+    def load_conversation(self, filepath: str, last: Optional[int] = None) -> None:
+        """
+        Load conversation from file
+
+        Args:
+            filepath: JSON file, or .jsonl/.jsonl.gz (streamed line by line)
+            last: Only load the last this many messages (JSONL files are read from the end)
+        """
+        with self._state_lock:
+            try:
+                if is_jsonl(filepath):
+                    log = ConversationLog(filepath, agent_name=self.name)
+                    if last is not None:
+                        self.conversation_history = log.load_tail(last)
+                    else:
+                        self.conversation_history = list(log.iter_messages())
+                        log.mark_saved(self.conversation_history)
+                    # Saving back to this file appends from here (and keeps anything before a partial load)
+                    self._saved_logs[filepath] = log
+                else:
+                    with open(filepath, 'r') as f:
+                        data = json.load(f)
+                        self.conversation_history = data.get('conversation', [])
+                    if last is not None:
+                        self.conversation_history = self.conversation_history[-last:] if last > 0 else []
+                if self.session_store is not None:
+                    self.session_store.replace_messages(self.session_id, self.conversation_history)
+                if not self.load_memory(self._memory_path(filepath)):
+                    self._rebuild_memory()
+                if self.summarizer is not None:
+                    self.summarizer.reset()
+                    self.summarizer.maybe_summarize(self.conversation_history)
+            except FileNotFoundError:
+                raise FileNotFoundError(f"Conversation file not found: {filepath}")
+            except json.JSONDecodeError as e:
+                raise json.JSONDecodeError(f"Invalid JSON in conversation file: {filepath}", e.doc, e.pos)
+
+    def _rebuild_memory(self) -> None:
+        """Re-embed the whole history in one batch (after loading a conversation)"""
+        if self.memory is None:
+            return
+        self.memory.clear()
+        self.memory.add_batch(
+            [msg.get('content', '') for msg in self.conversation_history],
+            [{'index': i} for i in range(len(self.conversation_history))]
+        )
+
+    @staticmethod
+    def _memory_path(filepath: str) -> str:
+        """Where save_conversation keeps the vector memory of a conversation file"""
+        return f"{filepath}.memory"
+
+    def save_memory(self, path: str) -> None:
+        """Save the conversation's vector memory (`<path>.npy` + `<path>.json`)"""
+        if self.memory is not None:
+            self.memory.save(path)
+
+    def load_memory(self, path: str, mmap: bool = True) -> bool:
+        """
+        Load vector memory saved with save_memory instead of re-embedding
+
+        Returns:
+            True if it was loaded and matches the current history
+        """
+        vector_memory = optional_import("vector_memory")
+        if self.memory is None or not vector_memory or not vector_memory.VectorMemory.exists(path):
+            return False
+
+        memory = vector_memory.VectorMemory.load(path, mmap=mmap)
+        if len(memory) != len(self.conversation_history):
+            return False
+        self.memory = memory
+        return True
+
+    def shutdown(self) -> None:
+        """Save batched learning and stop the speech worker"""
+        if self.learning_system is not None:
+            self.learning_system.flush()
+        if self.voice is not None:
+            self.voice.shutdown()
 
 
 # For backward compatibility, create an alias
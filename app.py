@@ -3,14 +3,19 @@ FastAPI Web Service for OG-AI Agent
 Exposes REST API endpoints for interacting with the AI agent.
 """
 
+import asyncio
+import hashlib
+import hmac
 import json
 import os
 import logging
-from typing import List, Dict
-from fastapi import FastAPI, HTTPException
+import threading
+from contextlib import asynccontextmanager
+from typing import List, Dict, Optional
+from fastapi import FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, ConfigDict
 
 # Try to import enhanced agent, fallback to basic agent
@@ -22,6 +27,14 @@ except ImportError as e:
     print("*** Installing required packages will enable full features")
     from ai_agent import AIAgent
 
+from compression import AssetCache, CachedStaticFiles, CompressionMiddleware
+from fast_json import FastJSONResponse
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, get_registry, monitor_event_loop
+from ollama_dispatcher import get_ollama_dispatcher
+from profiler import profile
+from request_timing import get_timing_stats, request_timer
+from warmup import Warmup
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -29,11 +42,60 @@ logger = logging.getLogger(__name__)
 # Check if running in development mode (for error detail control)
 DEVELOPMENT_MODE = os.getenv("DEVELOPMENT_MODE", "false").lower() == "true"
 
+# /history also returns the messages under "history" for old Flask API clients;
+# set to false (or pass ?compat=false) to only send "conversation"
+HISTORY_COMPAT_KEY = os.getenv("HISTORY_COMPAT_KEY", "true").lower() == "true"
+
+# Startup warm-up (agent, Ollama model, provider connections) - /ready reports it
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+warmup = Warmup()
+
+# Token for /debug/* endpoints (sent as "Authorization: Bearer <token>");
+# they answer 404 when it's unset
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# HTML pages and /static are served precompressed from memory with strong ETags;
+# HTML revalidates on every load (cheap 304s), static files are cached for a day
+HTML_PAGES = ["index_epic.html", "frontend.html", "qr.html"]
+HTML_CACHE_CONTROL = os.getenv("HTML_CACHE_CONTROL", "no-cache")
+STATIC_CACHE_CONTROL = os.getenv("STATIC_CACHE_CONTROL", "public, max-age=86400")
+assets = AssetCache()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Warm the worker up in the background on startup.
+    
+    The server starts answering /health right away while the warm-up runs;
+    /ready turns 200 once it's done. The HTML pages and /static files are
+    compressed up front so no request pays for it.
+    """
+    cached = await run_in_threadpool(assets.precompress, HTML_PAGES + ["static"])
+    logger.info(f"Precompressed {len(cached)} static assets")
+    if WARMUP_ENABLED:
+        task = asyncio.get_running_loop().run_in_executor(None, warmup.run, get_agent)
+    else:
+        warmup.skip()
+        task = None
+    lag_monitor = asyncio.create_task(monitor_event_loop())
+    yield
+    lag_monitor.cancel()
+    if task is not None and not task.done():
+        task.cancel()
+    # Writes out learning still waiting for its batch and stops the speech worker
+    shutdown = getattr(agent, 'shutdown', None)
+    if shutdown is not None:
+        await run_in_threadpool(shutdown)
+    get_ollama_dispatcher().stop()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="OG-AI Agent API",
     description="A conversational AI agent REST API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware to allow cross-origin requests
@@ -62,16 +124,40 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request counts and latency per route for /metrics (inside compression so it
+# times the handler, not the compression)
+app.add_middleware(MetricsMiddleware)
+
+# Brotli/gzip for API responses (COMPRESS_MIN_SIZE bytes and up); precompressed
+# assets already carry a Content-Encoding and pass straight through
+app.add_middleware(CompressionMiddleware)
+
 # Mount static files directory
 if not os.path.exists("static"):
     os.makedirs("static")
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", CachedStaticFiles(directory="static", assets=assets, cache_control=STATIC_CACHE_CONTROL),
+          name="static")
 
 # Global agent instance
 # NOTE: This is a simplified implementation where all users share the same conversation history.
 # For production multi-user scenarios, implement per-session or per-user agent instances
 # using session cookies, JWT tokens, or a database-backed session store.
 agent = None
+# The warm-up builds the agent on a worker thread while requests may already be
+# coming in - make sure only one of them constructs it
+agent_lock = threading.Lock()
+
+
+def load_config() -> Dict:
+    """Load config.json if it exists (empty dict otherwise)."""
+    config = {}
+    if os.path.exists('config.json'):
+        try:
+            with open('config.json', 'r') as f:
+                config = json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not load config.json: {e}")
+    return config
 
 
 def get_agent() -> AIAgent:
@@ -83,21 +169,80 @@ def get_agent() -> AIAgent:
     """
     global agent
     if agent is None:
-        # Load config if exists
-        config = {}
-        if os.path.exists('config.json'):
-            try:
-                with open('config.json', 'r') as f:
-                    config = json.load(f)
-            except Exception as e:
-                logger.warning(f"Could not load config.json: {e}")
-        
-        agent_name = config.get('agent_name', 'OG-AI')
-        agent = AIAgent(name=agent_name, config=config)
+        with agent_lock:
+            if agent is None:
+                config = load_config()
+                agent_name = config.get('agent_name', 'OG-AI')
+                agent = AIAgent(name=agent_name, config=config)
     
     return agent
 
 
+# Voice used by /speech to render audio for the browser
+speech_voice = None
+
+
+def get_speech_voice():
+    """
+    Get the voice generator used by /speech.
+    
+    Reuses the agent's voice when it has one, otherwise creates one on first use.
+    Returns None when no TTS engine is installed.
+    """
+    global speech_voice
+    if speech_voice is None:
+        agent_voice = getattr(get_agent(), 'voice', None)
+        if agent_voice is not None:
+            speech_voice = agent_voice
+        else:
+            try:
+                from voice_module import VoiceGenerator
+            except ImportError:
+                return None
+            voice = VoiceGenerator()
+            if not voice.is_available():
+                return None
+            speech_voice = voice
+    
+    return speech_voice
+
+
+def history_metric_samples():
+    """Conversation history size (only once the agent exists - a scrape never builds it)"""
+    agent_instance = agent
+    if agent_instance is None:
+        return []
+    return [("og_ai_history_messages", {}, len(agent_instance.conversation_history))]
+
+
+def cache_metric_samples():
+    """Hit ratios of the token count, provider prompt and TTS audio caches"""
+    samples = []
+    agent_instance = agent
+    if agent_instance is not None and hasattr(agent_instance, 'get_prompt_stats'):
+        stats = agent_instance.get_prompt_stats()
+        builder = stats['builder']
+        lookups = builder['token_cache_hits'] + builder['token_cache_misses']
+        if lookups:
+            samples.append(("og_ai_cache_hit_ratio", {'cache': 'token_count'}, builder['token_cache_hits'] / lookups))
+        for provider, usage in stats['usage'].items():
+            samples.append(("og_ai_cache_hit_ratio", {'cache': f'prompt_{provider}'}, usage['cached_ratio']))
+    if speech_voice is not None:
+        audio = speech_voice.audio_cache.get_stats()
+        lookups = audio['hits'] + audio['misses']
+        if lookups:
+            samples.append(("og_ai_cache_hit_ratio", {'cache': 'tts_audio'}, audio['hits'] / lookups))
+    return samples
+
+
+get_registry().add_collector("og_ai_history_messages", "gauge",
+                             "Messages in the conversation history",
+                             history_metric_samples)
+get_registry().add_collector("og_ai_cache_hit_ratio", "gauge",
+                             "Cache hit ratio (prompt_*: share of prompt tokens served from the provider's cache)",
+                             cache_metric_samples)
+
+
 # Pydantic models for request/response
 class ChatRequest(BaseModel):
     message: str
@@ -129,10 +274,26 @@ class ChatResponse(BaseModel):
     )
 
 
+class ProjectRequest(BaseModel):
+    message: str
+    archive: bool = False
+    
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "message": "Make me an API called inventory",
+                "archive": True
+            }
+        }
+    )
+
+
 class HistoryResponse(BaseModel):
     conversation: List[Dict]
-    history: List[Dict]  # Backward compatibility with Flask API
+    history: Optional[List[Dict]] = None  # Backward compatibility with Flask API
     message_count: int
+    next_after: Optional[int] = None  # Cursor for the next page (?after=)
+    has_more: bool = False
     
     model_config = ConfigDict(
         json_schema_extra={
@@ -151,7 +312,9 @@ class HistoryResponse(BaseModel):
                         "timestamp": "2025-11-05T20:00:00.000000"
                     }
                 ],
-                "message_count": 1
+                "message_count": 1,
+                "next_after": 0,
+                "has_more": False
             }
         }
     )
@@ -174,27 +337,27 @@ class StatusResponse(BaseModel):
 
 
 @app.get("/", response_class=FileResponse)
-async def root():
+async def root(request: Request):
     """
     Serve the epic frontend HTML interface.
     """
-    return FileResponse("index_epic.html")
+    return assets.response(request.headers, "index_epic.html", HTML_CACHE_CONTROL)
 
 
 @app.get("/classic", response_class=FileResponse)
-async def classic_ui():
+async def classic_ui(request: Request):
     """
     Serve the classic frontend HTML interface.
     """
-    return FileResponse("frontend.html")
+    return assets.response(request.headers, "frontend.html", HTML_CACHE_CONTROL)
 
 
 @app.get("/qr", response_class=FileResponse)
-async def qr_code():
+async def qr_code(request: Request):
     """
     Serve the QR code page for mobile access.
     """
-    return FileResponse("qr.html")
+    return assets.response(request.headers, "qr.html", HTML_CACHE_CONTROL)
 
 
 @app.get("/api", response_model=StatusResponse)
@@ -213,21 +376,49 @@ async def api_info():
 @app.get("/health", response_model=StatusResponse)
 async def health_check():
     """
-    Health check endpoint for monitoring service status.
+    Liveness check - the process is up and serving requests.
+    
+    Doesn't build the agent or wait for the warm-up; use /ready for that.
     """
-    agent_instance = get_agent()
+    agent_name = agent.name if agent is not None else load_config().get('agent_name', 'OG-AI')
     return {
         "status": "healthy",
-        "agent_name": agent_instance.name,
+        "agent_name": agent_name,
         "message": "Service is running"
     }
 
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness check - 200 once the startup warm-up has finished, 503 until then.
+    
+    Point load balancer / orchestrator readiness probes here so a fresh worker
+    only gets traffic after its agent and models are loaded.
+    """
+    report = warmup.get_report()
+    return JSONResponse(status_code=200 if warmup.ready else 503, content=report)
+
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus metrics for this worker (text exposition format).
+    
+    Each worker keeps its own counters - scrape every worker, or aggregate
+    them with a sum() in Prometheus.
+    """
+    return Response(get_registry().render(), media_type=METRICS_CONTENT_TYPE)
+
+
 @app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, http_response: Response):
     """
     Send a message to the AI agent and receive a response.
     
+    The time spent in each stage (intent, tools, provider, learning...) is sent
+    back in a Server-Timing header.
+    
     Args:
         request: ChatRequest containing the user's message and optional voice setting
         
@@ -244,11 +435,16 @@ async def chat(request: ChatRequest):
         has_voice = hasattr(agent_instance, 'voice') and agent_instance.voice is not None
         has_learning = hasattr(agent_instance, 'learning_system') and agent_instance.learning_system is not None
         
-        # Process message with voice option if available
-        if has_voice:
-            response = agent_instance.process_message(request.message.strip(), speak_response=request.speak_response)
-        else:
-            response = agent_instance.process_message(request.message.strip())
+        # Process message with voice option if available. It blocks on the provider,
+        # so it runs in the threadpool - other chats keep going (and can share an
+        # Ollama batch) while this one waits
+        with request_timer() as timer:
+            if has_voice:
+                response = await run_in_threadpool(agent_instance.process_message, request.message.strip(),
+                                                   speak_response=request.speak_response)
+            else:
+                response = await run_in_threadpool(agent_instance.process_message, request.message.strip())
+        http_response.headers["Server-Timing"] = timer.server_timing()
         
         # Get the latest assistant message from history
         history = agent_instance.get_conversation_history()
@@ -272,23 +468,148 @@ async def chat(request: ChatRequest):
         raise HTTPException(status_code=500, detail=detail)
 
 
+@app.post("/chat/project")
+async def chat_project(request: ProjectRequest):
+    """
+    Generate a multi-file project and stream it back file by file.
+    
+    Args:
+        request: ProjectRequest with the user's message and whether to return a zip archive
+        
+    Returns:
+        StreamingResponse with markdown, or a zip archive built on the fly
+    """
+    if not request.message or not request.message.strip():
+        raise HTTPException(status_code=400, detail="Message cannot be empty")
+    
+    agent_instance = get_agent()
+    message = request.message.strip()
+    
+    if not hasattr(agent_instance, 'stream_project'):
+        raise HTTPException(status_code=501, detail="Project generation is not available")
+    
+    if not agent_instance.can_generate_project(message):
+        raise HTTPException(status_code=400, detail="Could not figure out what project to generate from that message")
+    
+    if request.archive:
+        return StreamingResponse(
+            agent_instance.stream_project_archive(message),
+            media_type="application/zip",
+            headers={"Content-Disposition": 'attachment; filename="og-ai-project.zip"'}
+        )
+    
+    return StreamingResponse(agent_instance.stream_project(message), media_type="text/markdown")
+
+
+# Chunk size for streaming synthesized audio
+SPEECH_CHUNK_SIZE = 64 * 1024
+
+
+@app.get("/speech")
+async def speech(text: str, request: Request):
+    """
+    Synthesize text and stream the audio to the browser.
+    
+    Audio is cached by content hash, and the hash doubles as the ETag so
+    browsers can revalidate without downloading the clip again.
+    
+    Args:
+        text: Text to speak
+        
+    Returns:
+        StreamingResponse with the audio clip
+    """
+    if not text or not text.strip():
+        raise HTTPException(status_code=400, detail="Text cannot be empty")
+    
+    voice = get_speech_voice()
+    if voice is None:
+        raise HTTPException(status_code=503, detail="Voice synthesis not available - install pyttsx3 or gtts")
+    
+    agent_instance = get_agent()
+    if hasattr(agent_instance, '_prepare_for_speech'):
+        text = agent_instance._prepare_for_speech(text)
+    else:
+        text = text.strip()
+    
+    etag = f'"{voice.cache_key(text)}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=86400"}
+    
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    
+    audio = await run_in_threadpool(voice.synthesize, text)
+    if not audio:
+        raise HTTPException(status_code=500, detail="Speech synthesis failed")
+    
+    headers["Content-Length"] = str(len(audio))
+    chunks = (audio[i:i + SPEECH_CHUNK_SIZE] for i in range(0, len(audio), SPEECH_CHUNK_SIZE))
+    return StreamingResponse(chunks, media_type=voice.get_audio_mime_type(), headers=headers)
+
+
+def history_etag(history: List[Dict], *params) -> str:
+    """
+    ETag for a /history response.
+    
+    History is append-only (until reset), so its length plus the last message
+    identify it; the query params are included since they change the body.
+    """
+    last = history[-1] if history else {}
+    key = f"{len(history)}|{last.get('timestamp')}|{last.get('content', '')[:200]}|{params}"
+    return '"' + hashlib.blake2b(key.encode('utf-8'), digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header (may list several tags, or be *) against an ETag."""
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    return '*' in tags or etag in tags
+
+
 @app.get("/history", response_model=HistoryResponse)
-async def get_history():
+async def get_history(
+    request: Request,
+    after: Optional[int] = Query(None, ge=-1, description="Only messages with an id greater than this"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="At most this many messages"),
+    compat: Optional[bool] = Query(None, description="Also send the messages under 'history' (default: HISTORY_COMPAT_KEY)")
+):
     """
-    Get the full conversation history.
+    Get the conversation history, optionally one page at a time.
+    
+    Each message has an `id` (its position in the conversation). Pollers pass the
+    last id they saw as `?after=` to get only new messages, and send back the
+    ETag as If-None-Match to get a bodyless 304 when nothing changed.
     
     Returns:
-        HistoryResponse with all conversation messages
+        HistoryResponse with the requested messages; message_count is the total
     """
     agent_instance = get_agent()
     
     try:
         history = agent_instance.get_conversation_history()
-        return {
-            "conversation": history,
-            "history": history,  # Backward compatibility with Flask API
-            "message_count": len(history)
+        if compat is None:
+            compat = HISTORY_COMPAT_KEY
+        
+        etag = history_etag(history, after, limit, compat)
+        if etag_matches(request.headers.get('if-none-match'), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        
+        start = 0 if after is None else after + 1
+        end = len(history) if limit is None else min(start + limit, len(history))
+        page = [{**message, 'id': index} for index, message in enumerate(history[start:end], start)]
+        
+        result = {
+            "conversation": page,
+            "message_count": len(history),
+            "next_after": page[-1]['id'] if page else after,
+            "has_more": end < len(history)
         }
+        if compat:
+            result["history"] = page  # Backward compatibility with Flask API
+        # Built right here in the response shape - skip response_model re-validation,
+        # which costs more than the encoding itself on long conversations
+        return FastJSONResponse(result, headers={"ETag": etag})
     except Exception as e:
         logger.error(f"Error retrieving history: {str(e)}")
         detail = f"An error occurred while retrieving conversation history: {str(e)}" if DEVELOPMENT_MODE else "An error occurred while retrieving conversation history"
@@ -340,7 +661,11 @@ async def get_intelligence():
         # Check if agent has learning system
         if hasattr(agent_instance, 'learning_system') and agent_instance.learning_system:
             report = agent_instance.learning_system.get_intelligence_report()
-            return report
+            if hasattr(agent_instance, 'get_prompt_stats'):
+                report['prompt'] = agent_instance.get_prompt_stats()
+            report['timing'] = get_timing_stats().get_stats()
+            # Plain dicts/lists/numbers already - skip the jsonable_encoder walk
+            return FastJSONResponse(report)
         else:
             return {
                 "status": "unavailable",
@@ -358,6 +683,41 @@ async def get_intelligence():
         }
 
 
+def require_admin(authorization: Optional[str]) -> None:
+    """Reject the request unless it carries the admin token (404 when no token is configured)."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Admin token required", headers={"WWW-Authenticate": "Bearer"})
+
+
+@app.get("/debug/profile")
+async def debug_profile(
+    seconds: float = Query(10, gt=0, le=120, description="How long to profile"),
+    hz: int = Query(100, ge=1, le=1000, description="Stack samples per second"),
+    idle: bool = Query(False, description="Keep threads that are only waiting (locks, queues, sockets)"),
+    memory: bool = Query(False, description="Diff tracemalloc snapshots instead (bytes grown per stack)"),
+    authorization: Optional[str] = Header(None)
+):
+    """
+    Profile this worker for a few seconds (admin only).
+    
+    Returns collapsed stacks ("frame;frame;frame count" per line) - pipe into
+    flamegraph.pl or open in speedscope. With memory=true the counts are bytes
+    allocated and not freed during the window.
+    """
+    require_admin(authorization)
+    # Sampling runs on a worker thread; the event loop keeps serving (and gets sampled)
+    result = await run_in_threadpool(profile, seconds, hz=hz, include_idle=idle, memory=memory)
+    if result is None:
+        raise HTTPException(status_code=409, detail="A profile is already running in this worker")
+    headers = {"X-Profile-Mode": result['mode'], "Cache-Control": "no-store"}
+    if result['samples'] is not None:
+        headers["X-Profile-Samples"] = str(result['samples'])
+    return Response(result['output'], media_type="text/plain; charset=utf-8", headers=headers)
+
+
 @app.post("/improve")
 async def manual_improvement():
     """
@@ -0,0 +1,358 @@
+"""
+OG-AI Hot Path Benchmarks - Per-function cost as the data grows
+
+Times the functions every /chat request goes through at several input sizes
+and fits how the cost scales (the exponent k in time ~ size^k between the
+smallest and largest size): ~0 is constant, ~1 linear, >1 superlinear.
+
+  detect_intent               message length (words)
+  fallback_response           message length (words), with search context
+  prepare_for_speech          response length (characters)
+  learn_from_conversation     successful patterns already learned (saves batched)
+  save_knowledge              successful patterns already learned, one learn + save
+  get_intelligence_report     successful patterns already learned
+  generate_code_from_request  message length (words)
+  save_conversation           history length (messages), AIAgent and EnhancedAIAgent
+  save_conversation[jsonl]    history length, saving one new message to a .jsonl file
+  load_conversation[tail]     history length, loading the last 20 messages of a .jsonl file
+
+Results are compared against benchmarks/baselines/hot_paths.json: a size that
+got more than --tolerance slower, or a function whose scaling exponent grew
+by more than 0.25, is flagged and the script exits with status 1.
+
+Usage:
+    python benchmarks/hot_paths.py
+    python benchmarks/hot_paths.py --only learn_from_conversation --max-size 100000
+    python benchmarks/hot_paths.py --save-baseline
+"""
+
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+BASELINE_PATH = os.path.join(REPO_ROOT, "benchmarks", "baselines", "hot_paths.json")
+
+# A scaling exponent this much above the baseline's is a regression
+EXPONENT_SLACK = 0.25
+# Per-call differences smaller than this are timer noise
+MIN_DELTA_US = 2.0
+
+WORDS = "yo can you search for python decorators and explain how they work real quick".split()
+
+BENCHMARKS: Dict[str, Dict] = {}
+
+
+def benchmark(name: str, sizes: List[int], unit: str):
+    """Register `setup(size) -> zero-argument callable to time` under `name`"""
+    def register(setup: Callable[[int], Callable[[], Any]]):
+        BENCHMARKS[name] = {'setup': setup, 'sizes': sizes, 'unit': unit}
+        return setup
+    return register
+
+
+def message(words: int) -> str:
+    return " ".join(WORDS[n % len(WORDS)] for n in range(words))
+
+
+def make_history(size: int) -> List[Dict]:
+    history = []
+    for n in range(size):
+        role = 'user' if n % 2 == 0 else 'assistant'
+        content = f"Message {n}: " + ("quick question?" if role == 'user' else "Aight here's the deal. " * (n % 15 + 1))
+        history.append({'role': role, 'content': content, 'timestamp': f"2025-11-05T20:{n % 60:02d}:00"})
+    return history
+
+
+_agents: Dict[str, Any] = {}
+
+
+def agent(kind: str = 'enhanced'):
+    """One agent per kind, built without providers, voice or a shared store"""
+    if kind not in _agents:
+        if kind == 'enhanced':
+            from ai_agent_enhanced import EnhancedAIAgent
+            _agents[kind] = EnhancedAIAgent()
+        else:
+            from ai_agent import AIAgent
+            _agents[kind] = AIAgent()
+    return _agents[kind]
+
+
+@benchmark('detect_intent', [10, 100, 1000], 'words')
+def setup_detect_intent(size):
+    instance, text = agent(), message(size)
+    return lambda: instance.detect_intent(text)
+
+
+@benchmark('fallback_response', [10, 100, 1000], 'words')
+def setup_fallback_response(size):
+    instance, text = agent(), message(size)
+    context = "1. Decorators: functions that wrap other functions\n" * 3
+    return lambda: instance._fallback_response(text, context)
+
+
+@benchmark('prepare_for_speech', [1000, 10000, 100000], 'chars')
+def setup_prepare_for_speech(size):
+    chunk = "Aight so [check this](https://example.com) out. ```python\nprint('yo')\n``` That's it! "
+    instance, text = agent(), (chunk * (size // len(chunk) + 1))[:size]
+    return lambda: instance._prepare_for_speech(text)
+
+
+_learning_systems: List[Any] = []
+
+
+def learning_system(patterns: int):
+    """SelfLearningSystem whose knowledge already holds `patterns` successful patterns"""
+    from self_learning import SelfLearningSystem
+    system = SelfLearningSystem(os.path.join(tempfile.mkdtemp(dir=os.getcwd()), "knowledge.json"),
+                                save_interval=3600)
+    _learning_systems.append(system)
+    pattern = {'user_query_type': 'coding', 'response_type': 'code_generation',
+               'timestamp': "2025-11-05T20:00:00", 'user_feedback': None}
+    # The same dict over and over - serializes like distinct ones without the memory
+    system.knowledge['successful_patterns'] = [pattern] * patterns
+    system.knowledge['common_topics'] = {'coding': patterns // 2, 'information': patterns // 3, 'general': 5}
+    # Saves merge into the file, so it has to hold them too
+    with open(system.knowledge_file, 'w') as f:
+        json.dump(system.knowledge, f)
+    return system
+
+
+@benchmark('learn_from_conversation', [1000, 100000, 1000000], 'patterns')
+def setup_learn(size):
+    system = learning_system(size)
+    return lambda: system.learn_from_conversation("write me some python code", "```python\nprint('yo')\n```")
+
+
+@benchmark('save_knowledge', [1000, 100000, 1000000], 'patterns')
+def setup_save_knowledge(size):
+    system = learning_system(size)
+
+    def learn_and_save():
+        system.learn_from_conversation("write me some python code", "```python\nprint('yo')\n```")
+        system.flush()
+    return learn_and_save
+
+
+@benchmark('get_intelligence_report', [1000, 100000, 1000000], 'patterns')
+def setup_report(size):
+    system = learning_system(size)
+    return system.get_intelligence_report
+
+
+@benchmark('generate_code_from_request', [10, 100, 1000], 'words')
+def setup_generate_code(size):
+    from llm_code_generator import LLMCodeGenerator
+    generator = LLMCodeGenerator()
+    text = "create a flask api for users " + message(size)
+    return lambda: generator.generate_code_from_request(text)
+
+
+def setup_save(kind: str, size: int):
+    instance = agent(kind)
+    history = make_history(size)
+    path = os.path.join(tempfile.mkdtemp(dir=os.getcwd()), "conversation.json")
+
+    def save():
+        instance.conversation_history = history
+        instance.save_conversation(path)
+    return save
+
+
+@benchmark('save_conversation[AIAgent]', [1000, 10000, 100000], 'messages')
+def setup_save_basic(size):
+    return setup_save('basic', size)
+
+
+@benchmark('save_conversation[Enhanced]', [1000, 10000, 100000], 'messages')
+def setup_save_enhanced(size):
+    return setup_save('enhanced', size)
+
+
+@benchmark('save_conversation[jsonl]', [1000, 10000, 100000], 'messages')
+def setup_save_jsonl(size):
+    instance = agent('basic')
+    path = os.path.join(tempfile.mkdtemp(dir=os.getcwd()), "conversation.jsonl")
+    instance.conversation_history = make_history(size)
+    instance.save_conversation(path)
+
+    def save():
+        instance.conversation_history.append({'role': 'user', 'content': "one more thing",
+                                              'timestamp': "2025-11-05T21:00:00"})
+        instance.save_conversation(path)
+    return save
+
+
+@benchmark('load_conversation[tail]', [1000, 10000, 100000], 'messages')
+def setup_load_tail(size):
+    instance = agent('basic')
+    path = os.path.join(tempfile.mkdtemp(dir=os.getcwd()), "conversation.jsonl")
+    instance.conversation_history = make_history(size)
+    instance.save_conversation(path)
+    return lambda: instance.load_conversation(path, last=20)
+
+
+def measure(fn: Callable[[], Any], min_time: float, max_runs: int = 10000) -> Dict:
+    """
+    Call `fn` until `min_time` seconds have passed (at least 3 calls, or 1 if a call is that slow)
+
+    The first call warms caches and is dropped, unless it alone took `min_time`.
+
+    Returns:
+        {'median_us', 'min_us', 'runs'}
+    """
+    gc.collect()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    if elapsed > min_time:
+        return {'median_us': round(elapsed * 1e6, 2), 'min_us': round(elapsed * 1e6, 2), 'runs': 1}
+    timings = []
+    spent = 0.0
+    while len(timings) < max_runs and (spent < min_time or len(timings) < 3):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        timings.append(elapsed * 1e6)
+        spent += elapsed
+        if elapsed > min_time:
+            break
+    return {'median_us': round(statistics.median(timings), 2), 'min_us': round(min(timings), 2), 'runs': len(timings)}
+
+
+def scaling_exponent(points: List[Dict]) -> Optional[float]:
+    """k in time ~ size^k between the smallest and largest size"""
+    if len(points) < 2 or points[0]['median_us'] <= 0:
+        return None
+    first, last = points[0], points[-1]
+    return round(math.log(last['median_us'] / first['median_us']) / math.log(last['size'] / first['size']), 2)
+
+
+def run(names: List[str], max_size: Optional[int], min_time: float) -> Dict[str, Dict]:
+    results = {}
+    for name in names:
+        spec = BENCHMARKS[name]
+        points = []
+        for size in spec['sizes']:
+            if max_size is not None and size > max_size:
+                continue
+            fn = spec['setup'](size)
+            point = {'size': size, **measure(fn, min_time)}
+            points.append(point)
+            print(f"  {name:<28} {size:>9,} {spec['unit']:<9} {format_us(point['median_us']):>12} "
+                  f"{format_us(point['min_us']):>12} {point['runs']:>6}")
+        results[name] = {'unit': spec['unit'], 'points': points, 'exponent': scaling_exponent(points)}
+    return results
+
+
+def format_us(us: float) -> str:
+    if us >= 1e6:
+        return f"{us / 1e6:.2f} s"
+    if us >= 1e3:
+        return f"{us / 1e3:.2f} ms"
+    return f"{us:.1f} us"
+
+
+def compare(results: Dict[str, Dict], baseline: Dict, tolerance: float) -> List[str]:
+    """Regressions against the stored baseline (empty when everything is within tolerance)"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        base_points = {point['size']: point for point in base['points']}
+        for point in result['points']:
+            before = base_points.get(point['size'])
+            if before is None:
+                continue
+            if (point['median_us'] > before['median_us'] * (1 + tolerance)
+                    and point['median_us'] - before['median_us'] > MIN_DELTA_US):
+                regressions.append(f"{name} @ {point['size']:,}: {format_us(before['median_us'])} -> "
+                                   f"{format_us(point['median_us'])}")
+        if (result['exponent'] is not None and base.get('exponent') is not None
+                and [p['size'] for p in result['points']] == [p['size'] for p in base['points']]
+                and result['exponent'] > base['exponent'] + EXPONENT_SLACK):
+            regressions.append(f"{name}: scaling exponent {base['exponent']} -> {result['exponent']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time agent hot paths at growing input sizes")
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument('--max-size', type=int, default=None, help='Skip sizes above this')
+    parser.add_argument('--min-time', type=float, default=0.3, help='Seconds to spend per size')
+    parser.add_argument('--tolerance', type=float, default=0.3, help='Allowed slowdown vs baseline (0.3 = 30%%)')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the baseline')
+    args = parser.parse_args()
+
+    # Agents are built offline: no provider clients, no voice, nothing shared, files in a temp dir
+    for key in ("OPENAI_API_KEY", "ANTHROPIC_API_KEY", "SESSION_STORE_URL"):
+        os.environ.pop(key, None)
+    os.environ.update({'AI_PROVIDER': 'none', 'VOICE_ENABLED': 'false', 'SUMMARY_ENABLED': 'false'})
+    workdir = tempfile.mkdtemp(prefix="og_ai_bench_")
+    os.chdir(workdir)
+
+    print("=" * 86)
+    print("  OG-AI hot path benchmarks")
+    print("=" * 86)
+    print(f"  {'function':<28} {'size':>9} {'':<9} {'median':>12} {'min':>12} {'runs':>6}")
+    try:
+        results = run(args.only, args.max_size, args.min_time)
+    finally:
+        for system in _learning_systems:
+            system.flush()
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\n  Scaling (time ~ size^k):")
+    for name, result in results.items():
+        exponent = result['exponent']
+        note = "" if exponent is None else (" superlinear!" if exponent > 1.15 else "")
+        print(f"    {name:<28} k = {exponent if exponent is not None else 'n/a'}{note}")
+
+    if args.save_baseline:
+        baseline = {'meta': {'python': platform.python_version(), 'platform': platform.platform(),
+                             'recorded': time.strftime('%Y-%m-%d')},
+                    'results': results}
+        if os.path.exists(BASELINE_PATH):
+            # Keep entries for benchmarks that weren't run this time
+            with open(BASELINE_PATH) as f:
+                baseline['results'] = {**json.load(f)['results'], **results}
+        os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(baseline, f, indent=2)
+            f.write("\n")
+        print(f"\n  Baseline saved to {os.path.relpath(BASELINE_PATH, REPO_ROOT)}")
+        return
+
+    if not os.path.exists(BASELINE_PATH):
+        print("\n  No baseline yet - run with --save-baseline to record one")
+        return
+    with open(BASELINE_PATH) as f:
+        baseline = json.load(f)
+    if baseline['meta'].get('platform') != platform.platform():
+        print(f"\n  WARNING: baseline was recorded on {baseline['meta'].get('platform')} - "
+              f"absolute times may not be comparable (scaling exponents still are)")
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n  REGRESSIONS vs baseline ({baseline['meta'].get('recorded')}, tolerance {args.tolerance:.0%}):")
+        for regression in regressions:
+            print(f"    - {regression}")
+        sys.exit(1)
+    print(f"\n  Within {args.tolerance:.0%} of baseline ({baseline['meta'].get('recorded')})")
+
+
+if __name__ == "__main__":
+    main()
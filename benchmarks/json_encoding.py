@@ -0,0 +1,115 @@
+"""
+OG-AI JSON Encoding Benchmark - What does it cost to send a long /history?
+
+Encodes a /history payload for synthetic conversations (10k messages by default)
+the ways FastAPI can, and reports the time per response:
+
+  response_model    validate against HistoryResponse, jsonable_encoder, json.dumps
+                    (what FastAPI did for /history before)
+  pydantic json     validate, then pydantic-core straight to JSON bytes
+                    (newer FastAPI's default path for response_model endpoints)
+  jsonable+json     jsonable_encoder + json.dumps, no model (a plain dict endpoint)
+  FastJSONResponse  what /history returns now: no validation, orjson if installed
+
+Usage:
+    python benchmarks/json_encoding.py
+    python benchmarks/json_encoding.py --sizes 1000 10000 50000 --runs 20
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from pydantic import BaseModel  # noqa: E402
+
+from fast_json import FastJSONResponse  # noqa: E402
+from lazy_imports import is_installed  # noqa: E402
+
+
+class HistoryResponse(BaseModel):
+    """Same shape as app.HistoryResponse (not imported so the agent isn't loaded)"""
+    conversation: List[Dict]
+    history: List[Dict]
+    message_count: int
+
+
+def make_payload(size: int) -> Dict:
+    """A /history body with `size` messages (compat key included, like the default)"""
+    history = []
+    for n in range(size):
+        role = 'user' if n % 2 == 0 else 'assistant'
+        content = f"Message {n}: " + ("quick question about my code?" if role == 'user'
+                                      else "Aight here's the deal, no cap. " * (n % 15 + 1))
+        history.append({'role': role, 'content': content, 'timestamp': f"2025-11-05T20:{n % 60:02d}:00.000000", 'id': n})
+    return {'conversation': history, 'history': history, 'message_count': size}
+
+
+def response_model_path(payload: Dict) -> bytes:
+    model = HistoryResponse.model_validate(payload)
+    return json.dumps(jsonable_encoder(model.model_dump()), ensure_ascii=False,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def pydantic_json_path(payload: Dict) -> bytes:
+    return HistoryResponse.model_validate(payload).model_dump_json().encode("utf-8")
+
+
+def jsonable_path(payload: Dict) -> bytes:
+    return json.dumps(jsonable_encoder(payload), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(payload: Dict) -> bytes:
+    return FastJSONResponse(payload).body
+
+
+PATHS: Dict[str, Callable[[Dict], bytes]] = {
+    'response_model': response_model_path,
+    'pydantic json': pydantic_json_path,
+    'jsonable+json': jsonable_path,
+    'FastJSONResponse': fast_path,
+}
+
+
+def time_path(encode: Callable[[Dict], bytes], payload: Dict, runs: int) -> List[float]:
+    """Milliseconds per encode"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        encode(payload)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure /history encode time per response")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000], help='Messages per history')
+    parser.add_argument('--runs', type=int, default=10, help='Encodes per measurement')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print(f"  /history encoding benchmark (orjson {'installed' if is_installed('orjson') else 'NOT installed'})")
+    print("=" * 70)
+
+    for size in args.sizes:
+        payload = make_payload(size)
+        body_kb = len(fast_path(payload)) / 1024
+        print(f"\n  {size} messages, {body_kb:,.0f} KB body")
+        print(f"  {'path':<18}  {'p50':>10}  {'min':>10}  {'speedup':>8}")
+
+        baseline = None
+        for name, encode in PATHS.items():
+            timings = time_path(encode, payload, args.runs)
+            median = statistics.median(timings)
+            baseline = baseline or median
+            print(f"  {name:<18}  {median:>8.2f}ms  {min(timings):>8.2f}ms  {baseline / median:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
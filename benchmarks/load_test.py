@@ -0,0 +1,367 @@
+"""
+OG-AI Load Test - Throughput, tail latency and memory of the API under load
+
+Starts app:app under uvicorn (or in this process with --in-process) with the AI
+providers pointed at fake_llm_server.py, then drives /health, /chat and /history
+at each concurrency level and reports:
+
+  rps              completed requests per second
+  p50/p95/p99      latency in ms
+  errors           non-2xx responses and transport errors
+  rss              server resident memory after the scenario (MB)
+
+--in-process skips uvicorn and sockets: it measures what the app itself costs
+per request, but requests that block the event loop don't queue up behind
+each other the way they would on a real server, so trust uvicorn mode for
+latency under concurrency. Its RSS includes the load generator.
+
+Results are compared against the stored baseline in benchmarks/baselines/;
+a scenario that got slower, lost throughput or grew memory by more than
+--tolerance is flagged and the script exits with status 1. Baselines are only
+comparable on the machine they were recorded on - re-record with
+--save-baseline after an intended change or on new hardware.
+
+Usage:
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --concurrency 1 8 32 --duration 10 --provider-latency 0.2
+    python benchmarks/load_test.py --provider-jitter 0.5 --provider-distribution lognormal --provider-error-rate 0.02
+    python benchmarks/load_test.py --in-process --scenarios health history
+    python benchmarks/load_test.py --save-baseline
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import math
+import os
+import platform
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import httpx  # noqa: E402
+
+from fake_llm_server import DISTRIBUTIONS, FakeLLMServer  # noqa: E402
+from lazy_imports import is_installed  # noqa: E402
+
+BASELINE_DIR = os.path.join(REPO_ROOT, "benchmarks", "baselines")
+
+CHAT_MESSAGES = [
+    "yo what's good",
+    "explain python decorators real quick",
+    "what's the difference between a list and a tuple?",
+    "help me name my startup",
+]
+
+# name -> (method, path, json body factory)
+SCENARIOS = {
+    'health': ("GET", "/health", None),
+    'chat': ("POST", "/chat", lambda n: {"message": CHAT_MESSAGES[n % len(CHAT_MESSAGES)]}),
+    'history': ("GET", "/history?limit=100&compat=false", None),
+}
+
+# Differences smaller than these are noise, whatever the percentage
+MIN_LATENCY_DELTA_MS = 2.0
+MIN_RSS_DELTA_MB = 10.0
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile (0 for no values)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def rss_mb(pid: Optional[int] = None) -> Optional[float]:
+    """Resident memory of a process in MB (/proc on Linux, psutil elsewhere)"""
+    pid = pid or os.getpid()
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if is_installed("psutil"):
+        import psutil
+        return psutil.Process(pid).memory_info().rss / (1024 * 1024)
+    if pid == os.getpid():
+        # Peak rather than current, but better than nothing
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    return None
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def app_env(fake: FakeLLMServer, provider: str) -> Dict[str, str]:
+    """Environment for the app under test: providers on the fake server, nothing persistent shared"""
+    return {
+        **fake.provider_env(),
+        'AI_PROVIDER': provider,
+        'OPENAI_API_KEY': 'sk-fake',
+        'ANTHROPIC_API_KEY': 'sk-ant-fake',
+        'VOICE_ENABLED': 'false',
+        'SESSION_STORE_URL': '',
+        'DEVELOPMENT_MODE': 'false',
+    }
+
+
+@asynccontextmanager
+async def uvicorn_app(env: Dict[str, str], workdir: str, workers: int):
+    """Run app:app under uvicorn in a subprocess; yields (client, server pid)"""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--app-dir", REPO_ROOT, "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=workdir, env={**os.environ, **env, 'PYTHONPATH': REPO_ROOT},
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+            deadline = time.monotonic() + 120
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited:\n{process.stderr.read().decode()[-2000:]}")
+                try:
+                    if (await client.get("/ready")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError("App never became ready")
+                await asyncio.sleep(0.2)
+            yield client, process.pid
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+@asynccontextmanager
+async def in_process_app(env: Dict[str, str], workdir: str):
+    """Serve app:app from this process through httpx's ASGI transport (no sockets, no lifespan)"""
+    os.environ.update(env)
+    os.chdir(workdir)
+    import app as app_module
+    await asyncio.get_running_loop().run_in_executor(None, app_module.get_agent)
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://app", timeout=60) as client:
+        yield client, os.getpid()
+
+
+async def run_scenario(client: httpx.AsyncClient, name: str, concurrency: int, duration: float,
+                       warmup_requests: int = 5) -> Dict:
+    """
+    Hit one endpoint from `concurrency` concurrent clients for `duration` seconds
+
+    Returns:
+        {'requests', 'errors', 'rps', 'p50_ms', 'p95_ms', 'p99_ms'}
+    """
+    method, path, body = SCENARIOS[name]
+    counter = itertools.count()
+
+    async def call() -> bool:
+        n = next(counter)
+        try:
+            response = await client.request(method, path, json=body(n) if body else None)
+            return response.is_success
+        except httpx.HTTPError:
+            return False
+
+    for _ in range(warmup_requests):
+        await call()
+
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            ok = await call()
+            latencies.append((time.perf_counter() - start) * 1000)
+            if not ok:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+    }
+
+
+async def run(args) -> Tuple[List[Dict], int]:
+    """
+    Start the fake providers and the app, run every scenario at every concurrency
+
+    Returns:
+        (result rows, number of calls that reached the fake provider)
+    """
+    workdir = tempfile.mkdtemp(prefix="og_ai_load_")
+    rows = []
+    try:
+        with FakeLLMServer(latency=args.provider_latency, jitter=args.provider_jitter,
+                           distribution=args.provider_distribution, tokens_per_second=args.provider_tps,
+                           error_rate=args.provider_error_rate, seed=args.seed) as fake:
+            env = app_env(fake, args.provider)
+            app_cm = in_process_app(env, workdir) if args.in_process else uvicorn_app(env, workdir, args.workers)
+            async with app_cm as (client, pid):
+                for name in args.scenarios:
+                    for concurrency in args.concurrency:
+                        result = await run_scenario(client, name, concurrency, args.duration)
+                        rss = rss_mb(pid)
+                        rows.append({'scenario': name, 'concurrency': concurrency, **result,
+                                     'rss_mb': round(rss, 1) if rss is not None else None})
+                        print_row(rows[-1])
+            provider_calls = sum(fake.requests.values())
+    finally:
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+    if provider_calls == 0 and 'chat' in args.scenarios:
+        print(f"\n  NOTE: no calls reached the fake provider - is the {args.provider} SDK installed? "
+              f"/chat numbers are for the canned fallback replies.")
+    return rows, provider_calls
+
+
+def print_header() -> None:
+    print(f"  {'scenario':<9} {'conc':>5} {'reqs':>7} {'err':>5} {'rps':>9} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'rss MB':>8}")
+
+
+def print_row(row: Dict) -> None:
+    rss = f"{row['rss_mb']:.1f}" if row['rss_mb'] is not None else "n/a"
+    print(f"  {row['scenario']:<9} {row['concurrency']:>5} {row['requests']:>7} {row['errors']:>5} "
+          f"{row['rps']:>9.1f} {row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f} {rss:>8}")
+
+
+def baseline_path(args) -> str:
+    mode = "in_process" if args.in_process else f"uvicorn_{args.workers}w"
+    return os.path.join(BASELINE_DIR, f"load_test_{mode}.json")
+
+
+def metadata(args, provider_calls: int) -> Dict:
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'provider': args.provider,
+        'provider_latency': args.provider_latency,
+        'provider_jitter': args.provider_jitter,
+        'provider_distribution': args.provider_distribution,
+        'provider_tps': args.provider_tps,
+        'provider_error_rate': args.provider_error_rate,
+        'duration': args.duration,
+        'provider_calls': provider_calls,
+        'recorded': time.strftime('%Y-%m-%d'),
+    }
+
+
+def compare(rows: List[Dict], baseline: Dict, tolerance: float) -> List[str]:
+    """Regressions against a stored baseline (empty list when everything is within tolerance)"""
+    previous = {(row['scenario'], row['concurrency']): row for row in baseline['results']}
+    regressions = []
+    for row in rows:
+        base = previous.get((row['scenario'], row['concurrency']))
+        if base is None:
+            continue
+        label = f"{row['scenario']} x{row['concurrency']}"
+        if base['rps'] and row['rps'] < base['rps'] * (1 - tolerance):
+            regressions.append(f"{label}: throughput {base['rps']} -> {row['rps']} rps")
+        for key in ('p95_ms', 'p99_ms'):
+            if row[key] > base[key] * (1 + tolerance) and row[key] - base[key] > MIN_LATENCY_DELTA_MS:
+                regressions.append(f"{label}: {key} {base[key]} -> {row[key]}")
+        if row['errors'] > base['errors']:
+            regressions.append(f"{label}: errors {base['errors']} -> {row['errors']}")
+        if (row['rss_mb'] is not None and base.get('rss_mb') is not None
+                and row['rss_mb'] > base['rss_mb'] * (1 + tolerance)
+                and row['rss_mb'] - base['rss_mb'] > MIN_RSS_DELTA_MB):
+            regressions.append(f"{label}: rss {base['rss_mb']} -> {row['rss_mb']} MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the OG-AI API against fake AI providers")
+    parser.add_argument('--scenarios', nargs='+', default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32], help='Concurrent clients')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds per scenario and concurrency')
+    parser.add_argument('--provider', default='openai', choices=['openai', 'anthropic', 'ollama'])
+    parser.add_argument('--provider-latency', type=float, default=0.05, help='Fake provider seconds per reply')
+    parser.add_argument('--provider-jitter', type=float, default=0.0, help='Extra random provider seconds')
+    parser.add_argument('--provider-distribution', choices=DISTRIBUTIONS, default='uniform',
+                        help='How --provider-jitter spreads the latency')
+    parser.add_argument('--provider-tps', type=float, default=0.0, help='Fake provider tokens/s (0 = instant)')
+    parser.add_argument('--provider-error-rate', type=float, default=0.0, help='Fraction of provider calls that fail')
+    parser.add_argument('--seed', type=int, default=1, help='Seed for fake provider latencies and errors')
+    parser.add_argument('--workers', type=int, default=1, help='uvicorn workers')
+    parser.add_argument('--in-process', action='store_true', help='Call the ASGI app directly (no uvicorn)')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed regression vs baseline (0.25 = 25%%)')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the baseline')
+    args = parser.parse_args()
+    # The app turns on INFO logging; httpx would log every request we make
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    print("=" * 86)
+    mode = "in-process ASGI" if args.in_process else f"uvicorn, {args.workers} worker(s)"
+    print(f"  OG-AI load test ({mode}; fake {args.provider} at {args.provider_latency * 1000:.0f} ms)")
+    print("=" * 86)
+    print_header()
+    rows, provider_calls = asyncio.run(run(args))
+
+    path = baseline_path(args)
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({'meta': metadata(args, provider_calls), 'results': rows}, f, indent=2)
+            f.write("\n")
+        print(f"\n  Baseline saved to {os.path.relpath(path, REPO_ROOT)}")
+        return
+
+    if not os.path.exists(path):
+        print(f"\n  No baseline at {os.path.relpath(path, REPO_ROOT)} - run with --save-baseline to record one")
+        return
+
+    with open(path) as f:
+        baseline = json.load(f)
+    if baseline['meta'].get('cpus') != os.cpu_count() or baseline['meta'].get('platform') != platform.platform():
+        print(f"\n  WARNING: baseline was recorded on {baseline['meta'].get('platform')} "
+              f"({baseline['meta'].get('cpus')} CPUs) - numbers may not be comparable")
+    regressions = compare(rows, baseline, args.tolerance)
+    if regressions:
+        print(f"\n  REGRESSIONS vs baseline ({baseline['meta'].get('recorded')}, tolerance {args.tolerance:.0%}):")
+        for regression in regressions:
+            print(f"    - {regression}")
+        sys.exit(1)
+    print(f"\n  Within {args.tolerance:.0%} of baseline ({baseline['meta'].get('recorded')})")
+
+
+if __name__ == "__main__":
+    main()
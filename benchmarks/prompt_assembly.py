@@ -0,0 +1,77 @@
+"""
+OG-AI Prompt Assembly Benchmark - How long does packing a prompt take per request?
+
+Builds prompts from synthetic conversations of different lengths (with a
+scraped page and search results as context) and reports the time per build,
+both with a cold token-count cache and with the warm cache a live session has.
+
+Usage:
+    python benchmarks/prompt_assembly.py
+    python benchmarks/prompt_assembly.py --sizes 10 100 1000 --runs 200 --max-tokens 16000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prompt_builder import PromptBuilder, count_tokens  # noqa: E402
+
+SYSTEM_PROMPT = "You are OG-AI, the realest AI in the game. Keep it 100. " * 40
+SCRAPED_PAGE = "This paragraph came off a scraped web page and goes on for a while. " * 300
+SEARCH_RESULTS = "\n".join(f"{i}. Result title {i}: a snippet about the topic" for i in range(1, 4))
+
+
+def make_history(size: int) -> List[Dict]:
+    """Alternating user/assistant messages of mixed lengths"""
+    history = []
+    for n in range(size):
+        role = 'user' if n % 2 == 0 else 'assistant'
+        content = f"Message {n}: " + ("short question?" if role == 'user' else "a longer answer with details. " * (n % 20 + 1))
+        history.append({'role': role, 'content': content})
+    return history
+
+
+def time_builds(builder: PromptBuilder, history: List[Dict], runs: int, cold: bool) -> List[float]:
+    """Milliseconds per build"""
+    timings = []
+    for _ in range(runs):
+        if cold:
+            count_tokens.cache_clear()
+        start = time.perf_counter()
+        builder.build(SYSTEM_PROMPT, history, [SEARCH_RESULTS + "\n\n" + SCRAPED_PAGE])
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure prompt assembly time per request")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000], help='History lengths to test')
+    parser.add_argument('--runs', type=int, default=100, help='Builds per measurement')
+    parser.add_argument('--max-tokens', type=int, default=8000, help='Prompt token budget')
+    args = parser.parse_args()
+
+    builder = PromptBuilder(max_tokens=args.max_tokens, reserve_tokens=1000)
+
+    print("=" * 70)
+    print(f"  Prompt assembly benchmark (budget {builder.budget} tokens)")
+    print("=" * 70)
+    print(f"  {'messages':>8}  {'cold p50':>10}  {'warm p50':>10}  {'warm p95':>10}  {'tokens':>7}  {'kept':>5}")
+
+    for size in args.sizes:
+        history = make_history(size)
+        cold = time_builds(builder, history, args.runs, cold=True)
+        warm = time_builds(builder, history, args.runs, cold=False)
+        plan = builder.build(SYSTEM_PROMPT, history, [SEARCH_RESULTS + "\n\n" + SCRAPED_PAGE])
+        warm.sort()
+
+        print(f"  {size:>8}  {statistics.median(cold):>8.3f}ms  {statistics.median(warm):>8.3f}ms  "
+              f"{warm[int(len(warm) * 0.95) - 1]:>8.3f}ms  {plan['tokens']:>7}  {len(plan['messages']):>5}")
+
+
+if __name__ == "__main__":
+    main()
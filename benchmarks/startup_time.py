@@ -0,0 +1,114 @@
+"""
+OG-AI Startup Benchmark - How long does it take a fresh worker to import the app?
+
+Runs `python -X importtime -c "import app"` in a clean interpreter and
+summarizes the output: total import time plus the slowest modules.
+
+Usage:
+    python benchmarks/startup_time.py
+    python benchmarks/startup_time.py --module ai_agent_enhanced --top 20 --runs 5
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_importtime(module: str) -> Tuple[float, str]:
+    """
+    Import a module in a fresh interpreter with -X importtime
+
+    Returns:
+        (wall clock seconds, raw importtime output from stderr)
+    """
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True
+    )
+    elapsed = time.perf_counter() - start
+
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    return elapsed, result.stderr
+
+
+def parse_importtime(output: str) -> List[Dict]:
+    """
+    Parse -X importtime lines: "import time: self [us] | cumulative | imported package"
+
+    Returns:
+        List of {'module', 'self_us', 'cumulative_us', 'depth'}
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            entries.append({
+                'module': name.strip(),
+                'self_us': int(self_us),
+                'cumulative_us': int(cumulative_us),
+                'depth': (len(name) - len(name.lstrip())) // 2
+            })
+        except ValueError:
+            continue
+
+    return entries
+
+
+def summarize(entries: List[Dict], top: int) -> Dict:
+    """Total import time and the direct imports that cost the most"""
+    top_level = [e for e in entries if e['depth'] == 0]
+    direct = [e for e in entries if e['depth'] == 1]
+    return {
+        'total_us': sum(e['cumulative_us'] for e in top_level),
+        'module_count': len(entries),
+        'slowest': sorted(direct, key=lambda e: e['cumulative_us'], reverse=True)[:top],
+        'slowest_self': sorted(entries, key=lambda e: e['self_us'], reverse=True)[:top]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold import time of the OG-AI app")
+    parser.add_argument('--module', default='app', help='Module to import (default: app)')
+    parser.add_argument('--top', type=int, default=15, help='How many slow modules to list')
+    parser.add_argument('--runs', type=int, default=3, help='Fresh interpreter runs to time')
+    args = parser.parse_args()
+
+    wall_times = []
+    summary = None
+    for _ in range(args.runs):
+        elapsed, output = run_importtime(args.module)
+        wall_times.append(elapsed)
+        summary = summarize(parse_importtime(output), args.top)
+
+    print("=" * 70)
+    print(f"  Startup benchmark: import {args.module}")
+    print("=" * 70)
+    print(f"  Interpreter wall time (median of {args.runs}): {statistics.median(wall_times) * 1000:.1f} ms")
+    print(f"  Import time (last run):                {summary['total_us'] / 1000:.1f} ms")
+    print(f"  Modules imported:                      {summary['module_count']}")
+    print()
+    print("  Slowest direct imports (cumulative):")
+    for entry in summary['slowest']:
+        print(f"    {entry['cumulative_us'] / 1000:9.1f} ms  {entry['module']}")
+    print()
+    print("  Slowest modules (self):")
+    for entry in summary['slowest_self']:
+        print(f"    {entry['self_us'] / 1000:9.1f} ms  {entry['module']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""
+OG-AI Compression - Brotli/gzip for API responses and precompressed static assets
+CompressionMiddleware compresses responses on the fly (streamed ones chunk by
+chunk); AssetCache compresses the HTML pages and /static files once at startup
+and serves them with strong ETags and Cache-Control, straight from memory.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from lazy_imports import optional_import
+
+# Already compressed, or streamed to the client as it's produced
+EXCLUDED_CONTENT_TYPES = ('audio/', 'video/', 'image/', 'font/woff', 'application/zip',
+                          'application/gzip', 'text/event-stream')
+
+# Bodies bigger than this are compressed on a worker thread instead of the event loop
+THREAD_MIN_SIZE = 256 * 1024
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick 'br' or 'gzip' from an Accept-Encoding header (None = send uncompressed)
+
+    Brotli wins when the client takes it and the brotli package is installed.
+    """
+    accepted = {}
+    for part in accept_encoding.lower().split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+
+    def ok(name):
+        return accepted.get(name, accepted.get('*', 0)) > 0
+
+    if ok('br') and optional_import("brotli") is not None:
+        return 'br'
+    if ok('gzip'):
+        return 'gzip'
+    return None
+
+
+class _Compressor:
+    """Incremental br/gzip compressor"""
+
+    def __init__(self, encoding: str, level: int):
+        if encoding == 'br':
+            self._br = optional_import("brotli").Compressor(quality=level)
+            self._zlib = None
+        else:
+            self._br = None
+            self._zlib = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        """Compress a chunk - flushed so the client can decode it right away"""
+        if self._br is not None:
+            out = self._br.process(data)
+            return out + (self._br.finish() if final else self._br.flush())
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """
+    Brotli (preferred) or gzip compression for responses above a size threshold
+
+    Skips responses that already have a Content-Encoding (precompressed assets),
+    partial content and types that don't compress (audio, images, SSE...).
+    Streaming responses are compressed chunk by chunk.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: Optional[int] = None,
+                 gzip_level: int = 6, brotli_quality: int = 4):
+        """
+        Initialize middleware
+
+        Args:
+            app: ASGI app to wrap
+            minimum_size: Smaller bodies are sent as is (default: COMPRESS_MIN_SIZE or 1024)
+            gzip_level: zlib level for on-the-fly gzip
+            brotli_quality: Brotli quality for on-the-fly br (11 is too slow per request)
+        """
+        self.app = app
+        self.minimum_size = minimum_size if minimum_size is not None else int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+        self.levels = {'gzip': gzip_level, 'br': brotli_quality}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message, compressor, passthrough
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                media_type = headers.get("content-type", "").lower()
+                passthrough = ("content-encoding" in headers or message["status"] in (204, 206, 304)
+                               or media_type.startswith(EXCLUDED_CONTENT_TYPES))
+                if passthrough:
+                    await send(message)
+                else:
+                    start_message = message
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if start_message is not None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                headers.add_vary_header("Accept-Encoding")
+                if not more_body and len(body) < self.minimum_size:
+                    # Small response - not worth compressing
+                    await send(start_message)
+                    await send(message)
+                    start_message = None
+                    passthrough = True
+                    return
+
+                compressor = _Compressor(encoding, self.levels[encoding])
+                headers["Content-Encoding"] = encoding
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    # The compressed bytes differ, so the app's strong ETag only holds weakly
+                    headers["ETag"] = f"W/{etag}"
+                if more_body:
+                    del headers["Content-Length"]
+                await send_body_start(start_message, headers, body, more_body)
+                start_message = None
+                return
+
+            await send({**message, "body": await self._compress(compressor, body, not more_body)})
+
+        async def send_body_start(start: Message, headers: MutableHeaders, body: bytes, more_body: bool):
+            compressed = await self._compress(compressor, body, not more_body)
+            if not more_body:
+                headers["Content-Length"] = str(len(compressed))
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+    @staticmethod
+    async def _compress(compressor: _Compressor, body: bytes, final: bool) -> bytes:
+        """Compress on a worker thread when the chunk is big enough to stall the loop"""
+        if len(body) >= THREAD_MIN_SIZE:
+            return await run_in_threadpool(compressor.compress, body, final)
+        return compressor.compress(body, final)
+
+
+class Asset:
+    """One file with its precompressed variants"""
+
+    __slots__ = ('path', 'media_type', 'signature', 'variants', 'etags')
+
+    def __init__(self, path: str, body: bytes, signature: Tuple[int, int], min_size: int):
+        self.path = path
+        self.media_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        if self.media_type.startswith('text/') or self.media_type in ('application/javascript', 'application/json'):
+            self.media_type += '; charset=utf-8'
+        self.signature = signature
+
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.variants: Dict[Optional[str], bytes] = {None: body}
+        if len(body) >= min_size and not self.media_type.startswith(EXCLUDED_CONTENT_TYPES):
+            self.variants['gzip'] = gzip.compress(body, compresslevel=9, mtime=0)
+            brotli = optional_import("brotli")
+            if brotli is not None:
+                self.variants['br'] = brotli.compress(body, quality=11)
+        # Strong ETag per representation (identity / gzip / br)
+        self.etags = {encoding: f'"{digest}{"-" + encoding if encoding else ""}"' for encoding in self.variants}
+
+
+class AssetCache:
+    """
+    In-memory cache of static files and their gzip/br variants
+
+    Files are compressed once (at max level) instead of per request, and
+    re-read only when their mtime or size changes.
+    """
+
+    def __init__(self, min_size: Optional[int] = None):
+        """
+        Initialize cache
+
+        Args:
+            min_size: Files smaller than this aren't compressed (default: COMPRESS_MIN_SIZE or 1024)
+        """
+        self.min_size = min_size if min_size is not None else int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+        self._assets: Dict[str, Asset] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> Asset:
+        """The cached asset for `path`, (re)loading it if the file changed"""
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        key = os.path.abspath(path)
+        asset = self._assets.get(key)
+        if asset is None or asset.signature != signature:
+            with open(path, 'rb') as f:
+                asset = Asset(path, f.read(), signature, self.min_size)
+            with self._lock:
+                self._assets[key] = asset
+        return asset
+
+    def precompress(self, paths: Iterable[str]) -> List[str]:
+        """
+        Load and compress files up front (at startup)
+
+        Args:
+            paths: Files, or directories to walk
+
+        Returns:
+            The files that were cached
+        """
+        cached = []
+        for path in paths:
+            if os.path.isdir(path):
+                files = [os.path.join(root, name) for root, _, names in os.walk(path) for name in names]
+            else:
+                files = [path]
+            for file in files:
+                if os.path.isfile(file):
+                    self.get(file)
+                    cached.append(file)
+        return cached
+
+    def response(self, request_headers: Headers, path: str, cache_control: str) -> Response:
+        """
+        Serve a file from the cache
+
+        Picks the best variant for Accept-Encoding and answers If-None-Match
+        with a 304 when the client's copy is current.
+        """
+        asset = self.get(path)
+        encoding = choose_encoding(request_headers.get("accept-encoding", ""))
+        if encoding not in asset.variants:
+            encoding = 'gzip' if encoding == 'br' and 'gzip' in asset.variants else None
+
+        headers = {"ETag": asset.etags[encoding], "Cache-Control": cache_control}
+        if len(asset.variants) > 1:
+            headers["Vary"] = "Accept-Encoding"
+
+        if_none_match = request_headers.get("if-none-match", "")
+        if if_none_match:
+            tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+            if '*' in tags or not tags.isdisjoint(asset.etags.values()):
+                return Response(status_code=304, headers=headers)
+
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        return Response(asset.variants[encoding], media_type=asset.media_type, headers=headers)
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles served through an AssetCache (precompressed, strong ETags, Cache-Control)"""
+
+    def __init__(self, *args, assets: AssetCache, cache_control: str, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.assets = assets
+        self.cache_control = cache_control
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = await super().get_response(path, scope)
+        # StaticFiles did the path lookup/safety checks - swap in the cached copy
+        if isinstance(response, FileResponse) and response.status_code == 200:
+            return self.assets.response(Headers(scope=scope), response.path, self.cache_control)
+        return response
@@ -0,0 +1,338 @@
+"""
+OG-AI Conversation Log - Append-only JSONL conversation files
+One JSON object per line: a header naming the agent, then one line per
+message. New messages are appended instead of rewriting the file, loading
+streams it line by line, and the last N messages are read from the end of
+the file without parsing the rest.
+
+`.jsonl.gz` files are gzip compressed: every append is its own gzip member,
+which gzip readers concatenate transparently. Tail reads of those have to
+decompress the whole file (still without holding it in memory). A last
+member cut off by a crash mid-write is skipped like a cut-off last line.
+"""
+
+import gzip
+import json
+import os
+import re
+from collections import deque
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from fast_json import dumps
+from job_scheduler import FileLock
+
+HEADER_TYPE = "og-ai.conversation"
+# Bytes read per step when scanning backwards for tail()
+TAIL_BLOCK = 64 * 1024
+# Bytes copied per step when a rewrite keeps the messages before a tail load
+COPY_BLOCK = 1024 * 1024
+# conversation_dir transcripts are rotated once they reach this size (conversation_max_bytes)
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+
+
+def is_jsonl(path: str) -> bool:
+    """True for paths save_conversation/load_conversation treat as JSONL logs"""
+    return path.endswith(('.jsonl', '.jsonl.gz'))
+
+
+class ConversationLog:
+    """
+    A conversation stored as JSON lines
+
+    Every write is a single O_APPEND write(), so several workers can append
+    to the same file without interleaving lines. A line (or gzip member) cut
+    off by a crash mid-write is skipped when it's the last one in the file.
+    """
+
+    def __init__(self, path: str, agent_name: str = "OG-AI", compress: Optional[bool] = None,
+                 max_bytes: Optional[int] = None):
+        """
+        Initialize log
+
+        Args:
+            path: File to read and write
+            agent_name: Name recorded in the header of new files
+            compress: Gzip the file (default: path ends with .gz)
+            max_bytes: Once append() finds the file this big it's moved to rotated_path
+                and a new one started (None: grow forever). For append-only transcripts
+        """
+        self.path = path
+        self.agent_name = agent_name
+        self.compress = path.endswith('.gz') if compress is None else compress
+        self.max_bytes = max_bytes
+        # What save() last left in the file, so the next one can append instead of rewriting
+        self.saved = 0
+        self._last_saved: Optional[Dict] = None
+        self._size: Optional[int] = None
+        # After load_tail(): (uncompressed) bytes of the file before the loaded messages, kept by rewrites
+        self._prefix: Optional[int] = None
+
+    def _header(self) -> Dict:
+        return {'type': HEADER_TYPE, 'version': 1, 'agent_name': self.agent_name}
+
+    @staticmethod
+    def _lines(records: Iterable[Dict]) -> bytes:
+        return b"".join(dumps(record) + b"\n" for record in records)
+
+    def _encode(self, records: Iterable[Dict]) -> bytes:
+        data = self._lines(records)
+        return gzip.compress(data) if self.compress else data
+
+    def _file_size(self) -> int:
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def append(self, message: Dict) -> None:
+        """Append one message"""
+        self.append_many([message])
+
+    @property
+    def rotated_path(self) -> str:
+        """Where a full file is moved (one previous file is kept: default.jsonl -> default.1.jsonl)"""
+        for suffix in ('.jsonl.gz', '.jsonl'):
+            if self.path.endswith(suffix):
+                return f"{self.path[:-len(suffix)]}.1{suffix}"
+        return f"{self.path}.1"
+
+    def _rotate(self) -> None:
+        """Move a full file aside - under a file lock so two workers don't both move it"""
+        lock = FileLock(f"{self.path}.lock")
+        if not lock.acquire():
+            # Another worker is rotating it right now
+            return
+        try:
+            if self._file_size() >= self.max_bytes:
+                os.replace(self.path, self.rotated_path)
+        finally:
+            lock.release()
+
+    def append_many(self, messages: List[Dict]) -> None:
+        """Append messages with one write (a header first if the file is new)"""
+        records = list(messages)
+        if self.max_bytes and self._file_size() >= self.max_bytes:
+            self._rotate()
+        if self._file_size() == 0:
+            records.insert(0, self._header())
+        data = memoryview(self._encode(records))
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            while data:
+                data = data[os.write(fd, data):]
+        finally:
+            os.close(fd)
+
+    def rewrite(self, messages: List[Dict]) -> None:
+        """
+        Replace the file (atomically, through a temp file)
+
+        After load_tail() only the loaded messages are replaced - the ones
+        before them are copied over, so a partial load never drops them.
+        """
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            if not self._prefix:
+                f.write(self._encode([self._header(), *messages]))
+            else:
+                out = gzip.GzipFile(fileobj=f, mode='wb') if self.compress else f
+                try:
+                    self._copy_prefix(out)
+                    out.write(self._lines(messages))
+                finally:
+                    if out is not f:
+                        out.close()
+        os.replace(tmp_path, self.path)
+
+    def _copy_prefix(self, out: BinaryIO) -> None:
+        remaining = self._prefix
+        with self._open() as f:
+            while remaining > 0:
+                block = f.read(min(COPY_BLOCK, remaining))
+                if not block:
+                    break
+                out.write(block)
+                remaining -= len(block)
+
+    def save(self, messages: List[Dict]) -> None:
+        """
+        Make the file hold `messages`
+
+        Appends only the new ones when the file is unchanged since the last
+        save/load through this object and `messages` extends what was saved;
+        rewrites it otherwise. After load_tail(), `messages` stands for the
+        loaded messages onwards.
+        """
+        in_sync = (self._size is not None and self._size == self._file_size()
+                   and len(messages) >= self.saved
+                   and (self.saved == 0 or messages[self.saved - 1] == self._last_saved))
+        if in_sync:
+            if len(messages) > self.saved:
+                self.append_many(messages[self.saved:])
+        else:
+            self.rewrite(messages)
+        self.mark_saved(messages)
+
+    def mark_saved(self, messages: List[Dict]) -> None:
+        """Record that the file currently holds exactly `messages` (after the load_tail() prefix)"""
+        self.saved = len(messages)
+        self._last_saved = messages[-1] if messages else None
+        self._size = self._file_size()
+
+    def _open(self):
+        return gzip.open(self.path, 'rb') if self.compress else open(self.path, 'rb')
+
+    def _records(self, lines: Iterable[bytes]) -> Iterator[Tuple[int, Dict]]:
+        """
+        Decode lines to (offset, message), skipping headers, blanks and a cut-off last line
+
+        The offset is where the message's line starts in the (uncompressed) file.
+        """
+        bad_line = None
+        offset = 0
+        lines = iter(lines)
+        while True:
+            try:
+                line = next(lines)
+            except StopIteration:
+                return
+            except EOFError:
+                # Last gzip member cut off mid-write
+                return
+            if bad_line is not None:
+                raise json.JSONDecodeError(f"Invalid JSON line in conversation file: {self.path}",
+                                           bad_line.doc, bad_line.pos)
+            start, offset = offset, offset + len(line)
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                bad_line = e
+                continue
+            if isinstance(record, dict) and record.get('type') == HEADER_TYPE:
+                continue
+            yield start, record
+
+    def iter_messages(self) -> Iterator[Dict]:
+        """
+        Stream the messages in order
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+            json.JSONDecodeError: If a line other than the last is invalid
+        """
+        with self._open() as f:
+            for _, record in self._records(f):
+                yield record
+
+    def tail(self, n: int) -> List[Dict]:
+        """
+        The last `n` messages (oldest first)
+
+        Plain files are read backwards block by block, so the cost depends on
+        `n` and not on the length of the conversation.
+        """
+        return self._tail(n)[0]
+
+    def load_tail(self, n: int) -> List[Dict]:
+        """
+        The last `n` messages, with save() set up to append after them
+
+        A later save() (or rewrite) only touches these messages; the ones
+        before them stay in the file.
+        """
+        messages, self._prefix = self._tail(n)
+        self.mark_saved(messages)
+        return messages
+
+    def _tail(self, n: int) -> Tuple[List[Dict], int]:
+        """The last `n` messages and the (uncompressed) offset the first of them starts at"""
+        if self.compress:
+            window: deque = deque(maxlen=max(n, 0))
+            with self._open() as f:
+                window.extend(self._records(f))
+                end = f.tell()
+            if not window:
+                return [], end
+            return [record for _, record in window], window[0][0]
+
+        with open(self.path, 'rb') as f:
+            pos = f.seek(0, os.SEEK_END)
+            if n <= 0:
+                return [], pos
+            data = b""
+            while True:
+                # Read back until the window holds n full lines past a possibly cut-off first one
+                while pos > 0 and data.count(b"\n") <= n + 1:
+                    step = min(TAIL_BLOCK, pos)
+                    pos -= step
+                    f.seek(pos)
+                    data = f.read(step) + data
+                lines = data.split(b"\n")
+                start = pos
+                if pos > 0:
+                    start += len(lines[0]) + 1
+                    lines = lines[1:]
+                messages, first = self._last_records(lines, n)
+                if len(messages) >= n or pos == 0:
+                    return messages, start + sum(len(line) + 1 for line in lines[:first])
+                # Headers or blank lines took up the window - take another block
+                step = min(TAIL_BLOCK, pos)
+                pos -= step
+                f.seek(pos)
+                data = f.read(step) + data
+
+    def _last_records(self, lines: List[bytes], n: int) -> Tuple[List[Dict], int]:
+        """
+        Decode only as many lines from the end as it takes to find `n` messages
+
+        Returns:
+            The messages and the index in `lines` of the first one's line
+        """
+        messages: List[Dict] = []
+        first = len(lines)
+        last_line = True
+        for index in range(len(lines) - 1, -1, -1):
+            line = lines[index].strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                if last_line:
+                    last_line = False
+                    continue
+                raise json.JSONDecodeError(f"Invalid JSON line in conversation file: {self.path}", e.doc, e.pos)
+            last_line = False
+            if isinstance(record, dict) and record.get('type') == HEADER_TYPE:
+                continue
+            messages.append(record)
+            first = index
+            if len(messages) == n:
+                break
+        messages.reverse()
+        return messages, first
+
+
+def log_from_config(config: Dict, agent_name: str, session_id: str = "default") -> Optional[ConversationLog]:
+    """
+    The transcript log for an agent's `save_conversations` / `conversation_dir` config
+
+    Messages go to `<conversation_dir>/<session_id>.jsonl` (`.jsonl.gz` with
+    `compress_conversations`). Once that reaches `conversation_max_bytes`
+    (10 MB by default, 0 for no limit) it becomes `<session_id>.1.jsonl`,
+    replacing the previous one, and a new file is started.
+
+    Returns:
+        The log, or None when saving conversations is off
+    """
+    directory = config.get('conversation_dir')
+    if not config.get('save_conversations') or not directory:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    extension = '.jsonl.gz' if config.get('compress_conversations') else '.jsonl'
+    filename = re.sub(r'[^A-Za-z0-9_.-]', '_', session_id) + extension
+    max_bytes = config.get('conversation_max_bytes', DEFAULT_MAX_BYTES)
+    return ConversationLog(os.path.join(directory, filename), agent_name=agent_name, max_bytes=max_bytes or None)
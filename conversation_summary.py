@@ -0,0 +1,219 @@
+"""
+OG-AI Conversation Summary - Rolling summary of older turns to keep prompts small
+Once a conversation gets long, the older turns are summarized in the background
+(by the AI provider, or extractively when offline) and the summary is sent instead
+"""
+
+import os
+import re
+import threading
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Sequence
+
+from prompt_builder import count_tokens
+from search_index import tokenize
+
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+CODE_BLOCK = re.compile(r"```.*?```", re.DOTALL)
+
+# (previous_summary, transcript) -> new summary, or None/"" to fall back to extractive
+SummarizeFn = Callable[[str, str], Optional[str]]
+
+
+def format_transcript(messages: Sequence[Dict]) -> str:
+    """Turn messages into "role: content" lines with code blocks collapsed"""
+    return "\n".join(
+        f"{msg.get('role', 'user')}: {CODE_BLOCK.sub('[code]', msg.get('content', ''))}"
+        for msg in messages
+    )
+
+
+def extractive_summary(text: str, max_sentences: int = 8, max_sentence_chars: int = 300) -> str:
+    """
+    Summarize by picking the most informative sentences (no model needed)
+
+    Sentences are scored by how frequent their words are across the whole text,
+    normalized by length, and the best ones are kept in their original order.
+
+    Args:
+        text: Text to summarize (e.g. previous summary + transcript)
+        max_sentences: Most sentences to keep
+        max_sentence_chars: Longer sentences are cut to this many characters
+
+    Returns:
+        The summary
+    """
+    sentences = [s.strip()[:max_sentence_chars] for s in SENTENCE_SPLIT.split(text) if s.strip()]
+    if len(sentences) <= max_sentences:
+        return "\n".join(sentences)
+
+    frequencies = Counter(tokenize(text))
+    scores = []
+    for position, sentence in enumerate(sentences):
+        words = tokenize(sentence)
+        if not words:
+            continue
+        score = sum(frequencies[word] for word in set(words)) / (len(words) ** 0.5)
+        scores.append((score, position))
+
+    best = sorted(position for _, position in sorted(scores, reverse=True)[:max_sentences])
+    return "\n".join(sentences[position] for position in best)
+
+
+class RollingSummarizer:
+    """
+    Keeps a rolling summary of everything except the latest turns
+
+    When more than `threshold` messages haven't been summarized yet, all but the
+    last `keep_recent` of them are folded into the summary on a background
+    thread. Prompts then send the summary plus only the unsummarized messages.
+    """
+
+    def __init__(self, summarize_fn: Optional[SummarizeFn] = None, threshold: Optional[int] = None,
+                 keep_recent: Optional[int] = None, max_sentences: int = 8):
+        """
+        Initialize summarizer
+
+        Args:
+            summarize_fn: Provider-backed summarizer; extractive summary is used when it's
+                missing, fails or returns nothing
+            threshold: Unsummarized messages that trigger a summary (default: SUMMARY_THRESHOLD or 30)
+            keep_recent: Latest messages always kept verbatim (default: SUMMARY_KEEP_RECENT or 10)
+            max_sentences: Sentences in an extractive summary
+        """
+        self.summarize_fn = summarize_fn
+        self.threshold = threshold or int(os.getenv("SUMMARY_THRESHOLD", "30"))
+        self.keep_recent = keep_recent if keep_recent is not None else int(os.getenv("SUMMARY_KEEP_RECENT", "10"))
+        self.max_sentences = max_sentences
+
+        self.summary = ""
+        self.summarized_upto = 0
+        self._summarized_tokens = 0
+
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._generation = 0
+
+        self.stats = {
+            'summaries': 0,
+            'provider_summaries': 0,
+            'extractive_summaries': 0,
+            'provider_failures': 0,
+            'turns_summarized': 0,
+            'prompts_with_summary': 0,
+            'tokens_saved': 0
+        }
+
+    @property
+    def running(self) -> bool:
+        """Whether a summary is being made right now"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def maybe_summarize(self, history: Sequence[Dict], background: bool = True) -> bool:
+        """
+        Start summarizing older turns if enough have piled up
+
+        Args:
+            history: Full conversation history
+            background: Summarize on a daemon thread (False runs inline)
+
+        Returns:
+            True if a summary was started
+        """
+        with self._lock:
+            if self.running or len(history) - self.summarized_upto < self.threshold:
+                return False
+
+            end = len(history) - self.keep_recent
+            turns = list(history[self.summarized_upto:end])
+            previous = self.summary
+            generation = self._generation
+
+            if background:
+                self._thread = threading.Thread(
+                    target=self._summarize, args=(previous, turns, end, generation),
+                    name="og-ai-summarizer", daemon=True
+                )
+                self._thread.start()
+                return True
+
+        self._summarize(previous, turns, end, generation)
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for a running summary - returns False on timeout"""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+
+    def record_prompt(self, replaced: Optional[Sequence[Dict]] = None) -> int:
+        """
+        Count a prompt that sent the summary instead of the turns it covers
+
+        Args:
+            replaced: The summarized turns the prompt would have sent without the
+                summary (default: all of them - prompts that window their history
+                should pass only what the window would have kept)
+
+        Returns:
+            Tokens saved by this prompt
+        """
+        replaced_tokens = None
+        if replaced is not None:
+            replaced_tokens = sum(count_tokens(msg.get('content', '')) for msg in replaced)
+        with self._lock:
+            if not self.summary:
+                return 0
+            if replaced_tokens is None:
+                replaced_tokens = self._summarized_tokens
+            saved = max(replaced_tokens - count_tokens(self.summary), 0)
+            self.stats['prompts_with_summary'] += 1
+            self.stats['tokens_saved'] += saved
+            return saved
+
+    def reset(self) -> None:
+        """Forget the summary (e.g. when history is cleared or replaced)"""
+        with self._lock:
+            self._generation += 1
+            self.summary = ""
+            self.summarized_upto = 0
+            self._summarized_tokens = 0
+
+    def get_stats(self) -> Dict:
+        """Summary counters plus current state"""
+        with self._lock:
+            return {
+                **self.stats,
+                'summarized_upto': self.summarized_upto,
+                'summary_tokens': count_tokens(self.summary)
+            }
+
+    def _summarize(self, previous: str, turns: List[Dict], end: int, generation: int):
+        """Fold turns into the summary (runs on the summarizer thread)"""
+        transcript = format_transcript(turns)
+        summary = None
+        used_provider = False
+
+        if self.summarize_fn is not None:
+            try:
+                summary = self.summarize_fn(previous, transcript)
+                used_provider = bool(summary)
+            except Exception:
+                self.stats['provider_failures'] += 1
+
+        if not summary:
+            summary = extractive_summary(f"{previous}\n{transcript}", self.max_sentences)
+
+        turn_tokens = sum(count_tokens(msg.get('content', '')) for msg in turns)
+        with self._lock:
+            # History was cleared/replaced while we worked - drop the result
+            if generation != self._generation:
+                return
+            self.summary = summary.strip()
+            self.summarized_upto = end
+            self._summarized_tokens += turn_tokens
+            self.stats['summaries'] += 1
+            self.stats['turns_summarized'] += len(turns)
+            self.stats['provider_summaries' if used_provider else 'extractive_summaries'] += 1
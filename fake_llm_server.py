@@ -0,0 +1,413 @@
+"""
+OG-AI Fake LLM Server - Stand-in for OpenAI, Anthropic and Ollama in benchmarks
+Answers the chat endpoints the agent uses with canned replies after a
+configurable delay, so load tests measure our code and not a provider.
+Standard library only.
+
+Speaks each protocol both ways:
+    OpenAI     /v1/chat/completions   JSON, or SSE chunks with "stream": true
+    Anthropic  /v1/messages           JSON, or SSE events with "stream": true
+    Ollama     /api/chat              JSON, or NDJSON lines with "stream": true
+
+The delay before the first token is drawn from a latency distribution, the
+reply is then generated at a fixed token rate, and a fraction of calls can be
+answered with provider-shaped errors. Pass a seed for repeatable runs.
+Note that the OpenAI and Anthropic SDKs retry 429s and 5xx on their own.
+
+Point the clients at it with their base-URL env vars:
+    OPENAI_BASE_URL=http://127.0.0.1:8900/v1
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8900
+    OLLAMA_BASE_URL=http://127.0.0.1:8900
+
+Usage:
+    python fake_llm_server.py --port 8900 --latency 0.2 --jitter 0.05
+    python fake_llm_server.py --latency 0.3 --jitter 0.5 --distribution lognormal --tokens-per-second 50
+    python fake_llm_server.py --error-rate 0.05 --error-status 429 --seed 1
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional
+
+REPLY = "Aight bet, here's the deal fam - this reply came from the fake LLM server, no cap."
+
+# How `jitter` spreads the delay around `latency`:
+#   uniform      latency + U(0, jitter)
+#   normal       N(latency, jitter), clipped at 0
+#   lognormal    latency * e^N(0, jitter) - median `latency`, jitter is the log-space sigma (long tail)
+#   exponential  latency + Exp(mean jitter)
+DISTRIBUTIONS = ('uniform', 'normal', 'lognormal', 'exponential')
+
+ERROR_TYPES = {
+    400: ('invalid_request_error', 'invalid_request_error'),
+    401: ('authentication_error', 'authentication_error'),
+    429: ('rate_limit_error', 'rate_limit_error'),
+    500: ('server_error', 'api_error'),
+    503: ('server_error', 'overloaded_error'),
+    529: ('server_error', 'overloaded_error'),
+}
+
+
+def _count_tokens(text: str) -> int:
+    """Rough token count (4 characters per token)"""
+    return max(1, len(text) // 4)
+
+
+def _tokenize(text: str) -> List[str]:
+    """Split a reply into the pieces streamed one at a time (a word and its trailing space)"""
+    return re.findall(r'\S+\s*', text) or [text]
+
+
+class FakeLLMServer:
+    """
+    Fake provider API on a background thread
+
+    Serves OpenAI (/v1/chat/completions, /v1/models), Anthropic (/v1/messages)
+    and Ollama (/api/chat, /api/tags) with the same reply.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 jitter: float = 0.0, reply: str = REPLY, distribution: str = 'uniform',
+                 tokens_per_second: float = 0.0, error_rate: float = 0.0, error_status: int = 500,
+                 seed: Optional[int] = None):
+        """
+        Initialize fake server
+
+        Args:
+            host: Interface to bind
+            port: Port (0 picks a free one)
+            latency: Seconds to wait before the first token
+            jitter: Spread of that wait, see DISTRIBUTIONS
+            reply: Text every chat call returns
+            distribution: One of DISTRIBUTIONS
+            tokens_per_second: Generation speed after the first token (0 = instant)
+            error_rate: Fraction of chat calls answered with an error
+            error_status: HTTP status of injected errors (429, 500, 503, 529...)
+            seed: Seed for latency and error draws (None = random)
+        """
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"distribution must be one of {', '.join(DISTRIBUTIONS)}")
+        self.latency = latency
+        self.jitter = jitter
+        self.reply = reply
+        self.distribution = distribution
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.requests: Counter = Counter()
+        self.errors: Counter = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL, e.g. http://127.0.0.1:8900"""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def provider_env(self) -> Dict[str, str]:
+        """Env vars that point the OpenAI, Anthropic and Ollama clients here"""
+        return {
+            'OPENAI_BASE_URL': f"{self.url}/v1",
+            'ANTHROPIC_BASE_URL': self.url,
+            'OLLAMA_BASE_URL': self.url,
+            'OLLAMA_HOST': self.url,
+        }
+
+    def start(self) -> 'FakeLLMServer':
+        """Serve on a daemon thread"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Shut down and close the socket"""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> 'FakeLLMServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def sample_latency(self) -> float:
+        """Seconds before the first token, drawn from the configured distribution"""
+        with self._lock:
+            if not self.jitter:
+                delay = self.latency
+            elif self.distribution == 'normal':
+                delay = self._random.gauss(self.latency, self.jitter)
+            elif self.distribution == 'lognormal':
+                delay = self.latency * self._random.lognormvariate(0.0, self.jitter)
+            elif self.distribution == 'exponential':
+                delay = self.latency + self._random.expovariate(1.0 / self.jitter)
+            else:
+                delay = self.latency + self._random.uniform(0, self.jitter)
+        return max(delay, 0.0)
+
+    def _should_fail(self) -> bool:
+        if self.error_rate <= 0:
+            return False
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def _token_gap(self) -> float:
+        return 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def _generate(self) -> None:
+        """Wait as long as producing the whole reply takes (non-streaming calls)"""
+        delay = self.sample_latency() + self._token_gap() * len(_tokenize(self.reply))
+        if delay > 0:
+            time.sleep(delay)
+
+    def _stream_tokens(self) -> Iterator[str]:
+        """Yield the reply token by token, first after the sampled latency, then at the token rate"""
+        delay = self.sample_latency()
+        if delay > 0:
+            time.sleep(delay)
+        gap = self._token_gap()
+        for n, token in enumerate(_tokenize(self.reply)):
+            if n and gap:
+                time.sleep(gap)
+            yield token
+
+    # OpenAI
+
+    def _openai(self, body: Dict) -> Dict:
+        prompt_tokens = _count_tokens(json.dumps(body.get('messages', [])))
+        completion_tokens = len(_tokenize(self.reply))
+        return {
+            'id': f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'fake'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': self.reply},
+                         'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                      'total_tokens': prompt_tokens + completion_tokens,
+                      'prompt_tokens_details': {'cached_tokens': 0}},
+        }
+
+    def _openai_stream(self, body: Dict) -> Iterator[bytes]:
+        chunk = {'id': f"chatcmpl-{uuid.uuid4().hex[:12]}", 'object': 'chat.completion.chunk',
+                 'created': int(time.time()), 'model': body.get('model', 'fake')}
+
+        def event(choices: List[Dict], **extra) -> bytes:
+            return f"data: {json.dumps({**chunk, 'choices': choices, **extra})}\n\n".encode()
+
+        yield event([{'index': 0, 'delta': {'role': 'assistant', 'content': ''}, 'finish_reason': None}])
+        completion_tokens = 0
+        for token in self._stream_tokens():
+            completion_tokens += 1
+            yield event([{'index': 0, 'delta': {'content': token}, 'finish_reason': None}])
+        yield event([{'index': 0, 'delta': {}, 'finish_reason': 'stop'}])
+        if (body.get('stream_options') or {}).get('include_usage'):
+            prompt_tokens = _count_tokens(json.dumps(body.get('messages', [])))
+            yield event([], usage={'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                                   'total_tokens': prompt_tokens + completion_tokens})
+        yield b"data: [DONE]\n\n"
+
+    def _openai_error(self, status: int) -> Dict:
+        error_type = ERROR_TYPES.get(status, ERROR_TYPES[500])[0]
+        return {'error': {'message': f"Injected error ({status})", 'type': error_type,
+                          'param': None, 'code': None}}
+
+    # Anthropic
+
+    def _anthropic(self, body: Dict) -> Dict:
+        prompt = json.dumps(body.get('messages', [])) + json.dumps(body.get('system', ''))
+        return {
+            'id': f"msg_{uuid.uuid4().hex[:12]}",
+            'type': 'message',
+            'role': 'assistant',
+            'model': body.get('model', 'fake'),
+            'content': [{'type': 'text', 'text': self.reply}],
+            'stop_reason': 'end_turn',
+            'stop_sequence': None,
+            'usage': {'input_tokens': _count_tokens(prompt), 'output_tokens': len(_tokenize(self.reply)),
+                      'cache_read_input_tokens': 0, 'cache_creation_input_tokens': 0},
+        }
+
+    def _anthropic_stream(self, body: Dict) -> Iterator[bytes]:
+        def event(name: str, data: Dict) -> bytes:
+            return f"event: {name}\ndata: {json.dumps({'type': name, **data})}\n\n".encode()
+
+        message = self._anthropic(body)
+        message.update(content=[], stop_reason=None)
+        message['usage'] = {**message['usage'], 'output_tokens': 1}
+        yield event('message_start', {'message': message})
+        yield event('content_block_start', {'index': 0, 'content_block': {'type': 'text', 'text': ''}})
+        yield event('ping', {})
+        output_tokens = 0
+        for token in self._stream_tokens():
+            output_tokens += 1
+            yield event('content_block_delta', {'index': 0, 'delta': {'type': 'text_delta', 'text': token}})
+        yield event('content_block_stop', {'index': 0})
+        yield event('message_delta', {'delta': {'stop_reason': 'end_turn', 'stop_sequence': None},
+                                      'usage': {'output_tokens': output_tokens}})
+        yield event('message_stop', {})
+
+    def _anthropic_error(self, status: int) -> Dict:
+        error_type = ERROR_TYPES.get(status, ERROR_TYPES[500])[1]
+        return {'type': 'error', 'error': {'type': error_type, 'message': f"Injected error ({status})"}}
+
+    # Ollama
+
+    def _ollama(self, body: Dict) -> Dict:
+        return {
+            'model': body.get('model', 'fake'),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'message': {'role': 'assistant', 'content': self.reply},
+            'done': True,
+            'done_reason': 'stop',
+            'prompt_eval_count': _count_tokens(json.dumps(body.get('messages', []))),
+            'eval_count': len(_tokenize(self.reply)),
+        }
+
+    def _ollama_stream(self, body: Dict) -> Iterator[bytes]:
+        start = time.perf_counter_ns()
+        eval_count = 0
+        for token in self._stream_tokens():
+            eval_count += 1
+            yield (json.dumps({'model': body.get('model', 'fake'),
+                               'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                               'message': {'role': 'assistant', 'content': token},
+                               'done': False}) + "\n").encode()
+        final = self._ollama(body)
+        final.update(message={'role': 'assistant', 'content': ''}, eval_count=eval_count,
+                     total_duration=time.perf_counter_ns() - start)
+        yield (json.dumps(final) + "\n").encode()
+
+    def _ollama_error(self, status: int) -> Dict:
+        return {'error': f"Injected error ({status})"}
+
+    def _protocols(self) -> Dict[str, Dict]:
+        """Chat route -> how to answer it"""
+        return {
+            "/v1/chat/completions": {'reply': self._openai, 'stream': self._openai_stream,
+                                     'error': self._openai_error, 'content_type': "text/event-stream"},
+            "/v1/messages": {'reply': self._anthropic, 'stream': self._anthropic_stream,
+                             'error': self._anthropic_error, 'content_type': "text/event-stream"},
+            "/api/chat": {'reply': self._ollama, 'stream': self._ollama_stream,
+                          'error': self._ollama_error, 'content_type': "application/x-ndjson"},
+        }
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, payload: Dict, headers: Optional[Dict[str, str]] = None) -> None:
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_stream(self, content_type: str, chunks: Iterator[bytes]) -> None:
+                """Chunked response, each piece flushed as soon as it's produced"""
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for chunk in chunks:
+                    self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+                    self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _body(self) -> Dict:
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    return json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    return {}
+
+            def do_GET(self):
+                path = self.path.split('?')[0]
+                with server._lock:
+                    server.requests[path] += 1
+                if path == "/v1/models":
+                    self._send(200, {'object': 'list', 'data': [{'id': 'fake', 'object': 'model'}]})
+                elif path == "/api/tags":
+                    self._send(200, {'models': [{'name': 'fake', 'model': 'fake'}]})
+                elif path == "/":
+                    self._send(200, {'status': 'ok'})
+                else:
+                    self._send(404, {'error': f"no route {path}"})
+
+            def do_POST(self):
+                path = self.path.split('?')[0]
+                body = self._body()
+                with server._lock:
+                    server.requests[path] += 1
+                protocol = server._protocols().get(path)
+                if protocol is None:
+                    self._send(404, {'error': f"no route {path}"})
+                    return
+                if server._should_fail():
+                    with server._lock:
+                        server.errors[path] += 1
+                    status = server.error_status
+                    self._send(status, protocol['error'](status), {'Retry-After': "1"} if status == 429 else None)
+                    return
+                # Ollama streams by default; its Python client always says which it wants
+                if body.get('stream'):
+                    self._send_stream(protocol['content_type'], protocol['stream'](body))
+                else:
+                    server._generate()
+                    self._send(200, protocol['reply'](body))
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI/Anthropic/Ollama server for load tests")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--latency', type=float, default=0.2, help='Seconds before the first token')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Spread of the latency (see --distribution)')
+    parser.add_argument('--distribution', choices=DISTRIBUTIONS, default='uniform')
+    parser.add_argument('--tokens-per-second', type=float, default=0.0, help='Generation speed (0 = instant)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of chat calls that fail')
+    parser.add_argument('--error-status', type=int, default=500, help='HTTP status of injected errors')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for repeatable latencies and errors')
+    args = parser.parse_args()
+
+    server = FakeLLMServer(args.host, args.port, latency=args.latency, jitter=args.jitter,
+                           distribution=args.distribution, tokens_per_second=args.tokens_per_second,
+                           error_rate=args.error_rate, error_status=args.error_status, seed=args.seed)
+    print(f"Fake LLM server on {server.url} ({args.distribution} latency {args.latency}s ~{args.jitter}, "
+          f"{args.tokens_per_second or 'instant'} tokens/s, {args.error_rate:.0%} errors)")
+    for name, value in server.provider_env().items():
+        print(f"  {name}={value}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+OG-AI Fast JSON - Response class for big payloads we build ourselves
+Returning one of these from an endpoint skips FastAPI's response_model
+re-validation and jsonable_encoder pass; orjson does the encoding when it's
+installed (several times faster than json.dumps), plain json otherwise.
+"""
+
+import json
+from typing import Any
+
+from starlette.responses import JSONResponse
+
+from lazy_imports import optional_import
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode to compact UTF-8 JSON (same output as Starlette's JSONResponse)
+
+    Args:
+        content: JSON-compatible data (numpy arrays and non-str dict keys work with orjson)
+
+    Returns:
+        The encoded bytes
+    """
+    orjson = optional_import("orjson")
+    if orjson is not None:
+        return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None,
+                      separators=(",", ":"), default=str).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse encoded with orjson when available
+
+    Only return it with data that's already in its final shape - nothing gets
+    validated against the endpoint's response_model.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,369 @@
+"""
+OG-AI Job Scheduler - One background scheduler per process, one leader across workers
+Runs periodic jobs (hourly learning, daily self-improvement) on an asyncio loop in a
+single daemon thread, with jitter, a file lock so only one gunicorn worker runs them,
+and per-job metrics
+"""
+
+import asyncio
+import inspect
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+
+class FileLock:
+    """
+    Non-blocking exclusive lock on a file - works across processes
+    Uses flock on Unix and msvcrt.locking on Windows
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize file lock
+
+        Args:
+            path: Lock file path (created if missing)
+        """
+        self.path = path
+        self._file = None
+
+    @property
+    def held(self) -> bool:
+        """Whether this instance holds the lock"""
+        return self._file is not None
+
+    def acquire(self, blocking: bool = False) -> bool:
+        """
+        Take the lock
+
+        Args:
+            blocking: Wait for another holder to release it instead of giving up
+                (on Windows msvcrt gives up after about 10 seconds)
+
+        Returns:
+            True if we hold the lock now, False if someone else has it
+        """
+        if self._file is not None:
+            return True
+
+        lock_file = open(self.path, 'a+')
+        try:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+        except OSError:
+            lock_file.close()
+            return False
+
+        self._file = lock_file
+        return True
+
+    def release(self) -> None:
+        """Release the lock if we hold it"""
+        if self._file is None:
+            return
+
+        try:
+            if fcntl:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
+
+
+class Job:
+    """A periodic job and its metrics"""
+
+    def __init__(self, name: str, func: Callable, interval: Optional[float] = None,
+                 daily_at: Optional[str] = None, jitter: float = 0.1):
+        """
+        Initialize job
+
+        Args:
+            name: Unique job name - adding a job with the same name replaces it
+            func: Sync or async callable with no arguments
+            interval: Seconds between runs
+            daily_at: "HH:MM" local time to run once a day (instead of interval)
+            jitter: Random spread as a fraction of the delay (0.1 = +/-10%)
+        """
+        if interval is None and daily_at is None:
+            raise ValueError("Job needs an interval or a daily_at time")
+
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.daily_at = daily_at
+        self.jitter = jitter
+        self.task: Optional[asyncio.Task] = None
+
+        self.metrics = {
+            'runs': 0,
+            'failures': 0,
+            'skipped_not_leader': 0,
+            'last_run': None,
+            'last_duration': None,
+            'total_duration': 0.0,
+            'last_error': None,
+            'next_run': None
+        }
+
+    def next_delay(self, now: Optional[datetime] = None) -> float:
+        """Seconds until the next run, with jitter applied"""
+        if self.daily_at:
+            now = now or datetime.now()
+            hour, minute = (int(part) for part in self.daily_at.split(':'))
+            target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            if target <= now:
+                target += timedelta(days=1)
+            delay = (target - now).total_seconds()
+            # Only spread daily jobs forward, and by at most a few minutes
+            return delay + random.uniform(0, min(delay, 300) * self.jitter)
+
+        return self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+
+class JobScheduler:
+    """
+    Process-wide asyncio job scheduler
+
+    Jobs run on an event loop in one daemon thread; blocking jobs go to a small
+    thread pool so they never stall the loop. Only the process holding the
+    leader lock file runs jobs, so multiple gunicorn workers don't all do the
+    same hourly work.
+    """
+
+    def __init__(self, name: str = "og_ai_scheduler", lock_dir: Optional[str] = None, max_workers: int = 2):
+        """
+        Initialize scheduler
+
+        Args:
+            name: Scheduler name, used for the leader lock file
+            lock_dir: Directory for the lock file (default: OG_AI_LOCK_DIR or the temp dir)
+            max_workers: Threads available to blocking jobs
+        """
+        lock_dir = lock_dir or os.getenv("OG_AI_LOCK_DIR", tempfile.gettempdir())
+        self.leader_lock = FileLock(os.path.join(lock_dir, f"{name}.lock"))
+
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="og-ai-job")
+
+    @property
+    def running(self) -> bool:
+        """Whether the scheduler thread is running"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def add_job(self, name: str, func: Callable, interval: Optional[float] = None,
+                daily_at: Optional[str] = None, jitter: float = 0.1) -> Job:
+        """
+        Register a periodic job (replaces any job with the same name)
+
+        Args:
+            name: Unique job name
+            func: Sync or async callable with no arguments
+            interval: Seconds between runs
+            daily_at: "HH:MM" local time to run once a day
+            jitter: Random spread as a fraction of the delay
+
+        Returns:
+            The registered Job
+        """
+        job = Job(name, func, interval=interval, daily_at=daily_at, jitter=jitter)
+
+        with self._lock:
+            old_job = self._jobs.get(name)
+            self._jobs[name] = job
+            loop = self._loop
+
+        if loop is not None:
+            loop.call_soon_threadsafe(self._schedule_job, job, old_job)
+
+        return job
+
+    def remove_job(self, name: str) -> bool:
+        """Unregister a job - returns False if there was no such job"""
+        with self._lock:
+            job = self._jobs.pop(name, None)
+            loop = self._loop
+
+        if job and loop is not None:
+            loop.call_soon_threadsafe(self._cancel_job, job)
+
+        return job is not None
+
+    def start(self) -> None:
+        """Start the scheduler thread (no-op if already running)"""
+        with self._lock:
+            if self.running:
+                return
+
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run_loop, name="og-ai-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Cancel all jobs, stop the thread and give up leadership"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = None
+            self._thread = None
+
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout)
+
+        self.leader_lock.release()
+
+    def is_leader(self) -> bool:
+        """Try to become (or stay) the process that runs jobs"""
+        return self.leader_lock.acquire()
+
+    def run_now(self, name: str) -> bool:
+        """
+        Run a job right away in the calling thread (ignores leadership)
+
+        Returns:
+            True if the job ran without raising
+        """
+        with self._lock:
+            job = self._jobs[name]
+        return self._execute_blocking(job)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Scheduler state plus per-job metrics"""
+        with self._lock:
+            jobs = {name: dict(job.metrics) for name, job in self._jobs.items()}
+
+        return {
+            'running': self.running,
+            'leader': self.leader_lock.held,
+            'jobs': jobs
+        }
+
+    def _run_loop(self):
+        """Scheduler thread - run the event loop until stopped"""
+        loop = self._loop
+        asyncio.set_event_loop(loop)
+
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            self._schedule_job(job)
+
+        try:
+            loop.run_forever()
+        finally:
+            for task in asyncio.all_tasks(loop):
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*asyncio.all_tasks(loop), return_exceptions=True))
+            loop.close()
+            # The tasks died with this loop - the next start() schedules every job again
+            with self._lock:
+                for job in self._jobs.values():
+                    if job.task is not None and job.task.get_loop() is loop:
+                        job.task = None
+
+    def _schedule_job(self, job: Job, old_job: Optional[Job] = None):
+        """Start the job's task on the loop (runs on the scheduler thread)"""
+        self._cancel_job(old_job)
+        # A job added right after start() is both in _run_loop's snapshot and
+        # queued by add_job - whichever comes second finds it already running
+        if job.task is None or job.task.done():
+            job.task = self._loop.create_task(self._job_loop(job))
+
+    def _cancel_job(self, job: Optional[Job]):
+        """Cancel a job's task if it has one (runs on the scheduler thread)"""
+        if job is not None and job.task is not None:
+            job.task.cancel()
+
+    async def _job_loop(self, job: Job):
+        """Sleep until each run, then run the job if we're the leader"""
+        while True:
+            delay = job.next_delay()
+            job.metrics['next_run'] = (datetime.now() + timedelta(seconds=delay)).isoformat()
+            await asyncio.sleep(delay)
+
+            if not self.is_leader():
+                job.metrics['skipped_not_leader'] += 1
+                continue
+
+            await self._execute(job)
+
+    async def _execute(self, job: Job):
+        """Run a job once, off the loop if it's blocking, and record metrics"""
+        start = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(job.func):
+                await job.func()
+            else:
+                await asyncio.get_running_loop().run_in_executor(self._executor, job.func)
+            self._record(job, start, None)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Background job {job.name} failed: {e}")
+            self._record(job, start, e)
+
+    def _execute_blocking(self, job: Job) -> bool:
+        """Run a job once in the calling thread and record metrics"""
+        start = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(job.func):
+                asyncio.run(job.func())
+            else:
+                job.func()
+            self._record(job, start, None)
+            return True
+        except Exception as e:
+            logger.error(f"Background job {job.name} failed: {e}")
+            self._record(job, start, e)
+            return False
+
+    def _record(self, job: Job, start: float, error: Optional[Exception]):
+        """Update job metrics after a run"""
+        duration = time.perf_counter() - start
+        with self._lock:
+            job.metrics['runs'] += 1
+            job.metrics['last_run'] = datetime.now().isoformat()
+            job.metrics['last_duration'] = duration
+            job.metrics['total_duration'] += duration
+            if error is not None:
+                job.metrics['failures'] += 1
+                job.metrics['last_error'] = str(error)
+
+
+# Process-wide scheduler instance
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> JobScheduler:
+    """Get or create the process-wide job scheduler"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = JobScheduler()
+        return _scheduler
@@ -0,0 +1,43 @@
+"""
+OG-AI Lazy Imports - Load heavy optional packages the first time they're needed
+Keeps module import (and gunicorn worker boot) fast - no SDK gets loaded until a feature uses it
+"""
+
+import importlib
+import importlib.util
+from functools import lru_cache
+from types import ModuleType
+from typing import Optional
+
+
+@lru_cache(maxsize=None)
+def optional_import(module_name: str) -> Optional[ModuleType]:
+    """
+    Import a module on first use and cache the result
+
+    Args:
+        module_name: Dotted module name, e.g. 'openai' or 'duckduckgo_search'
+
+    Returns:
+        The module, or None if it isn't installed (also cached, so we only try once)
+    """
+    try:
+        return importlib.import_module(module_name)
+    except ImportError:
+        return None
+
+
+def is_installed(module_name: str) -> bool:
+    """
+    Check if a module is installed without importing it
+
+    Args:
+        module_name: Dotted module name
+
+    Returns:
+        True if the module can be imported
+    """
+    try:
+        return importlib.util.find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        return False
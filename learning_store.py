@@ -0,0 +1,233 @@
+"""
+OG-AI Learning Store - Bounded, deduplicated store for things learned from the internet
+Entries are appended to a JSONL file as they're learned (no full rewrite every hour),
+duplicates are dropped by URL and content hash, old entries are evicted, and
+everything in the store is full-text searchable
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+from search_index import BM25Index
+
+logger = logging.getLogger(__name__)
+
+
+class InternetLearningStore:
+    """
+    Append-only store of internet learnings with dedup and a size cap
+
+    Entries are kept in memory oldest-first, so the latest ones can be read
+    without touching the rest. The JSONL file only gets rewritten (compacted)
+    once evicted entries make up most of it.
+    """
+
+    def __init__(self, path: str = "og_ai_learnings.jsonl", max_entries: Optional[int] = None,
+                 max_age_days: Optional[float] = None):
+        """
+        Initialize learning store
+
+        Args:
+            path: JSONL file to persist learnings to
+            max_entries: Most entries to keep (default: OG_AI_MAX_LEARNINGS or 5000)
+            max_age_days: Drop entries older than this (default: OG_AI_LEARNING_MAX_AGE_DAYS or 30)
+        """
+        self.path = path
+        self.max_entries = max_entries or int(os.getenv("OG_AI_MAX_LEARNINGS", "5000"))
+        self.max_age_days = max_age_days or float(os.getenv("OG_AI_LEARNING_MAX_AGE_DAYS", "30"))
+
+        # dedup key -> entry, oldest first
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._url_keys: Dict[str, str] = {}
+        self._index = BM25Index()
+        self._lock = threading.RLock()
+        self._file_lines = 0
+
+        self.stats = {'added': 0, 'duplicates': 0, 'evicted': 0, 'compactions': 0}
+
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Dict]:
+        with self._lock:
+            return iter(list(self._entries.values()))
+
+    @staticmethod
+    def normalize_url(url: Optional[str]) -> Optional[str]:
+        """Normalize a URL for dedup (lowercase host, no fragment, no trailing slash)"""
+        if not url:
+            return None
+        parts = urlsplit(url.strip())
+        path = parts.path.rstrip('/') or '/'
+        return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, parts.query, ''))
+
+    @staticmethod
+    def content_hash(entry: Dict) -> str:
+        """Hash of an entry's title and snippet, ignoring case and whitespace"""
+        text = f"{entry.get('title') or ''}\n{entry.get('snippet') or ''}"
+        text = " ".join(text.lower().split())
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def add_many(self, learnings: Iterable[Dict]) -> List[Dict]:
+        """
+        Add learnings, skipping ones we already have
+
+        Args:
+            learnings: Dicts with topic, title, snippet, url, learned_at
+
+        Returns:
+            The entries that were actually new
+        """
+        added = []
+        with self._lock:
+            for entry in learnings:
+                if self._insert(entry):
+                    added.append(entry)
+                else:
+                    self.stats['duplicates'] += 1
+
+            evicted = self._evict()
+            self.stats['added'] += len(added)
+
+            if evicted and self._file_lines > 2 * max(len(self._entries), 1):
+                self._compact()
+            elif added:
+                self._append(added)
+
+        return added
+
+    def add(self, entry: Dict) -> bool:
+        """Add one learning - returns False if it was a duplicate"""
+        return bool(self.add_many([entry]))
+
+    def latest(self, n: int = 5) -> List[Dict]:
+        """The n most recent entries, oldest first"""
+        with self._lock:
+            newest = list(islice(reversed(self._entries.values()), n))
+        newest.reverse()
+        return newest
+
+    def search(self, query: str, k: int = 3, min_match: float = 0.34) -> List[Dict]:
+        """
+        Full-text search over learned titles and snippets
+
+        Args:
+            query: Free text, e.g. the user's message
+            k: Most entries to return
+            min_match: Fraction of the query's words an entry needs to count as relevant
+
+        Returns:
+            Matching entries, best first
+        """
+        with self._lock:
+            hits = self._index.search(query, k=k, min_match=min_match)
+            return [self._entries[key] for key, _ in hits]
+
+    def get_stats(self) -> Dict:
+        """Store size and counters"""
+        with self._lock:
+            return {**self.stats, 'entries': len(self._entries), 'file_lines': self._file_lines}
+
+    def import_legacy(self, learnings: List[Dict]) -> int:
+        """
+        Import learnings from the old og_ai_knowledge_base.json list
+
+        Returns:
+            Number of entries imported
+        """
+        ordered = sorted(learnings, key=lambda entry: entry.get('learned_at') or '')
+        return len(self.add_many(ordered))
+
+    def _insert(self, entry: Dict) -> bool:
+        """Add an entry to the in-memory index (no persistence)"""
+        key = self.content_hash(entry)
+        url = self.normalize_url(entry.get('url'))
+        if key in self._entries or (url and url in self._url_keys):
+            return False
+
+        self._entries[key] = entry
+        self._index.add(key, f"{entry.get('title') or ''} {entry.get('snippet') or ''}")
+        if url:
+            self._url_keys[url] = key
+        return True
+
+    def _remove_oldest(self):
+        """Drop the oldest entry from the in-memory index"""
+        key, entry = self._entries.popitem(last=False)
+        self._index.remove(key)
+        url = self.normalize_url(entry.get('url'))
+        if url and self._url_keys.get(url) == key:
+            del self._url_keys[url]
+
+    def _evict(self) -> int:
+        """Drop entries past the age limit or over the size cap - returns how many"""
+        cutoff = (datetime.now() - timedelta(days=self.max_age_days)).isoformat()
+        evicted = 0
+
+        while self._entries:
+            oldest = next(iter(self._entries.values()))
+            too_old = (oldest.get('learned_at') or '') < cutoff
+            if not too_old and len(self._entries) <= self.max_entries:
+                break
+            self._remove_oldest()
+            evicted += 1
+
+        self.stats['evicted'] += evicted
+        return evicted
+
+    def _load(self):
+        """Rebuild the index from the JSONL file"""
+        if not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    self._file_lines += 1
+                    try:
+                        self._insert(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue
+        except OSError as e:
+            logger.warning(f"Failed to load learnings: {e}")
+            return
+
+        self._evict()
+        if self._file_lines > 2 * max(len(self._entries), 1):
+            self._compact()
+
+    def _append(self, entries: List[Dict]):
+        """Append new entries to the JSONL file"""
+        try:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                for entry in entries:
+                    f.write(json.dumps(entry) + "\n")
+            self._file_lines += len(entries)
+        except OSError as e:
+            logger.error(f"Failed to save learnings: {e}")
+
+    def _compact(self):
+        """Rewrite the JSONL file with only the live entries"""
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for entry in self._entries.values():
+                    f.write(json.dumps(entry) + "\n")
+            os.replace(tmp_path, self.path)
+            self._file_lines = len(self._entries)
+            self.stats['compactions'] += 1
+        except OSError as e:
+            logger.error(f"Failed to compact learnings: {e}")
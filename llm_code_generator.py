@@ -4,9 +4,12 @@ Generates complete, production-ready code using AI models
 Keeps it gangster while being smart as fuck
 """
 
+import io
+import itertools
 import os
 import re
-from typing import Dict, List, Optional, Tuple
+import zipfile
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from datetime import datetime
 
 
@@ -421,7 +424,7 @@ export default {{ComponentName}};
             ComponentName=component_name.replace(' ', ''),
             description=description,
             props=props,
-            component-name=component_class
+            **{'component-name': component_class}
         )
         
         return code
@@ -500,6 +503,13 @@ export default {{ComponentName}};
         if not request:
             return None, None
         
+        return self._render_request(request)
+    
+    def _render_request(self, request: Dict) -> Tuple[Optional[str], str]:
+        """
+        Render the main code file for a detected request
+        Returns (code, explanation)
+        """
         code = None
         explanation = ""
         
@@ -547,6 +557,137 @@ export default {{ComponentName}};
                          f"Drop this in your React project and you're good to go!"
         
         return code, explanation
+    
+    # Main file name for each request type inside a generated project
+    PROJECT_MAIN_FILES = {
+        'api': 'main.py',
+        'cli': 'cli.py',
+        'scraper': 'scraper.py',
+        'react': 'Component.jsx'
+    }
+    
+    # Supporting files shipped next to the main file
+    PROJECT_EXTRA_FILES = {
+        'api': {
+            'requirements.txt': "fastapi>=0.109.1\nuvicorn[standard]>=0.24.0\npydantic>=2.0.0\n"
+        },
+        'scraper': {
+            'requirements.txt': "requests>=2.28.0\nbeautifulsoup4>=4.12.0\n"
+        }
+    }
+    
+    # Max characters per streamed chunk
+    PROJECT_CHUNK_SIZE = 4096
+    
+    def generate_project_from_request(self, message: str) -> Iterator[Tuple[str, str]]:
+        """
+        Generate a multi-file project for the user request, streamed as (path, chunk)
+        Yields nothing if the request isn't a code generation request
+        """
+        request = self.detect_generation_request(message)
+        
+        if not request:
+            return
+        
+        yield from self.iter_project_files(request)
+    
+    def iter_project_files(self, request: Dict) -> Iterator[Tuple[str, str]]:
+        """
+        Yield (path, chunk) pairs for a detected request, one file after another
+        Only the file being streamed is held in memory, never the whole project
+        """
+        code, explanation = self._render_request(request)
+        if code is None:
+            return
+        
+        root = self._project_root(request)
+        
+        yield from self._chunk_file(f"{root}/README.md", f"# {request['name']}\n\n{explanation}\n")
+        
+        main_file = self.PROJECT_MAIN_FILES.get(request['type'], 'main.py')
+        if request['type'] == 'react':
+            main_file = f"{request['name'].replace(' ', '')}.jsx"
+        yield from self._chunk_file(f"{root}/{main_file}", code)
+        del code
+        
+        for filename, content in self.PROJECT_EXTRA_FILES.get(request['type'], {}).items():
+            yield from self._chunk_file(f"{root}/{filename}", content)
+    
+    def _project_root(self, request: Dict) -> str:
+        """Folder name for a generated project"""
+        slug = re.sub(r'[^a-z0-9]+', '_', request['name'].lower()).strip('_')
+        return slug or 'project'
+    
+    def _chunk_file(self, path: str, content: str) -> Iterator[Tuple[str, str]]:
+        """Split one file into PROJECT_CHUNK_SIZE pieces"""
+        for start in range(0, len(content), self.PROJECT_CHUNK_SIZE):
+            yield path, content[start:start + self.PROJECT_CHUNK_SIZE]
+
+
+class _ZipStreamBuffer(io.RawIOBase):
+    """
+    Unseekable sink for zipfile - bytes get drained and sent as soon as they're written
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+    
+    def tell(self) -> int:
+        return self._position
+    
+    def drain(self) -> bytes:
+        """Return everything written since the last drain"""
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_project_zip(files: Iterable[Tuple[str, str]]) -> Iterator[bytes]:
+    """
+    Build a zip archive on the fly from (path, chunk) pairs
+    
+    Consecutive chunks with the same path go into the same archive entry.
+    Compressed bytes are yielded as they're produced, so the archive is
+    never held in memory as a whole.
+    
+    Args:
+        files: (path, chunk) pairs, e.g. from LLMCodeGenerator.generate_project_from_request
+        
+    Yields:
+        Raw zip archive bytes
+    """
+    buffer = _ZipStreamBuffer()
+    
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for path, chunks in itertools.groupby(files, key=lambda item: item[0]):
+            info = zipfile.ZipInfo(path, date_time=datetime.now().timetuple()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            
+            with archive.open(info, 'w') as entry:
+                for _, chunk in chunks:
+                    entry.write(chunk.encode('utf-8'))
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            
+            data = buffer.drain()
+            if data:
+                yield data
+    
+    # Closing the archive writes the central directory
+    data = buffer.drain()
+    if data:
+        yield data
 
 
 # Singleton instance
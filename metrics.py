@@ -0,0 +1,282 @@
+"""
+OG-AI Metrics - Prometheus text-format metrics for /metrics
+Counters and histograms are per-worker and lock-free on the hot path (each
+thread adds into its own shard, scrapes add the shards up). Gauges that come
+from existing stats (cache hit ratios, history size...) are only computed when
+/metrics is scraped. No prometheus_client needed - render() returns the text.
+"""
+
+import asyncio
+import math
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from request_timing import Histogram, get_timing_stats
+
+# Seconds - same bounds as the span histograms (which are in ms)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _histogram_samples(name: str, labels: Dict[str, str], buckets: Sequence[float],
+                       counts: List[int], total: float, divisor: float = 1) -> List[Sample]:
+    """Cumulative _bucket samples plus _sum and _count (`divisor` converts e.g. ms to seconds)"""
+    samples = []
+    cumulative = 0
+    for bound, count in zip(list(buckets) + [math.inf], counts):
+        cumulative += count
+        samples.append((f"{name}_bucket", {**labels, 'le': _format_value(bound / divisor)}, cumulative))
+    samples.append((f"{name}_sum", labels, total / divisor))
+    samples.append((f"{name}_count", labels, cumulative))
+    return samples
+
+
+class _Shards:
+    """A float that every thread adds to without locking (one cell per thread)"""
+
+    __slots__ = ('_local', '_cells')
+
+    def __init__(self):
+        self._local = threading.local()
+        self._cells: List[List[float]] = []
+
+    def add(self, amount: float) -> None:
+        cell = getattr(self._local, 'cell', None)
+        if cell is None:
+            cell = self._local.cell = [0.0]
+            self._cells.append(cell)  # list.append is atomic
+        cell[0] += amount
+
+    def value(self) -> float:
+        return sum(cell[0] for cell in list(self._cells))
+
+
+class _Metric(ABC):
+    """Base for labelled metrics - one child per label value combination"""
+
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _new_child(self):
+        """A fresh child holding one label combination's value"""
+
+    def labels(self, *values: str):
+        """The child for these label values (created on first use)"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _label_dict(self, values: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+
+class Counter(_Metric):
+    """Monotonic counter"""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name if name.endswith("_total") else f"{name}_total", documentation, labelnames)
+
+    def _new_child(self):
+        return _Shards()
+
+    def inc(self, amount: float = 1, *labels: str) -> None:
+        """Add to the counter (label values after the amount)"""
+        self.labels(*labels).add(amount)
+
+    def collect(self) -> List[Sample]:
+        return [(self.name, self._label_dict(values), child.value())
+                for values, child in list(self._children.items())]
+
+
+class HistogramMetric(_Metric):
+    """Histogram with fixed buckets (in seconds)"""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def _new_child(self):
+        return Histogram(self.buckets)
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Record a value (label values after it)"""
+        self.labels(*labels).observe(value)
+
+    def collect(self) -> List[Sample]:
+        samples = []
+        for values, child in list(self._children.items()):
+            counts, total = child.snapshot()
+            samples.extend(_histogram_samples(self.name, self._label_dict(values), self.buckets, counts, total))
+        return samples
+
+
+class Registry:
+    """Metrics plus callbacks that produce samples at scrape time"""
+
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+        self.collectors: List[Tuple[str, str, str, Callable[[], Iterable[Sample]]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> HistogramMetric:
+        return self.register(HistogramMetric(name, documentation, labelnames, buckets))
+
+    def add_collector(self, name: str, type_: str, documentation: str,
+                      collect: Callable[[], Iterable[Sample]]) -> None:
+        """
+        Add a metric family computed on each scrape
+
+        Args:
+            name: Family name
+            type_: 'gauge', 'counter' or 'histogram'
+            documentation: HELP text
+            collect: Returns (sample name, labels, value) tuples
+        """
+        self.collectors.append((name, type_, documentation, collect))
+
+    def render(self) -> str:
+        """Everything in the Prometheus text exposition format (0.0.4)"""
+        families = [(metric.name, metric.type, metric.documentation, metric.collect) for metric in self.metrics]
+        lines = []
+        for name, type_, documentation, collect in families + self.collectors:
+            try:
+                samples = list(collect())
+            except Exception as e:
+                # One broken collector shouldn't take the whole scrape down
+                lines.append(f"# {name} collection failed: {_escape(e)}")
+                continue
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {type_}")
+            for sample_name, labels, value in samples:
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.counter("og_ai_http_requests", "HTTP requests by route, method and status",
+                                 ("method", "route", "status"))
+HTTP_LATENCY = registry.histogram("og_ai_http_request_duration_seconds", "HTTP request latency by route",
+                                  ("method", "route"))
+PROVIDER_LATENCY = registry.histogram("og_ai_provider_request_duration_seconds",
+                                      "AI provider call latency", ("provider",))
+PROVIDER_ERRORS = registry.counter("og_ai_provider_errors", "AI provider calls that failed", ("provider",))
+KNOWLEDGE_SAVE = registry.histogram("og_ai_knowledge_save_duration_seconds", "Time to write the knowledge file")
+LOOP_LAG = registry.histogram("og_ai_event_loop_lag_seconds", "How late the event loop woke up a sleeping task",
+                              buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5))
+
+
+def _stage_samples() -> List[Sample]:
+    """process_message spans (request_timing, in ms) as seconds"""
+    samples = []
+    stats = get_timing_stats()
+    for stage, histogram in sorted(stats.histograms.items()):
+        counts, total = histogram.snapshot()
+        samples.extend(_histogram_samples("og_ai_chat_stage_duration_seconds", {'stage': stage},
+                                          histogram.buckets, counts, total, divisor=1000))
+    return samples
+
+
+registry.add_collector("og_ai_chat_stage_duration_seconds", "histogram",
+                       "Time per /chat pipeline stage (intent, tools, provider, learning...)", _stage_samples)
+
+
+def get_registry() -> Registry:
+    """Get the process-wide metrics registry"""
+    return registry
+
+
+class MetricsMiddleware:
+    """Count requests and time them per route (the route template, so ids don't blow up the label set)"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_REQUESTS.inc(1, method, route, str(status))
+            HTTP_LATENCY.observe(time.perf_counter() - start, method, route)
+
+
+async def monitor_event_loop(interval: Optional[float] = None) -> None:
+    """
+    Measure event-loop lag until cancelled
+
+    Sleeps `interval` seconds at a time and records how much later than asked
+    it woke up - time the loop spent stuck in blocking code.
+
+    Args:
+        interval: Seconds between probes (default: METRICS_LOOP_LAG_INTERVAL or 0.5)
+    """
+    interval = interval if interval is not None else float(os.getenv("METRICS_LOOP_LAG_INTERVAL", "0.5"))
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        LOOP_LAG.observe(max(0.0, loop.time() - start - interval))
@@ -16,19 +16,11 @@ Features:
 """
 
 import os
-import sys
 import json
-import time
-import asyncio
 import logging
-import random
-import subprocess
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
-import threading
-import schedule
+from datetime import datetime
+from typing import Dict, List, Any
 from pathlib import Path
-import re
 
 # Setup logging
 logging.basicConfig(
@@ -37,73 +29,31 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Core AI imports - AUTO INSTALL if missing
-def ensure_package(package_name, import_name=None):
-    """Make sure we got all the tools we need, no cap"""
-    if import_name is None:
-        import_name = package_name
-    try:
-        __import__(import_name)
-        return True
-    except ImportError:
-        logger.info(f"Installing {package_name}...")
-        subprocess.check_call([sys.executable, "-m", "pip", "install", package_name])
-        return True
+# AI SDKs, web tools and voice are imported lazily on first use - nothing gets
+# pip-installed or loaded at import time, so the module loads fast
+from lazy_imports import is_installed, optional_import
 
-# Install all requirements automatically
-try:
-    import openai
-    OPENAI_AVAILABLE = True
-except ImportError:
-    ensure_package("openai")
-    try:
-        import openai
-        OPENAI_AVAILABLE = True
-    except:
-        OPENAI_AVAILABLE = False
+WEB_MODULES = ('duckduckgo_search', 'wikipedia', 'requests', 'bs4')
 
-try:
-    import anthropic
-    ANTHROPIC_AVAILABLE = True
-except ImportError:
-    ensure_package("anthropic")
-    try:
-        import anthropic
-        ANTHROPIC_AVAILABLE = True
-    except:
-        ANTHROPIC_AVAILABLE = False
 
-try:
-    import ollama
-    OLLAMA_AVAILABLE = True
-except ImportError:
-    try:
-        ensure_package("ollama")
-        import ollama
-        OLLAMA_AVAILABLE = True
-    except:
-        OLLAMA_AVAILABLE = False
+def web_available() -> bool:
+    """Check if the web search stack is installed (without importing it)"""
+    return all(is_installed(name) for name in WEB_MODULES)
 
-# Web capabilities
-try:
-    from duckduckgo_search import DDGS
-    import wikipedia
-    import requests
-    from bs4 import BeautifulSoup
-    WEB_AVAILABLE = True
-except ImportError:
-    WEB_AVAILABLE = False
 
-# Voice capabilities
-try:
-    import pyttsx3
-    VOICE_AVAILABLE = True
-except ImportError:
-    VOICE_AVAILABLE = False
+def voice_available() -> bool:
+    """Check if pyttsx3 is installed (without importing it)"""
+    return is_installed('pyttsx3')
+
 
 # Import our custom modules
 from self_learning import SelfLearningSystem
-from llm_code_generator import LLMCodeGenerator, get_code_generator
+from llm_code_generator import get_code_generator
+from job_scheduler import get_scheduler
+from learning_store import InternetLearningStore
+from prompt_builder import PromptBuilder
+from ollama_dispatcher import get_ollama_dispatcher, ollama_client
+from session_store import get_session_store
 
 # Setup logging
 logging.basicConfig(
@@ -130,530 +80,21 @@ class OGSupremeAgent:
         # Load environment variables
         self.load_environment()
         
-        # Initialize core components
-        self.learning_system = SelfLearningSystem()
+        # Initialize core components - learning counters are shared with other
+        # workers when SESSION_STORE_URL is set
+        try:
+            session_store = get_session_store()
+        except (ImportError, ValueError) as e:
+            logger.warning(f"Session store not available: {e}")
+            session_store = None
+        self.learning_system = SelfLearningSystem(store=session_store)
         self.code_generator = get_code_generator()
         
         # AI Providers
         self.ai_providers = self.setup_ai_providers()
+        self.prompt_builder = PromptBuilder()
         
         # Voice engine
-        self.voice = None
-        if VOICE_AVAILABLE:
-            from voice_module import VoiceGenerator
-            self.voice = VoiceGenerator()
-        
-        # Web research engine
-        self.web_enabled = WEB_AVAILABLE
-        
-        # Knowledge and intelligence
-        self.intelligence_level = self.learning_system.knowledge.get('intelligence_level', 1.0)
-        self.learned_skills = []
-        self.hourly_learning_log = []
-        
-        # Auto-improvement settings
-        self.auto_improve = True
-        self.last_learning_time = None
-        self.learning_interval = 3600  # 1 hour in seconds
-        
-        # Conversation history
-        self.conversation_history = []
-        
-        # Start background tasks
-        self.start_background_tasks()
-        
-        logger.info(f"✅ OG-AI Supreme initialized with intelligence level: {self.intelligence_level}")
-        logger.info(f"   Available AI providers: {list(self.ai_providers.keys())}")
-    
-    def load_environment(self):
-        """Load API keys from environment"""
-        self.openai_key = os.getenv('OPENAI_API_KEY')
-        self.anthropic_key = os.getenv('ANTHROPIC_API_KEY')
-        
-        if not self.openai_key:
-            logger.warning("⚠️  OPENAI_API_KEY not set")
-        if not self.anthropic_key:
-            logger.warning("⚠️  ANTHROPIC_API_KEY not set")
-    
-    def setup_ai_providers(self) -> Dict:
-        """Setup all available AI providers"""
-        providers = {}
-        
-        # Ollama (local, always try this first)
-        if OLLAMA_AVAILABLE:
-            try:
-                ollama.list()  # Test connection
-                providers['ollama'] = {
-                    'client': ollama,
-                    'models': ['llama3.2', 'llama3.1', 'codellama', 'mistral'],
-                    'primary': True
-                }
-                logger.info("✅ Ollama connected (local AI)")
-            except Exception as e:
-                logger.warning(f"⚠️  Ollama not available: {e}")
-        
-        # OpenAI
-        if OPENAI_AVAILABLE and self.openai_key:
-            try:
-                openai.api_key = self.openai_key
-                providers['openai'] = {
-                    'client': openai,
-                    'models': ['gpt-4', 'gpt-3.5-turbo'],
-                    'primary': False
-                }
-                logger.info("✅ OpenAI connected")
-            except Exception as e:
-                logger.warning(f"⚠️  OpenAI not available: {e}")
-        
-        # Claude (Anthropic)
-        if ANTHROPIC_AVAILABLE and self.anthropic_key:
-            try:
-                providers['claude'] = {
-                    'client': anthropic.Anthropic(api_key=self.anthropic_key),
-                    'models': ['claude-3-opus', 'claude-3-sonnet'],
-                    'primary': False
-                }
-                logger.info("✅ Claude connected")
-            except Exception as e:
-                logger.warning(f"⚠️  Claude not available: {e}")
-        
-        return providers
-    
-    def start_background_tasks(self):
-        """Start background learning and improvement tasks"""
-        
-        def hourly_learning():
-            """Run every hour to learn something new"""
-            logger.info("🧠 Starting hourly learning routine...")
-            self.learn_from_internet()
-        
-        def daily_improvement():
-            """Run daily self-improvement"""
-            logger.info("🔥 Starting daily self-improvement...")
-            improvements = self.learning_system.daily_self_improvement()
-            for imp in improvements:
-                logger.info(f"   ✅ {imp}")
-        
-        # Schedule tasks
-        schedule.every().hour.do(hourly_learning)
-        schedule.every().day.at("03:00").do(daily_improvement)
-        
-        # Run scheduler in background thread
-        def run_scheduler():
-            while True:
-                schedule.run_pending()
-                time.sleep(60)
-        
-        scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
-        scheduler_thread.start()
-        logger.info("✅ Background learning tasks started")
-    
-    def learn_from_internet(self) -> Dict[str, Any]:
-        """
-        Learn something new from the internet every hour
-        Research coding, programming techniques, money-making strategies
-        """
-        if not self.web_enabled:
-            return {'status': 'skipped', 'reason': 'web not available'}
-        
-        topics = [
-            'latest python programming techniques 2024',
-            'how to make money with AI automation',
-            'advanced coding patterns and best practices',
-            'new software development frameworks',
-            'passive income strategies with programming',
-            'machine learning breakthroughs',
-            'blockchain development opportunities',
-            'API monetization strategies'
-        ]
-        
-        import random
-        topic = random.choice(topics)
-        
-        logger.info(f"🔍 Researching: {topic}")
-        
-        try:
-            # Search the web
-            ddgs = DDGS()
-            results = list(ddgs.text(topic, max_results=5))
-            
-            # Extract key insights
-            insights = []
-            for result in results:
-                insights.append({
-                    'title': result.get('title', ''),
-                    'snippet': result.get('body', ''),
-                    'url': result.get('href', '')
-                })
-            
-            # Log what was learned
-            learning_entry = {
-                'timestamp': datetime.now().isoformat(),
-                'topic': topic,
-                'insights_count': len(insights),
-                'insights': insights,
-                'intelligence_boost': 0.01
-            }
-            
-            self.hourly_learning_log.append(learning_entry)
-            self.intelligence_level += 0.01
-            
-            # Save to learning system
-            self.learning_system.knowledge['hourly_learning'] = \
-                self.learning_system.knowledge.get('hourly_learning', [])
-            self.learning_system.knowledge['hourly_learning'].append(learning_entry)
-            self.learning_system._save_knowledge()
-            
-            logger.info(f"✅ Learned about: {topic}")
-            logger.info(f"   Intelligence: {self.intelligence_level:.2f}")
-            
-            return learning_entry
-            
-        except Exception as e:
-            logger.error(f"❌ Learning failed: {e}")
-            return {'status': 'failed', 'error': str(e)}
-    
-    def understand_user_better(self, message: str) -> Dict[str, Any]:
-        """
-        Advanced NLU to truly understand what user wants
-        Extract intent, entities, sentiment, and context
-        """
-        analysis = {
-            'intent': 'unknown',
-            'entities': [],
-            'sentiment': 'neutral',
-            'urgency': 'normal',
-            'requires_code': False,
-            'requires_web_search': False,
-            'requires_voice': False,
-            'gangster_level': 0
-        }
-        
-        msg_lower = message.lower()
-        
-        # Detect intent
-        if any(word in msg_lower for word in ['create', 'make', 'build', 'generate', 'write']):
-            analysis['intent'] = 'creation'
-            if 'code' in msg_lower or 'function' in msg_lower or 'script' in msg_lower:
-                analysis['requires_code'] = True
-        elif any(word in msg_lower for word in ['search', 'find', 'look up', 'research']):
-            analysis['intent'] = 'information_seeking'
-            analysis['requires_web_search'] = True
-        elif any(word in msg_lower for word in ['fix', 'debug', 'error', 'problem']):
-            analysis['intent'] = 'troubleshooting'
-            analysis['urgency'] = 'high'
-        elif any(word in msg_lower for word in ['explain', 'how', 'what', 'why']):
-            analysis['intent'] = 'learning'
-        elif any(word in msg_lower for word in ['improve', 'upgrade', 'enhance', 'better']):
-            analysis['intent'] = 'improvement'
-        
-        # Detect gangster level (how much attitude to give)
-        gangster_words = ['fuck', 'shit', 'damn', 'yo', 'bruh', 'gangster', 'og']
-        analysis['gangster_level'] = sum(1 for word in gangster_words if word in msg_lower)
-        
-        # Detect urgency
-        if any(word in msg_lower for word in ['now', 'asap', 'urgent', 'quick', 'fast']):
-            analysis['urgency'] = 'high'
-        
-        # Detect if voice output wanted
-        if 'say' in msg_lower or 'speak' in msg_lower or 'voice' in msg_lower:
-            analysis['requires_voice'] = True
-        
-        return analysis
-    
-    def generate_gangster_response(self, content: str, gangster_level: int = 1) -> str:
-        """
-        Make responses more gangster based on context
-        """
-        intros = [
-            "Yo listen up,",
-            "Aight bet,",
-            "Damn straight,",
-            "Fuck yeah,",
-            "Real talk,",
-            "No cap,",
-            "Straight up,"
-        ]
-        
-        outros = [
-            "Ya feel me?",
-            "That's how we do it.",
-            "OG-AI don't fuck around.",
-            "Bet.",
-            "Now you know.",
-            "Keep it gangster.",
-            "Stay hard."
-        ]
-        
-        if gangster_level >= 2:
-            import random
-            return f"{random.choice(intros)} {content} {random.choice(outros)}"
-        elif gangster_level == 1:
-            return f"{content} Ya feel me?"
-        else:
-            return content
-    
-    async def process_message(self, message: str, use_voice: bool = False) -> str:
-        """
-        Master function to process any user message
-        Automatically uses all appropriate tools
-        """
-        logger.info(f"💬 Processing: {message}")
-        
-        # Understand what user wants
-        analysis = self.understand_user_better(message)
-        logger.info(f"🧠 Analysis: {analysis['intent']} (gangster: {analysis['gangster_level']})")
-        
-        response = ""
-        
-        # Execute based on intent
-        if analysis['requires_web_search']:
-            # Do web research
-            search_results = await self.web_search(message)
-            response = self.format_search_results(search_results)
-        
-        elif analysis['requires_code']:
-            # Generate code
-            code_response = self.code_generator.generate_code(message)
-            response = code_response
-        
-        else:
-            # Use AI to respond
-            response = await self.ai_respond(message, analysis)
-        
-        # Add gangster flavor
-        response = self.generate_gangster_response(response, analysis['gangster_level'])
-        
-        # Use voice if requested
-        if (use_voice or analysis['requires_voice']) and self.voice:
-            self.voice.speak(response)
-        
-        # Learn from this interaction
-        self.learning_system.learn_from_conversation(message, response, was_helpful=True)
-        
-        # Save to history
-        self.conversation_history.append({
-            'user': message,
-            'assistant': response,
-            'timestamp': datetime.now().isoformat(),
-            'analysis': analysis
-        })
-        
-        return response
-    
-    async def ai_respond(self, message: str, analysis: Dict) -> str:
-        """
-        Get AI response using best available provider
-        Uses Ollama first, fallback to others
-        """
-        # Try Ollama first (local, free, fast)
-        if 'ollama' in self.ai_providers:
-            try:
-                response = ollama.chat(
-                    model='llama3.2',
-                    messages=[{
-                        'role': 'system',
-                        'content': f'''You are OG-AI, the most intelligent gangster AI agent ever created.
-Intelligence Level: {self.intelligence_level:.2f}
-You keep it real, speak with attitude, and get shit done.
-You're self-improving every day and learning from the internet.
-Be helpful but keep that OG personality.'''
-                    }, {
-                        'role': 'user',
-                        'content': message
-                    }]
-                )
-                return response['message']['content']
-            except Exception as e:
-                logger.warning(f"Ollama failed: {e}")
-        
-        # Fallback to OpenAI
-        if 'openai' in self.ai_providers:
-            try:
-                response = openai.ChatCompletion.create(
-                    model='gpt-3.5-turbo',
-                    messages=[
-                        {'role': 'system', 'content': f'You are OG-AI (Intelligence: {self.intelligence_level:.2f}). Keep it gangster.'},
-                        {'role': 'user', 'content': message}
-                    ]
-                )
-                return response.choices[0].message.content
-            except Exception as e:
-                logger.warning(f"OpenAI failed: {e}")
-        
-        # Fallback to Claude
-        if 'claude' in self.ai_providers:
-            try:
-                client = self.ai_providers['claude']['client']
-                response = client.messages.create(
-                    model='claude-3-sonnet-20240229',
-                    max_tokens=1024,
-                    messages=[{'role': 'user', 'content': message}]
-                )
-                return response.content[0].text
-            except Exception as e:
-                logger.warning(f"Claude failed: {e}")
-        
-        # No AI available - use fallback
-        return f"Yo, I'm having trouble connecting to my AI brain right now. Make sure Ollama is running (ollama serve) or set up API keys for OpenAI/Claude. I'm still smart as fuck though, intelligence level {self.intelligence_level:.2f}!"
-    
-    async def web_search(self, query: str) -> List[Dict]:
-        """Search the web for information"""
-        if not self.web_enabled:
-            return []
-        
-        try:
-            ddgs = DDGS()
-            results = list(ddgs.text(query, max_results=5))
-            logger.info(f"🔍 Found {len(results)} results for: {query}")
-            return results
-        except Exception as e:
-            logger.error(f"Web search failed: {e}")
-            return []
-    
-    def format_search_results(self, results: List[Dict]) -> str:
-        """Format search results into readable response"""
-        if not results:
-            return "Couldn't find shit on the web, try asking different."
-        
-        formatted = "Aight, here's what I found:\n\n"
-        for i, result in enumerate(results[:3], 1):
-            formatted += f"{i}. **{result.get('title', 'No title')}**\n"
-            formatted += f"   {result.get('body', 'No description')}\n"
-            formatted += f"   {result.get('href', '')}\n\n"
-        
-        return formatted
-    
-    def get_status_report(self) -> Dict[str, Any]:
-        """Get current status and intelligence report"""
-        learning_report = self.learning_system.get_intelligence_report()
-        
-        return {
-            'agent_name': 'OG-AI Supreme',
-            'intelligence_level': round(self.intelligence_level, 2),
-            'ai_providers': list(self.ai_providers.keys()),
-            'capabilities': {
-                'web_search': self.web_enabled,
-                'voice': self.voice is not None,
-                'code_generation': True,
-                'self_learning': True
-            },
-            'learning_stats': learning_report,
-            'hourly_learning_count': len(self.hourly_learning_log),
-            'last_learning': self.hourly_learning_log[-1] if self.hourly_learning_log else None,
-            'conversations': len(self.conversation_history)
-        }
-    
-    def improve_own_code(self) -> List[str]:
-        """
-        Self-improvement: Analyze own code and suggest improvements
-        Actually modifies its own code files
-        """
-        improvements = []
-        
-        # Analyze performance patterns
-        if len(self.conversation_history) > 100:
-            # Calculate average response time, success rate, etc.
-            improvements.append("Optimized conversation processing based on 100+ interactions")
-        
-        # Check intelligence level and upgrade capabilities
-        if self.intelligence_level > 2.0 and 'advanced_reasoning' not in self.learned_skills:
-            self.learned_skills.append('advanced_reasoning')
-            improvements.append("Unlocked advanced reasoning capabilities")
-        
-        if self.intelligence_level > 3.0 and 'expert_coding' not in self.learned_skills:
-            self.learned_skills.append('expert_coding')
-            improvements.append("Achieved expert-level coding abilities")
-        
-        # Log improvements
-        for imp in improvements:
-            logger.info(f"🚀 Self-Improvement: {imp}")
-        
-        return improvements
-
-
-# Global agent instance
-_supreme_agent = None
-
-
-def get_supreme_agent() -> OGSupremeAgent:
-    """Get or create the supreme agent instance"""
-    global _supreme_agent
-    if _supreme_agent is None:
-        _supreme_agent = OGSupremeAgent()
-    return _supreme_agent
-
-
-async def chat(message: str, use_voice: bool = False) -> str:
-    """
-    Simple chat interface
-    
-    Args:
-        message: User message
-        use_voice: Whether to speak response
-        
-    Returns:
-        Agent response
-    """
-    agent = get_supreme_agent()
-    return await agent.process_message(message, use_voice)
-
-
-if __name__ == "__main__":
-    import asyncio
-    
-    print("="*70)
-    print("  🔥 OG-AI SUPREME AGENT - THE SMARTEST AI IN THE FUCKING WORLD 🔥")
-    print("="*70)
-    print()
-    
-    # Initialize agent
-    agent = get_supreme_agent()
-    
-    # Show status
-    status = agent.get_status_report()
-    print("📊 Status Report:")
-    print(f"   Intelligence Level: {status['intelligence_level']}")
-    print(f"   AI Providers: {', '.join(status['ai_providers'])}")
-    print(f"   Web Search: {'✅' if status['capabilities']['web_search'] else '❌'}")
-    print(f"   Voice: {'✅' if status['capabilities']['voice'] else '❌'}")
-    print(f"   Code Generation: ✅")
-    print(f"   Self-Learning: ✅")
-    print()
-    
-    # Interactive mode
-    print("💬 Ready to chat! Type 'quit' to exit, 'status' for report")
-    print()
-    
-    async def main_loop():
-        while True:
-            try:
-                user_input = input("You: ").strip()
-                
-                if not user_input:
-                    continue
-                
-                if user_input.lower() in ['quit', 'exit', 'bye']:
-                    print("OG-AI: Later homie! Stay gangster. 💯")
-                    break
-                
-                if user_input.lower() == 'status':
-                    status = agent.get_status_report()
-                    print(json.dumps(status, indent=2))
-                    continue
-                
-                # Process message
-                response = await agent.process_message(user_input)
-                print(f"\nOG-AI: {response}\n")
-                
-            except KeyboardInterrupt:
-                print("\n\nOG-AI: Peace out! 👊")
-                break
-            except Exception as e:
-                print(f"\n❌ Error: {e}\n")
-    
-    # Run
-    asyncio.run(main_loop())
         self.voice_engine = self.setup_voice()
         
         # Intelligence metrics
@@ -661,9 +102,11 @@ if __name__ == "__main__":
         self.conversations_count = 0
         self.code_generated_count = 0
         self.web_searches_count = 0
+        self.knowledge_hits_count = 0
         self.improvements_made = []
         
         # Learning from internet
+        self.learnings = InternetLearningStore()
         self.knowledge_base = self.load_knowledge_base()
         self.last_internet_learn = None
         
@@ -696,13 +139,13 @@ if __name__ == "__main__":
         providers = {}
         
         # OpenAI
-        if OPENAI_AVAILABLE:
-            api_key = os.getenv('OPENAI_API_KEY')
-            if api_key and api_key != 'your_openai_key_here':
+        api_key = os.getenv('OPENAI_API_KEY')
+        if api_key and api_key != 'your_openai_key_here':
+            openai = optional_import('openai')
+            if openai:
                 try:
-                    openai.api_key = api_key
                     providers['openai'] = {
-                        'client': openai,
+                        'client': openai.OpenAI(api_key=api_key, base_url=os.getenv('OPENAI_BASE_URL') or None),
                         'model': os.getenv('OPENAI_MODEL', 'gpt-4o-mini'),
                         'available': True
                     }
@@ -711,12 +154,14 @@ if __name__ == "__main__":
                     logger.warning(f"OpenAI setup failed: {e}")
         
         # Anthropic Claude
-        if ANTHROPIC_AVAILABLE:
-            api_key = os.getenv('ANTHROPIC_API_KEY')
-            if api_key and api_key != 'your_anthropic_key_here':
+        api_key = os.getenv('ANTHROPIC_API_KEY')
+        if api_key and api_key != 'your_anthropic_key_here':
+            anthropic = optional_import('anthropic')
+            if anthropic:
                 try:
                     providers['anthropic'] = {
-                        'client': anthropic.Anthropic(api_key=api_key),
+                        'client': anthropic.Anthropic(api_key=api_key,
+                                                      base_url=os.getenv('ANTHROPIC_BASE_URL') or None),
                         'model': os.getenv('ANTHROPIC_MODEL', 'claude-3-5-sonnet-20241022'),
                         'available': True
                     }
@@ -725,12 +170,14 @@ if __name__ == "__main__":
                     logger.warning(f"Anthropic setup failed: {e}")
         
         # Ollama (local)
-        if OLLAMA_AVAILABLE:
+        ollama = optional_import('ollama')
+        if ollama:
             try:
-                # Test if Ollama is running
-                ollama.list()
+                # Test if Ollama is running (at OLLAMA_BASE_URL)
+                ollama_client().list()
                 providers['ollama'] = {
-                    'client': ollama,
+                    # Batches concurrent requests onto the loaded model
+                    'client': get_ollama_dispatcher(),
                     'model': os.getenv('OLLAMA_MODEL', 'llama3.2'),
                     'available': True
                 }
@@ -745,13 +192,16 @@ if __name__ == "__main__":
     
     def setup_voice(self):
         """Setup voice synthesis"""
-        if VOICE_AVAILABLE and self.voice_enabled:
+        if voice_available() and self.voice_enabled:
             try:
-                engine = pyttsx3.init()
-                engine.setProperty('rate', 150)
-                engine.setProperty('volume', 0.9)
+                from voice_module import VoiceGenerator
+                voice = VoiceGenerator('pyttsx3')
+                if not voice.is_available():
+                    return None
+                voice.pyttsx3_engine.setProperty('rate', 150)
+                voice.pyttsx3_engine.setProperty('volume', 0.9)
                 logger.info("✅ Voice engine ready")
-                return engine
+                return voice
             except Exception as e:
                 logger.warning(f"Voice setup failed: {e}")
         return None
@@ -762,12 +212,21 @@ if __name__ == "__main__":
         if kb_file.exists():
             try:
                 with open(kb_file) as f:
-                    return json.load(f)
+                    knowledge_base = json.load(f)
+                
+                # Learnings used to live in this file - move them to the learning store once
+                legacy_learnings = knowledge_base.pop('internet_learnings', None)
+                if legacy_learnings is not None:
+                    imported = self.learnings.import_legacy(legacy_learnings)
+                    logger.info(f"📦 Moved {imported} learnings to {self.learnings.path}")
+                    with open(kb_file, 'w') as f:
+                        json.dump(knowledge_base, f, indent=2)
+                
+                return knowledge_base
             except Exception as e:
                 logger.warning(f"Failed to load knowledge base: {e}")
         
         return {
-            'internet_learnings': [],
             'code_patterns': [],
             'money_making_strategies': [],
             'programming_techniques': [],
@@ -787,27 +246,19 @@ if __name__ == "__main__":
         if not self.self_learning_enabled:
             return
         
-        # Learn from internet every hour
-        schedule.every(1).hours.do(self.learn_from_internet)
-        
-        # Self-improve daily
-        schedule.every().day.at("00:00").do(self.daily_self_improvement)
-        
-        # Run scheduled tasks in background thread
-        def run_schedule():
-            while True:
-                schedule.run_pending()
-                time.sleep(60)
-        
-        scheduler_thread = threading.Thread(target=run_schedule, daemon=True)
-        scheduler_thread.start()
+        # One scheduler per process - registering by name means creating another
+        # agent replaces these jobs instead of adding duplicates
+        scheduler = get_scheduler()
+        scheduler.add_job('learn_from_internet', self.learn_from_internet, interval=3600)
+        scheduler.add_job('daily_self_improvement', self.daily_self_improvement, daily_at="00:00")
+        scheduler.start()
         logger.info("✅ Background learning tasks started")
     
     def learn_from_internet(self):
         """Learn something new from the internet"""
         logger.info("🌐 Learning from the internet...")
         
-        if not WEB_AVAILABLE:
+        if not web_available():
             logger.warning("Web search not available")
             return
         
@@ -825,7 +276,7 @@ if __name__ == "__main__":
         
         try:
             # Search and learn
-            ddgs = DDGS()
+            ddgs = optional_import('duckduckgo_search').DDGS()
             for topic in topics[:2]:  # Learn 2 topics per hour
                 results = ddgs.text(topic, max_results=5)
                 
@@ -840,17 +291,17 @@ if __name__ == "__main__":
                     learnings.append(learning)
                     logger.info(f"📚 Learned: {result.get('title')}")
             
-            # Add to knowledge base
-            self.knowledge_base['internet_learnings'].extend(learnings)
+            # Add to the learning store - only new URLs/content get appended to disk
+            new_learnings = self.learnings.add_many(learnings)
             self.knowledge_base['last_update'] = datetime.now().isoformat()
             self.save_knowledge_base()
             
-            # Update intelligence
-            self.intelligence_level += 0.01
-            self.learning_system.knowledge['intelligence_level'] = self.intelligence_level
-            self.learning_system._save_knowledge()
+            # Update intelligence (only when we actually learned something new)
+            if new_learnings:
+                self.intelligence_level = self.learning_system.add_intelligence(0.01)
             
-            logger.info(f"✅ Learned {len(learnings)} new things! Intelligence: {self.intelligence_level:.2f}")
+            logger.info(f"✅ Learned {len(new_learnings)} new things ({len(learnings) - len(new_learnings)} already known)! "
+                        f"Intelligence: {self.intelligence_level:.2f}")
             
             self.last_internet_learn = datetime.now()
             
@@ -892,7 +343,7 @@ if __name__ == "__main__":
         improvements = []
         
         # Check if we should add new features based on learning
-        if len(self.knowledge_base['internet_learnings']) > 100:
+        if len(self.learnings) > 100:
             improvements.append("Added new patterns from 100+ internet learnings")
         
         # Check if we should optimize based on conversations
@@ -904,6 +355,10 @@ if __name__ == "__main__":
     def get_best_ai_response(self, message: str, system_prompt: str) -> str:
         """Get response from the best available AI provider"""
         
+        # Keep the message (with any search/learned context) inside the token budget
+        prompt = self.prompt_builder.build(system_prompt, [{'role': 'user', 'content': message}])
+        message = prompt['messages'][-1]['content']
+        
         # Try providers in order of preference
         for provider_name in ['anthropic', 'openai', 'ollama']:
             if provider_name in self.ai_providers:
@@ -920,7 +375,7 @@ if __name__ == "__main__":
                         return response.content[0].text
                     
                     elif provider_name == 'openai':
-                        response = openai.chat.completions.create(
+                        response = provider['client'].chat.completions.create(
                             model=provider['model'],
                             messages=[
                                 {"role": "system", "content": system_prompt},
@@ -931,7 +386,7 @@ if __name__ == "__main__":
                         return response.choices[0].message.content
                     
                     elif provider_name == 'ollama':
-                        response = ollama.chat(
+                        response = provider['client'].chat(
                             model=provider['model'],
                             messages=[
                                 {"role": "system", "content": system_prompt},
@@ -964,11 +419,11 @@ if __name__ == "__main__":
     
     def search_web(self, query: str) -> List[Dict]:
         """Search the web for information"""
-        if not WEB_AVAILABLE:
+        if not web_available():
             return []
         
         try:
-            ddgs = DDGS()
+            ddgs = optional_import('duckduckgo_search').DDGS()
             results = ddgs.text(query, max_results=5)
             self.web_searches_count += 1
             return list(results)
@@ -977,13 +432,12 @@ if __name__ == "__main__":
             return []
     
     def speak(self, text: str):
-        """Speak the response out loud"""
+        """Speak the response out loud on the background speech worker"""
         if self.voice_engine and self.voice_enabled:
             try:
                 # Remove markdown and code blocks for speech
                 clean_text = text.replace('```', '').replace('**', '').replace('*', '')
-                self.voice_engine.say(clean_text)
-                self.voice_engine.runAndWait()
+                self.voice_engine.speak_async(clean_text)
             except Exception as e:
                 logger.error(f"Voice failed: {e}")
     
@@ -1010,8 +464,18 @@ if __name__ == "__main__":
             
             return response
         
-        # Check if this needs web search
-        if any(word in message.lower() for word in ['search', 'find', 'look up', 'what is', 'who is']):
+        # Check what we already learned about this - local index, no network call
+        known_learnings = self.learnings.search(message, k=3)
+        if known_learnings:
+            self.knowledge_hits_count += 1
+            known_context = "\n\n".join([
+                f"- {l.get('title')}: {l.get('snippet')}"
+                for l in known_learnings
+            ])
+            message = f"{message}\n\nThings I already learned about this:\n{known_context}"
+        
+        # Check if this needs web search (skip it if we already know the topic)
+        elif any(word in message.lower() for word in ['search', 'find', 'look up', 'what is', 'who is']):
             search_results = self.search_web(message)
             if search_results:
                 # Include search results in context
@@ -1040,7 +504,7 @@ if __name__ == "__main__":
         """Build the ultimate system prompt for OG-AI"""
         
         # Get recent learnings
-        recent_learnings = self.knowledge_base['internet_learnings'][-5:]
+        recent_learnings = self.learnings.latest(5)
         learnings_context = ""
         if recent_learnings:
             learnings_context = "\n\nRecent things I learned:\n" + "\n".join([
@@ -1094,14 +558,18 @@ You're not just answering questions - you're dominating problems and getting rea
             'conversations_count': self.conversations_count,
             'code_generated_count': self.code_generated_count,
             'web_searches_count': self.web_searches_count,
+            'knowledge_hits_count': self.knowledge_hits_count,
             'improvements_made_count': len(self.improvements_made),
             'ai_providers_available': list(self.ai_providers.keys()),
             'last_internet_learn': self.last_internet_learn.isoformat() if self.last_internet_learn else None,
-            'internet_learnings_count': len(self.knowledge_base['internet_learnings']),
+            'internet_learnings_count': len(self.learnings),
+            'learning_store': self.learnings.get_stats(),
+            'background_jobs': get_scheduler().get_metrics(),
+            'ollama_dispatch': get_ollama_dispatcher().get_stats() if 'ollama' in self.ai_providers else None,
             'capabilities': {
                 'code_generation': True,
-                'web_search': WEB_AVAILABLE,
-                'voice': VOICE_AVAILABLE and self.voice_enabled,
+                'web_search': web_available(),
+                'voice': voice_available() and self.voice_enabled,
                 'self_learning': self.self_learning_enabled,
                 'openai': 'openai' in self.ai_providers,
                 'claude': 'anthropic' in self.ai_providers,
@@ -1143,6 +611,18 @@ You're not just answering questions - you're dominating problems and getting rea
         print("="*70 + "\n")
 
 
+# Global agent instance
+_supreme_agent = None
+
+
+def get_supreme_agent() -> OGSupremeAgent:
+    """Get or create the supreme agent instance"""
+    global _supreme_agent
+    if _supreme_agent is None:
+        _supreme_agent = OGSupremeAgent()
+    return _supreme_agent
+
+
 def main():
     """Main entry point"""
     print("\n" + "🔥"*35)
@@ -0,0 +1,273 @@
+"""
+OG-AI Ollama Dispatcher - Micro-batches concurrent chat requests to the local model
+Requests arriving within a few milliseconds of each other are collected and sent
+together, never more at once than the Ollama server runs in parallel
+(OLLAMA_NUM_PARALLEL), so they share the loaded model instead of queueing blindly.
+The model is kept loaded between requests with keep_alive.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from lazy_imports import optional_import
+
+logger = logging.getLogger(__name__)
+
+
+class _Request:
+    """One queued chat call"""
+
+    __slots__ = ('kwargs', 'future', 'enqueued')
+
+    def __init__(self, kwargs: Dict[str, Any]):
+        self.kwargs = kwargs
+        self.future: Future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class OllamaDispatcher:
+    """
+    Collects concurrent ollama.chat calls into small batches with bounded parallelism
+
+    A dispatcher thread takes the first waiting request and, if more are already
+    queued behind it, keeps collecting for `window_ms` (or until a full batch of
+    `parallel` requests), then hands the batch to a pool of `parallel` workers. A
+    request that arrives alone goes out right away. It waits for free slots before dispatching, so
+    at most `parallel` requests are ever in flight at the Ollama server.
+    """
+
+    def __init__(self, chat_fn: Optional[Callable[..., Any]] = None, parallel: Optional[int] = None,
+                 window_ms: Optional[float] = None, keep_alive: Optional[str] = None,
+                 host: Optional[str] = None):
+        """
+        Initialize dispatcher
+
+        Args:
+            chat_fn: Function doing the actual call (default: chat on an ollama.Client for `host`)
+            parallel: Requests in flight at once (default: OLLAMA_NUM_PARALLEL or 4)
+            window_ms: How long to collect a batch (default: OLLAMA_BATCH_WINDOW_MS or 10)
+            keep_alive: How long Ollama keeps the model loaded (default: OLLAMA_KEEP_ALIVE or 30m)
+            host: Ollama server URL (default: OLLAMA_BASE_URL, else the SDK's OLLAMA_HOST or localhost)
+        """
+        self.chat_fn = chat_fn
+        self.parallel = max(parallel or int(os.getenv("OLLAMA_NUM_PARALLEL", "4")), 1)
+        if window_ms is None:
+            window_ms = float(os.getenv("OLLAMA_BATCH_WINDOW_MS", "10"))
+        self.window = max(window_ms, 0) / 1000
+        self.keep_alive = keep_alive or os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+        self.host = host or os.getenv("OLLAMA_BASE_URL") or None
+        self._client = None
+
+        self._queue: "queue.Queue[Optional[_Request]]" = queue.Queue()
+        self._slots = threading.Semaphore(self.parallel)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._in_flight = 0
+
+        self.stats = {
+            'requests': 0,
+            'batches': 0,
+            'max_batch_size': 0,
+            'errors': 0,
+            'total_queue_wait': 0.0,
+            'max_queue_wait': 0.0,
+            'total_inference': 0.0,
+            'max_inference': 0.0
+        }
+
+    @property
+    def running(self) -> bool:
+        """Whether the dispatcher thread is running"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start the dispatcher thread (done automatically on the first request)"""
+        with self._lock:
+            self._start()
+
+    def _start(self) -> None:
+        """Start the thread with a fresh queue unless it's running (call with the lock held)"""
+        if self.running:
+            return
+        # Each run gets its own queue, so nothing can land behind a stopped run's sentinel
+        self._queue = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=self.parallel, thread_name_prefix="og-ai-ollama")
+        self._thread = threading.Thread(target=self._run, args=(self._queue, self._executor),
+                                        name="og-ai-ollama-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop dispatching - requests already queued are still answered"""
+        with self._lock:
+            thread, executor = self._thread, self._executor
+            self._thread = self._executor = None
+            if thread is None:
+                return
+            self._queue.put(None)
+
+        thread.join(timeout)
+        executor.shutdown(wait=False)
+
+    def submit(self, **kwargs) -> Future:
+        """
+        Queue a chat call
+
+        Args:
+            **kwargs: Arguments for ollama.chat (model, messages, options...)
+
+        Returns:
+            Future resolving to the ollama.chat response
+        """
+        kwargs.setdefault('keep_alive', self.keep_alive)
+        request = _Request(kwargs)
+        with self._lock:
+            self._start()
+            self._queue.put(request)
+        return request.future
+
+    def chat(self, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Queue a chat call and wait for the response - drop-in for ollama.chat"""
+        return self.submit(**kwargs).result(timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Batch counters plus average queue wait vs. inference time in milliseconds"""
+        with self._lock:
+            stats = dict(self.stats)
+            in_flight = self._in_flight
+
+        requests = stats['requests']
+        return {
+            'requests': requests,
+            'batches': stats['batches'],
+            'avg_batch_size': round(requests / stats['batches'], 2) if stats['batches'] else 0.0,
+            'max_batch_size': stats['max_batch_size'],
+            'errors': stats['errors'],
+            'in_flight': in_flight,
+            'queued': self._queue.qsize(),
+            'parallel': self.parallel,
+            'avg_queue_wait_ms': round(stats['total_queue_wait'] / requests * 1000, 2) if requests else 0.0,
+            'max_queue_wait_ms': round(stats['max_queue_wait'] * 1000, 2),
+            'avg_inference_ms': round(stats['total_inference'] / requests * 1000, 2) if requests else 0.0,
+            'max_inference_ms': round(stats['max_inference'] * 1000, 2)
+        }
+
+    def _collect(self, requests: "queue.Queue[Optional[_Request]]", first: _Request) -> List[Optional[_Request]]:
+        """Gather requests arriving within the window after `first`, up to a full batch"""
+        batch = [first]
+        if requests.empty():
+            # Nobody else is waiting - don't hold a lone request for the window
+            return batch
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.parallel:
+            remaining = deadline - time.perf_counter()
+            try:
+                request = requests.get(timeout=remaining) if remaining > 0 else requests.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(request)
+            if request is None:
+                break
+        return batch
+
+    def _run(self, requests: "queue.Queue[Optional[_Request]]", executor: ThreadPoolExecutor):
+        """Dispatcher thread: collect a batch, wait for free slots, send it"""
+        while True:
+            first = requests.get()
+            if first is None:
+                break
+
+            batch = self._collect(requests, first)
+            stopping = batch[-1] is None
+            batch = [request for request in batch if request is not None]
+
+            with self._lock:
+                self.stats['batches'] += 1
+                self.stats['max_batch_size'] = max(self.stats['max_batch_size'], len(batch))
+
+            for request in batch:
+                self._slots.acquire()
+                executor.submit(self._call, request)
+
+            if stopping:
+                break
+
+        # Anything still queued behind the sentinel would never be answered - fail it
+        while True:
+            try:
+                request = requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is not None:
+                request.future.set_exception(RuntimeError("Ollama dispatcher stopped"))
+
+    def _default_chat(self) -> Callable[..., Any]:
+        """chat of one shared ollama.Client pointed at self.host"""
+        with self._lock:
+            if self._client is None:
+                self._client = ollama_client(self.host)
+            return self._client.chat
+
+    def _call(self, request: _Request):
+        """Run one chat call on a worker and resolve its future"""
+        start = time.perf_counter()
+        with self._lock:
+            self._in_flight += 1
+
+        error = None
+        try:
+            chat_fn = self.chat_fn or self._default_chat()
+            result = chat_fn(**request.kwargs)
+        except Exception as e:
+            error = e
+        finally:
+            self._slots.release()
+
+        end = time.perf_counter()
+        waited, inference = start - request.enqueued, end - start
+        with self._lock:
+            self._in_flight -= 1
+            self.stats['requests'] += 1
+            self.stats['total_queue_wait'] += waited
+            self.stats['max_queue_wait'] = max(self.stats['max_queue_wait'], waited)
+            self.stats['total_inference'] += inference
+            self.stats['max_inference'] = max(self.stats['max_inference'], inference)
+            if error is not None:
+                self.stats['errors'] += 1
+
+        if error is not None:
+            logger.warning(f"Ollama request failed: {error}")
+            request.future.set_exception(error)
+        else:
+            request.future.set_result(result)
+
+
+def ollama_client(host: Optional[str] = None):
+    """
+    ollama.Client for `host` (default: OLLAMA_BASE_URL, else the SDK's OLLAMA_HOST or localhost)
+
+    Raises:
+        ImportError: If the ollama package isn't installed
+    """
+    ollama = optional_import("ollama")
+    if ollama is None:
+        raise ImportError("ollama is not installed")
+    return ollama.Client(host=host or os.getenv("OLLAMA_BASE_URL") or None)
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_ollama_dispatcher() -> OllamaDispatcher:
+    """Get or create the process-wide Ollama dispatcher"""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = OllamaDispatcher()
+        return _dispatcher
@@ -0,0 +1,199 @@
+"""
+OG-AI Prompt Builder - Pack system prompt, history and context into a token budget
+Instead of always sending "the last 10 messages", prompts are filled by priority:
+system prompt, then the current message, then context, then as much recent history as fits
+"""
+
+import os
+import re
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+
+from lazy_imports import optional_import
+
+TRUNCATION_MARKER = " [...]"
+BOUNDARY_PATTERN = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """tiktoken encoding if tiktoken is installed, else None"""
+    tiktoken = optional_import("tiktoken")
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def _count(text: str) -> int:
+    """Count tokens with tiktoken when installed, otherwise estimate ~4 characters per token"""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+@lru_cache(maxsize=8192)
+def count_tokens(text: str) -> int:
+    """Count tokens in a text (cached - history messages are only counted once)"""
+    return _count(text)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Shorten text to fit max_tokens, cutting at a sentence or line break when one is close
+
+    Args:
+        text: Text to shorten
+        max_tokens: Token limit (including the truncation marker)
+
+    Returns:
+        The text unchanged if it fits, otherwise its start plus " [...]"
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+    if max_tokens <= count_tokens(TRUNCATION_MARKER):
+        return ""
+
+    # Prefixes are counted uncached so they don't push real messages out of the cache
+    limit = max_tokens - count_tokens(TRUNCATION_MARKER)
+    cut = len(text)
+    while cut > 0:
+        # Scale the cut by how far over we are, then back off to a boundary
+        cut = min(cut - 1, int(cut * limit / max(_count(text[:cut]), 1)))
+        boundaries = [m.start() for m in BOUNDARY_PATTERN.finditer(text, 0, cut)]
+        if boundaries and boundaries[-1] >= cut * 0.8:
+            cut = boundaries[-1]
+        if _count(text[:cut]) <= limit:
+            break
+
+    return text[:cut].rstrip() + TRUNCATION_MARKER
+
+
+class PromptBuilder:
+    """
+    Assembles prompts under a token budget
+
+    Priority (highest first):
+    1. System prompt - always sent as is
+    2. Current message (the last history entry) - truncated only if it alone overflows
+    3. Context sections, in the order given - together capped at context_share of what's left
+    4. Earlier history, newest first, until the budget is used up
+    """
+
+    def __init__(self, max_tokens: Optional[int] = None, reserve_tokens: Optional[int] = None,
+                 context_share: float = 0.4):
+        """
+        Initialize prompt builder
+
+        Args:
+            max_tokens: Model context size (default: PROMPT_MAX_TOKENS or 8000)
+            reserve_tokens: Tokens kept free for the reply (default: PROMPT_RESERVE_TOKENS or 1000)
+            context_share: Most of the remaining budget context sections may use
+        """
+        self.max_tokens = max_tokens or int(os.getenv("PROMPT_MAX_TOKENS", "8000"))
+        self.reserve_tokens = reserve_tokens if reserve_tokens is not None else int(os.getenv("PROMPT_RESERVE_TOKENS", "1000"))
+        self.context_share = context_share
+
+        self.stats = {
+            'builds': 0,
+            'total_build_ms': 0.0,
+            'last_tokens': 0,
+            'messages_dropped': 0,
+            'sections_truncated': 0
+        }
+
+    @property
+    def budget(self) -> int:
+        """Tokens available for the prompt"""
+        return self.max_tokens - self.reserve_tokens
+
+    def build(self, system_prompt: str, history: Sequence[Dict], context_sections: Sequence[str] = ()) -> Dict:
+        """
+        Pack a prompt into the budget
+
+        Args:
+            system_prompt: System prompt (always included)
+            history: Chat messages oldest first; the last one is the current message
+            context_sections: Extra context in priority order (empty ones are skipped)
+
+        Returns:
+            Dict with 'system', 'messages' (role/content dicts), 'context' (joined
+            sections), 'tokens', 'dropped_messages', 'truncated_sections', 'build_ms'
+        """
+        start = time.perf_counter()
+        remaining = self.budget - count_tokens(system_prompt)
+
+        # Current message
+        messages: List[Dict] = []
+        if history:
+            current = history[-1]
+            content = current['content']
+            if count_tokens(content) > remaining:
+                content = truncate_to_tokens(content, max(remaining, 0))
+            messages.append({'role': current['role'], 'content': content})
+            remaining -= count_tokens(content)
+
+        # Context sections, highest priority first
+        context_parts = []
+        truncated_sections = 0
+        context_budget = int(max(remaining, 0) * self.context_share)
+        for section in context_sections:
+            if not section:
+                continue
+            tokens = count_tokens(section)
+            if tokens > context_budget:
+                section = truncate_to_tokens(section, context_budget)
+                truncated_sections += 1
+                if not section:
+                    continue
+                tokens = count_tokens(section)
+            context_parts.append(section)
+            context_budget -= tokens
+            remaining -= tokens
+
+        # Earlier history, newest first, stop at the first message that doesn't fit
+        included = 0
+        for message in reversed(history[:-1]):
+            tokens = count_tokens(message['content'])
+            if tokens > remaining:
+                break
+            messages.append({'role': message['role'], 'content': message['content']})
+            remaining -= tokens
+            included += 1
+        messages.reverse()
+
+        dropped = max(len(history) - 1 - included, 0)
+        build_ms = (time.perf_counter() - start) * 1000
+        tokens = self.budget - remaining
+
+        self.stats['builds'] += 1
+        self.stats['total_build_ms'] += build_ms
+        self.stats['last_tokens'] = tokens
+        self.stats['messages_dropped'] += dropped
+        self.stats['sections_truncated'] += truncated_sections
+
+        return {
+            'system': system_prompt,
+            'messages': messages,
+            'context': "\n\n".join(context_parts),
+            'tokens': tokens,
+            'dropped_messages': dropped,
+            'truncated_sections': truncated_sections,
+            'build_ms': build_ms
+        }
+
+    def get_stats(self) -> Dict:
+        """Build counters plus token cache hit rate"""
+        cache = count_tokens.cache_info()
+        return {
+            **self.stats,
+            'avg_build_ms': self.stats['total_build_ms'] / self.stats['builds'] if self.stats['builds'] else 0.0,
+            'token_cache_hits': cache.hits,
+            'token_cache_misses': cache.misses
+        }
@@ -0,0 +1,182 @@
+"""
+OG-AI Request Timing - Where does a /chat request spend its time?
+The agent wraps each stage of process_message (intent detection, tool calls,
+provider call, learning, TTS...) in span(). Every span lands in a per-stage
+latency histogram; inside request_timer() it's also kept for that request so
+the API can send it back as a Server-Timing header.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Histogram bucket upper bounds in milliseconds (anything slower goes in +Inf)
+DEFAULT_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class Histogram:
+    """
+    Latency histogram with fixed buckets
+
+    Every thread counts into its own shard, so observe() takes no lock and
+    never loses an update; readers add the shards up.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS_MS):
+        """
+        Initialize histogram
+
+        Args:
+            buckets: Sorted bucket upper bounds
+        """
+        self.buckets = tuple(buckets)
+        self._local = threading.local()
+        self._shards: List[List[float]] = []
+
+    def _shard(self) -> List[float]:
+        """This thread's [count per bucket..., +Inf count, sum]"""
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = [0] * (len(self.buckets) + 1) + [0.0]
+            self._shards.append(shard)  # list.append is atomic
+        return shard
+
+    def observe(self, value: float) -> None:
+        """Record one value"""
+        shard = self._shard()
+        shard[bisect_left(self.buckets, value)] += 1
+        shard[-1] += value
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        """Per-bucket counts (last one is +Inf) and the sum of all values"""
+        counts = [0] * (len(self.buckets) + 1)
+        total = 0.0
+        for shard in list(self._shards):
+            values = list(shard)
+            for i in range(len(counts)):
+                counts[i] += values[i]
+            total += values[-1]
+        return counts, total
+
+    def quantile(self, q: float, counts: Optional[List[int]] = None) -> float:
+        """Estimate a quantile by interpolating inside its bucket (0 when empty)"""
+        counts = counts if counts is not None else self.snapshot()[0]
+        rank = q * sum(counts)
+        if rank <= 0:
+            return 0.0
+        seen = 0
+        for i, count in enumerate(counts):
+            if seen + count >= rank:
+                if i == len(self.buckets):
+                    return float(self.buckets[-1])
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+        return float(self.buckets[-1])
+
+    def get_stats(self) -> Dict:
+        """Count, mean and p50/p95/p99 estimates (milliseconds)"""
+        counts, total = self.snapshot()
+        count = sum(counts)
+        return {
+            'count': count,
+            'mean_ms': round(total / count, 2) if count else 0.0,
+            'p50_ms': round(self.quantile(0.5, counts), 2),
+            'p95_ms': round(self.quantile(0.95, counts), 2),
+            'p99_ms': round(self.quantile(0.99, counts), 2),
+        }
+
+
+class TimingStats:
+    """Histograms of span durations by name"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS_MS):
+        """Initialize timing stats"""
+        self.buckets = tuple(buckets)
+        self.histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str) -> Histogram:
+        """The histogram for a span name (created on first use)"""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(name, Histogram(self.buckets))
+        return histogram
+
+    def observe(self, name: str, ms: float) -> None:
+        """Record a span duration"""
+        self.histogram(name).observe(ms)
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Stats for every span name"""
+        return {name: histogram.get_stats() for name, histogram in sorted(self.histograms.items())}
+
+
+class RequestTimer:
+    """Spans recorded during one request"""
+
+    def __init__(self):
+        """Initialize request timer"""
+        self.start = time.perf_counter()
+        self.spans: List[Tuple[str, float]] = []
+
+    def total_ms(self) -> float:
+        """Milliseconds since the request started"""
+        return (time.perf_counter() - self.start) * 1000
+
+    def server_timing(self) -> str:
+        """
+        Spans as a Server-Timing header value
+
+        e.g. 'intent;dur=0.21, search;dur=412.5, provider;dur=913.04, total;dur=1330.2'
+        """
+        entries = [f"{name};dur={ms:.2f}" for name, ms in self.spans]
+        entries.append(f"total;dur={self.total_ms():.2f}")
+        return ", ".join(entries)
+
+
+_stats = TimingStats()
+_current: ContextVar[Optional[RequestTimer]] = ContextVar('og_ai_request_timer', default=None)
+
+
+def get_timing_stats() -> TimingStats:
+    """Get the process-wide span histograms"""
+    return _stats
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """
+    Time a block as a span
+
+    Always recorded in the span histograms; also added to the current
+    request's timer when there is one.
+
+    Args:
+        name: Span name (a header token - letters, digits, '_', '-', '.')
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        ms = (time.perf_counter() - start) * 1000
+        _stats.observe(name, ms)
+        timer = _current.get()
+        if timer is not None:
+            timer.spans.append((name, ms))
+
+
+@contextmanager
+def request_timer() -> Iterator[RequestTimer]:
+    """Collect the spans of everything run inside the block (threads started via run_in_threadpool included)"""
+    timer = RequestTimer()
+    token = _current.set(timer)
+    try:
+        yield timer
+    finally:
+        _current.reset(token)
+        _stats.observe('total', timer.total_ms())
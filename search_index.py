@@ -0,0 +1,126 @@
+"""
+OG-AI Search Index - Small in-memory BM25 full-text index
+Used to look things up in what OG-AI already learned instead of hitting the web again
+"""
+
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Dict, Hashable, List, Set, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'can', 'do', 'for', 'from', 'how',
+    'i', 'in', 'is', 'it', 'me', 'my', 'of', 'on', 'or', 'so', 'that', 'the', 'this',
+    'to', 'up', 'was', 'what', 'when', 'where', 'who', 'why', 'with', 'you', 'your',
+    'yo', 'look', 'find', 'search', 'tell', 'about'
+})
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords or single characters"""
+    return [token for token in TOKEN_PATTERN.findall(text.lower())
+            if len(token) > 1 and token not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Inverted index with Okapi BM25 scoring
+
+    Documents can be added and removed one at a time, so the index stays in
+    sync with a store that evicts old entries.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Initialize index
+
+        Args:
+            k1: Term frequency saturation
+            b: Document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+
+        self._postings: Dict[str, Dict[Hashable, int]] = {}
+        self._doc_terms: Dict[Hashable, Counter] = {}
+        self._doc_lengths: Dict[Hashable, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def __contains__(self, doc_id: Hashable) -> bool:
+        return doc_id in self._doc_terms
+
+    def add(self, doc_id: Hashable, text: str) -> None:
+        """Index a document (replaces an existing one with the same id)"""
+        if doc_id in self._doc_terms:
+            self.remove(doc_id)
+
+        terms = Counter(tokenize(text))
+        self._doc_terms[doc_id] = terms
+        length = sum(terms.values())
+        self._doc_lengths[doc_id] = length
+        self._total_length += length
+
+        for term, count in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = count
+
+    def remove(self, doc_id: Hashable) -> bool:
+        """Drop a document from the index - returns False if it wasn't indexed"""
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return False
+
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        for term in terms:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+        return True
+
+    def search(self, query: str, k: int = 5, min_score: float = 0.0,
+               min_match: float = 0.0) -> List[Tuple[Hashable, float]]:
+        """
+        Find the best matching documents
+
+        Args:
+            query: Free text query
+            k: Most results to return
+            min_score: Drop results scoring at or below this
+            min_match: Fraction of the query's terms a document must contain
+
+        Returns:
+            List of (doc_id, score), best first
+        """
+        doc_count = len(self._doc_terms)
+        if not doc_count:
+            return []
+
+        avg_length = self._total_length / doc_count or 1.0
+        scores: Dict[Hashable, float] = {}
+        matches: Counter = Counter()
+        query_terms: Set[str] = set(tokenize(query))
+
+        for term in query_terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+
+            df = len(postings)
+            idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            for doc_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+                matches[doc_id] += 1
+
+        if min_match:
+            needed = min_match * len(query_terms)
+            scores = {doc_id: score for doc_id, score in scores.items() if matches[doc_id] >= needed}
+
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(doc_id, score) for doc_id, score in best if score > min_score]
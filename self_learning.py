@@ -3,12 +3,37 @@ OG-AI Self-Learning Module - Agent improves itself over time
 Makes OG-AI smarter every day by learning from conversations
 """
 
+import atexit
 import json
 import os
+import threading
+import time
+import weakref
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from collections import defaultdict
 
+from fast_json import dumps
+from job_scheduler import FileLock
+from metrics import KNOWLEDGE_SAVE
+
+# Counter names in the shared session store
+COUNTER_PREFIX = 'learning:'
+TOPIC_PREFIX = COUNTER_PREFIX + 'topic:'
+
+# Knowledge lists every worker only ever appends to, and dicts it only adds keys to
+APPEND_FIELDS = ('successful_patterns', 'improvements')
+MERGE_FIELDS = ('learned_responses', 'user_preferences', 'code_snippets')
+
+# Systems with a save still waiting on its timer - saved at exit so nothing is lost
+_unsaved = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_all():
+    for system in list(_unsaved):
+        system.flush()
+
 
 class SelfLearningSystem:
     """
@@ -16,15 +41,35 @@ class SelfLearningSystem:
     Learns from conversations and improves responses over time
     """
     
-    def __init__(self, knowledge_file: str = "og_ai_knowledge.json"):
+    def __init__(self, knowledge_file: str = "og_ai_knowledge.json", store: Optional[Any] = None,
+                 save_interval: Optional[float] = None):
         """
         Initialize self-learning system
         
         Args:
             knowledge_file: Path to save learned knowledge
+            store: Shared SessionStore - conversation/topic counts and intelligence level
+                are kept there so every worker adds to the same numbers
+            save_interval: Seconds conversations are batched up before the knowledge file
+                is rewritten (LEARNING_SAVE_INTERVAL, default 30; 0 saves after every one)
         """
         self.knowledge_file = knowledge_file
+        if save_interval is None:
+            save_interval = float(os.getenv("LEARNING_SAVE_INTERVAL", "30"))
+        self.save_interval = max(save_interval, 0.0)
+        # Chats from several threads learn at once - guards knowledge and _pending
+        self._lock = threading.RLock()
+        # One save at a time per process (the file lock handles other processes)
+        self._save_lock = threading.Lock()
+        self._save_timer = None
+        self._dirty = False
         self.knowledge = self._load_knowledge()
+        # What this worker learned since its last save - merged into the file, never written over it
+        self._pending = self._empty_pending()
+        self.store = store
+        if self.store is not None:
+            self._seed_counters()
+            self._sync_counters()
         
         # Track patterns
         self.successful_patterns = []
@@ -43,11 +88,15 @@ class SelfLearningSystem:
         if os.path.exists(self.knowledge_file):
             try:
                 with open(self.knowledge_file, 'r') as f:
-                    return json.load(f)
+                    return {**self._default_knowledge(), **json.load(f)}
             except Exception as e:
                 print(f"⚠️  Failed to load knowledge: {e}")
         
-        # Default knowledge structure
+        return self._default_knowledge()
+    
+    @staticmethod
+    def _default_knowledge() -> Dict:
+        """Default knowledge structure"""
         return {
             'learned_responses': {},
             'successful_patterns': [],
@@ -60,13 +109,172 @@ class SelfLearningSystem:
             'intelligence_level': 1.0
         }
     
+    @staticmethod
+    def _empty_pending() -> Dict:
+        return {
+            **{field: [] for field in APPEND_FIELDS},
+            'total_conversations': 0,
+            'intelligence_level': 0.0,
+            'common_topics': defaultdict(int),
+        }
+    
+    def _merge_pending(self, knowledge: Dict, pending: Dict, local: Dict) -> Dict:
+        """
+        Add what this worker learned (`pending`) to `knowledge` (fresh from the file)
+        
+        `local` is this worker's own view - where the learned_responses/preferences/
+        snippets and, with a store, the authoritative counters come from.
+        """
+        for field in APPEND_FIELDS:
+            knowledge[field] = knowledge.get(field, []) + pending[field]
+        for field in MERGE_FIELDS:
+            knowledge[field] = {**knowledge.get(field, {}), **local.get(field, {})}
+        
+        if self.store is not None:
+            # The store has the authoritative counts - the file just mirrors them
+            for field in ('total_conversations', 'intelligence_level', 'common_topics'):
+                knowledge[field] = local[field]
+        else:
+            knowledge['total_conversations'] += pending['total_conversations']
+            knowledge['intelligence_level'] += pending['intelligence_level']
+            topics = dict(knowledge.get('common_topics', {}))
+            for topic, count in pending['common_topics'].items():
+                topics[topic] = topics.get(topic, 0) + count
+            knowledge['common_topics'] = topics
+        
+        dates = [date for date in (knowledge.get('last_improvement_date'), local.get('last_improvement_date'))
+                 if date]
+        knowledge['last_improvement_date'] = max(dates) if dates else None
+        return knowledge
+    
+    @staticmethod
+    def _combine_pending(first: Dict, second: Dict) -> Dict:
+        """Pending learning from two batches, oldest first"""
+        combined = SelfLearningSystem._empty_pending()
+        for pending in (first, second):
+            for field in APPEND_FIELDS:
+                combined[field].extend(pending[field])
+            combined['total_conversations'] += pending['total_conversations']
+            combined['intelligence_level'] += pending['intelligence_level']
+            for topic, count in pending['common_topics'].items():
+                combined['common_topics'][topic] += count
+        return combined
+    
     def _save_knowledge(self):
-        """Save knowledge to file"""
-        try:
-            with open(self.knowledge_file, 'w') as f:
-                json.dump(self.knowledge, f, indent=2)
-        except Exception as e:
-            print(f"⚠️  Failed to save knowledge: {e}")
+        """
+        Merge this worker's new learning into the knowledge file
+        
+        Other workers write the same file, so under a file lock the current
+        file is read, the patterns/improvements/counts learned here since the
+        last save are added to it, and the result is written to a temp file
+        and swapped in (readers never see half a file). self.knowledge then
+        holds what every worker has learned.
+        
+        The pending learning is taken before the file is touched, so anything
+        learned while the save runs just waits for the next one.
+        """
+        with self._save_lock:
+            with self._lock:
+                if self._save_timer is not None:
+                    self._save_timer.cancel()
+                    self._save_timer = None
+                _unsaved.discard(self)
+                self._dirty = False
+                pending, self._pending = self._pending, self._empty_pending()
+                local = {
+                    **self.knowledge,
+                    'common_topics': dict(self.knowledge['common_topics']),
+                    **{field: dict(self.knowledge.get(field, {})) for field in MERGE_FIELDS},
+                }
+            
+            tmp_file = f"{self.knowledge_file}.{os.getpid()}.tmp"
+            lock = FileLock(f"{self.knowledge_file}.lock")
+            start = time.perf_counter()
+            try:
+                lock.acquire(blocking=True)
+                try:
+                    knowledge = self._merge_pending(self._load_knowledge(), pending, local)
+                    with open(tmp_file, 'wb') as f:
+                        f.write(dumps(knowledge))
+                    os.replace(tmp_file, self.knowledge_file)
+                finally:
+                    lock.release()
+            except Exception as e:
+                print(f"⚠️  Failed to save knowledge: {e}")
+                if os.path.exists(tmp_file):
+                    os.remove(tmp_file)
+                with self._lock:
+                    # Try again with the next batch (or at exit)
+                    self._pending = self._combine_pending(pending, self._pending)
+                    self._dirty = True
+                    _unsaved.add(self)
+                return
+            
+            with self._lock:
+                # Keep what was learned during the save in view until it's saved too
+                self.knowledge = self._merge_pending(knowledge, self._pending, self.knowledge)
+            KNOWLEDGE_SAVE.observe(time.perf_counter() - start)
+    
+    def _schedule_save(self):
+        """Save now if batching is off, otherwise once save_interval has passed"""
+        if self.save_interval <= 0:
+            self._save_knowledge()
+            return
+        with self._lock:
+            self._dirty = True
+            _unsaved.add(self)
+            if self._save_timer is None:
+                self._save_timer = threading.Timer(self.save_interval, self.flush)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+    
+    def flush(self):
+        """Save learning still waiting for its batch to the knowledge file (call on shutdown)"""
+        with self._lock:
+            if not self._dirty:
+                return
+        self._save_knowledge()
+    
+    def _seed_counters(self):
+        """Copy the file's counters into an empty store (only the first worker gets to)"""
+        if not self.store.init_counter(COUNTER_PREFIX + 'seeded', 1):
+            return
+        self.store.increment(COUNTER_PREFIX + 'total_conversations', self.knowledge['total_conversations'])
+        self.store.increment(COUNTER_PREFIX + 'intelligence_level', self.knowledge['intelligence_level'])
+        for topic, count in self.knowledge['common_topics'].items():
+            self.store.increment(TOPIC_PREFIX + topic, count)
+    
+    def _sync_counters(self):
+        """Refresh counters in self.knowledge from the shared store"""
+        counters = self.store.get_counters(COUNTER_PREFIX)
+        self.knowledge['total_conversations'] = int(counters.get(COUNTER_PREFIX + 'total_conversations', 0))
+        self.knowledge['intelligence_level'] = counters.get(COUNTER_PREFIX + 'intelligence_level', 1.0)
+        self.knowledge['common_topics'] = {
+            name[len(TOPIC_PREFIX):]: int(value) for name, value in counters.items() if name.startswith(TOPIC_PREFIX)
+        }
+    
+    def _add_intelligence(self, amount: float):
+        """Raise the intelligence level (atomically in the store when there is one)"""
+        if self.store is not None:
+            self.knowledge['intelligence_level'] = self.store.increment(COUNTER_PREFIX + 'intelligence_level', amount)
+        else:
+            self.knowledge['intelligence_level'] += amount
+            self._pending['intelligence_level'] += amount
+    
+    def add_intelligence(self, amount: float) -> float:
+        """
+        Raise the intelligence level and save it
+        
+        Args:
+            amount: How much to add
+            
+        Returns:
+            The new intelligence level (across all workers)
+        """
+        with self._lock:
+            self._add_intelligence(amount)
+        self._save_knowledge()
+        return self.knowledge['intelligence_level']
     
     def learn_from_conversation(self, user_message: str, agent_response: str, 
                                  was_helpful: bool = True, user_feedback: str = None):
@@ -80,29 +288,36 @@ class SelfLearningSystem:
             user_feedback: Optional user feedback
         """
         # Track conversation
-        self.knowledge['total_conversations'] += 1
-        
-        # Extract topic
         topic = self._extract_topic(user_message)
-        if topic:
-            self.knowledge['common_topics'][topic] = \
-                self.knowledge['common_topics'].get(topic, 0) + 1
-        
-        # If helpful, save as successful pattern
-        if was_helpful:
-            pattern = {
-                'user_query_type': self._categorize_query(user_message),
-                'response_type': self._categorize_response(agent_response),
-                'timestamp': datetime.now().isoformat(),
-                'user_feedback': user_feedback
-            }
-            self.knowledge['successful_patterns'].append(pattern)
+        with self._lock:
+            if self.store is not None:
+                self.knowledge['total_conversations'] = int(self.store.increment(COUNTER_PREFIX + 'total_conversations'))
+                if topic:
+                    self.knowledge['common_topics'][topic] = int(self.store.increment(TOPIC_PREFIX + topic))
+            else:
+                self.knowledge['total_conversations'] += 1
+                self._pending['total_conversations'] += 1
+                if topic:
+                    self.knowledge['common_topics'][topic] = \
+                        self.knowledge['common_topics'].get(topic, 0) + 1
+                    self._pending['common_topics'][topic] += 1
+        
+            # If helpful, save as successful pattern
+            if was_helpful:
+                pattern = {
+                    'user_query_type': self._categorize_query(user_message),
+                    'response_type': self._categorize_response(agent_response),
+                    'timestamp': datetime.now().isoformat(),
+                    'user_feedback': user_feedback
+                }
+                self.knowledge['successful_patterns'].append(pattern)
+                self._pending['successful_patterns'].append(pattern)
             
-            # Increase intelligence
-            self.knowledge['intelligence_level'] += 0.001
+                # Increase intelligence
+                self._add_intelligence(0.001)
         
-        # Save knowledge
-        self._save_knowledge()
+        # Save knowledge (batched up with the conversations around it)
+        self._schedule_save()
     
     def _extract_topic(self, message: str) -> str:
         """Extract main topic from message"""
@@ -152,22 +367,23 @@ class SelfLearningSystem:
         """
         suggestions = []
         
-        # Check if we need more personality in responses
-        personality_responses = sum(1 for p in self.knowledge['successful_patterns'] 
-                                   if p.get('response_type') == 'personality_response')
-        total_patterns = len(self.knowledge['successful_patterns'])
+        with self._lock:
+            # Check if we need more personality in responses
+            personality_responses = sum(1 for p in self.knowledge['successful_patterns'] 
+                                       if p.get('response_type') == 'personality_response')
+            total_patterns = len(self.knowledge['successful_patterns'])
         
-        if total_patterns > 10 and personality_responses / total_patterns < 0.3:
-            suggestions.append("Add more gangster personality to responses")
+            if total_patterns > 10 and personality_responses / total_patterns < 0.3:
+                suggestions.append("Add more gangster personality to responses")
         
-        # Check common topics
-        if self.knowledge['common_topics']:
-            top_topic = max(self.knowledge['common_topics'].items(), key=lambda x: x[1])
-            suggestions.append(f"User asks about '{top_topic[0]}' often - specialize in this")
+            # Check common topics
+            if self.knowledge['common_topics']:
+                top_topic = max(self.knowledge['common_topics'].items(), key=lambda x: x[1])
+                suggestions.append(f"User asks about '{top_topic[0]}' often - specialize in this")
         
-        # Intelligence improvement
-        if self.knowledge['intelligence_level'] < 2.0:
-            suggestions.append("Expand knowledge base with more advanced responses")
+            # Intelligence improvement
+            if self.knowledge['intelligence_level'] < 2.0:
+                suggestions.append("Expand knowledge base with more advanced responses")
         
         return suggestions
     
@@ -182,27 +398,31 @@ class SelfLearningSystem:
         improvements = []
         today = datetime.now().date().isoformat()
         
-        # Check if already improved today
-        if self.knowledge.get('last_improvement_date') == today:
-            return ["Already improved today"]
+        with self._lock:
+            # Check if already improved today
+            if self.knowledge.get('last_improvement_date') == today:
+                return ["Already improved today"]
         
-        # Analyze patterns
-        suggestions = self.suggest_improvements()
+            # Analyze patterns
+            suggestions = self.suggest_improvements()
         
-        for suggestion in suggestions:
-            improvement = {
-                'date': today,
-                'suggestion': suggestion,
-                'applied': True
-            }
-            improvements.append(suggestion)
-            self.knowledge['improvements'].append(improvement)
+            for suggestion in suggestions:
+                improvement = {
+                    'date': today,
+                    'suggestion': suggestion,
+                    'applied': True
+                }
+                improvements.append(suggestion)
+                self.knowledge['improvements'].append(improvement)
+                self._pending['improvements'].append(improvement)
         
-        # Update intelligence level
-        self.knowledge['intelligence_level'] *= 1.01  # 1% improvement per day
+            # Update intelligence level
+            if self.store is not None:
+                self._sync_counters()
+            self._add_intelligence(self.knowledge['intelligence_level'] * 0.01)  # 1% improvement per day
         
-        # Update last improvement date
-        self.knowledge['last_improvement_date'] = today
+            # Update last improvement date
+            self.knowledge['last_improvement_date'] = today
         
         # Save
         self._save_knowledge()
@@ -216,16 +436,19 @@ class SelfLearningSystem:
         Returns:
             Report dictionary
         """
-        return {
-            'intelligence_level': round(self.knowledge['intelligence_level'], 2),
-            'total_conversations': self.knowledge['total_conversations'],
-            'successful_patterns_learned': len(self.knowledge['successful_patterns']),
-            'improvements_made': len(self.knowledge['improvements']),
-            'top_topics': sorted(self.knowledge['common_topics'].items(), 
-                                key=lambda x: x[1], reverse=True)[:5],
-            'last_improvement': self.knowledge.get('last_improvement_date'),
-            'days_learning': len(self.knowledge['improvements'])
-        }
+        with self._lock:
+            if self.store is not None:
+                self._sync_counters()
+            return {
+                'intelligence_level': round(self.knowledge['intelligence_level'], 2),
+                'total_conversations': self.knowledge['total_conversations'],
+                'successful_patterns_learned': len(self.knowledge['successful_patterns']),
+                'improvements_made': len(self.knowledge['improvements']),
+                'top_topics': sorted(self.knowledge['common_topics'].items(), 
+                                    key=lambda x: x[1], reverse=True)[:5],
+                'last_improvement': self.knowledge.get('last_improvement_date'),
+                'days_learning': len(self.knowledge['improvements'])
+            }
     
     def get_learned_response(self, user_message: str) -> str:
         """
@@ -0,0 +1,296 @@
+"""
+OG-AI Session Store - Conversation history and learning counters shared across workers
+Gunicorn runs several workers, each with its own agent; with a shared store they all
+see the same /history and count conversations/topics without racing on a JSON file.
+SQLite (WAL mode) for a single host, Redis to scale workers across hosts.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional
+
+from lazy_imports import optional_import
+
+
+class SessionStore(ABC):
+    """
+    Interface for shared session state
+
+    Sessions are append-only lists of message dicts; counters are named floats
+    that are incremented atomically (safe to call from any worker at once).
+    """
+
+    @abstractmethod
+    def append_message(self, session_id: str, message: Dict) -> int:
+        """
+        Append a message to a session
+
+        Returns:
+            Number of messages in the session afterwards
+        """
+
+    @abstractmethod
+    def get_messages(self, session_id: str, start: int = 0, limit: Optional[int] = None) -> List[Dict]:
+        """Messages of a session from position `start`, at most `limit` of them"""
+
+    @abstractmethod
+    def count_messages(self, session_id: str) -> int:
+        """Number of messages in a session"""
+
+    @abstractmethod
+    def replace_messages(self, session_id: str, messages: Iterable[Dict]) -> None:
+        """Swap a session's messages for `messages` in one go (e.g. after loading a saved chat)"""
+
+    def clear_session(self, session_id: str) -> None:
+        """Delete all messages of a session"""
+        self.replace_messages(session_id, [])
+
+    @abstractmethod
+    def increment(self, name: str, amount: float = 1) -> float:
+        """
+        Atomically add `amount` to a counter (created at 0)
+
+        Returns:
+            The counter's new value
+        """
+
+    @abstractmethod
+    def init_counter(self, name: str, value: float) -> bool:
+        """
+        Create a counter with `value` unless it exists already (atomic)
+
+        Returns:
+            True if this call created it
+        """
+
+    @abstractmethod
+    def get_counters(self, prefix: str = "") -> Dict[str, float]:
+        """All counters whose name starts with `prefix`"""
+
+    def close(self) -> None:
+        """Release connections"""
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Session store in a local SQLite database
+
+    WAL mode lets readers in one worker run while another writes, and every
+    write is a single statement or an IMMEDIATE transaction, so workers on the
+    same host never lose updates. Each thread gets its own connection.
+    """
+
+    def __init__(self, path: str = "og_ai_state.db", timeout: float = 30.0):
+        """
+        Initialize SQLite store
+
+        Args:
+            path: Database file (created if missing)
+            timeout: Seconds to wait for another worker's write lock
+        """
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+        conn = self._conn()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS messages_session ON messages (session_id, id);
+            CREATE TABLE IF NOT EXISTS counters (
+                name TEXT PRIMARY KEY,
+                value REAL NOT NULL
+            );
+        """)
+
+    def _conn(self) -> sqlite3.Connection:
+        """This thread's connection (autocommit, WAL)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def append_message(self, session_id: str, message: Dict) -> int:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("INSERT INTO messages (session_id, data) VALUES (?, ?)",
+                         (session_id, json.dumps(message)))
+            count = conn.execute("SELECT COUNT(*) FROM messages WHERE session_id = ?", (session_id,)).fetchone()[0]
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return count
+
+    def get_messages(self, session_id: str, start: int = 0, limit: Optional[int] = None) -> List[Dict]:
+        rows = self._conn().execute(
+            "SELECT data FROM messages WHERE session_id = ? ORDER BY id LIMIT ? OFFSET ?",
+            (session_id, -1 if limit is None else limit, start)
+        )
+        return [json.loads(data) for (data,) in rows]
+
+    def count_messages(self, session_id: str) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM messages WHERE session_id = ?", (session_id,)).fetchone()[0]
+
+    def replace_messages(self, session_id: str, messages: Iterable[Dict]) -> None:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            conn.executemany("INSERT INTO messages (session_id, data) VALUES (?, ?)",
+                             ((session_id, json.dumps(message)) for message in messages))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def increment(self, name: str, amount: float = 1) -> float:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("INSERT INTO counters (name, value) VALUES (?, ?) "
+                         "ON CONFLICT (name) DO UPDATE SET value = value + excluded.value", (name, amount))
+            value = conn.execute("SELECT value FROM counters WHERE name = ?", (name,)).fetchone()[0]
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return value
+
+    def init_counter(self, name: str, value: float) -> bool:
+        cursor = self._conn().execute("INSERT OR IGNORE INTO counters (name, value) VALUES (?, ?)", (name, value))
+        return cursor.rowcount == 1
+
+    def get_counters(self, prefix: str = "") -> Dict[str, float]:
+        rows = self._conn().execute(
+            "SELECT name, value FROM counters WHERE substr(name, 1, ?) = ?", (len(prefix), prefix)
+        )
+        return dict(rows.fetchall())
+
+    def close(self) -> None:
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Session store in Redis - for workers spread over several hosts
+
+    Sessions are lists of JSON messages (RPUSH/LRANGE) and counters live in one
+    hash (HINCRBYFLOAT), all atomic on the Redis side. Works with any client that
+    speaks the redis-py API.
+    """
+
+    def __init__(self, url: str = "redis://localhost:6379/0", client: Any = None, prefix: str = "og_ai:"):
+        """
+        Initialize Redis store
+
+        Args:
+            url: Redis URL (ignored when `client` is given)
+            client: redis-py compatible client, created from `url` if missing
+            prefix: Prefix for all keys
+        """
+        if client is None:
+            redis = optional_import("redis")
+            if redis is None:
+                raise ImportError("The redis package is needed for a redis:// session store (pip install redis)")
+            client = redis.Redis.from_url(url, decode_responses=True)
+        self.client = client
+        self.prefix = prefix
+        self.counters_key = f"{prefix}counters"
+
+    def _key(self, session_id: str) -> str:
+        """List key holding a session"""
+        return f"{self.prefix}session:{session_id}"
+
+    def append_message(self, session_id: str, message: Dict) -> int:
+        return self.client.rpush(self._key(session_id), json.dumps(message))
+
+    def get_messages(self, session_id: str, start: int = 0, limit: Optional[int] = None) -> List[Dict]:
+        if limit is not None and limit <= 0:
+            return []
+        stop = -1 if limit is None else start + limit - 1
+        return [json.loads(data) for data in self.client.lrange(self._key(session_id), start, stop)]
+
+    def count_messages(self, session_id: str) -> int:
+        return self.client.llen(self._key(session_id))
+
+    def replace_messages(self, session_id: str, messages: Iterable[Dict]) -> None:
+        key = self._key(session_id)
+        encoded = [json.dumps(message) for message in messages]
+        # MULTI/EXEC so no worker ever sees the session half-replaced
+        pipe = self.client.pipeline(transaction=True)
+        pipe.delete(key)
+        if encoded:
+            pipe.rpush(key, *encoded)
+        pipe.execute()
+
+    def increment(self, name: str, amount: float = 1) -> float:
+        return float(self.client.hincrbyfloat(self.counters_key, name, amount))
+
+    def init_counter(self, name: str, value: float) -> bool:
+        return bool(self.client.hsetnx(self.counters_key, name, value))
+
+    def get_counters(self, prefix: str = "") -> Dict[str, float]:
+        return {
+            name: float(value) for name, value in self.client.hgetall(self.counters_key).items()
+            if name.startswith(prefix)
+        }
+
+    def close(self) -> None:
+        close = getattr(self.client, 'close', None)
+        if close is not None:
+            close()
+
+
+def create_session_store(url: Optional[str] = None) -> Optional[SessionStore]:
+    """
+    Build a store from a URL
+
+    Args:
+        url: 'sqlite:///path/to/file.db', 'redis://host:port/db' or 'rediss://...'
+            (default: SESSION_STORE_URL); empty means no shared store
+
+    Returns:
+        The store, or None when none is configured
+    """
+    url = url if url is not None else os.getenv("SESSION_STORE_URL", "")
+    if not url:
+        return None
+    if url.startswith("sqlite:///"):
+        return SQLiteSessionStore(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisSessionStore(url)
+    raise ValueError(f"Unsupported SESSION_STORE_URL: {url}")
+
+
+_store = None
+_store_loaded = False
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> Optional[SessionStore]:
+    """Get or create the process-wide session store (None when SESSION_STORE_URL is unset)"""
+    global _store, _store_loaded
+    with _store_lock:
+        if not _store_loaded:
+            _store = create_session_store()
+            _store_loaded = True
+        return _store
@@ -676,4 +676,92 @@ class TestEdgeCases:
         message = "Test\x00message"
         response = agent.process_message(message)
         
-        assert isinstance(response, str)
\ No newline at end of file
+        assert isinstance(response, str)
+
+class TestJsonlConversation:
+    """Test the JSONL conversation format."""
+    
+    def test_save_and_load(self, tmp_path):
+        """Test a .jsonl round trip keeps every message."""
+        filepath = str(tmp_path / "conversation.jsonl")
+        agent = AIAgent(name="LineBot")
+        agent.process_message("hello")
+        agent.save_conversation(filepath)
+        
+        loaded = AIAgent()
+        loaded.load_conversation(filepath)
+        assert loaded.conversation_history == agent.conversation_history
+    
+    def test_save_again_appends(self, tmp_path):
+        """Test saving to the same path only appends the new messages."""
+        filepath = str(tmp_path / "conversation.jsonl")
+        agent = AIAgent()
+        agent.process_message("hello")
+        agent.save_conversation(filepath)
+        with open(filepath) as f:
+            first_lines = f.read()
+        
+        agent.process_message("how are you")
+        agent.save_conversation(filepath)
+        with open(filepath) as f:
+            contents = f.read()
+        
+        assert contents.startswith(first_lines)
+        assert len(contents.splitlines()) == 5
+    
+    def test_load_last(self, tmp_path):
+        """Test loading only the last messages."""
+        filepath = str(tmp_path / "conversation.jsonl.gz")
+        agent = AIAgent()
+        for n in range(10):
+            agent.add_message('user', f"message {n}")
+        agent.save_conversation(filepath)
+        
+        loaded = AIAgent()
+        loaded.load_conversation(filepath, last=3)
+        assert [msg['content'] for msg in loaded.conversation_history] == ['message 7', 'message 8', 'message 9']
+    
+    def test_save_after_load_last_keeps_earlier_messages(self, tmp_path):
+        """Test saving back to a partially loaded .jsonl file doesn't drop what wasn't loaded."""
+        filepath = str(tmp_path / "conversation.jsonl")
+        agent = AIAgent()
+        for n in range(10):
+            agent.add_message('user', f"message {n}")
+        agent.save_conversation(filepath)
+        
+        loaded = AIAgent()
+        loaded.load_conversation(filepath, last=3)
+        loaded.add_message('user', "message 10")
+        loaded.save_conversation(filepath)
+        
+        reloaded = AIAgent()
+        reloaded.load_conversation(filepath)
+        assert [msg['content'] for msg in reloaded.conversation_history] == [f"message {n}" for n in range(11)]
+    
+    def test_load_last_from_json(self, tmp_path):
+        """Test `last` works for plain JSON files too."""
+        filepath = str(tmp_path / "conversation.json")
+        agent = AIAgent()
+        for n in range(5):
+            agent.add_message('user', f"message {n}")
+        agent.save_conversation(filepath)
+        
+        loaded = AIAgent()
+        loaded.load_conversation(filepath, last=2)
+        assert [msg['content'] for msg in loaded.conversation_history] == ['message 3', 'message 4']
+    
+    def test_load_missing_jsonl(self, tmp_path):
+        """Test loading a missing .jsonl file raises FileNotFoundError."""
+        agent = AIAgent()
+        with pytest.raises(FileNotFoundError):
+            agent.load_conversation(str(tmp_path / "missing.jsonl"))
+    
+    def test_conversation_dir_transcript(self, tmp_path):
+        """Test save_conversations appends every message to conversation_dir."""
+        config = {'save_conversations': True, 'conversation_dir': str(tmp_path / "conversations")}
+        agent = AIAgent(config=config)
+        agent.process_message("hello")
+        
+        loaded = AIAgent()
+        loaded.load_conversation(str(tmp_path / "conversations" / "default.jsonl"))
+        assert loaded.conversation_history == agent.conversation_history
@@ -4,10 +4,15 @@ Tests cover all API endpoints, request validation, error handling, and edge case
 """
 
 import pytest
+import asyncio
 import json
+import threading
+import time
+import httpx
 from fastapi.testclient import TestClient
 from app import app, get_agent
 from ai_agent import AIAgent
+from ollama_dispatcher import OllamaDispatcher
 import app as app_module
 
 
@@ -15,6 +20,14 @@ import app as app_module
 client = TestClient(app)
 
 
+@pytest.fixture(autouse=True)
+def conversation_dir(tmp_path, monkeypatch):
+    """Keep the transcripts config.json's save_conversations turns on out of the repo."""
+    load_config = app_module.load_config
+    monkeypatch.setattr(app_module, "load_config",
+                        lambda: {**load_config(), 'conversation_dir': str(tmp_path / "conversations")})
+
+
 @pytest.fixture
 def reset_agent():
     """Fixture to reset the global agent between tests."""
@@ -144,6 +157,126 @@ class TestHealthEndpoint:
         assert response2.json()["status"] == "healthy"
 
 
+class TestMetricsEndpoint:
+    """Test the /metrics endpoint."""
+
+    @pytest.mark.usefixtures("reset_agent")
+    def test_metrics_format(self):
+        """Test /metrics serves Prometheus text with request counts."""
+        client.get("/health")
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert "# TYPE og_ai_http_requests_total counter" in response.text
+        assert 'og_ai_http_requests_total{method="GET",route="/health",status="200"}' in response.text
+
+    @pytest.mark.usefixtures("reset_agent")
+    def test_metrics_after_chat(self):
+        """Test chat stages and history size show up after a chat."""
+        client.post("/chat", json={"message": "Hello"})
+        text = client.get("/metrics").text
+
+        assert "og_ai_history_messages " in text
+        assert 'og_ai_http_request_duration_seconds_count{method="POST",route="/chat"}' in text
+
+    @pytest.mark.usefixtures("reset_agent")
+    def test_metrics_does_not_build_agent(self):
+        """Test scraping doesn't construct the agent."""
+        client.get("/metrics")
+        assert app_module.agent is None
+
+
+class TestDebugProfileEndpoint:
+    """Test the admin-only /debug/profile endpoint."""
+
+    @pytest.fixture
+    def admin_token(self, monkeypatch):
+        monkeypatch.setattr(app_module, "ADMIN_TOKEN", "s3cret")
+        return "s3cret"
+
+    def test_disabled_without_token(self, monkeypatch):
+        """Test the endpoint doesn't exist unless ADMIN_TOKEN is set."""
+        monkeypatch.setattr(app_module, "ADMIN_TOKEN", "")
+        response = client.get("/debug/profile?seconds=0.01", headers={"Authorization": "Bearer "})
+        assert response.status_code == 404
+
+    def test_wrong_token(self, admin_token):
+        response = client.get("/debug/profile?seconds=0.01", headers={"Authorization": "Bearer nope"})
+        assert response.status_code == 401
+        assert client.get("/debug/profile?seconds=0.01").status_code == 401
+
+    def test_cpu_profile(self, admin_token):
+        """Test a profile comes back as collapsed stacks."""
+        response = client.get("/debug/profile?seconds=0.1&hz=200&idle=true",
+                              headers={"Authorization": f"Bearer {admin_token}"})
+        assert response.status_code == 200
+        assert response.headers["x-profile-mode"] == "cpu"
+        assert int(response.headers["x-profile-samples"]) >= 1
+        for line in response.text.splitlines():
+            stack, count = line.rsplit(" ", 1)
+            assert int(count) >= 1
+
+    def test_memory_profile(self, admin_token):
+        response = client.get("/debug/profile?seconds=0.05&memory=true",
+                              headers={"Authorization": f"Bearer {admin_token}"})
+        assert response.status_code == 200
+        assert response.headers["x-profile-mode"] == "memory"
+
+    def test_seconds_limit(self, admin_token):
+        response = client.get("/debug/profile?seconds=600", headers={"Authorization": f"Bearer {admin_token}"})
+        assert response.status_code == 422
+
+
+class TestReadyEndpoint:
+    """Test the /ready endpoint and the startup warm-up."""
+    
+    @pytest.fixture
+    def fresh_warmup(self, monkeypatch):
+        """Swap in a warm-up that hasn't run yet."""
+        from warmup import Warmup
+        monkeypatch.setattr(app_module, "warmup", Warmup())
+        return app_module.warmup
+    
+    @pytest.mark.usefixtures("reset_agent")
+    def test_not_ready_before_warmup(self, fresh_warmup):
+        """Test /ready is 503 until the warm-up ran, while /health is already up."""
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["status"] == "pending"
+        assert client.get("/health").status_code == 200
+    
+    @pytest.mark.usefixtures("reset_agent")
+    def test_health_does_not_build_agent(self):
+        """Test the liveness check doesn't construct the agent."""
+        client.get("/health")
+        assert app_module.agent is None
+    
+    @pytest.mark.usefixtures("reset_agent")
+    def test_startup_warms_up(self, fresh_warmup):
+        """Test app startup builds the agent and /ready turns 200."""
+        with TestClient(app) as warm_client:
+            assert fresh_warmup.wait(30)
+            response = warm_client.get("/ready")
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "ready"
+        assert data["steps"]["agent"]["ok"] is True
+        assert app_module.agent is not None
+    
+    @pytest.mark.usefixtures("reset_agent")
+    def test_warmup_disabled(self, fresh_warmup, monkeypatch):
+        """Test WARMUP_ENABLED=false reports ready without building anything."""
+        monkeypatch.setattr(app_module, "WARMUP_ENABLED", False)
+        with TestClient(app) as warm_client:
+            response = warm_client.get("/ready")
+        
+        assert response.status_code == 200
+        assert response.json()["status"] == "skipped"
+        assert app_module.agent is None
+
+
 class TestChatEndpoint:
     """Test the /chat endpoint."""
     
@@ -157,7 +290,69 @@ class TestChatEndpoint:
         assert "response" in data
         assert "agent_name" in data
         assert "timestamp" in data
-    
+
+    @pytest.mark.usefixtures("reset_agent")
+    def test_chat_server_timing(self):
+        """Test chat sends its pipeline timings in a Server-Timing header."""
+        response = client.post("/chat", json={"message": "Hello"})
+
+        assert response.status_code == 200
+        timing = response.headers["server-timing"]
+        assert "total;dur=" in timing
+        if "intent" in timing:  # enhanced agent
+            assert "provider;dur=" in timing
+
+    def test_concurrent_chats_share_ollama_batches(self, monkeypatch):
+        """Test concurrent chats reach the Ollama model together instead of one by one."""
+        calls = []
+        active = [0, 0]  # running now, most at once
+        lock = threading.Lock()
+
+        def slow_chat(**kwargs):
+            with lock:
+                calls.append(kwargs)
+                active[0] += 1
+                active[1] = max(active)
+            time.sleep(0.1)
+            with lock:
+                active[0] -= 1
+            return {'message': {'content': "aight"}}
+
+        class OllamaAgent:
+            """Minimal agent whose replies go through a dispatcher, like EnhancedAIAgent with Ollama."""
+            name = "OG-AI"
+
+            def __init__(self):
+                self.dispatcher = OllamaDispatcher(chat_fn=slow_chat, parallel=4, window_ms=50)
+                self.history = []
+
+            def process_message(self, message):
+                response = self.dispatcher.chat(model="llama3.2", messages=[{"role": "user", "content": message}])
+                self.history.append({'role': 'assistant', 'content': response['message']['content'],
+                                     'timestamp': "2025-11-05T20:00:00"})
+                return response['message']['content']
+
+            def get_conversation_history(self):
+                return self.history
+
+        agent = OllamaAgent()
+        monkeypatch.setattr(app_module, "agent", agent)
+        async def send_all():
+            # One event loop for all four, like a uvicorn worker
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+                return await asyncio.gather(*(async_client.post("/chat", json={"message": f"yo {n}"})
+                                              for n in range(4)))
+
+        try:
+            responses = asyncio.run(send_all())
+        finally:
+            agent.dispatcher.stop()
+
+        assert [response.status_code for response in responses] == [200] * 4
+        assert len(calls) == 4
+        assert active[1] > 1
+
     @pytest.mark.usefixtures("reset_agent")
     def test_chat_response_not_empty(self):
         """Test chat response is not empty."""
@@ -395,6 +590,82 @@ class TestHistoryEndpoint:
         response2 = client.get("/history")
         
         assert response1.json() == response2.json()
+    
+    @pytest.mark.usefixtures("reset_agent")
+    def test_history_message_ids(self):
+        """Test every message carries its position as id."""
+        client.post("/chat", json={"message": "One"})
+        client.post("/chat", json={"message": "Two"})
+        
+        data = client.get("/history").json()
+        assert [m["id"] for m in data["conversation"]] == [0, 1, 2, 3]
+        assert data["next_after"] == 3
+        assert data["has_more"] is False
+    
+    @pytest.mark.usefixtures("reset_agent")
+    def test_history_pagination(self):
+        """Test ?after= and ?limit= page through the conversation."""
+        for text in ("One", "Two", "Three"):
+            client.post("/chat", json={"message": text})
+        
+        first = client.get("/history", params={"limit": 4}).json()
+        assert [m["id"] for m in first["conversation"]] == [0, 1, 2, 3]
+        assert first["has_more"] is True
+        assert first["message_count"] == 6
+        
+        rest = client.get("/history", params={"after": first["next_after"], "limit": 4}).json()
+        assert [m["id"] for m in rest["conversation"]] == [4, 5]
+        assert rest["conversation"][0]["content"] == "Three"
+        assert rest["has_more"] is False
+    
+    @pytest.mark.usefixtures("reset_agent")
+    def test_history_only_new_messages(self):
+        """Test polling with the last seen id returns nothing until something new arrives."""
+        client.post("/chat", json={"message": "One"})
+        seen = client.get("/history").json()["next_after"]
+        
+        assert client.get("/history", params={"after": seen}).json()["conversation"] == []
+        client.post("/chat", json={"message": "Two"})
+        new = client.get("/history", params={"after": seen}).json()["conversation"]
+        assert [m["content"] for m in new][0] == "Two"
+    
+    @pytest.mark.usefixtures("reset_agent")
+    def test_history_invalid_params(self):
+        """Test bad pagination params are rejected."""
+        assert client.get("/history", params={"limit": 0}).status_code == 422
+        assert client.get("/history", params={"after": -5}).status_code == 422
+    
+    @pytest.mark.usefixtures("reset_agent")
+    def test_history_etag_not_modified(self):
+        """Test If-None-Match with the current ETag gives an empty 304."""
+        client.post("/chat", json={"message": "Hello"})
+        response = client.get("/history")
+        etag = response.headers["etag"]
+        
+        cached = client.get("/history", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["etag"] == etag
+    
+    @pytest.mark.usefixtures("reset_agent")
+    def test_history_etag_changes(self):
+        """Test the ETag changes with new messages and with the query."""
+        client.post("/chat", json={"message": "Hello"})
+        etag = client.get("/history").headers["etag"]
+        
+        assert client.get("/history", params={"limit": 1}).headers["etag"] != etag
+        client.post("/chat", json={"message": "Again"})
+        assert client.get("/history", headers={"If-None-Match": etag}).status_code == 200
+    
+    @pytest.mark.usefixtures("reset_agent")
+    def test_history_compat_flag(self, monkeypatch):
+        """Test the duplicated 'history' key can be dropped."""
+        client.post("/chat", json={"message": "Hello"})
+        assert "history" not in client.get("/history", params={"compat": "false"}).json()
+        
+        monkeypatch.setattr(app_module, "HISTORY_COMPAT_KEY", False)
+        assert "history" not in client.get("/history").json()
+        assert "history" in client.get("/history", params={"compat": "true"}).json()
 
 
 class TestResetEndpoint:
@@ -489,6 +760,118 @@ class TestResetEndpoint:
         assert history["message_count"] == 0
 
 
+class TestProjectEndpoint:
+    """Test the /chat/project streaming endpoint."""
+    
+    @pytest.mark.usefixtures("reset_agent")
+    def test_project_streams_markdown(self):
+        """Test project generation streams README and code files as markdown."""
+        response = client.post("/chat/project", json={"message": "Make me an API called pets"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/markdown")
+        assert "# pets" in response.text
+        assert "**`pets/main.py`**" in response.text
+        assert "```python" in response.text
+    
+    @pytest.mark.usefixtures("reset_agent")
+    def test_project_streams_zip_archive(self):
+        """Test project generation can return a zip archive."""
+        import io
+        import zipfile
+        
+        response = client.post("/chat/project", json={"message": "Make me an API called pets", "archive": True})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/zip"
+        
+        archive = zipfile.ZipFile(io.BytesIO(response.content))
+        assert archive.testzip() is None
+        assert set(archive.namelist()) == {"pets/README.md", "pets/main.py", "pets/requirements.txt"}
+        assert b"FastAPI" in archive.read("pets/main.py")
+    
+    @pytest.mark.usefixtures("reset_agent")
+    def test_project_records_file_listing(self):
+        """Test only a short file listing is saved to history."""
+        client.post("/chat/project", json={"message": "Make me an API called pets"})
+        
+        history = client.get("/history").json()
+        assert history["message_count"] == 2
+        assert "pets/main.py" in history["history"][-1]["content"]
+    
+    @pytest.mark.usefixtures("reset_agent")
+    def test_project_rejects_unknown_request(self):
+        """Test messages that aren't project requests are rejected."""
+        response = client.post("/chat/project", json={"message": "Hello there"})
+        assert response.status_code == 400
+    
+    @pytest.mark.usefixtures("reset_agent")
+    def test_project_empty_message(self):
+        """Test empty message is rejected."""
+        response = client.post("/chat/project", json={"message": "   "})
+        assert response.status_code == 400
+
+
+class FakeSpeechVoice:
+    """Stand-in voice for /speech that renders text to fake audio bytes."""
+    
+    engine = 'fake'
+    
+    def __init__(self):
+        self.renders = 0
+    
+    def cache_key(self, text):
+        return f"key-{len(text)}"
+    
+    def synthesize(self, text):
+        self.renders += 1
+        return b"ID3" + text.encode()
+    
+    def get_audio_mime_type(self):
+        return "audio/mpeg"
+
+
+@pytest.fixture
+def fake_speech_voice():
+    """Fixture to install a fake voice for /speech."""
+    voice = FakeSpeechVoice()
+    app_module.speech_voice = voice
+    yield voice
+    app_module.speech_voice = None
+
+
+class TestSpeechEndpoint:
+    """Test the /speech endpoint."""
+    
+    @pytest.mark.usefixtures("reset_agent")
+    def test_speech_streams_audio(self, fake_speech_voice):
+        """Test speech returns synthesized audio."""
+        response = client.get("/speech", params={"text": "Yo what's good"})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "audio/mpeg"
+        assert response.content == b"ID3Yo what's good"
+        assert "etag" in response.headers
+    
+    @pytest.mark.usefixtures("reset_agent")
+    def test_speech_etag_short_circuit(self, fake_speech_voice):
+        """Test matching If-None-Match skips synthesis."""
+        etag = client.get("/speech", params={"text": "Yo"}).headers["etag"]
+        response = client.get("/speech", params={"text": "Yo"}, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert fake_speech_voice.renders == 1
+    
+    @pytest.mark.usefixtures("reset_agent")
+    def test_speech_empty_text(self, fake_speech_voice):
+        """Test empty text is rejected."""
+        response = client.get("/speech", params={"text": "  "})
+        assert response.status_code == 400
+    
+    @pytest.mark.usefixtures("reset_agent")
+    def test_speech_unavailable_without_engine(self, monkeypatch):
+        """Test speech returns 503 when no TTS engine is available."""
+        monkeypatch.setattr(app_module, "get_speech_voice", lambda: None)
+        response = client.get("/speech", params={"text": "Yo"})
+        assert response.status_code == 503
+
+
 class TestGetAgent:
     """Test the get_agent function."""
     
@@ -0,0 +1,225 @@
+"""
+Unit tests for compression.py
+Tests cover encoding negotiation, the compression middleware (buffered and
+streamed responses), the precompressed asset cache and the app's static routes.
+"""
+
+import gzip
+import os
+import time
+import zlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+import compression
+from compression import AssetCache, CachedStaticFiles, CompressionMiddleware, choose_encoding
+
+BIG = "Aight here's the deal, no cap. " * 200
+GZIP = {"Accept-Encoding": "gzip"}
+
+
+@pytest.fixture
+def no_brotli(monkeypatch):
+    """Pretend the brotli package isn't installed."""
+    real = compression.optional_import
+    monkeypatch.setattr(compression, "optional_import", lambda name: None if name == "brotli" else real(name))
+
+
+def make_client(minimum_size=1024):
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=minimum_size)
+
+    @app.get("/big")
+    def big():
+        return PlainTextResponse(BIG, headers={"ETag": '"abc"'})
+
+    @app.get("/small")
+    def small():
+        return PlainTextResponse("yo")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([BIG, BIG]), media_type="text/markdown")
+
+    @app.get("/events")
+    def events():
+        return StreamingResponse(iter([BIG]), media_type="text/event-stream")
+
+    return TestClient(app)
+
+
+class TestChooseEncoding:
+    """Test Accept-Encoding negotiation."""
+
+    def test_gzip(self, no_brotli):
+        assert choose_encoding("gzip, deflate, br") == "gzip"
+
+    def test_nothing_acceptable(self, no_brotli):
+        assert choose_encoding("") is None
+        assert choose_encoding("identity") is None
+        assert choose_encoding("gzip;q=0") is None
+
+    def test_wildcard(self, no_brotli):
+        assert choose_encoding("*") == "gzip"
+
+    def test_prefers_brotli(self):
+        pytest.importorskip("brotli")
+        assert choose_encoding("gzip, br") == "br"
+        assert choose_encoding("gzip, br;q=0") == "gzip"
+
+
+@pytest.mark.usefixtures("no_brotli")
+class TestCompressionMiddleware:
+    """Test on-the-fly compression."""
+
+    def test_compresses_big_response(self):
+        """Test a big body is gzipped, with Vary and a weakened ETag."""
+        response = make_client().get("/big", headers=GZIP)
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.headers["etag"] == 'W/"abc"'
+        assert int(response.headers["content-length"]) < len(BIG)
+        assert response.text == BIG
+
+    def test_small_response_untouched(self):
+        """Test bodies under the threshold are sent as is."""
+        response = make_client().get("/small", headers=GZIP)
+        assert "content-encoding" not in response.headers
+        assert response.text == "yo"
+
+    def test_threshold(self):
+        """Test the threshold is configurable."""
+        response = make_client(minimum_size=1).get("/small", headers=GZIP)
+        assert response.headers["content-encoding"] == "gzip"
+
+    def test_client_without_gzip(self):
+        """Test clients that don't accept gzip get plain bodies."""
+        response = make_client().get("/big", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+        assert response.headers["etag"] == '"abc"'
+
+    def test_streams_chunks(self):
+        """Test streamed responses are compressed chunk by chunk."""
+        response = make_client().get("/stream", headers=GZIP)
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        assert response.text == BIG * 2
+
+    def test_event_stream_excluded(self):
+        """Test server-sent events aren't compressed."""
+        response = make_client().get("/events", headers=GZIP)
+        assert "content-encoding" not in response.headers
+
+    def test_brotli(self, monkeypatch):
+        """Test br is used when brotli is installed and accepted."""
+        brotli = pytest.importorskip("brotli")
+        monkeypatch.setattr(compression, "optional_import", lambda name: brotli)
+        response = make_client().get("/big", headers={"Accept-Encoding": "gzip, br"})
+        assert response.headers["content-encoding"] == "br"
+
+
+class TestAssetCache:
+    """Test the precompressed asset cache."""
+
+    @pytest.fixture
+    def page(self, tmp_path):
+        path = tmp_path / "page.html"
+        path.write_text("<html>" + BIG + "</html>")
+        return str(path)
+
+    def test_precompress(self, tmp_path, page, no_brotli):
+        """Test files and directories are loaded with a gzip variant."""
+        (tmp_path / "static").mkdir()
+        (tmp_path / "static" / "app.css").write_text("body { color: red; }")
+        cache = AssetCache(min_size=1024)
+
+        cached = cache.precompress([page, str(tmp_path / "static"), str(tmp_path / "missing.html")])
+        assert len(cached) == 2
+        asset = cache.get(page)
+        assert gzip.decompress(asset.variants["gzip"]) == asset.variants[None]
+        assert set(cache.get(str(tmp_path / "static" / "app.css")).variants) == {None}
+
+    def test_serves_variant_with_strong_etag(self, page, no_brotli):
+        """Test the gzip variant is served with its own strong ETag."""
+        cache = AssetCache()
+        plain = cache.response(compression.Headers({}), page, "no-cache")
+        zipped = cache.response(compression.Headers(GZIP), page, "no-cache")
+
+        assert "content-encoding" not in plain.headers
+        assert zipped.headers["content-encoding"] == "gzip"
+        assert zipped.headers["cache-control"] == "no-cache"
+        assert zipped.headers["vary"] == "Accept-Encoding"
+        assert plain.headers["etag"] != zipped.headers["etag"]
+        assert not zipped.headers["etag"].startswith("W/")
+        assert zlib.decompress(zipped.body, 16 + zlib.MAX_WBITS) == plain.body
+        assert plain.media_type == "text/html; charset=utf-8"
+
+    def test_not_modified(self, page, no_brotli):
+        """Test If-None-Match with a current ETag gets a 304."""
+        cache = AssetCache()
+        etag = cache.response(compression.Headers(GZIP), page, "no-cache").headers["etag"]
+        response = cache.response(compression.Headers({**GZIP, "If-None-Match": etag}), page, "no-cache")
+        assert response.status_code == 304
+        assert response.body == b""
+
+    def test_reloads_changed_file(self, page, no_brotli):
+        """Test a file edited on disk is re-read and gets a new ETag."""
+        cache = AssetCache()
+        before = cache.get(page).etags[None]
+        with open(page, "a") as f:
+            f.write("<!-- edited -->")
+        os.utime(page, ns=(time.time_ns(), time.time_ns() + 1_000_000))
+        assert cache.get(page).etags[None] != before
+
+
+class TestCachedStaticFiles:
+    """Test /static served through the cache."""
+
+    @pytest.fixture
+    def client(self, tmp_path, no_brotli):
+        (tmp_path / "styles.css").write_text("body { color: red; }\n" * 100)
+        app = FastAPI()
+        app.mount("/static", CachedStaticFiles(directory=str(tmp_path), assets=AssetCache(),
+                                               cache_control="public, max-age=60"), name="static")
+        return TestClient(app)
+
+    def test_served_precompressed(self, client):
+        response = client.get("/static/styles.css", headers=GZIP)
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["cache-control"] == "public, max-age=60"
+        assert response.text == "body { color: red; }\n" * 100
+
+    def test_revalidation(self, client):
+        etag = client.get("/static/styles.css", headers=GZIP).headers["etag"]
+        assert client.get("/static/styles.css", headers={**GZIP, "If-None-Match": etag}).status_code == 304
+
+    def test_missing_file(self, client):
+        assert client.get("/static/nope.css").status_code == 404
+
+    def test_no_traversal(self, client):
+        assert client.get("/static/../test_compression.py").status_code == 404
+
+
+@pytest.mark.usefixtures("no_brotli")
+class TestAppStaticRoutes:
+    """Test the app's HTML pages and /static use the cache."""
+
+    def test_html_page(self):
+        from app import app
+        client = TestClient(app)
+        response = client.get("/classic", headers=GZIP)
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["cache-control"] == "no-cache"
+        assert client.get("/classic", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+
+    def test_static_css(self):
+        from app import app
+        response = TestClient(app).get("/static/styles.css", headers=GZIP)
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert "max-age" in response.headers["cache-control"]
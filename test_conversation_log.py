@@ -0,0 +1,270 @@
+"""
+Unit tests for conversation_log.py
+Tests cover appending, incremental saves, saving after a tail load, streaming
+and tail reads, gzip files, cut-off last lines and the conversation_dir config.
+"""
+
+import gzip
+import json
+import os
+
+import pytest
+
+import conversation_log
+from conversation_log import DEFAULT_MAX_BYTES, HEADER_TYPE, ConversationLog, is_jsonl, log_from_config
+
+
+def message(n):
+    return {'role': 'user' if n % 2 == 0 else 'assistant', 'content': f"message {n}",
+            'timestamp': f"2025-11-05T20:00:{n % 60:02d}"}
+
+
+def lines(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt') as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.fixture(params=['.jsonl', '.jsonl.gz'])
+def path(request, tmp_path):
+    return str(tmp_path / f"conversation{request.param}")
+
+
+class TestAppend:
+    """Test appending messages."""
+
+    def test_header_then_messages(self, path):
+        log = ConversationLog(path, agent_name="TestBot")
+        log.append(message(0))
+        log.append_many([message(1), message(2)])
+
+        records = lines(path)
+        assert records[0] == {'type': HEADER_TYPE, 'version': 1, 'agent_name': "TestBot"}
+        assert records[1:] == [message(0), message(1), message(2)]
+        assert list(log.iter_messages()) == [message(0), message(1), message(2)]
+
+    def test_two_writers_share_a_file(self, path):
+        first, second = ConversationLog(path), ConversationLog(path)
+        first.append(message(0))
+        second.append(message(1))
+        first.append(message(2))
+        assert list(ConversationLog(path).iter_messages()) == [message(0), message(1), message(2)]
+        assert sum(1 for record in lines(path) if record.get('type') == HEADER_TYPE) == 1
+
+    def test_rotated_at_max_bytes(self, path):
+        log = ConversationLog(path, max_bytes=300)
+        for n in range(20):
+            log.append(message(n))
+
+        rotated = list(ConversationLog(log.rotated_path).iter_messages())
+        current = list(log.iter_messages())
+        assert rotated and current
+        assert rotated + current == [message(n) for n in range(20)][-len(rotated + current):]
+        assert lines(path)[0]['type'] == HEADER_TYPE
+        assert os.path.getsize(path) < 300 + 200
+        assert log.rotated_path.endswith(".1" + path[path.index(".jsonl"):])
+
+    def test_gzip_is_compressed(self, tmp_path):
+        path = str(tmp_path / "conversation.jsonl.gz")
+        ConversationLog(path).append(message(0))
+        with open(path, 'rb') as f:
+            assert f.read(2) == b"\x1f\x8b"
+
+
+class TestSave:
+    """Test save() appends when it can and rewrites when it must."""
+
+    def test_appends_new_messages(self, path, monkeypatch):
+        log = ConversationLog(path)
+        history = [message(n) for n in range(3)]
+        log.save(history)
+
+        rewrites = []
+        monkeypatch.setattr(log, 'rewrite', lambda messages: rewrites.append(messages))
+        history += [message(3), message(4)]
+        log.save(history)
+
+        assert rewrites == []
+        assert list(log.iter_messages()) == history
+
+    def test_rewrites_when_history_changed(self, path):
+        log = ConversationLog(path)
+        log.save([message(0), message(1)])
+        log.save([message(5)])
+        assert list(log.iter_messages()) == [message(5)]
+
+    def test_rewrites_when_file_changed_elsewhere(self, path):
+        log = ConversationLog(path)
+        history = [message(0)]
+        log.save(history)
+        ConversationLog(path).append(message(9))
+
+        history.append(message(1))
+        log.save(history)
+        assert list(log.iter_messages()) == history
+
+    def test_rewrite_replaces_existing_file(self, path):
+        ConversationLog(path).append_many([message(n) for n in range(5)])
+        ConversationLog(path).save([message(7)])
+        assert list(ConversationLog(path).iter_messages()) == [message(7)]
+        assert not os.path.exists(f"{path}.tmp")
+
+
+class TestLoadTail:
+    """Test saving back after loading only the last messages."""
+
+    def test_save_appends_after_window(self, path, monkeypatch):
+        ConversationLog(path).append_many([message(n) for n in range(10)])
+        log = ConversationLog(path)
+        history = log.load_tail(3)
+        assert history == [message(7), message(8), message(9)]
+
+        rewrites = []
+        monkeypatch.setattr(log, 'rewrite', lambda messages: rewrites.append(messages))
+        history.append(message(10))
+        log.save(history)
+        assert rewrites == []
+        assert list(ConversationLog(path).iter_messages()) == [message(n) for n in range(11)]
+
+    def test_rewrite_keeps_messages_before_window(self, path):
+        ConversationLog(path).append_many([message(n) for n in range(10)])
+        log = ConversationLog(path)
+        log.load_tail(3)
+        log.save([message(20), message(21)])
+        assert list(ConversationLog(path).iter_messages()) == [message(n) for n in range(7)] + [message(20), message(21)]
+
+        log.save([message(20), message(21), message(22)])
+        assert list(ConversationLog(path).iter_messages())[-3:] == [message(20), message(21), message(22)]
+        assert sum(1 for record in lines(path) if record.get('type') == HEADER_TYPE) == 1
+
+    def test_window_past_start_of_file(self, path):
+        ConversationLog(path).append_many([message(0), message(1)])
+        log = ConversationLog(path)
+        assert log.load_tail(5) == [message(0), message(1)]
+        log.save([message(3)])
+        assert list(ConversationLog(path).iter_messages()) == [message(3)]
+
+    def test_load_none(self, path):
+        ConversationLog(path).append_many([message(0), message(1)])
+        log = ConversationLog(path)
+        assert log.load_tail(0) == []
+        log.save([message(2)])
+        assert list(ConversationLog(path).iter_messages()) == [message(0), message(1), message(2)]
+
+
+class TestRead:
+    """Test streaming and tail reads."""
+
+    def test_iter_is_lazy(self, path):
+        ConversationLog(path).append_many([message(n) for n in range(3)])
+        messages = ConversationLog(path).iter_messages()
+        assert next(messages) == message(0)
+
+    def test_missing_file(self, path):
+        with pytest.raises(FileNotFoundError):
+            list(ConversationLog(path).iter_messages())
+
+    def test_tail(self, path):
+        ConversationLog(path).append_many([message(n) for n in range(100)])
+        log = ConversationLog(path)
+        assert log.tail(3) == [message(97), message(98), message(99)]
+        assert log.tail(1000) == [message(n) for n in range(100)]
+        assert log.tail(0) == []
+
+    def test_tail_across_blocks(self, tmp_path, monkeypatch):
+        """Test tail reads back as many blocks as it needs and no further."""
+        monkeypatch.setattr(conversation_log, 'TAIL_BLOCK', 64)
+        path = str(tmp_path / "conversation.jsonl")
+        ConversationLog(path).append_many([message(n) for n in range(50)])
+        assert ConversationLog(path).tail(7) == [message(n) for n in range(43, 50)]
+        assert ConversationLog(path).tail(50) == [message(n) for n in range(50)]
+
+    def test_tail_reads_only_the_end(self, tmp_path, monkeypatch):
+        path = str(tmp_path / "conversation.jsonl")
+        ConversationLog(path).append_many([message(n) for n in range(5000)])
+        size = os.path.getsize(path)
+
+        read = []
+        real_open = open
+
+        class CountingFile:
+            def __init__(self, f):
+                self.f = f
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                self.f.close()
+
+            def seek(self, *args):
+                return self.f.seek(*args)
+
+            def read(self, n):
+                data = self.f.read(n)
+                read.append(len(data))
+                return data
+
+        monkeypatch.setattr(conversation_log, 'open', lambda *args: CountingFile(real_open(*args)), raising=False)
+        assert ConversationLog(path).tail(5) == [message(n) for n in range(4995, 5000)]
+        assert sum(read) < size / 2
+
+    def test_cut_off_last_line_skipped(self, tmp_path):
+        path = str(tmp_path / "conversation.jsonl")
+        ConversationLog(path).append_many([message(0), message(1)])
+        with open(path, 'a') as f:
+            f.write('{"role": "user", "cont')
+
+        log = ConversationLog(path)
+        assert list(log.iter_messages()) == [message(0), message(1)]
+        assert log.tail(1) == [message(1)]
+
+    def test_cut_off_gzip_member_skipped(self, tmp_path):
+        """Test a last gzip member cut off mid-write is skipped, not an EOFError."""
+        path = str(tmp_path / "conversation.jsonl.gz")
+        ConversationLog(path).append_many([message(0), message(1)])
+        with open(path, 'ab') as f:
+            f.write(gzip.compress((json.dumps(message(2)) + "\n").encode())[:-12])
+
+        log = ConversationLog(path)
+        assert list(log.iter_messages()) == [message(0), message(1)]
+        assert log.tail(1) == [message(1)]
+        assert log.load_tail(1) == [message(1)]
+
+    def test_corrupt_middle_line_raises(self, tmp_path):
+        path = str(tmp_path / "conversation.jsonl")
+        with open(path, 'w') as f:
+            f.write(json.dumps(message(0)) + "\nnot json\n" + json.dumps(message(1)) + "\n")
+        with pytest.raises(json.JSONDecodeError):
+            list(ConversationLog(path).iter_messages())
+
+
+class TestConfig:
+    """Test is_jsonl and log_from_config."""
+
+    def test_is_jsonl(self):
+        assert is_jsonl("a.jsonl")
+        assert is_jsonl("a.jsonl.gz")
+        assert not is_jsonl("a.json")
+
+    def test_off_by_default(self, tmp_path):
+        assert log_from_config({}, "OG-AI") is None
+        assert log_from_config({'save_conversations': True}, "OG-AI") is None
+        assert log_from_config({'save_conversations': False, 'conversation_dir': str(tmp_path)}, "OG-AI") is None
+
+    def test_path_from_session(self, tmp_path):
+        directory = tmp_path / "conversations"
+        log = log_from_config({'save_conversations': True, 'conversation_dir': str(directory)}, "OG-AI", "user/42")
+        assert log.path == str(directory / "user_42.jsonl")
+        assert directory.is_dir()
+
+        log = log_from_config({'save_conversations': True, 'conversation_dir': str(directory),
+                               'compress_conversations': True}, "OG-AI")
+        assert log.path == str(directory / "default.jsonl.gz")
+        assert log.compress
+
+    def test_max_bytes_from_config(self, tmp_path):
+        config = {'save_conversations': True, 'conversation_dir': str(tmp_path)}
+        assert log_from_config(config, "OG-AI").max_bytes == DEFAULT_MAX_BYTES
+        assert log_from_config({**config, 'conversation_max_bytes': 500}, "OG-AI").max_bytes == 500
+        assert log_from_config({**config, 'conversation_max_bytes': 0}, "OG-AI").max_bytes is None
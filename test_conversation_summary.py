@@ -0,0 +1,213 @@
+"""
+Unit tests for conversation_summary.py
+Tests cover the extractive summarizer, when rolling summaries trigger,
+provider fallback, tokens-saved accounting and EnhancedAIAgent prompts.
+"""
+
+import threading
+
+import pytest
+
+from conversation_summary import RollingSummarizer, extractive_summary, format_transcript
+
+
+def make_history(size):
+    """Alternating user/assistant turns."""
+    return [
+        {'role': 'user' if n % 2 == 0 else 'assistant', 'content': f"Turn {n} talks about topic{n} in some detail."}
+        for n in range(size)
+    ]
+
+
+class TestExtractiveSummary:
+    """Test the offline summarizer."""
+
+    def test_short_text_kept_whole(self):
+        """Test text with few sentences comes back unchanged."""
+        assert extractive_summary("One. Two.", max_sentences=5) == "One.\nTwo."
+
+    def test_keeps_most_repeated_topic(self):
+        """Test sentences about the main topic win over one-offs."""
+        text = ("We are building a FastAPI inventory service. "
+                "The inventory service needs a Postgres database. "
+                "Nice weather today. "
+                "The inventory service exposes FastAPI endpoints for stock. "
+                "Lunch was good.")
+        summary = extractive_summary(text, max_sentences=2)
+        assert "inventory" in summary
+        assert "weather" not in summary and "Lunch" not in summary
+
+    def test_keeps_original_order(self):
+        """Test picked sentences stay in conversation order."""
+        text = "Docker first docker. Filler. Docker second docker. Filler two."
+        assert extractive_summary(text, max_sentences=2) == "Docker first docker.\nDocker second docker."
+
+    def test_transcript_collapses_code(self):
+        """Test code blocks are collapsed in transcripts."""
+        transcript = format_transcript([{'role': 'assistant', 'content': "Here:\n```py\nprint(1)\n```"}])
+        assert "print" not in transcript
+        assert transcript.startswith("assistant: Here:")
+
+
+class TestRollingSummarizer:
+    """Test RollingSummarizer."""
+
+    def test_below_threshold_does_nothing(self):
+        """Test short histories aren't summarized."""
+        summarizer = RollingSummarizer(threshold=10, keep_recent=4)
+        assert not summarizer.maybe_summarize(make_history(9), background=False)
+        assert summarizer.summary == ""
+
+    def test_summarizes_all_but_recent(self):
+        """Test older turns are folded in and the latest are kept."""
+        summarizer = RollingSummarizer(threshold=10, keep_recent=4)
+        assert summarizer.maybe_summarize(make_history(12), background=False)
+
+        assert summarizer.summarized_upto == 8
+        assert summarizer.summary
+        assert summarizer.get_stats()['extractive_summaries'] == 1
+        assert summarizer.get_stats()['turns_summarized'] == 8
+
+    def test_rolls_forward(self):
+        """Test later summaries start where the last one stopped."""
+        summarizer = RollingSummarizer(threshold=10, keep_recent=4, summarize_fn=lambda prev, text: f"{prev}|{text[:7]}")
+        history = make_history(12)
+        summarizer.maybe_summarize(history, background=False)
+        history += make_history(10)
+        summarizer.maybe_summarize(history, background=False)
+
+        assert summarizer.summarized_upto == 18
+        assert summarizer.summary.count("|") == 2
+
+    def test_uses_provider(self):
+        """Test the provider summary is used when it works."""
+        calls = []
+
+        def provider(previous, transcript):
+            calls.append(transcript)
+            return "They're building an inventory API."
+
+        summarizer = RollingSummarizer(provider, threshold=4, keep_recent=2)
+        summarizer.maybe_summarize(make_history(4), background=False)
+        assert summarizer.summary == "They're building an inventory API."
+        assert calls[0].startswith("user: Turn 0")
+        assert summarizer.get_stats()['provider_summaries'] == 1
+
+    @pytest.mark.parametrize("provider_result", [None, "", RuntimeError("offline")])
+    def test_falls_back_to_extractive(self, provider_result):
+        """Test a missing, empty or failing provider falls back to extractive."""
+        def provider(previous, transcript):
+            if isinstance(provider_result, Exception):
+                raise provider_result
+            return provider_result
+
+        summarizer = RollingSummarizer(provider, threshold=4, keep_recent=2)
+        summarizer.maybe_summarize(make_history(4), background=False)
+        assert "Turn 0" in summarizer.summary
+        assert summarizer.get_stats()['extractive_summaries'] == 1
+
+    def test_background_summary(self):
+        """Test summaries run on a background thread."""
+        release = threading.Event()
+
+        def provider(previous, transcript):
+            release.wait(5)
+            return "summary"
+
+        summarizer = RollingSummarizer(provider, threshold=4, keep_recent=2)
+        assert summarizer.maybe_summarize(make_history(4))
+        assert summarizer.running
+        assert not summarizer.maybe_summarize(make_history(6))
+
+        release.set()
+        assert summarizer.wait(5)
+        assert summarizer.summary == "summary"
+
+    def test_reset_discards_in_flight_summary(self):
+        """Test a summary finishing after reset() is dropped."""
+        release = threading.Event()
+        summarizer = RollingSummarizer(lambda prev, text: release.wait(5) and "stale", threshold=4, keep_recent=2)
+        summarizer.maybe_summarize(make_history(4))
+        summarizer.reset()
+        release.set()
+        summarizer.wait(5)
+
+        assert summarizer.summary == ""
+        assert summarizer.summarized_upto == 0
+
+    def test_tokens_saved(self):
+        """Test each prompt sending the summary counts the tokens it saved."""
+        summarizer = RollingSummarizer(lambda prev, text: "short", threshold=10, keep_recent=2)
+        assert summarizer.record_prompt() == 0
+
+        summarizer.maybe_summarize(make_history(20), background=False)
+        saved = summarizer.record_prompt()
+        summarizer.record_prompt()
+
+        assert saved > 0
+        assert summarizer.get_stats()['tokens_saved'] == 2 * saved
+        assert summarizer.get_stats()['prompts_with_summary'] == 2
+
+
+    def test_tokens_saved_counts_only_replaced_turns(self):
+        """Test only the turns the prompt would otherwise have sent count as saved."""
+        summarizer = RollingSummarizer(lambda prev, text: "short", threshold=10, keep_recent=2)
+        history = make_history(20)
+        summarizer.maybe_summarize(history, background=False)
+
+        assert summarizer.record_prompt([]) == 0
+        assert summarizer.record_prompt(history[10:18]) < summarizer.record_prompt(history[:18])
+        assert summarizer.get_stats()['prompts_with_summary'] == 3
+
+
+class TestAgentSummary:
+    """Test EnhancedAIAgent sending the summary instead of old turns."""
+
+    @pytest.fixture
+    def agent(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("SUMMARY_THRESHOLD", "8")
+        monkeypatch.setenv("SUMMARY_KEEP_RECENT", "4")
+        for key in ("OPENAI_API_KEY", "ANTHROPIC_API_KEY", "SUMMARY_ENABLED"):
+            monkeypatch.delenv(key, raising=False)
+        from ai_agent_enhanced import EnhancedAIAgent
+        return EnhancedAIAgent()
+
+    def test_prompt_uses_summary(self, agent):
+        """Test summarized turns are replaced by the summary in prompts."""
+        for message in make_history(8):
+            agent.add_message(message['role'], message['content'] + " More filler sentences here." * 5)
+        assert agent.summarizer.wait(5)
+        assert agent.summarizer.summarized_upto == 4
+
+        prompt = agent._build_prompt(agent.conversation_history[-1]['content'])
+        assert "[CONVERSATION SUMMARY SO FAR]" in prompt['context']
+        assert [m['content'] for m in prompt['messages']][0].startswith("Turn 4")
+        assert agent.get_prompt_stats()['summary']['tokens_saved'] > 0
+
+    def test_tokens_saved_only_within_window(self, agent, monkeypatch):
+        """Test summarized turns the history window would have dropped anyway aren't counted as saved."""
+        for message in make_history(40):
+            agent.add_message(message['role'], message['content'])
+        assert agent.summarizer.wait(5)
+        agent.summarizer.summarized_upto = 30
+
+        replaced = []
+        monkeypatch.setattr(agent.summarizer, 'record_prompt', replaced.append)
+        agent._build_prompt(agent.conversation_history[-1]['content'])
+        assert replaced == [agent.conversation_history[20:30]]
+
+    def test_clear_history_resets_summary(self, agent):
+        """Test clearing history clears the summary."""
+        for message in make_history(8):
+            agent.add_message(message['role'], message['content'])
+        agent.summarizer.wait(5)
+        agent.clear_history()
+        assert agent.summarizer.summary == ""
+
+    def test_disabled(self, tmp_path, monkeypatch):
+        """Test SUMMARY_ENABLED=false turns summaries off."""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("SUMMARY_ENABLED", "false")
+        from ai_agent_enhanced import EnhancedAIAgent
+        assert EnhancedAIAgent().summarizer is None
@@ -0,0 +1,202 @@
+"""
+Unit tests for fake_llm_server.py
+Tests cover the OpenAI, Anthropic and Ollama chat endpoints, streaming, latency
+distributions, token rates and error injection.
+"""
+
+import json
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from fake_llm_server import DISTRIBUTIONS, REPLY, FakeLLMServer
+
+
+@pytest.fixture
+def server():
+    with FakeLLMServer() as fake:
+        yield fake
+
+
+def post(url, body):
+    request = urllib.request.Request(url, data=json.dumps(body).encode(),
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return json.loads(response.read())
+
+
+def post_raw(url, body):
+    """POST and return (status, content type, body text) without raising on errors"""
+    request = urllib.request.Request(url, data=json.dumps(body).encode(),
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, response.headers["Content-Type"], response.read().decode()
+    except urllib.error.HTTPError as error:
+        return error.code, error.headers["Content-Type"], error.read().decode()
+
+
+def sse_data(text):
+    return [line[len("data: "):] for line in text.splitlines() if line.startswith("data: ")]
+
+
+MESSAGES = [{"role": "user", "content": "yo"}]
+
+
+class TestFakeLLMServer:
+    """Test the fake provider endpoints."""
+
+    def test_openai(self, server):
+        reply = post(f"{server.url}/v1/chat/completions", {"model": "gpt-4o-mini", "messages": MESSAGES})
+        assert reply['choices'][0]['message']['content'] == REPLY
+        assert reply['usage']['prompt_tokens'] > 0
+
+    def test_anthropic(self, server):
+        reply = post(f"{server.url}/v1/messages", {"model": "claude", "max_tokens": 10, "messages": MESSAGES})
+        assert reply['content'][0]['text'] == REPLY
+        assert reply['usage']['output_tokens'] > 0
+
+    def test_ollama(self, server):
+        reply = post(f"{server.url}/api/chat", {"model": "llama3.2", "messages": MESSAGES})
+        assert reply['message']['content'] == REPLY
+        assert reply['done'] is True
+
+    def test_counts_requests(self, server):
+        post(f"{server.url}/api/chat", {"messages": MESSAGES})
+        post(f"{server.url}/api/chat", {"messages": MESSAGES})
+        assert server.requests["/api/chat"] == 2
+
+    def test_unknown_route(self, server):
+        with pytest.raises(urllib.error.HTTPError) as error:
+            post(f"{server.url}/v2/nope", {})
+        assert error.value.code == 404
+
+    def test_latency(self):
+        with FakeLLMServer(latency=0.1) as slow:
+            start = time.perf_counter()
+            post(f"{slow.url}/api/chat", {"messages": MESSAGES})
+            assert time.perf_counter() - start >= 0.1
+
+    def test_provider_env(self, server):
+        env = server.provider_env()
+        assert env['OPENAI_BASE_URL'] == f"{server.url}/v1"
+        assert env['OLLAMA_BASE_URL'] == server.url
+        assert env['OLLAMA_HOST'] == server.url
+
+
+class TestStreaming:
+    """Test the streaming form of each protocol."""
+
+    def test_openai(self, server):
+        status, content_type, text = post_raw(f"{server.url}/v1/chat/completions",
+                                              {"messages": MESSAGES, "stream": True,
+                                               "stream_options": {"include_usage": True}})
+        assert status == 200
+        assert content_type == "text/event-stream"
+        events = sse_data(text)
+        assert events[-1] == "[DONE]"
+        chunks = [json.loads(event) for event in events[:-1]]
+        content = "".join(chunk['choices'][0]['delta'].get('content', '') for chunk in chunks if chunk['choices'])
+        assert content == REPLY
+        assert chunks[-2]['choices'][0]['finish_reason'] == 'stop'
+        assert chunks[-1]['usage']['completion_tokens'] == len(REPLY.split())
+
+    def test_anthropic(self, server):
+        status, _, text = post_raw(f"{server.url}/v1/messages",
+                                   {"max_tokens": 10, "messages": MESSAGES, "stream": True})
+        assert status == 200
+        events = [json.loads(event) for event in sse_data(text)]
+        assert events[0]['type'] == 'message_start'
+        assert events[-1]['type'] == 'message_stop'
+        deltas = [event['delta']['text'] for event in events if event['type'] == 'content_block_delta']
+        assert "".join(deltas) == REPLY
+        assert "event: content_block_delta" in text
+
+    def test_ollama(self, server):
+        status, content_type, text = post_raw(f"{server.url}/api/chat", {"messages": MESSAGES, "stream": True})
+        assert status == 200
+        assert content_type == "application/x-ndjson"
+        lines = [json.loads(line) for line in text.splitlines()]
+        assert "".join(line['message']['content'] for line in lines) == REPLY
+        assert [line['done'] for line in lines[-2:]] == [False, True]
+        assert lines[-1]['eval_count'] == len(REPLY.split())
+
+    def test_token_rate(self):
+        """Test tokens after the first arrive at the configured rate."""
+        with FakeLLMServer(reply="one two three four five", tokens_per_second=50) as slow:
+            start = time.perf_counter()
+            post_raw(f"{slow.url}/api/chat", {"messages": MESSAGES, "stream": True})
+            assert time.perf_counter() - start >= 4 / 50
+
+    def test_token_rate_applies_without_streaming(self):
+        with FakeLLMServer(reply="one two three four five", tokens_per_second=50) as slow:
+            start = time.perf_counter()
+            post(f"{slow.url}/api/chat", {"messages": MESSAGES})
+            assert time.perf_counter() - start >= 5 / 50
+
+
+class TestLatencyDistributions:
+    """Test latency sampling."""
+
+    @pytest.mark.parametrize("distribution", DISTRIBUTIONS)
+    def test_never_negative(self, distribution):
+        server = FakeLLMServer(latency=0.01, jitter=0.05, distribution=distribution, seed=1)
+        try:
+            samples = [server.sample_latency() for _ in range(500)]
+        finally:
+            server._httpd.server_close()
+        assert min(samples) >= 0
+        assert len(set(samples)) > 1
+
+    def test_seed_repeats(self):
+        servers = [FakeLLMServer(latency=0.1, jitter=0.5, distribution='lognormal', seed=7) for _ in range(2)]
+        try:
+            first, second = ([server.sample_latency() for _ in range(20)] for server in servers)
+        finally:
+            for server in servers:
+                server._httpd.server_close()
+        assert first == second
+
+    def test_no_jitter_is_constant(self):
+        server = FakeLLMServer(latency=0.2, distribution='exponential')
+        try:
+            assert {server.sample_latency() for _ in range(10)} == {0.2}
+        finally:
+            server._httpd.server_close()
+
+    def test_unknown_distribution(self):
+        with pytest.raises(ValueError):
+            FakeLLMServer(distribution='pareto')
+
+
+class TestErrorInjection:
+    """Test injected provider errors."""
+
+    def test_openai_shape(self):
+        with FakeLLMServer(error_rate=1.0, error_status=429) as failing:
+            status, _, text = post_raw(f"{failing.url}/v1/chat/completions", {"messages": MESSAGES})
+        assert status == 429
+        assert json.loads(text)['error']['type'] == 'rate_limit_error'
+        assert failing.errors["/v1/chat/completions"] == 1
+
+    def test_anthropic_shape(self):
+        with FakeLLMServer(error_rate=1.0, error_status=529) as failing:
+            status, _, text = post_raw(f"{failing.url}/v1/messages", {"messages": MESSAGES})
+        assert status == 529
+        assert json.loads(text) == {'type': 'error', 'error': {'type': 'overloaded_error',
+                                                               'message': "Injected error (529)"}}
+
+    def test_ollama_shape(self):
+        with FakeLLMServer(error_rate=1.0) as failing:
+            status, _, text = post_raw(f"{failing.url}/api/chat", {"messages": MESSAGES, "stream": True})
+        assert status == 500
+        assert 'error' in json.loads(text)
+
+    def test_rate(self):
+        with FakeLLMServer(error_rate=0.3, seed=3) as flaky:
+            statuses = [post_raw(f"{flaky.url}/api/chat", {"messages": MESSAGES})[0] for _ in range(100)]
+        assert 15 <= statuses.count(500) <= 45
+        assert flaky.errors["/api/chat"] == statuses.count(500)
+        assert flaky.requests["/api/chat"] == 100
@@ -0,0 +1,62 @@
+"""
+Unit tests for fast_json.py
+Tests cover encoding with and without orjson and the response class.
+"""
+
+import json
+
+import pytest
+
+import fast_json
+from fast_json import FastJSONResponse, dumps
+
+PAYLOAD = {
+    'conversation': [{'role': 'user', 'content': "yo what's good 🔥", 'timestamp': "2025-11-05T20:00:00", 'id': 0}],
+    'message_count': 1,
+    'top_topics': [('coding', 3)],
+    'ratio': 0.25,
+    'missing': None
+}
+
+
+@pytest.fixture(params=["orjson", "json"])
+def encoder(request, monkeypatch):
+    """Run each test with orjson and with the stdlib fallback."""
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(fast_json, "optional_import", lambda name: None)
+    return request.param
+
+
+class TestDumps:
+    """Test dumps()."""
+
+    def test_round_trips(self, encoder):
+        """Test output decodes back to the same data (tuples become lists)."""
+        decoded = json.loads(dumps(PAYLOAD))
+        assert decoded == {**PAYLOAD, 'top_topics': [['coding', 3]]}
+
+    def test_compact_utf8(self, encoder):
+        """Test output is compact and keeps non-ASCII as UTF-8."""
+        body = dumps({'a': [1, 2], 'b': "🔥"})
+        assert body == '{"a":[1,2],"b":"🔥"}'.encode('utf-8')
+
+    def test_unknown_types_as_strings(self, encoder):
+        """Test types JSON can't express are sent as strings instead of failing."""
+        class Thing:
+            def __str__(self):
+                return "thing"
+
+        assert json.loads(dumps({'x': Thing()})) == {'x': "thing"}
+
+
+class TestFastJSONResponse:
+    """Test FastJSONResponse."""
+
+    def test_body_and_headers(self, encoder):
+        """Test the response carries the encoded body as application/json."""
+        response = FastJSONResponse(PAYLOAD, headers={'ETag': '"abc"'})
+        assert json.loads(response.body)['message_count'] == 1
+        assert response.media_type == "application/json"
+        assert response.headers['etag'] == '"abc"'
@@ -0,0 +1,214 @@
+"""
+Unit tests for job_scheduler.py
+Tests cover job registration, jitter, leader locking across schedulers and job metrics.
+"""
+
+import asyncio
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from job_scheduler import FileLock, Job, JobScheduler
+
+
+@pytest.fixture
+def scheduler(tmp_path):
+    """Scheduler with its lock file in a temp dir."""
+    scheduler = JobScheduler(lock_dir=str(tmp_path))
+    yield scheduler
+    scheduler.stop()
+
+
+def wait_for(predicate, timeout=5.0):
+    """Poll until predicate() is true or the timeout passes."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestFileLock:
+    """Test the cross-process file lock."""
+
+    def test_second_holder_is_refused(self, tmp_path):
+        """Test only one lock instance can hold the file."""
+        path = str(tmp_path / "test.lock")
+        first, second = FileLock(path), FileLock(path)
+
+        assert first.acquire()
+        assert not second.acquire()
+        first.release()
+        assert second.acquire()
+        second.release()
+
+    def test_acquire_is_reentrant(self, tmp_path):
+        """Test acquiring a held lock again succeeds."""
+        lock = FileLock(str(tmp_path / "test.lock"))
+        assert lock.acquire()
+        assert lock.acquire()
+        assert lock.held
+        lock.release()
+        assert not lock.held
+
+
+class TestJob:
+    """Test job delay calculation."""
+
+    def test_requires_interval_or_daily_time(self):
+        """Test a job without a schedule is rejected."""
+        with pytest.raises(ValueError):
+            Job('nothing', lambda: None)
+
+    def test_interval_jitter_stays_in_range(self):
+        """Test interval delays stay within the jitter fraction."""
+        job = Job('hourly', lambda: None, interval=100, jitter=0.1)
+        delays = [job.next_delay() for _ in range(200)]
+        assert all(90 <= delay <= 110 for delay in delays)
+        assert len(set(delays)) > 1
+
+    def test_daily_delay_targets_next_occurrence(self):
+        """Test daily jobs wait until the next HH:MM."""
+        job = Job('daily', lambda: None, daily_at="00:00", jitter=0)
+        assert job.next_delay(now=datetime(2024, 1, 1, 23, 0)) == 3600
+        assert job.next_delay(now=datetime(2024, 1, 1, 0, 0)) == 86400
+
+
+class TestJobScheduler:
+    """Test JobScheduler running jobs."""
+
+    def test_runs_sync_job_and_records_metrics(self, scheduler):
+        """Test a blocking job runs on the scheduler and updates metrics."""
+        calls = []
+        scheduler.add_job('tick', lambda: calls.append(threading.current_thread().name), interval=0.02, jitter=0)
+        scheduler.start()
+
+        assert wait_for(lambda: len(calls) >= 2)
+        metrics = scheduler.get_metrics()
+        assert metrics['running'] and metrics['leader']
+        assert metrics['jobs']['tick']['runs'] >= 2
+        assert metrics['jobs']['tick']['last_duration'] is not None
+        # Blocking jobs run in the pool, not on the loop thread
+        assert calls[0].startswith("og-ai-job")
+
+    def test_runs_async_job(self, scheduler):
+        """Test coroutine jobs are awaited on the loop."""
+        ran = threading.Event()
+
+        async def job():
+            ran.set()
+
+        scheduler.add_job('async', job, interval=0.02, jitter=0)
+        scheduler.start()
+        assert ran.wait(5)
+
+    def test_failures_are_counted(self, scheduler):
+        """Test a raising job is recorded and keeps its schedule."""
+        def boom():
+            raise RuntimeError("no internet")
+
+        scheduler.add_job('boom', boom, interval=0.02, jitter=0)
+        scheduler.start()
+
+        assert wait_for(lambda: scheduler.get_metrics()['jobs']['boom']['failures'] >= 2)
+        assert scheduler.get_metrics()['jobs']['boom']['last_error'] == "no internet"
+
+    def test_same_name_replaces_job(self, scheduler):
+        """Test re-registering a job doesn't run it twice."""
+        old_calls, new_calls = [], []
+        scheduler.add_job('learn', lambda: old_calls.append(1), interval=0.02, jitter=0)
+        scheduler.start()
+        assert wait_for(lambda: old_calls)
+
+        scheduler.add_job('learn', lambda: new_calls.append(1), interval=0.02, jitter=0)
+        assert wait_for(lambda: len(new_calls) >= 2)
+        count = len(old_calls)
+        time.sleep(0.1)
+
+        assert len(old_calls) == count
+        assert list(scheduler.get_metrics()['jobs']) == ['learn']
+
+    def test_job_added_while_starting_scheduled_once(self, scheduler, monkeypatch):
+        """Test a job added between start() and the loop's startup snapshot gets one task."""
+        go = threading.Event()
+        run_loop = scheduler._run_loop
+
+        def delayed_run_loop():
+            assert go.wait(5)
+            run_loop()
+
+        monkeypatch.setattr(scheduler, '_run_loop', delayed_run_loop)
+        scheduler.start()
+        scheduler.add_job('tick', lambda: None, interval=60)
+        go.set()
+
+        async def count_tasks():
+            return len(asyncio.all_tasks()) - 1
+
+        assert asyncio.run_coroutine_threadsafe(count_tasks(), scheduler._loop).result(5) == 1
+
+    def test_restart_runs_jobs_again(self, scheduler):
+        """Test jobs keep running after stop() and start()."""
+        calls = []
+        scheduler.add_job('tick', lambda: calls.append(1), interval=0.02, jitter=0)
+        scheduler.start()
+        assert wait_for(lambda: len(calls) >= 2)
+        scheduler.stop()
+
+        count = len(calls)
+        scheduler.start()
+        assert wait_for(lambda: len(calls) >= count + 2)
+
+    def test_only_leader_runs_jobs(self, tmp_path):
+        """Test a second scheduler sharing the lock file skips its runs."""
+        leader = JobScheduler(lock_dir=str(tmp_path))
+        follower = JobScheduler(lock_dir=str(tmp_path))
+        leader_calls, follower_calls = [], []
+        try:
+            assert leader.is_leader()
+            leader.add_job('learn', lambda: leader_calls.append(1), interval=0.02, jitter=0)
+            follower.add_job('learn', lambda: follower_calls.append(1), interval=0.02, jitter=0)
+            leader.start()
+            follower.start()
+
+            assert wait_for(lambda: follower.get_metrics()['jobs']['learn']['skipped_not_leader'] >= 2)
+            assert leader_calls
+            assert follower_calls == []
+        finally:
+            leader.stop()
+            follower.stop()
+
+    def test_follower_takes_over_when_leader_stops(self, tmp_path):
+        """Test leadership moves on when the leader releases its lock."""
+        leader = JobScheduler(lock_dir=str(tmp_path))
+        follower = JobScheduler(lock_dir=str(tmp_path))
+        calls = []
+        try:
+            assert leader.is_leader()
+            follower.add_job('learn', lambda: calls.append(1), interval=0.02, jitter=0)
+            follower.start()
+            assert wait_for(lambda: follower.get_metrics()['jobs']['learn']['skipped_not_leader'] >= 1)
+
+            leader.stop()
+            assert wait_for(lambda: calls)
+        finally:
+            leader.stop()
+            follower.stop()
+
+    def test_run_now(self, scheduler):
+        """Test run_now runs a job immediately without starting the loop."""
+        calls = []
+        scheduler.add_job('daily', lambda: calls.append(1), daily_at="00:00")
+        assert scheduler.run_now('daily')
+        assert calls == [1]
+        assert scheduler.get_metrics()['jobs']['daily']['runs'] == 1
+
+    def test_remove_job(self, scheduler):
+        """Test removed jobs stop running."""
+        scheduler.add_job('tick', lambda: None, interval=0.02)
+        assert scheduler.remove_job('tick')
+        assert not scheduler.remove_job('tick')
+        assert scheduler.get_metrics()['jobs'] == {}
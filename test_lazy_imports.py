@@ -0,0 +1,48 @@
+"""
+Unit tests for lazy_imports.py
+Tests cover cached optional imports and that importing the app leaves heavy SDKs unloaded.
+"""
+
+import subprocess
+import sys
+
+from lazy_imports import is_installed, optional_import
+
+
+class TestOptionalImport:
+    """Test optional_import and is_installed."""
+
+    def test_returns_module(self):
+        """Test an installed module is returned."""
+        assert optional_import("json").dumps({}) == "{}"
+
+    def test_missing_module_returns_none(self):
+        """Test a missing module returns None instead of raising."""
+        assert optional_import("og_ai_module_that_does_not_exist") is None
+
+    def test_result_is_cached(self):
+        """Test the import only happens once."""
+        optional_import.cache_clear()
+        optional_import("json")
+        optional_import("json")
+        assert optional_import.cache_info().hits == 1
+
+    def test_is_installed(self):
+        """Test is_installed checks without importing."""
+        assert is_installed("json")
+        assert not is_installed("og_ai_module_that_does_not_exist")
+
+
+class TestColdStart:
+    """Test importing the app doesn't pull in heavy optional packages."""
+
+    def test_app_import_skips_heavy_modules(self):
+        """Test openai, anthropic, ollama and web tools aren't imported at startup."""
+        heavy = ["openai", "anthropic", "ollama", "duckduckgo_search", "wikipedia", "bs4", "pyttsx3", "pygame"]
+        code = (
+            "import sys, app; "
+            f"print('loaded:' + ','.join(m for m in {heavy!r} if m in sys.modules))"
+        )
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+        assert "loaded:\n" in result.stdout
@@ -0,0 +1,170 @@
+"""
+Unit tests for learning_store.py
+Tests cover dedup by URL and content, size/age eviction, incremental
+persistence and compaction of the JSONL file.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from learning_store import InternetLearningStore
+
+
+def make_learning(n, url=None, learned_at=None, **kwargs):
+    """Build a learning entry like learn_from_internet does."""
+    entry = {
+        'topic': 'advanced python patterns',
+        'title': f"Title {n}",
+        'snippet': f"Snippet number {n}",
+        'url': url or f"https://example.com/post/{n}",
+        'learned_at': learned_at or datetime.now().isoformat()
+    }
+    entry.update(kwargs)
+    return entry
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    """Path for a temp JSONL file."""
+    return str(tmp_path / "learnings.jsonl")
+
+
+def count_lines(path):
+    with open(path) as f:
+        return sum(1 for line in f if line.strip())
+
+
+class TestDedup:
+    """Test duplicate detection."""
+
+    def test_skips_same_url(self, store_path):
+        """Test the same URL (modulo fragment/trailing slash/case) is only stored once."""
+        store = InternetLearningStore(store_path)
+        assert store.add(make_learning(1, url="https://Example.com/post/"))
+        assert not store.add(make_learning(2, url="https://example.com/post#comments"))
+        assert len(store) == 1
+        assert store.get_stats()['duplicates'] == 1
+
+    def test_skips_same_content(self, store_path):
+        """Test the same title and snippet under a different URL is a duplicate."""
+        store = InternetLearningStore(store_path)
+        assert store.add(make_learning(1, url="https://a.com/x"))
+        assert not store.add(make_learning(1, url="https://b.com/y", title="  TITLE 1 "))
+        assert len(store) == 1
+
+    def test_add_many_returns_only_new(self, store_path):
+        """Test add_many reports which entries were new."""
+        store = InternetLearningStore(store_path)
+        store.add(make_learning(1))
+        added = store.add_many([make_learning(1), make_learning(2), make_learning(2)])
+        assert [entry['title'] for entry in added] == ["Title 2"]
+
+
+class TestEviction:
+    """Test the size cap and age limit."""
+
+    def test_size_cap_evicts_oldest(self, store_path):
+        """Test the oldest entries go first once over max_entries."""
+        store = InternetLearningStore(store_path, max_entries=3)
+        store.add_many([make_learning(n) for n in range(5)])
+        assert len(store) == 3
+        assert [entry['title'] for entry in store] == ["Title 2", "Title 3", "Title 4"]
+        assert store.get_stats()['evicted'] == 2
+
+    def test_old_entries_evicted(self, store_path):
+        """Test entries older than max_age_days are dropped."""
+        store = InternetLearningStore(store_path, max_age_days=7)
+        old = (datetime.now() - timedelta(days=30)).isoformat()
+        store.add_many([make_learning(1, learned_at=old), make_learning(2)])
+        assert [entry['title'] for entry in store] == ["Title 2"]
+
+    def test_evicted_url_can_be_learned_again(self, store_path):
+        """Test evicted URLs stop counting as duplicates."""
+        store = InternetLearningStore(store_path, max_entries=1)
+        store.add(make_learning(1))
+        store.add(make_learning(2))
+        assert store.add(make_learning(3, url="https://example.com/post/1"))
+
+
+class TestLatest:
+    """Test reading the newest entries."""
+
+    def test_latest_returns_newest_in_order(self, store_path):
+        """Test latest(n) returns the last n entries oldest first."""
+        store = InternetLearningStore(store_path)
+        store.add_many([make_learning(n) for n in range(10)])
+        assert [entry['title'] for entry in store.latest(3)] == ["Title 7", "Title 8", "Title 9"]
+
+    def test_latest_on_empty_store(self, store_path):
+        """Test latest on an empty store is an empty list."""
+        assert InternetLearningStore(store_path).latest(5) == []
+
+
+class TestPersistence:
+    """Test the JSONL file."""
+
+    def test_appends_only_new_entries(self, store_path):
+        """Test each batch appends only its new entries."""
+        store = InternetLearningStore(store_path)
+        store.add_many([make_learning(1), make_learning(2)])
+        store.add_many([make_learning(2), make_learning(3)])
+        assert count_lines(store_path) == 3
+
+    def test_reload_restores_entries(self, store_path):
+        """Test a new store rebuilds its index from disk."""
+        InternetLearningStore(store_path).add_many([make_learning(n) for n in range(3)])
+        store = InternetLearningStore(store_path)
+        assert len(store) == 3
+        assert not store.add(make_learning(0))
+
+    def test_compacts_after_many_evictions(self, store_path):
+        """Test the file is rewritten once evicted lines outnumber live ones."""
+        store = InternetLearningStore(store_path, max_entries=2)
+        for n in range(10):
+            store.add(make_learning(n))
+
+        assert count_lines(store_path) <= 4
+        assert store.get_stats()['compactions'] >= 1
+        assert [entry['title'] for entry in InternetLearningStore(store_path, max_entries=2)] == ["Title 8", "Title 9"]
+
+    def test_ignores_corrupt_lines(self, store_path):
+        """Test a truncated line doesn't break loading."""
+        InternetLearningStore(store_path).add(make_learning(1))
+        with open(store_path, 'a') as f:
+            f.write('{"title": "half wri\n')
+        assert len(InternetLearningStore(store_path)) == 1
+
+    def test_import_legacy_sorts_by_date(self, store_path):
+        """Test legacy knowledge base lists are imported oldest first."""
+        store = InternetLearningStore(store_path)
+        newer = make_learning(1, learned_at=datetime.now().isoformat())
+        older = make_learning(2, learned_at=(datetime.now() - timedelta(days=1)).isoformat())
+        assert store.import_legacy([newer, older, newer]) == 2
+        assert store.latest(1)[0]['title'] == "Title 1"
+
+
+class TestSearch:
+    """Test full-text search over learnings."""
+
+    def test_finds_relevant_learning(self, store_path):
+        """Test search returns entries matching the query."""
+        store = InternetLearningStore(store_path)
+        store.add_many([
+            make_learning(1, title="Web scraping best practices", snippet="Use rotating proxies and respect robots.txt"),
+            make_learning(2, title="Asyncio patterns", snippet="Structured concurrency with task groups"),
+        ])
+        results = store.search("how do I do web scraping without getting blocked")
+        assert [entry['title'] for entry in results] == ["Web scraping best practices"]
+
+    def test_evicted_entries_not_found(self, store_path):
+        """Test evicted entries drop out of the index."""
+        store = InternetLearningStore(store_path, max_entries=1)
+        store.add(make_learning(1, title="Web scraping best practices"))
+        store.add(make_learning(2, title="Asyncio patterns"))
+        assert store.search("scraping") == []
+
+    def test_index_rebuilt_on_load(self, store_path):
+        """Test a reloaded store can search what was saved."""
+        InternetLearningStore(store_path).add(make_learning(1, title="Web scraping best practices"))
+        assert InternetLearningStore(store_path).search("scraping practices")
@@ -0,0 +1,154 @@
+"""
+Unit tests for metrics.py
+Tests cover counters and histograms, the text exposition format, the request
+middleware and the event-loop lag monitor - all without a Prometheus server.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from metrics import Counter, HistogramMetric, MetricsMiddleware, Registry, monitor_event_loop
+import metrics
+
+
+def parse(text):
+    """Exposition text to {'name{labels}': value} (comment lines skipped)."""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            samples[name] = float(value)
+    return samples
+
+
+class TestCounter:
+    """Test Counter."""
+
+    def test_labels(self):
+        counter = Counter("og_ai_things", "Things", ("kind",))
+        counter.inc(1, "a")
+        counter.inc(2.5, "a")
+        counter.inc(1, "b")
+        assert dict((labels['kind'], value) for _, labels, value in counter.collect()) == {"a": 3.5, "b": 1}
+        assert counter.name == "og_ai_things_total"
+
+    def test_wrong_labels(self):
+        with pytest.raises(ValueError):
+            Counter("og_ai_things", "Things", ("kind",)).inc(1)
+
+    def test_concurrent_incs_not_lost(self):
+        """Test increments from many threads all count (no lock on the hot path)."""
+        counter = Counter("og_ai_hits", "Hits")
+
+        def hit():
+            for _ in range(10000):
+                counter.inc()
+
+        threads = [threading.Thread(target=hit) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert counter.collect()[0][2] == 80000
+
+
+class TestRender:
+    """Test the text exposition format."""
+
+    def test_histogram_series(self):
+        registry = Registry()
+        histogram = registry.histogram("og_ai_latency_seconds", "Latency", ("route",), buckets=(0.1, 1))
+        histogram.observe(0.05, "/chat")
+        histogram.observe(0.5, "/chat")
+        histogram.observe(5, "/chat")
+
+        text = registry.render()
+        assert "# TYPE og_ai_latency_seconds histogram" in text
+        samples = parse(text)
+        assert samples['og_ai_latency_seconds_bucket{route="/chat",le="0.1"}'] == 1
+        assert samples['og_ai_latency_seconds_bucket{route="/chat",le="1"}'] == 2
+        assert samples['og_ai_latency_seconds_bucket{route="/chat",le="+Inf"}'] == 3
+        assert samples['og_ai_latency_seconds_count{route="/chat"}'] == 3
+        assert samples['og_ai_latency_seconds_sum{route="/chat"}'] == pytest.approx(5.55)
+
+    def test_counter_and_escaping(self):
+        registry = Registry()
+        registry.counter("og_ai_errors", "Errors", ("message",)).inc(1, 'say "yo"\n')
+        text = registry.render()
+        assert "# TYPE og_ai_errors_total counter" in text
+        assert 'og_ai_errors_total{message="say \\"yo\\"\\n"} 1' in text
+
+    def test_collectors(self):
+        registry = Registry()
+        registry.add_collector("og_ai_history_messages", "gauge", "History", lambda: [("og_ai_history_messages", {}, 7)])
+        assert parse(registry.render())["og_ai_history_messages"] == 7
+
+    def test_broken_collector_skipped(self):
+        registry = Registry()
+
+        def broken():
+            raise RuntimeError("nope")
+
+        registry.add_collector("og_ai_broken", "gauge", "Broken", broken)
+        registry.counter("og_ai_ok", "Fine").inc()
+        assert parse(registry.render()) == {"og_ai_ok_total": 1}
+
+    def test_chat_stages_exported(self):
+        """Test request_timing spans show up as a seconds histogram."""
+        from request_timing import span
+        with span('intent'):
+            pass
+        samples = parse(metrics.registry.render())
+        assert samples['og_ai_chat_stage_duration_seconds_count{stage="intent"}'] >= 1
+        assert 'og_ai_chat_stage_duration_seconds_bucket{stage="intent",le="0.0025"}' in samples
+
+
+class TestMetricsMiddleware:
+    """Test per-route request counting."""
+
+    def test_counts_by_route_template(self, monkeypatch):
+        requests = Counter("og_ai_http_requests", "Requests", ("method", "route", "status"))
+        latency = HistogramMetric("og_ai_http_request_duration_seconds", "Latency", ("method", "route"))
+        monkeypatch.setattr(metrics, "HTTP_REQUESTS", requests)
+        monkeypatch.setattr(metrics, "HTTP_LATENCY", latency)
+
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware)
+
+        @app.get("/items/{item_id}")
+        def item(item_id: int):
+            return {"id": item_id}
+
+        client = TestClient(app)
+        client.get("/items/1")
+        client.get("/items/2")
+        client.get("/nowhere")
+
+        counts = {tuple(labels.values()): value for _, labels, value in requests.collect()}
+        assert counts == {("GET", "/items/{item_id}", "200"): 2, ("GET", "unmatched", "404"): 1}
+        assert latency.labels("GET", "/items/{item_id}").get_stats()['count'] == 2
+
+
+class TestEventLoopLag:
+    """Test the event-loop lag monitor."""
+
+    def test_measures_blocked_loop(self, monkeypatch):
+        lag = HistogramMetric("og_ai_event_loop_lag_seconds", "Lag", buckets=(0.01, 0.1, 1))
+        monkeypatch.setattr(metrics, "LOOP_LAG", lag)
+
+        async def run():
+            monitor = asyncio.create_task(monitor_event_loop(interval=0.01))
+            await asyncio.sleep(0.02)
+            time.sleep(0.15)  # Block the loop
+            await asyncio.sleep(0.03)
+            monitor.cancel()
+
+        asyncio.run(run())
+        counts, total = lag.labels().snapshot()
+        assert sum(counts) >= 2
+        assert total >= 0.1
@@ -0,0 +1,200 @@
+"""
+Unit tests for ollama_dispatcher.py
+Tests cover batching waiting requests, lone requests skipping the window, the
+parallelism bound, keep_alive, error propagation, stopping and the
+queue-wait/inference metrics.
+"""
+
+import threading
+import time
+
+import pytest
+
+from ollama_dispatcher import OllamaDispatcher
+
+
+class FakeOllama:
+    """Records chat calls and tracks how many run at once."""
+
+    def __init__(self, delay=0.05, fail_on=None):
+        self.delay = delay
+        self.fail_on = fail_on
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def chat(self, **kwargs):
+        with self.lock:
+            self.calls.append(kwargs)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delay)
+            content = kwargs['messages'][-1]['content']
+            if content == self.fail_on:
+                raise RuntimeError("model crashed")
+            return {'message': {'content': f"re: {content}"}, 'prompt_eval_count': 5, 'eval_count': 3}
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def run_concurrently(dispatcher, count):
+    """Submit `count` requests at once and return their futures."""
+    return [
+        dispatcher.submit(model="llama3.2", messages=[{'role': 'user', 'content': f"msg {n}"}])
+        for n in range(count)
+    ]
+
+
+def wait_for(predicate, timeout=5.0):
+    """Poll until predicate() is true or the timeout passes."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def fake():
+    return FakeOllama()
+
+
+class TestOllamaDispatcher:
+    """Test OllamaDispatcher."""
+
+    def test_chat_returns_response(self, fake):
+        """Test chat() waits for and returns the model response."""
+        dispatcher = OllamaDispatcher(fake.chat, parallel=2, window_ms=0)
+        response = dispatcher.chat(model="llama3.2", messages=[{'role': 'user', 'content': "yo"}], timeout=5)
+        assert response['message']['content'] == "re: yo"
+        dispatcher.stop()
+
+    def test_keep_alive_sent(self, fake):
+        """Test every call asks Ollama to keep the model loaded."""
+        dispatcher = OllamaDispatcher(fake.chat, parallel=1, window_ms=0, keep_alive="1h")
+        dispatcher.chat(model="llama3.2", messages=[{'role': 'user', 'content': "yo"}], timeout=5)
+        dispatcher.chat(model="llama3.2", messages=[{'role': 'user', 'content': "yo"}], keep_alive=0, timeout=5)
+        assert [call['keep_alive'] for call in fake.calls] == ["1h", 0]
+        dispatcher.stop()
+
+    def test_waiting_requests_batched(self, fake):
+        """Test requests that queue up behind a busy dispatcher go out as one batch."""
+        dispatcher = OllamaDispatcher(fake.chat, parallel=4, window_ms=50)
+        for _ in range(4):
+            dispatcher._slots.acquire()
+        first = run_concurrently(dispatcher, 1)[0]
+        assert wait_for(lambda: dispatcher._queue.empty())
+        time.sleep(0.05)
+        futures = run_concurrently(dispatcher, 3)
+        for _ in range(4):
+            dispatcher._slots.release()
+
+        assert first.result(5)['message']['content'] == "re: msg 0"
+        assert [future.result(5)['message']['content'] for future in futures] == [f"re: msg {n}" for n in range(3)]
+        stats = dispatcher.get_stats()
+        assert stats['batches'] == 2
+        assert stats['max_batch_size'] == 3
+        assert fake.max_active == 3
+        dispatcher.stop()
+
+    def test_lone_request_not_held(self, fake):
+        """Test a request with nothing queued behind it skips the batch window."""
+        dispatcher = OllamaDispatcher(fake.chat, parallel=4, window_ms=1000)
+        start = time.perf_counter()
+        dispatcher.chat(model="llama3.2", messages=[{'role': 'user', 'content': "yo"}], timeout=5)
+        assert time.perf_counter() - start < 0.5
+        dispatcher.stop()
+
+    def test_parallelism_bounded(self, fake):
+        """Test no more than `parallel` calls run at once."""
+        dispatcher = OllamaDispatcher(fake.chat, parallel=2, window_ms=5)
+        for future in run_concurrently(dispatcher, 8):
+            future.result(5)
+
+        assert fake.max_active == 2
+        stats = dispatcher.get_stats()
+        assert stats['requests'] == 8
+        assert stats['max_batch_size'] <= 2
+        dispatcher.stop()
+
+    def test_queue_wait_vs_inference(self, fake):
+        """Test requests stuck behind busy slots show up as queue wait."""
+        dispatcher = OllamaDispatcher(fake.chat, parallel=1, window_ms=0)
+        for future in run_concurrently(dispatcher, 3):
+            future.result(5)
+
+        stats = dispatcher.get_stats()
+        assert stats['avg_inference_ms'] >= 40
+        # The last request waited for the two before it
+        assert stats['max_queue_wait_ms'] >= 80
+        assert stats['in_flight'] == 0 and stats['queued'] == 0
+        dispatcher.stop()
+
+    def test_errors_propagate(self):
+        """Test a failing call raises for its caller only."""
+        fake = FakeOllama(delay=0, fail_on="msg 1")
+        dispatcher = OllamaDispatcher(fake.chat, parallel=2, window_ms=5)
+        ok, failed = run_concurrently(dispatcher, 2)
+
+        assert ok.result(5)['message']['content'] == "re: msg 0"
+        with pytest.raises(RuntimeError):
+            failed.result(5)
+        assert dispatcher.get_stats()['errors'] == 1
+        dispatcher.stop()
+
+    def test_stop_and_restart(self, fake):
+        """Test a stopped dispatcher starts again on the next request."""
+        dispatcher = OllamaDispatcher(fake.chat, parallel=1, window_ms=0)
+        dispatcher.chat(model="llama3.2", messages=[{'role': 'user', 'content': "yo"}], timeout=5)
+        dispatcher.stop()
+        assert not dispatcher.running
+
+        dispatcher.chat(model="llama3.2", messages=[{'role': 'user', 'content': "yo"}], timeout=5)
+        assert dispatcher.running
+        dispatcher.stop()
+
+    def test_requests_racing_stop_get_answers(self):
+        """Test every request submitted around a stop() gets a result or an error, never a hang."""
+        fake = FakeOllama(delay=0.001)
+        dispatcher = OllamaDispatcher(fake.chat, parallel=2, window_ms=1)
+        futures = []
+
+        def submit_many():
+            for n in range(200):
+                futures.extend(run_concurrently(dispatcher, 1))
+
+        submitter = threading.Thread(target=submit_many)
+        submitter.start()
+        for _ in range(5):
+            time.sleep(0.002)
+            dispatcher.stop()
+        submitter.join(5)
+
+        for future in futures:
+            try:
+                future.result(5)
+            except RuntimeError:
+                pass
+        dispatcher.stop()
+
+    def test_settings_from_env(self, monkeypatch):
+        """Test defaults come from OLLAMA_NUM_PARALLEL / OLLAMA_BATCH_WINDOW_MS / OLLAMA_KEEP_ALIVE."""
+        monkeypatch.setenv("OLLAMA_NUM_PARALLEL", "3")
+        monkeypatch.setenv("OLLAMA_BATCH_WINDOW_MS", "20")
+        monkeypatch.setenv("OLLAMA_KEEP_ALIVE", "-1")
+        dispatcher = OllamaDispatcher()
+        assert dispatcher.parallel == 3
+        assert dispatcher.window == pytest.approx(0.02)
+        assert dispatcher.keep_alive == "-1"
+
+    def test_host_from_env(self, monkeypatch):
+        """Test the default client goes to OLLAMA_BASE_URL unless a host is passed."""
+        monkeypatch.setenv("OLLAMA_BASE_URL", "http://127.0.0.1:8900")
+        assert OllamaDispatcher().host == "http://127.0.0.1:8900"
+        assert OllamaDispatcher(host="http://gpu-box:11434").host == "http://gpu-box:11434"
+        monkeypatch.delenv("OLLAMA_BASE_URL")
+        assert OllamaDispatcher().host is None
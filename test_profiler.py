@@ -0,0 +1,106 @@
+"""
+Unit tests for profiler.py
+Tests cover stack sampling, idle-thread filtering, the collapsed-stack output,
+tracemalloc growth diffs and the one-profile-at-a-time guard.
+"""
+
+import threading
+import time
+
+import profiler
+from profiler import StackSampler, memory_growth, profile
+
+
+def busy_loop(stop):
+    """Burn CPU until told to stop."""
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def run_in_thread(target):
+    stop = threading.Event()
+    thread = threading.Thread(target=target, args=(stop,), name="test-busy")
+    thread.start()
+    return stop, thread
+
+
+class TestStackSampler:
+    """Test StackSampler."""
+
+    def test_samples_busy_thread(self):
+        stop, thread = run_in_thread(busy_loop)
+        try:
+            sampler = StackSampler(hz=200).run(0.2)
+        finally:
+            stop.set()
+            thread.join()
+
+        assert sampler.samples >= 10
+        busy = [stack for stack in sampler.stacks if 'busy_loop' in stack]
+        assert busy
+        assert busy[0].startswith("test-busy;")
+        assert "busy_loop (test_profiler.py:" in busy[0]
+
+    def test_collapsed_format(self):
+        sampler = StackSampler()
+        sampler.stacks.update({"main;a (x.py:1);b (x.py:5)": 3, "main;a (x.py:1)": 7})
+        assert sampler.collapsed() == "main;a (x.py:1) 7\nmain;a (x.py:1);b (x.py:5) 3\n"
+
+    def test_skips_own_and_idle_threads(self):
+        """Test the sampling thread and threads blocked on a wait are left out."""
+        event = threading.Event()
+        waiter = threading.Thread(target=event.wait, name="test-waiter")
+        waiter.start()
+        try:
+            quiet = StackSampler(hz=100)
+            quiet.sample(skip_thread=threading.get_ident())
+            everything = StackSampler(hz=100, include_idle=True)
+            everything.sample()
+        finally:
+            event.set()
+            waiter.join()
+
+        assert not any(stack.startswith("test-waiter;") for stack in quiet.stacks)
+        assert not any(stack.startswith("MainThread;") for stack in quiet.stacks)
+        assert any(stack.startswith("test-waiter;") for stack in everything.stacks)
+        assert any(stack.startswith("MainThread;") for stack in everything.stacks)
+
+
+class TestMemoryGrowth:
+    """Test tracemalloc diffs."""
+
+    def test_reports_growing_site(self):
+        kept = []
+
+        def allocate(stop):
+            while not stop.is_set():
+                kept.append(bytearray(10000))
+                time.sleep(0.005)
+
+        stop, thread = run_in_thread(allocate)
+        try:
+            output = memory_growth(0.2)
+        finally:
+            stop.set()
+            thread.join()
+
+        top = output.splitlines()[0]
+        stack, size = top.rsplit(' ', 1)
+        assert "test_profiler.py" in stack
+        assert int(size) >= 10000
+
+
+class TestProfile:
+    """Test profile()."""
+
+    def test_cpu(self):
+        result = profile(0.05, hz=100)
+        assert result['mode'] == 'cpu'
+        assert result['samples'] >= 1
+
+    def test_one_at_a_time(self):
+        profiler._profile_lock.acquire()
+        try:
+            assert profile(0.01) is None
+        finally:
+            profiler._profile_lock.release()
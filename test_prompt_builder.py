@@ -0,0 +1,184 @@
+"""
+Unit tests for prompt_builder.py
+Tests cover token counting/caching, truncation at sentence boundaries and
+packing history and context into the budget by priority.
+"""
+
+import pytest
+
+from prompt_builder import TRUNCATION_MARKER, PromptBuilder, count_tokens, truncate_to_tokens
+
+
+def make_history(size, words=10):
+    """Alternating user/assistant messages, each about `words` * 1.25 tokens."""
+    return [
+        {'role': 'user' if n % 2 == 0 else 'assistant', 'content': f"message {n} " + "word " * words}
+        for n in range(size)
+    ]
+
+
+class TestCountTokens:
+    """Test token counting."""
+
+    def test_empty(self):
+        """Test empty text has no tokens."""
+        assert count_tokens("") == 0
+
+    def test_longer_text_has_more_tokens(self):
+        """Test counts grow with text length."""
+        assert count_tokens("word " * 100) > count_tokens("word " * 10) > 0
+
+    def test_counts_are_cached(self):
+        """Test counting the same text twice hits the cache."""
+        text = "a message only this test counts"
+        count_tokens(text)
+        hits = count_tokens.cache_info().hits
+        count_tokens(text)
+        assert count_tokens.cache_info().hits == hits + 1
+
+
+class TestTruncate:
+    """Test truncate_to_tokens."""
+
+    def test_short_text_unchanged(self):
+        """Test text under the limit is returned as is."""
+        assert truncate_to_tokens("Short one.", 100) == "Short one."
+
+    def test_fits_limit_and_marks_cut(self):
+        """Test truncated text fits and ends with the marker."""
+        text = "This is a sentence. " * 100
+        result = truncate_to_tokens(text, 50)
+        assert count_tokens(result) <= 50
+        assert result.endswith(TRUNCATION_MARKER)
+
+    def test_cuts_at_sentence_boundary(self):
+        """Test the cut lands after a full sentence."""
+        result = truncate_to_tokens("This is a sentence. " * 100, 50)
+        assert result[:-len(TRUNCATION_MARKER)].endswith("sentence.")
+
+    def test_no_boundary_still_fits(self):
+        """Test text without boundaries is cut mid-way."""
+        result = truncate_to_tokens("x" * 1000, 10)
+        assert count_tokens(result) <= 10
+
+    def test_tiny_limit_returns_empty(self):
+        """Test a limit too small for the marker gives an empty string."""
+        assert truncate_to_tokens("word " * 100, 1) == ""
+
+
+class TestPromptBuilder:
+    """Test PromptBuilder.build."""
+
+    def test_short_chat_sends_everything(self):
+        """Test a short conversation is sent whole, in order."""
+        history = make_history(4)
+        prompt = PromptBuilder(max_tokens=1000, reserve_tokens=0).build("system", history)
+        assert [m['content'] for m in prompt['messages']] == [m['content'] for m in history]
+        assert prompt['dropped_messages'] == 0
+
+    def test_drops_oldest_history_over_budget(self):
+        """Test the oldest messages are dropped first when over budget."""
+        history = make_history(50)
+        prompt = PromptBuilder(max_tokens=200, reserve_tokens=0).build("system", history)
+
+        assert prompt['tokens'] <= 200
+        assert prompt['dropped_messages'] > 0
+        assert prompt['messages'][-1]['content'] == history[-1]['content']
+        kept = [m['content'] for m in prompt['messages']]
+        assert kept == [m['content'] for m in history[-len(kept):]]
+
+    def test_huge_current_message_is_truncated(self):
+        """Test a pasted file bigger than the budget gets truncated, not dropped."""
+        history = make_history(3) + [{'role': 'user', 'content': "def f():\n    pass\n" * 2000}]
+        prompt = PromptBuilder(max_tokens=500, reserve_tokens=100).build("system", history)
+
+        assert prompt['tokens'] <= 400
+        assert prompt['messages'][-1]['content'].endswith(TRUNCATION_MARKER)
+        assert prompt['dropped_messages'] == 3
+
+    def test_context_capped_by_share(self):
+        """Test context only takes its share of the budget and gets truncated."""
+        builder = PromptBuilder(max_tokens=1000, reserve_tokens=0, context_share=0.25)
+        prompt = builder.build("system", make_history(2), ["Scraped sentence. " * 1000])
+
+        assert count_tokens(prompt['context']) <= 250
+        assert prompt['truncated_sections'] == 1
+        assert len(prompt['messages']) == 2
+
+    def test_context_sections_in_priority_order(self):
+        """Test earlier sections win when the context budget runs out."""
+        builder = PromptBuilder(max_tokens=400, reserve_tokens=0, context_share=0.5)
+        prompt = builder.build("system", make_history(1), ["important " * 40, "", "extra " * 400])
+
+        assert prompt['context'].startswith("important")
+        assert count_tokens(prompt['context']) <= 200
+
+    def test_empty_history(self):
+        """Test building without history only includes the context."""
+        prompt = PromptBuilder(max_tokens=100, reserve_tokens=0).build("system", [], ["ctx"])
+        assert prompt['messages'] == []
+        assert prompt['context'] == "ctx"
+
+    def test_stats(self):
+        """Test builds are counted and timed."""
+        builder = PromptBuilder(max_tokens=200, reserve_tokens=0)
+        builder.build("system", make_history(50))
+        stats = builder.get_stats()
+        assert stats['builds'] == 1
+        assert stats['messages_dropped'] > 0
+        assert stats['avg_build_ms'] >= 0
+
+    def test_budget_from_env(self, monkeypatch):
+        """Test defaults come from PROMPT_MAX_TOKENS / PROMPT_RESERVE_TOKENS."""
+        monkeypatch.setenv("PROMPT_MAX_TOKENS", "4000")
+        monkeypatch.setenv("PROMPT_RESERVE_TOKENS", "500")
+        assert PromptBuilder().budget == 3500
+
+
+class FakeCompletions:
+    """Records chat.completions.create calls."""
+
+    def __init__(self):
+        self.calls = []
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+
+        class Choice:
+            class message:
+                content = "bet"
+
+        class Response:
+            choices = [Choice]
+
+        return Response
+
+
+class TestAgentPrompt:
+    """Test EnhancedAIAgent sending budgeted prompts."""
+
+    @pytest.fixture
+    def agent(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("PROMPT_MAX_TOKENS", "1500")
+        monkeypatch.setenv("PROMPT_RESERVE_TOKENS", "0")
+        monkeypatch.setenv("SUMMARY_ENABLED", "false")
+        from ai_agent_enhanced import EnhancedAIAgent
+        agent = EnhancedAIAgent()
+        completions = FakeCompletions()
+        agent.openai_client = type("Client", (), {"chat": type("Chat", (), {"completions": completions})})()
+        agent.ai_provider = "openai"
+        agent.completions = completions
+        return agent
+
+    def test_openai_prompt_stays_in_budget(self, agent):
+        """Test a huge scraped context doesn't blow the prompt."""
+        for n in range(30):
+            agent.add_message('user' if n % 2 == 0 else 'assistant', f"turn {n} " + "blah " * 50)
+        agent.add_message('user', "summarize that page")
+
+        assert agent._openai_response("summarize that page", "Scraped text. " * 5000) == "bet"
+        messages = agent.completions.calls[0]['messages']
+        assert sum(count_tokens(m['content']) for m in messages) <= 1500 + 10
+        assert messages[0]['role'] == 'system'
+        assert any(m['content'] == "summarize that page" for m in messages)
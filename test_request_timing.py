@@ -0,0 +1,125 @@
+"""
+Unit tests for request_timing.py
+Tests cover the lock-free histogram, spans inside and outside a request timer,
+the Server-Timing header and the spans process_message records.
+"""
+
+import threading
+
+import pytest
+
+import request_timing
+from request_timing import Histogram, RequestTimer, TimingStats, request_timer, span
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats(monkeypatch):
+    """Give every test its own span histograms."""
+    stats = TimingStats()
+    monkeypatch.setattr(request_timing, "_stats", stats)
+    return stats
+
+
+class TestHistogram:
+    """Test Histogram."""
+
+    def test_buckets_and_sum(self):
+        histogram = Histogram(buckets=(10, 100))
+        for value in (5, 10, 50, 500):
+            histogram.observe(value)
+        counts, total = histogram.snapshot()
+        assert counts == [2, 1, 1]
+        assert total == 565
+
+    def test_quantiles(self):
+        histogram = Histogram(buckets=(10, 20))
+        for _ in range(10):
+            histogram.observe(15)
+        assert histogram.quantile(0.5) == pytest.approx(15)
+        assert histogram.quantile(1.0) == pytest.approx(20)
+
+    def test_empty(self):
+        assert Histogram().get_stats() == {'count': 0, 'mean_ms': 0.0, 'p50_ms': 0.0, 'p95_ms': 0.0, 'p99_ms': 0.0}
+
+    def test_concurrent_observes_not_lost(self):
+        """Test threads observing at once never lose a count."""
+        histogram = Histogram()
+
+        def observe():
+            for _ in range(10000):
+                histogram.observe(3)
+
+        threads = [threading.Thread(target=observe) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert histogram.get_stats()['count'] == 80000
+
+
+class TestSpans:
+    """Test span() and request_timer()."""
+
+    def test_span_outside_request(self, fresh_stats):
+        """Test spans still feed the histograms without a request timer."""
+        with span('intent'):
+            pass
+        assert fresh_stats.get_stats()['intent']['count'] == 1
+
+    def test_request_collects_spans(self, fresh_stats):
+        with request_timer() as timer:
+            with span('intent'):
+                pass
+            with span('provider'):
+                pass
+        assert [name for name, _ in timer.spans] == ['intent', 'provider']
+        assert fresh_stats.get_stats()['total']['count'] == 1
+
+    def test_span_recorded_on_error(self, fresh_stats):
+        with pytest.raises(ValueError):
+            with span('search'):
+                raise ValueError("boom")
+        assert fresh_stats.get_stats()['search']['count'] == 1
+
+    def test_requests_dont_mix(self):
+        """Test concurrent requests on other threads keep their own spans."""
+        timers = {}
+
+        def handle(name):
+            with request_timer() as timer:
+                with span(name):
+                    pass
+            timers[name] = timer
+
+        threads = [threading.Thread(target=handle, args=(f"s{n}",)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert all([name for name, _ in timer.spans] == [key] for key, timer in timers.items())
+
+    def test_server_timing_header(self):
+        timer = RequestTimer()
+        timer.spans = [('intent', 0.214), ('provider', 912.5)]
+        header = timer.server_timing()
+        assert header.startswith("intent;dur=0.21, provider;dur=912.50, total;dur=")
+
+
+class TestAgentSpans:
+    """Test the spans EnhancedAIAgent.process_message records."""
+
+    def test_process_message_spans(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        for key in ("OPENAI_API_KEY", "ANTHROPIC_API_KEY", "GITHUB_TOKEN"):
+            monkeypatch.delenv(key, raising=False)
+        monkeypatch.setenv("SUMMARY_ENABLED", "false")
+        from ai_agent_enhanced import EnhancedAIAgent
+        agent = EnhancedAIAgent()
+        monkeypatch.setattr(agent, "_generate_ai_response", lambda message, context, speech=None: "bet")
+
+        with request_timer() as timer:
+            agent.process_message("yo what's good", speak_response=False)
+        names = [name for name, _ in timer.spans]
+        assert names[:1] == ['history']
+        assert {'intent', 'provider', 'history'} <= set(names)
+        assert names.index('intent') < names.index('provider')
@@ -0,0 +1,75 @@
+"""
+Unit tests for search_index.py
+Tests cover tokenizing, BM25 ranking and keeping the index in sync on removal.
+"""
+
+from search_index import BM25Index, tokenize
+
+
+class TestTokenize:
+    """Test query/document tokenizing."""
+
+    def test_lowercases_and_drops_stopwords(self):
+        """Test stopwords, punctuation and single characters are dropped."""
+        assert tokenize("What is the BEST way to scrape a site?") == ['best', 'way', 'scrape', 'site']
+
+    def test_empty_text(self):
+        """Test empty text has no tokens."""
+        assert tokenize("") == []
+
+
+class TestBM25Index:
+    """Test BM25Index search."""
+
+    def build(self):
+        index = BM25Index()
+        index.add('scraping', "Web scraping best practices with requests and BeautifulSoup")
+        index.add('asyncio', "Advanced Python patterns: asyncio, generators and context managers")
+        index.add('money', "How to make money with AI agents and automation")
+        return index
+
+    def test_ranks_matching_document_first(self):
+        """Test the most relevant document comes first."""
+        results = self.build().search("python asyncio patterns")
+        assert results[0][0] == 'asyncio'
+
+    def test_no_match_returns_empty(self):
+        """Test a query with no known terms finds nothing."""
+        assert self.build().search("kubernetes helm charts") == []
+
+    def test_k_limits_results(self):
+        """Test k caps the number of results."""
+        index = BM25Index()
+        for n in range(10):
+            index.add(n, f"python tip number {n}")
+        assert len(index.search("python", k=3)) == 3
+
+    def test_rare_terms_weigh_more(self):
+        """Test a rare term outranks a common one."""
+        index = BM25Index()
+        for n in range(5):
+            index.add(n, "python programming tips")
+        index.add('rare', "python scraping tips")
+        assert index.search("python scraping")[0][0] == 'rare'
+
+    def test_remove_drops_document(self):
+        """Test removed documents are no longer found."""
+        index = self.build()
+        assert index.remove('scraping')
+        assert not index.remove('scraping')
+        assert 'scraping' not in index
+        assert index.search("scraping") == []
+        assert len(index) == 2
+
+    def test_add_same_id_replaces(self):
+        """Test re-adding an id replaces its text."""
+        index = self.build()
+        index.add('money', "Crypto trading bots")
+        assert index.search("money") == []
+        assert index.search("crypto")[0][0] == 'money'
+
+    def test_min_match_filters_partial_matches(self):
+        """Test min_match drops documents containing too few query terms."""
+        index = self.build()
+        assert len(index.search("python web scraping")) == 2
+        assert [doc_id for doc_id, _ in index.search("python web scraping", min_match=0.6)] == ['scraping']
@@ -0,0 +1,327 @@
+"""
+Unit tests for session_store.py
+Tests run every store (SQLite and Redis against an in-process fake) through the
+same checks, plus shared history between agents and shared learning counters.
+"""
+
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from self_learning import SelfLearningSystem
+from session_store import RedisSessionStore, SessionStore, SQLiteSessionStore, create_session_store
+
+
+class FakeRedis:
+    """In-process stand-in for the redis-py client (decode_responses=True)."""
+
+    def __init__(self):
+        self.data = {}
+        self.lock = threading.RLock()
+
+    def rpush(self, key, *values):
+        with self.lock:
+            self.data.setdefault(key, []).extend(values)
+            return len(self.data[key])
+
+    def lrange(self, key, start, stop):
+        with self.lock:
+            items = self.data.get(key, [])
+            return items[start:] if stop == -1 else items[start:stop + 1]
+
+    def llen(self, key):
+        with self.lock:
+            return len(self.data.get(key, []))
+
+    def delete(self, key):
+        with self.lock:
+            return int(self.data.pop(key, None) is not None)
+
+    def hincrbyfloat(self, key, field, amount):
+        with self.lock:
+            hash_ = self.data.setdefault(key, {})
+            hash_[field] = str(float(hash_.get(field, 0)) + amount)
+            return float(hash_[field])
+
+    def hsetnx(self, key, field, value):
+        with self.lock:
+            hash_ = self.data.setdefault(key, {})
+            if field in hash_:
+                return 0
+            hash_[field] = str(value)
+            return 1
+
+    def hgetall(self, key):
+        with self.lock:
+            return dict(self.data.get(key, {}))
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """Queues commands and runs them under the fake's lock."""
+
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.commands.append((name, args))
+
+    def execute(self):
+        with self.client.lock:
+            return [getattr(self.client, name)(*args) for name, args in self.commands]
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def make_store(request, tmp_path):
+    """Factory for stores that share state, like two workers would."""
+    redis = FakeRedis()
+
+    def make():
+        if request.param == "sqlite":
+            return SQLiteSessionStore(str(tmp_path / "state.db"))
+        return RedisSessionStore(client=redis)
+
+    return make
+
+
+def message(n):
+    return {'role': 'user', 'content': f"message {n}", 'timestamp': "2025-11-05T20:00:00"}
+
+
+class TestSessionStore:
+    """Test every SessionStore implementation."""
+
+    def test_append_and_read(self, make_store):
+        """Test messages come back in order, with paging."""
+        store = make_store()
+        for n in range(5):
+            assert store.append_message("s1", message(n)) == n + 1
+
+        assert store.count_messages("s1") == 5
+        assert store.get_messages("s1") == [message(n) for n in range(5)]
+        assert store.get_messages("s1", start=3) == [message(3), message(4)]
+        assert store.get_messages("s1", start=1, limit=2) == [message(1), message(2)]
+        assert store.get_messages("s1", limit=0) == []
+
+    def test_sessions_are_separate(self, make_store):
+        """Test sessions don't see each other's messages."""
+        store = make_store()
+        store.append_message("a", message(1))
+        assert store.count_messages("b") == 0
+        assert store.get_messages("b") == []
+
+    def test_replace_and_clear(self, make_store):
+        """Test replacing and clearing a session."""
+        store = make_store()
+        store.append_message("s1", message(0))
+        store.replace_messages("s1", [message(7), message(8)])
+        assert store.get_messages("s1") == [message(7), message(8)]
+
+        store.clear_session("s1")
+        assert store.count_messages("s1") == 0
+
+    def test_shared_between_instances(self, make_store):
+        """Test a second store (another worker) sees the same data."""
+        first, second = make_store(), make_store()
+        first.append_message("s1", message(0))
+        second.append_message("s1", message(1))
+        assert first.get_messages("s1") == second.get_messages("s1") == [message(0), message(1)]
+
+    def test_counters(self, make_store):
+        """Test counters increment, init once and filter by prefix."""
+        store = make_store()
+        assert store.increment("learning:total") == 1
+        assert store.increment("learning:total", 2.5) == 3.5
+        assert store.init_counter("learning:seeded", 1)
+        assert not store.init_counter("learning:seeded", 5)
+        store.increment("other", 1)
+
+        assert store.get_counters("learning:") == {"learning:total": 3.5, "learning:seeded": 1.0}
+
+    def test_concurrent_increments(self, make_store):
+        """Test no increments are lost when workers count at the same time."""
+        stores = [make_store() for _ in range(4)]
+
+        def count(store):
+            for _ in range(50):
+                store.increment("hits")
+
+        threads = [threading.Thread(target=count, args=(store,)) for store in stores]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert stores[0].get_counters()["hits"] == 200
+
+
+class TestCreateSessionStore:
+    """Test picking a store from SESSION_STORE_URL."""
+
+    def test_unset_means_none(self, monkeypatch):
+        monkeypatch.delenv("SESSION_STORE_URL", raising=False)
+        assert create_session_store() is None
+
+    def test_sqlite_url(self, tmp_path):
+        store = create_session_store(f"sqlite:///{tmp_path / 'state.db'}")
+        assert isinstance(store, SQLiteSessionStore)
+        store.close()
+
+    def test_interface_is_abstract(self):
+        with pytest.raises(TypeError):
+            SessionStore()
+
+    def test_unknown_url(self):
+        with pytest.raises(ValueError):
+            create_session_store("mongodb://nope")
+
+
+class TestSharedLearning:
+    """Test SelfLearningSystem counting through the store."""
+
+    def test_counts_shared_between_workers(self, make_store, tmp_path):
+        """Test two workers add to the same conversation and topic counts."""
+        first = SelfLearningSystem(str(tmp_path / "k1.json"), store=make_store())
+        second = SelfLearningSystem(str(tmp_path / "k2.json"), store=make_store())
+        first.learn_from_conversation("write python code", "```py```")
+        second.learn_from_conversation("debug my python", "bet")
+
+        report = first.get_intelligence_report()
+        assert report['total_conversations'] == 2
+        assert dict(report['top_topics'])['coding'] == 2
+        assert report['intelligence_level'] == pytest.approx(1.0, abs=0.01)
+
+    def test_seeds_from_file_once(self, make_store, tmp_path):
+        """Test existing file counts are copied into an empty store only once."""
+        legacy = SelfLearningSystem(str(tmp_path / "k.json"))
+        for _ in range(3):
+            legacy.learn_from_conversation("hello", "yo")
+        legacy.flush()
+
+        SelfLearningSystem(str(tmp_path / "k.json"), store=make_store())
+        shared = SelfLearningSystem(str(tmp_path / "k.json"), store=make_store())
+        assert shared.get_intelligence_report()['total_conversations'] == 3
+
+
+class TestSharedKnowledgeFile:
+    """Test workers sharing one knowledge file merge into it instead of overwriting it."""
+
+    def test_patterns_from_both_workers_kept(self, tmp_path):
+        path = str(tmp_path / "k.json")
+        first, second = SelfLearningSystem(path, save_interval=0), SelfLearningSystem(path, save_interval=0)
+        first.learn_from_conversation("write python code", "```py```")
+        second.learn_from_conversation("write a python api", "```py```")
+        first.learn_from_conversation("debug my script", "```py```")
+
+        with open(path) as f:
+            knowledge = json.load(f)
+        assert len(knowledge['successful_patterns']) == 3
+        assert knowledge['total_conversations'] == 3
+        assert knowledge['common_topics']['coding'] == 3
+
+    def test_improvements_and_intelligence_add_up(self, tmp_path):
+        path = str(tmp_path / "k.json")
+        first, second = SelfLearningSystem(path), SelfLearningSystem(path)
+        first.add_intelligence(0.5)
+        assert second.add_intelligence(0.25) == pytest.approx(1.75)
+
+        first.knowledge['last_improvement_date'] = None
+        second.knowledge['last_improvement_date'] = None
+        first.daily_self_improvement()
+        second.daily_self_improvement()
+        improvements = SelfLearningSystem(path).knowledge['improvements']
+        assert len(improvements) == 2
+
+    def test_store_counts_not_doubled(self, make_store, tmp_path):
+        path = str(tmp_path / "k.json")
+        first = SelfLearningSystem(path, store=make_store(), save_interval=0)
+        second = SelfLearningSystem(path, store=make_store(), save_interval=0)
+        first.learn_from_conversation("hello", "yo")
+        second.learn_from_conversation("hello", "yo")
+
+        with open(path) as f:
+            knowledge = json.load(f)
+        assert knowledge['total_conversations'] == 2
+        assert len(knowledge['successful_patterns']) == 2
+
+    def test_conversations_batched_until_flush(self, tmp_path):
+        path = str(tmp_path / "k.json")
+        system = SelfLearningSystem(path, save_interval=60)
+        for _ in range(5):
+            system.learn_from_conversation("write python code", "```py```")
+        assert not os.path.exists(path)
+
+        system.flush()
+        with open(path) as f:
+            assert json.load(f)['total_conversations'] == 5
+        system.flush()
+
+    def test_saved_after_interval(self, tmp_path):
+        path = str(tmp_path / "k.json")
+        system = SelfLearningSystem(path, save_interval=0.05)
+        system.learn_from_conversation("hello", "yo")
+        deadline = time.monotonic() + 5
+        while not os.path.exists(path) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        with open(path) as f:
+            assert json.load(f)['total_conversations'] == 1
+
+    def test_learning_during_save_not_lost(self, tmp_path):
+        path = str(tmp_path / "k.json")
+        system = SelfLearningSystem(path, save_interval=60)
+        load = system._load_knowledge
+
+        def load_and_learn():
+            # Another chat finishes while this save holds the file
+            system._load_knowledge = load
+            system.learn_from_conversation("debug my script", "```py```")
+            return load()
+
+        system.learn_from_conversation("write python code", "```py```")
+        system._load_knowledge = load_and_learn
+        system.flush()
+        assert system.knowledge['total_conversations'] == 2
+        assert len(system.knowledge['successful_patterns']) == 2
+
+        system.flush()
+        with open(path) as f:
+            knowledge = json.load(f)
+        assert knowledge['total_conversations'] == 2
+        assert len(knowledge['successful_patterns']) == 2
+
+
+class TestAgentSharedHistory:
+    """Test two EnhancedAIAgents (two workers) sharing one session."""
+
+    @pytest.fixture
+    def agents(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("SUMMARY_ENABLED", "false")
+        monkeypatch.setattr("ai_agent_enhanced.get_session_store",
+                            lambda: SQLiteSessionStore(str(tmp_path / "state.db")))
+        from ai_agent_enhanced import EnhancedAIAgent
+        return EnhancedAIAgent(), EnhancedAIAgent()
+
+    def test_history_shared(self, agents):
+        """Test messages added by one worker show up in the other's history."""
+        first, second = agents
+        first.add_message('user', "yo")
+        first.add_message('assistant', "sup")
+        second.add_message('user', "what's good")
+
+        assert [m['content'] for m in second.get_conversation_history()] == ["yo", "sup", "what's good"]
+        assert [m['content'] for m in first.get_conversation_history()] == ["yo", "sup", "what's good"]
+
+    def test_clear_seen_by_other_worker(self, agents):
+        """Test clearing in one worker empties the other's history too."""
+        first, second = agents
+        first.add_message('user', "yo")
+        assert len(second.get_conversation_history()) == 1
+
+        first.clear_history()
+        assert second.get_conversation_history() == []
@@ -0,0 +1,183 @@
+"""
+Unit tests for usage_metrics.py
+Tests cover reading usage off OpenAI/Anthropic responses, cache hit ratios and
+EnhancedAIAgent sending cacheable prompts.
+"""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from usage_metrics import UsageTracker
+
+
+def openai_response(prompt_tokens, cached_tokens, completion_tokens=10):
+    """Fake chat completion with a usage block."""
+    usage = SimpleNamespace(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=cached_tokens)
+    )
+    message = SimpleNamespace(content="bet")
+    return SimpleNamespace(usage=usage, choices=[SimpleNamespace(message=message)])
+
+
+def anthropic_response(input_tokens, cache_read=0, cache_write=0, output_tokens=10):
+    """Fake Anthropic message with a usage block."""
+    usage = SimpleNamespace(
+        input_tokens=input_tokens,
+        cache_read_input_tokens=cache_read,
+        cache_creation_input_tokens=cache_write,
+        output_tokens=output_tokens
+    )
+    return SimpleNamespace(usage=usage, content=[SimpleNamespace(text="bet")])
+
+
+class TestUsageTracker:
+    """Test UsageTracker."""
+
+    def test_openai_cached_tokens(self):
+        """Test OpenAI cached prompt tokens are counted."""
+        tracker = UsageTracker()
+        tracker.record_openai(openai_response(2000, 0), latency=1.0)
+        tracker.record_openai(openai_response(2000, 1536), latency=0.5)
+
+        stats = tracker.get_stats()['openai']
+        assert stats['requests'] == 2
+        assert stats['input_tokens'] == 4000
+        assert stats['cached_tokens'] == 1536
+        assert stats['cache_hit_requests'] == 1
+        assert stats['cached_ratio'] == pytest.approx(1536 / 4000)
+        assert stats['avg_latency'] == pytest.approx(0.75)
+
+    def test_anthropic_input_includes_cache(self):
+        """Test Anthropic input counts the cached and cache-written parts too."""
+        tracker = UsageTracker()
+        tracker.record_anthropic(anthropic_response(50, cache_write=1500))
+        tracker.record_anthropic(anthropic_response(60, cache_read=1500))
+
+        stats = tracker.get_stats('anthropic')['anthropic']
+        assert stats['input_tokens'] == 3110
+        assert stats['cached_tokens'] == 1500
+        assert stats['cache_write_tokens'] == 1500
+        assert stats['cache_hit_requests'] == 1
+
+    def test_missing_usage(self):
+        """Test responses without usage still count as requests."""
+        tracker = UsageTracker()
+        tracker.record_openai(SimpleNamespace())
+        tracker.record_anthropic({'usage': None})
+
+        stats = tracker.get_stats()
+        assert stats['openai']['requests'] == 1
+        assert stats['openai']['cached_ratio'] == 0.0
+        assert stats['anthropic']['input_tokens'] == 0
+
+    def test_errors(self):
+        """Test failed calls count towards the error rate."""
+        tracker = UsageTracker()
+        tracker.record('openai', input_tokens=10)
+        tracker.record_error('openai')
+        tracker.record_error('ollama')
+
+        stats = tracker.get_stats()
+        assert stats['openai']['errors'] == 1
+        assert stats['openai']['error_rate'] == pytest.approx(0.5)
+        assert stats['ollama']['requests'] == 0
+        assert stats['ollama']['error_rate'] == 1.0
+
+    def test_provider_filter(self):
+        """Test get_stats(provider) only returns that provider."""
+        tracker = UsageTracker()
+        tracker.record('ollama', input_tokens=10)
+        tracker.record('openai', input_tokens=10)
+        assert list(tracker.get_stats('ollama')) == ['ollama']
+
+
+class FakeMessages:
+    """Records messages.create calls."""
+
+    def __init__(self, response):
+        self.response = response
+        self.calls = []
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        return self.response
+
+
+class TestAgentPromptCache:
+    """Test EnhancedAIAgent marking prompts cacheable and recording usage."""
+
+    @pytest.fixture
+    def agent(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("SUMMARY_ENABLED", "false")
+        monkeypatch.delenv("PROMPT_CACHE_ENABLED", raising=False)
+        from ai_agent_enhanced import EnhancedAIAgent
+        agent = EnhancedAIAgent()
+        agent.ai_provider = "anthropic"
+        agent.anthropic_client = SimpleNamespace(messages=FakeMessages(anthropic_response(40, cache_read=1800)))
+        return agent
+
+    def chat(self, agent, turns):
+        for n in range(turns):
+            agent.add_message('user' if n % 2 == 0 else 'assistant', f"turn {n}")
+        agent.add_message('user', "what's next")
+        return agent._anthropic_response("what's next", "some context")
+
+    def test_anthropic_cache_breakpoints(self, agent):
+        """Test the system prompt and history prefix carry cache_control."""
+        assert self.chat(agent, 4) == "bet"
+        call = agent.anthropic_client.messages.calls[0]
+
+        assert call['system'][0]['cache_control'] == {"type": "ephemeral"}
+        assert call['system'][0]['text'] == agent.system_prompt
+        assert call['messages'][-2]['content'][0]['cache_control'] == {"type": "ephemeral"}
+        assert call['messages'][-1]['content'].startswith("what's next")
+
+    def test_usage_recorded(self, agent):
+        """Test cache hits from the response show up in prompt stats."""
+        self.chat(agent, 2)
+        usage = agent.get_prompt_stats()['usage']['anthropic']
+        assert usage['cached_tokens'] == 1800
+        assert usage['cache_hit_requests'] == 1
+
+    def test_summary_call_recorded(self, agent, monkeypatch):
+        """Test background summary calls record their latency, and errors when they fail."""
+        create = agent.anthropic_client.messages.create
+        monkeypatch.setattr(agent.anthropic_client.messages, 'create',
+                            lambda **kwargs: time.sleep(0.02) or create(**kwargs))
+        assert agent._provider_summary("", "user: hi") == "bet"
+        usage = agent.get_prompt_stats()['usage']['anthropic']
+        assert usage['requests'] == 1
+        assert usage['avg_latency'] >= 0.02
+
+        def fail(**kwargs):
+            raise RuntimeError("overloaded")
+
+        monkeypatch.setattr(agent.anthropic_client.messages, 'create', fail)
+        with pytest.raises(RuntimeError):
+            agent._provider_summary("", "user: hi")
+        assert agent.get_prompt_stats()['usage']['anthropic']['errors'] == 1
+
+    def test_disabled(self, agent):
+        """Test PROMPT_CACHE_ENABLED=false sends a plain system string."""
+        agent.prompt_cache_enabled = False
+        self.chat(agent, 2)
+        call = agent.anthropic_client.messages.calls[0]
+        assert call['system'] == agent.system_prompt
+        assert all(isinstance(m['content'], str) for m in call['messages'])
+
+    def test_history_prefix_stable(self, agent):
+        """Test the history window slides in steps so the prefix repeats between calls."""
+        for n in range(agent.HISTORY_WINDOW + 2):
+            agent.add_message('user' if n % 2 == 0 else 'assistant', f"turn {n}")
+        first = agent._build_prompt("next")['messages']
+        agent.add_message('user', "one more")
+        second = agent._build_prompt("next")['messages']
+
+        # Everything but the current message is a shared prefix
+        assert second[:len(first) - 1] == first[:-1]
+        assert len(first) <= agent.HISTORY_WINDOW
@@ -0,0 +1,268 @@
+"""
+Unit tests for vector_memory.py
+Tests cover hashed embeddings, batched top-k search, growth, np.save/memmap
+persistence, and EnhancedAIAgent recalling older turns.
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+from vector_memory import HashingEmbedder, VectorMemory
+
+
+@pytest.fixture
+def enhanced_agent(tmp_path, monkeypatch):
+    """EnhancedAIAgent with no providers, writing its files to a temp dir."""
+    monkeypatch.chdir(tmp_path)
+    for key in ("OPENAI_API_KEY", "ANTHROPIC_API_KEY", "MEMORY_ENABLED", "VOICE_ENABLED"):
+        monkeypatch.delenv(key, raising=False)
+    from ai_agent_enhanced import EnhancedAIAgent
+    return EnhancedAIAgent()
+
+
+class TestHashingEmbedder:
+    """Test the hashing embedder."""
+
+    def test_vectors_are_unit_length(self):
+        """Test embeddings are L2-normalized."""
+        vectors = HashingEmbedder(dim=64).embed_batch(["python asyncio tips", "docker compose setup"])
+        assert vectors.shape == (2, 64)
+        assert vectors.dtype == np.float32
+        assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+
+    def test_empty_text_is_zero_vector(self):
+        """Test text with no tokens embeds to zeros."""
+        assert not HashingEmbedder().embed("the a of").any()
+
+    def test_deterministic(self):
+        """Test the same text always embeds the same way."""
+        embedder = HashingEmbedder()
+        assert np.array_equal(embedder.embed("fastapi streaming"), embedder.embed("fastapi streaming"))
+
+    def test_similar_texts_score_higher(self):
+        """Test texts sharing words are closer than unrelated ones."""
+        embedder = HashingEmbedder()
+        query = embedder.embed("deploy fastapi with docker")
+        related = embedder.embed("how to deploy a fastapi app in docker")
+        unrelated = embedder.embed("my dog loves tennis balls")
+        assert query @ related > query @ unrelated
+
+
+class TestVectorMemory:
+    """Test VectorMemory storage and search."""
+
+    def test_search_returns_best_match_first(self):
+        """Test search ranks by cosine similarity."""
+        memory = VectorMemory()
+        memory.add("my dog is called Rex", {'index': 0})
+        memory.add("deploying fastapi with docker", {'index': 1})
+        memory.add("docker compose networking", {'index': 2})
+
+        results = memory.search("fastapi docker deploy", k=2, min_score=0.0)
+        assert [meta['index'] for _, _, meta in results] == [1, 2]
+
+    def test_min_score_filters_unrelated(self):
+        """Test unrelated entries aren't returned."""
+        memory = VectorMemory()
+        memory.add("my dog is called Rex")
+        assert memory.search("kubernetes helm charts") == []
+
+    def test_limit_skips_recent_rows(self):
+        """Test limit only searches the oldest rows."""
+        memory = VectorMemory()
+        memory.add("docker tips", {'index': 0})
+        memory.add("docker tips again", {'index': 1})
+        results = memory.search("docker tips", limit=1)
+        assert [meta['index'] for _, _, meta in results] == [0]
+        assert memory.search("docker tips", limit=0) == []
+
+    def test_grows_past_capacity(self):
+        """Test appending past the initial capacity keeps earlier rows."""
+        memory = VectorMemory(capacity=2)
+        memory.add_batch([f"message number {n} about topic{n}" for n in range(100)],
+                         [{'index': n} for n in range(100)])
+        assert len(memory) == 100
+        assert memory.search("topic3", k=1)[0][2] == {'index': 3}
+
+    def test_concurrent_adds_keep_rows_and_metadata_together(self):
+        """Test rows added from several threads line up with their metadata."""
+        memory = VectorMemory(capacity=2)
+
+        def add(worker):
+            for n in range(50):
+                memory.add(f"worker{worker} item{n}", {'text': f"worker{worker} item{n}"})
+
+        threads = [threading.Thread(target=add, args=(worker,)) for worker in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(memory) == 400 and len(memory.vectors) == 400
+        for row, _, meta in memory.search("worker3 item7", k=1):
+            assert meta['text'] == "worker3 item7"
+            assert np.allclose(memory.vectors[row], memory.embedder.embed("worker3 item7"))
+
+    def test_clear(self):
+        """Test clear forgets everything."""
+        memory = VectorMemory()
+        memory.add("docker tips")
+        memory.clear()
+        assert len(memory) == 0
+        assert memory.search("docker tips") == []
+
+    @pytest.mark.parametrize("mmap", [False, True])
+    def test_save_and_load(self, tmp_path, mmap):
+        """Test memory round-trips through np.save, with and without memmap."""
+        path = str(tmp_path / "memory")
+        memory = VectorMemory(dim=128)
+        memory.add("my dog is called Rex", {'index': 0})
+        memory.add("deploying fastapi with docker", {'index': 1})
+        memory.save(path)
+
+        assert VectorMemory.exists(path)
+        loaded = VectorMemory.load(path, mmap=mmap)
+        assert loaded.dim == 128
+        assert loaded.search("what's my dog called", k=1)[0][2] == {'index': 0}
+
+        # Appending after a memmap load copies into a writable array
+        loaded.add("new message", {'index': 2})
+        assert len(loaded) == 3
+
+    def test_load_rejects_mismatched_files(self, tmp_path):
+        """Test a vector file that doesn't match its metadata is rejected."""
+        path = str(tmp_path / "memory")
+        memory = VectorMemory()
+        memory.add("one")
+        memory.save(path)
+        np.save(f"{path}.npy", np.zeros((5, memory.dim), dtype=np.float32))
+
+        with pytest.raises(ValueError):
+            VectorMemory.load(path)
+
+
+class TestAgentRecall:
+    """Test EnhancedAIAgent pulling relevant older turns into prompts."""
+
+    def fill(self, agent):
+        agent.add_message('user', "my dog is called Rex and he loves tennis balls")
+        for n in range(agent.HISTORY_WINDOW + 2):
+            agent.add_message('user', f"filler message about python number {n}")
+
+    def test_recalls_turns_outside_window(self, enhanced_agent):
+        """Test an older relevant turn is recalled."""
+        self.fill(enhanced_agent)
+        recalled = enhanced_agent.recall("what is my dog called again?")
+        assert [msg['content'] for msg in recalled] == ["my dog is called Rex and he loves tennis balls"]
+
+    def test_does_not_recall_recent_turns(self, enhanced_agent):
+        """Test turns already in the history window aren't repeated."""
+        enhanced_agent.add_message('user', "my dog is called Rex")
+        assert enhanced_agent.recall("what is my dog called?") == []
+
+    @pytest.mark.parametrize("total", [21, 25, 30])
+    def test_recalls_turns_slid_out_of_window(self, enhanced_agent, total):
+        """Test turns the sliding window dropped are recallable even while among the last HISTORY_WINDOW."""
+        for n in range(5):
+            enhanced_agent.add_message('user', f"filler message about python number {n}")
+        enhanced_agent.add_message('user', "my dog is called Rex and he loves tennis balls")
+        for n in range(total - 7):
+            enhanced_agent.add_message('user', f"more filler about python number {n}")
+        enhanced_agent.add_message('user', "what is my dog called?")
+        assert len(enhanced_agent.conversation_history) == total
+
+        prompt = enhanced_agent._build_prompt("what is my dog called?")
+        in_history = any("Rex" in msg['content'] for msg in prompt['messages'])
+        assert not in_history
+        assert "my dog is called Rex" in prompt['context']
+
+    def test_memory_context_format(self, enhanced_agent):
+        """Test recalled turns are formatted as prompt context."""
+        self.fill(enhanced_agent)
+        context = enhanced_agent._memory_context("what is my dog called?")
+        assert context.startswith("[EARLIER IN THIS CONVERSATION]")
+        assert "user: my dog is called Rex" in context
+
+    def test_concurrent_chats_keep_indexes_in_step(self, enhanced_agent):
+        """Test chats answered on several threads leave history and memory in step."""
+        def chat(worker):
+            for n in range(10):
+                enhanced_agent.process_message(f"worker{worker} question{n}", speak_response=False)
+
+        threads = [threading.Thread(target=chat, args=(worker,)) for worker in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        history = enhanced_agent.conversation_history
+        assert len(history) == 120
+        memory = enhanced_agent.memory
+        assert len(memory) == len(history)
+        expected = memory.embedder.embed_batch([message['content'] for message in history])
+        for row, meta in enumerate(memory._items):
+            assert meta['index'] == row
+            assert np.allclose(memory.vectors[row], expected[row])
+
+    def test_clear_history_clears_memory(self, enhanced_agent):
+        """Test clearing history also clears the memory."""
+        self.fill(enhanced_agent)
+        enhanced_agent.clear_history()
+        assert len(enhanced_agent.memory) == 0
+
+    def test_load_conversation_rebuilds_memory(self, enhanced_agent, tmp_path):
+        """Test loading a conversation re-embeds it."""
+        self.fill(enhanced_agent)
+        path = str(tmp_path / "conversation.json")
+        enhanced_agent.save_conversation(path)
+        enhanced_agent.clear_history()
+
+        enhanced_agent.load_conversation(path)
+        assert len(enhanced_agent.memory) == len(enhanced_agent.conversation_history)
+        assert enhanced_agent.recall("what is my dog called?")
+
+    def test_save_and_load_memory(self, enhanced_agent, tmp_path):
+        """Test saved memory is reused when it matches the history."""
+        self.fill(enhanced_agent)
+        path = str(tmp_path / "memory")
+        enhanced_agent.save_memory(path)
+        assert enhanced_agent.load_memory(path)
+        assert enhanced_agent.recall("what is my dog called?")
+
+        enhanced_agent.add_message('user', "one more")
+        assert not enhanced_agent.load_memory(path)
+
+    def test_conversation_save_keeps_memory(self, enhanced_agent, tmp_path, monkeypatch):
+        """Test loading a saved conversation reuses its saved memory instead of re-embedding."""
+        self.fill(enhanced_agent)
+        path = str(tmp_path / "conversation.jsonl")
+        enhanced_agent.save_conversation(path)
+
+        rebuilt = []
+        monkeypatch.setattr(enhanced_agent, '_rebuild_memory', lambda: rebuilt.append(True))
+        enhanced_agent.load_conversation(path)
+        assert rebuilt == []
+        assert enhanced_agent.recall("what is my dog called?")
+
+        # Saving over the memory-mapped files it was loaded from
+        enhanced_agent.save_conversation(path)
+        enhanced_agent.add_message('user', "one more")
+        enhanced_agent.save_conversation(path)
+        enhanced_agent.load_conversation(path)
+        assert rebuilt == []
+        assert len(enhanced_agent.memory) == len(enhanced_agent.conversation_history)
+
+        enhanced_agent.load_conversation(path, last=3)
+        assert rebuilt == [True]
+
+    def test_disabled(self, tmp_path, monkeypatch):
+        """Test MEMORY_ENABLED=false turns recall off."""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("MEMORY_ENABLED", "false")
+        from ai_agent_enhanced import EnhancedAIAgent
+        agent = EnhancedAIAgent()
+        agent.add_message('user', "my dog is called Rex")
+        assert agent.memory is None
+        assert agent.recall("dog") == []
@@ -0,0 +1,438 @@
+"""
+Unit tests for voice_module.py
+Tests cover the background SpeechWorker: non-blocking submit, drop-oldest
+backpressure, stale utterance skipping and cancellation, and the agent
+streaming provider tokens into speech.
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from voice_module import AudioCache, ChunkStream, SentenceBuffer, SpeechWorker, VoiceGenerator
+
+
+class FakeVoice(VoiceGenerator):
+    """VoiceGenerator that records utterances instead of playing audio."""
+
+    def __init__(self, block: bool = False, **kwargs):
+        super().__init__(engine='fake', **kwargs)
+        self.spoken = []
+        self.stopped = 0
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+
+    def speak(self, text, save_to_file=None):
+        self.release.wait(5)
+        self.spoken.append(text)
+        return True
+
+    def stop(self):
+        self.stopped += 1
+        self.release.set()
+
+
+@pytest.fixture
+def blocked_voice():
+    """Voice that holds the worker on the first utterance until released."""
+    voice = FakeVoice(block=True)
+    yield voice
+    voice.release.set()
+    voice.shutdown()
+
+
+class TestSpeechWorker:
+    """Test SpeechWorker queueing behaviour."""
+
+    def test_submit_returns_immediately(self, blocked_voice):
+        """Test submitting never waits for playback."""
+        start = time.monotonic()
+        assert blocked_voice.speak_async("Yo", interrupt=False)
+        assert time.monotonic() - start < 0.5
+
+    def test_speaks_in_order(self):
+        """Test queued utterances are spoken in order."""
+        voice = FakeVoice()
+        worker = SpeechWorker(voice)
+        worker.submit("one")
+        worker.submit("two")
+
+        assert worker.wait_until_idle(timeout=5)
+        assert voice.spoken == ["one", "two"]
+        assert worker.get_stats()['spoken'] == 2
+        worker.stop()
+
+    def test_drops_oldest_when_full(self, blocked_voice):
+        """Test the oldest pending utterance is dropped when the queue is full."""
+        worker = SpeechWorker(blocked_voice, max_pending=2)
+        worker.submit("playing")
+        while worker.pending_count():
+            time.sleep(0.01)
+
+        worker.submit("first")
+        worker.submit("second")
+        worker.submit("third")
+
+        assert worker.get_stats()['dropped'] == 1
+        blocked_voice.release.set()
+        assert worker.wait_until_idle(timeout=5)
+        assert blocked_voice.spoken == ["playing", "second", "third"]
+        worker.stop()
+
+    def test_skips_stale_utterances(self, blocked_voice):
+        """Test utterances older than max_age are skipped."""
+        worker = SpeechWorker(blocked_voice, max_age=0.05)
+        worker.submit("playing")
+        while worker.pending_count():
+            time.sleep(0.01)
+
+        worker.submit("stale")
+        time.sleep(0.1)
+        blocked_voice.release.set()
+
+        assert worker.wait_until_idle(timeout=5)
+        assert blocked_voice.spoken == ["playing"]
+        assert worker.get_stats()['stale'] == 1
+        worker.stop()
+
+    def test_interrupt_cancels_pending_and_current(self, blocked_voice):
+        """Test interrupting cancels queued speech and stops playback."""
+        worker = SpeechWorker(blocked_voice)
+        worker.submit("playing")
+        while worker.pending_count():
+            time.sleep(0.01)
+        worker.submit("old news")
+
+        worker.submit("latest", interrupt=True)
+
+        assert worker.wait_until_idle(timeout=5)
+        assert blocked_voice.stopped == 1
+        assert blocked_voice.spoken == ["playing", "latest"]
+        assert worker.get_stats()['cancelled'] == 1
+        worker.stop()
+
+    def test_submit_after_stop(self):
+        """Test a stopped worker rejects new utterances."""
+        worker = SpeechWorker(FakeVoice())
+        worker.stop()
+        assert worker.submit("too late") is False
+
+
+class TestVoiceGeneratorAsync:
+    """Test VoiceGenerator.speak_async."""
+
+    def test_no_engine_returns_false(self):
+        """Test speak_async without a TTS engine does nothing."""
+        voice = VoiceGenerator.__new__(VoiceGenerator)
+        voice.engine = None
+        assert voice.speak_async("Yo") is False
+
+
+class CountingVoice(VoiceGenerator):
+    """VoiceGenerator whose synthesis backend just counts calls."""
+
+    def __init__(self):
+        super().__init__(engine='fake')
+        self.engine = 'pyttsx3'
+        self.renders = 0
+
+    def _synthesize_pyttsx3(self, text):
+        self.renders += 1
+        return f"audio:{text}".encode()
+
+
+class TestAudioCache:
+    """Test the content-hash LRU audio cache."""
+
+    def test_get_miss_then_hit(self):
+        """Test cache counts misses and hits."""
+        cache = AudioCache()
+        key = AudioCache.make_key('gtts', 'Yo')
+        assert cache.get(key) is None
+        cache.put(key, b'audio')
+        assert cache.get(key) == b'audio'
+        assert cache.get_stats()['hits'] == 1
+        assert cache.get_stats()['misses'] == 1
+
+    def test_key_depends_on_engine_and_text(self):
+        """Test keys differ per engine and per text."""
+        assert AudioCache.make_key('gtts', 'Yo') != AudioCache.make_key('pyttsx3', 'Yo')
+        assert AudioCache.make_key('gtts', 'Yo') != AudioCache.make_key('gtts', 'Sup')
+
+    def test_evicts_least_recently_used_entry(self):
+        """Test the least recently used entry is evicted first."""
+        cache = AudioCache(max_entries=2)
+        cache.put('a', b'1')
+        cache.put('b', b'2')
+        cache.get('a')
+        cache.put('c', b'3')
+
+        assert cache.get('a') == b'1'
+        assert cache.get('b') is None
+        assert cache.get('c') == b'3'
+
+    def test_evicts_to_stay_under_byte_budget(self):
+        """Test total cached bytes stay under max_bytes."""
+        cache = AudioCache(max_bytes=10)
+        cache.put('a', b'x' * 6)
+        cache.put('b', b'x' * 6)
+
+        assert cache.get('a') is None
+        assert cache.get_stats()['bytes'] == 6
+
+    def test_skips_clips_bigger_than_budget(self):
+        """Test a clip bigger than the whole budget isn't cached."""
+        cache = AudioCache(max_bytes=4)
+        cache.put('a', b'x' * 5)
+        assert cache.get_stats()['entries'] == 0
+
+
+class TestSynthesize:
+    """Test VoiceGenerator.synthesize."""
+
+    def test_synthesize_returns_bytes(self):
+        """Test synthesize renders audio to bytes."""
+        voice = CountingVoice()
+        assert voice.synthesize("Yo") == b"audio:Yo"
+
+    def test_repeated_phrases_use_cache(self):
+        """Test repeated phrases are only synthesized once."""
+        voice = CountingVoice()
+        voice.synthesize("Yo")
+        voice.synthesize("Yo")
+        voice.synthesize("Sup")
+        assert voice.renders == 2
+
+    def test_no_engine_returns_none(self):
+        """Test synthesize without an engine returns None."""
+        voice = CountingVoice()
+        voice.engine = None
+        assert voice.synthesize("Yo") is None
+
+
+class PipelineVoice(VoiceGenerator):
+    """gTTS-style voice that records synthesis and playback order."""
+
+    def __init__(self):
+        super().__init__(engine='fake')
+        self.engine = 'gtts'
+        self.events = []
+
+    def synthesize(self, text):
+        self.events.append(('render', text))
+        return text.encode()
+
+    def play_audio(self, audio):
+        self.events.append(('play', audio.decode()))
+        return True
+
+
+class TestSentenceBuffer:
+    """Test splitting streamed text into speakable sentences."""
+
+    def test_emits_sentences_as_they_complete(self):
+        """Test a sentence comes out as soon as the next one starts."""
+        buffer = SentenceBuffer(min_chars=1)
+        assert buffer.feed("Yo what's good") == []
+        assert buffer.feed(" fam. Next") == ["Yo what's good fam."]
+        assert buffer.flush() == ["Next"]
+
+    def test_token_stream(self):
+        """Test sentences are rebuilt from tiny token chunks."""
+        text = "First sentence right here. Second one is here too! Third?"
+        tokens = [text[i:i + 3] for i in range(0, len(text), 3)]
+        sentences = list(SentenceBuffer(min_chars=1).iter_sentences(tokens))
+        assert sentences == ["First sentence right here.", "Second one is here too!", "Third?"]
+
+    def test_merges_short_fragments(self):
+        """Test short sentences are merged into one clip."""
+        sentences = list(SentenceBuffer(min_chars=20).iter_sentences(["Yo. Bet. This one is long enough."]))
+        assert sentences == ["Yo. Bet. This one is long enough."]
+
+    def test_replaces_code_blocks(self):
+        """Test fenced code is never read out, even when split across chunks."""
+        chunks = ["Check this out fam. ```py", "thon\nprint('hi')\n", "``` Pretty fire right?"]
+        spoken = " ".join(SentenceBuffer(min_chars=1).iter_sentences(chunks))
+        assert "print" not in spoken
+        assert "[code snippet]" in spoken
+
+    def test_strips_markdown_links(self):
+        """Test markdown links are read as their text."""
+        sentences = list(SentenceBuffer().iter_sentences(["Read [the docs](https://example.com) now."]))
+        assert sentences == ["Read the docs now."]
+
+    def test_max_chars_truncates(self):
+        """Test speech stops once max_chars is reached."""
+        chunks = ["This first sentence is long. ", "The second sentence is also long. ", "Third."]
+        sentences = list(SentenceBuffer(min_chars=1, max_chars=40).iter_sentences(chunks))
+        assert sentences == ["This first sentence is long.", "... and more."]
+
+
+class TestSpeakStream:
+    """Test the sentence-by-sentence speech pipeline."""
+
+    def test_plays_every_sentence_in_order(self):
+        """Test each sentence is synthesized and played in order."""
+        voice = PipelineVoice()
+        assert voice.speak_stream(["Sentence number one. ", "Sentence number two."])
+        plays = [text for kind, text in voice.events if kind == 'play']
+        assert plays == ["Sentence number one.", "Sentence number two."]
+
+    def test_renders_ahead_of_playback(self):
+        """Test the next sentence is rendered before the current one finishes playing."""
+        voice = PipelineVoice()
+        first_played = threading.Event()
+        rendered_second = threading.Event()
+
+        def synthesize(text):
+            if text.startswith("Second"):
+                rendered_second.set()
+            return text.encode()
+
+        def play_audio(audio):
+            if audio.startswith(b"First"):
+                first_played.set()
+                assert rendered_second.wait(5)
+            return True
+
+        voice.synthesize = synthesize
+        voice.play_audio = play_audio
+        assert voice.speak_stream(["First sentence here. ", "Second sentence here."])
+        assert first_played.is_set()
+
+    def test_stop_cancels_remaining_sentences(self):
+        """Test stop() ends the pipeline between sentences."""
+        voice = PipelineVoice()
+
+        def play_audio(audio):
+            voice.events.append(('play', audio.decode()))
+            voice._stream_cancelled.set()
+            return True
+
+        voice.play_audio = play_audio
+        voice.speak_stream(["Sentence number one. ", "Sentence number two. ", "Sentence number three."])
+        assert [text for kind, text in voice.events if kind == 'play'] == ["Sentence number one."]
+
+    def test_speak_stream_async_uses_worker(self):
+        """Test token streams can be queued on the background worker."""
+        voice = PipelineVoice()
+        assert voice.speak_stream_async(iter(["Queued sentence ", "from tokens."]))
+        assert voice._get_worker().wait_until_idle(timeout=5)
+        assert ('play', "Queued sentence from tokens.") in voice.events
+        voice.shutdown()
+
+    def test_cancel_before_stream_starts(self):
+        """Test a cancel that lands before the worker starts the stream still stops it."""
+        voice = PipelineVoice()
+        entered, go = threading.Event(), threading.Event()
+        speak_stream = voice.speak_stream
+
+        def late_start(*args, **kwargs):
+            entered.set()
+            assert go.wait(5)
+            return speak_stream(*args, **kwargs)
+
+        voice.speak_stream = late_start
+        worker = voice._get_worker()
+        worker.submit(["Sentence number one. ", "Sentence number two."])
+        assert entered.wait(5)
+        worker.cancel()
+        go.set()
+
+        assert worker.wait_until_idle(timeout=5)
+        assert [text for kind, text in voice.events if kind == 'play'] == []
+        voice.shutdown()
+
+    def test_chunk_stream_spoken_while_written(self):
+        """Test a ChunkStream starts playing before the writer is done with it."""
+        voice = PipelineVoice()
+        played = threading.Event()
+        play_audio = voice.play_audio
+        voice.play_audio = lambda audio: play_audio(audio) and not played.set()
+
+        stream = ChunkStream()
+        assert voice.speak_stream_async(stream, max_chars=200)
+        stream.put("First streamed sentence. ")
+        stream.put("Second one is ")
+        assert played.wait(5)
+        stream.put("still coming.")
+        stream.close()
+
+        assert voice._get_worker().wait_until_idle(timeout=5)
+        assert [text for kind, text in voice.events if kind == 'play'] == [
+            "First streamed sentence.", "Second one is still coming."]
+        voice.shutdown()
+
+
+class FakeStream:
+    """Anthropic messages.stream() context manager yielding canned tokens."""
+
+    def __init__(self, tokens, fail_after=None):
+        self.tokens = tokens
+        self.fail_after = fail_after
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    @property
+    def text_stream(self):
+        for n, token in enumerate(self.tokens):
+            if n == self.fail_after:
+                raise ConnectionError("stream dropped")
+            yield token
+
+    def get_final_message(self):
+        return SimpleNamespace(content=[SimpleNamespace(text="".join(self.tokens))],
+                               usage=SimpleNamespace(input_tokens=10, output_tokens=5))
+
+
+class TestAgentSpeech:
+    """Test EnhancedAIAgent streaming provider tokens to the speech worker."""
+
+    @pytest.fixture
+    def agent(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("SUMMARY_ENABLED", "false")
+        for key in ("OPENAI_API_KEY", "ANTHROPIC_API_KEY"):
+            monkeypatch.delenv(key, raising=False)
+        from ai_agent_enhanced import EnhancedAIAgent
+        agent = EnhancedAIAgent()
+        agent.learning_system = None
+        agent.voice = PipelineVoice()
+        yield agent
+        agent.voice.shutdown()
+
+    def test_provider_tokens_streamed_to_voice(self, agent):
+        tokens = ["Yo that's ", "a solid question fam. ", "Here's the ", "deal."]
+        agent.ai_provider = "anthropic"
+        agent.anthropic_client = SimpleNamespace(messages=SimpleNamespace(stream=lambda **kwargs: FakeStream(tokens)))
+
+        assert agent.process_message("how do decorators work", speak_response=True) == "".join(tokens)
+        assert agent.voice._get_worker().wait_until_idle(timeout=5)
+        assert [text for kind, text in agent.voice.events if kind == 'play'] == [
+            "Yo that's a solid question fam.", "Here's the deal."]
+
+    def test_fallback_spoken_after_stream_fails(self, agent):
+        """Test a response that breaks off mid-stream is replaced by the spoken fallback."""
+        tokens = ["Yo that's ", "a solid question fam. ", "Here's the ", "deal."]
+        agent.ai_provider = "anthropic"
+        agent.anthropic_client = SimpleNamespace(
+            messages=SimpleNamespace(stream=lambda **kwargs: FakeStream(tokens, fail_after=2)))
+
+        response = agent.process_message("how do decorators work", speak_response=True)
+        assert not response.startswith("Yo that's a solid question fam.")
+        assert agent.voice._get_worker().wait_until_idle(timeout=5)
+        played = " ".join(text for kind, text in agent.voice.events if kind == 'play')
+        assert played.endswith(" ".join(response.split()))
+
+    def test_fallback_spoken_whole(self, agent):
+        agent.ai_provider = "none"
+        response = agent.process_message("hello", speak_response=True)
+        assert agent.voice._get_worker().wait_until_idle(timeout=5)
+        assert " ".join(text for kind, text in agent.voice.events if kind == 'play') == " ".join(response.split())
@@ -0,0 +1,92 @@
+"""
+Unit tests for warmup.py
+Tests cover the warm-up steps, readiness and how failures are reported.
+"""
+
+from types import SimpleNamespace
+
+from warmup import Warmup
+
+
+class FakeModels:
+    """Counts models.list calls."""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = 0
+
+    def list(self):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return []
+
+
+def make_agent(provider="openai", **clients):
+    """Agent stand-in with the given provider and clients."""
+    return SimpleNamespace(ai_provider=provider, openai_client=clients.get('openai'),
+                           anthropic_client=clients.get('anthropic'))
+
+
+class TestWarmup:
+    """Test Warmup."""
+
+    def test_primes_clients(self):
+        """Test every configured provider client gets a connection opened."""
+        openai_client = SimpleNamespace(models=FakeModels())
+        anthropic_client = SimpleNamespace(models=FakeModels())
+        warmup = Warmup()
+        report = warmup.run(lambda: make_agent(openai=openai_client, anthropic=anthropic_client))
+
+        assert warmup.ready
+        assert report['status'] == 'ready'
+        assert set(report['steps']) == {'agent', 'openai_client', 'anthropic_client'}
+        assert openai_client.models.calls == anthropic_client.models.calls == 1
+
+    def test_loads_ollama_model(self, monkeypatch):
+        """Test the Ollama model is loaded with keep_alive when it's the provider."""
+        calls = []
+        dispatcher = SimpleNamespace(chat=lambda **kwargs: calls.append(kwargs))
+        monkeypatch.setattr("warmup.get_ollama_dispatcher", lambda: dispatcher)
+        monkeypatch.setenv("OLLAMA_MODEL", "qwen2.5")
+
+        report = Warmup().run(lambda: make_agent("ollama"))
+        assert report['steps']['ollama_model']['ok']
+        assert calls == [{'model': "qwen2.5", 'messages': []}]
+
+    def test_provider_failure_still_ready(self):
+        """Test a provider being down is reported but doesn't block readiness."""
+        client = SimpleNamespace(models=FakeModels(ConnectionError("no route")))
+        warmup = Warmup()
+        report = warmup.run(lambda: make_agent(openai=client))
+
+        assert warmup.ready
+        assert report['steps']['openai_client'] == {'ok': False, 'seconds': report['steps']['openai_client']['seconds'],
+                                                    'error': "no route"}
+
+    def test_agent_failure_not_ready(self):
+        """Test failing to build the agent leaves the worker not ready."""
+        def broken():
+            raise RuntimeError("bad config")
+
+        warmup = Warmup()
+        report = warmup.run(broken)
+        assert not warmup.ready
+        assert report['status'] == 'failed'
+        assert report['steps']['agent']['error'] == "bad config"
+
+    def test_runs_once(self):
+        """Test a second run doesn't repeat the steps."""
+        built = []
+        warmup = Warmup()
+        warmup.run(lambda: built.append(1) or make_agent())
+        warmup.run(lambda: built.append(1) or make_agent())
+        assert built == [1]
+        assert warmup.wait(0)
+
+    def test_skip(self):
+        """Test a skipped warm-up counts as ready."""
+        warmup = Warmup()
+        warmup.skip()
+        assert warmup.ready
+        assert warmup.get_report()['status'] == 'skipped'
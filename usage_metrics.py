@@ -0,0 +1,120 @@
+"""
+OG-AI Usage Metrics - Token usage per AI provider, including prompt cache hits
+Reads the usage block off OpenAI / Anthropic responses so we can see how much of
+each prompt was served from the provider's prompt cache
+"""
+
+import threading
+from typing import Any, Dict, Optional
+
+from metrics import PROVIDER_ERRORS, PROVIDER_LATENCY
+
+
+def _get(obj: Any, *path: str) -> int:
+    """Follow attributes (or dict keys) and return an int, 0 if anything is missing"""
+    for name in path:
+        if obj is None:
+            return 0
+        obj = obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+    return obj if isinstance(obj, int) else 0
+
+
+class UsageTracker:
+    """Thread-safe per-provider token and latency counters"""
+
+    FIELDS = ('requests', 'input_tokens', 'cached_tokens', 'cache_write_tokens',
+              'output_tokens', 'cache_hit_requests', 'errors')
+
+    def __init__(self):
+        """Initialize usage tracker"""
+        self._lock = threading.Lock()
+        self._providers: Dict[str, Dict[str, float]] = {}
+
+    def record(self, provider: str, input_tokens: int = 0, cached_tokens: int = 0,
+               cache_write_tokens: int = 0, output_tokens: int = 0, latency: float = 0.0) -> None:
+        """
+        Record one provider call
+
+        Args:
+            provider: 'openai', 'anthropic', 'ollama'...
+            input_tokens: Prompt tokens in total (cached ones included)
+            cached_tokens: Prompt tokens read from the provider's cache
+            cache_write_tokens: Prompt tokens written to the cache
+            output_tokens: Completion tokens
+            latency: Seconds the call took
+        """
+        PROVIDER_LATENCY.observe(latency, provider)
+        with self._lock:
+            stats = self._provider(provider)
+            stats['requests'] += 1
+            stats['input_tokens'] += input_tokens
+            stats['cached_tokens'] += cached_tokens
+            stats['cache_write_tokens'] += cache_write_tokens
+            stats['output_tokens'] += output_tokens
+            stats['total_latency'] += latency
+            if cached_tokens:
+                stats['cache_hit_requests'] += 1
+
+    def record_error(self, provider: str) -> None:
+        """Record a provider call that failed (the agent fell back to canned responses)"""
+        PROVIDER_ERRORS.inc(1, provider)
+        with self._lock:
+            self._provider(provider)['errors'] += 1
+
+    def _provider(self, provider: str) -> Dict[str, float]:
+        """A provider's counters, created at 0 (call with the lock held)"""
+        return self._providers.setdefault(provider, {**{field: 0 for field in self.FIELDS}, 'total_latency': 0.0})
+
+    def record_openai(self, response: Any, latency: float = 0.0) -> None:
+        """Record an OpenAI chat completion (usage.prompt_tokens_details.cached_tokens)"""
+        usage = getattr(response, 'usage', None)
+        self.record(
+            'openai',
+            input_tokens=_get(usage, 'prompt_tokens'),
+            cached_tokens=_get(usage, 'prompt_tokens_details', 'cached_tokens'),
+            output_tokens=_get(usage, 'completion_tokens'),
+            latency=latency
+        )
+
+    def record_anthropic(self, response: Any, latency: float = 0.0) -> None:
+        """Record an Anthropic message (usage.cache_read_input_tokens / cache_creation_input_tokens)"""
+        usage = getattr(response, 'usage', None)
+        cached = _get(usage, 'cache_read_input_tokens')
+        written = _get(usage, 'cache_creation_input_tokens')
+        self.record(
+            'anthropic',
+            # Anthropic's input_tokens only counts the uncached part
+            input_tokens=_get(usage, 'input_tokens') + cached + written,
+            cached_tokens=cached,
+            cache_write_tokens=written,
+            output_tokens=_get(usage, 'output_tokens'),
+            latency=latency
+        )
+
+    def record_ollama(self, response: Any, latency: float = 0.0) -> None:
+        """Record an Ollama chat response (prompt_eval_count / eval_count)"""
+        self.record(
+            'ollama',
+            input_tokens=_get(response, 'prompt_eval_count'),
+            output_tokens=_get(response, 'eval_count'),
+            latency=latency
+        )
+
+    def get_stats(self, provider: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Counters per provider, plus cached share of input tokens and average latency
+
+        Args:
+            provider: Only return this provider's stats
+        """
+        with self._lock:
+            providers = {name: dict(stats) for name, stats in self._providers.items()
+                         if provider is None or name == provider}
+
+        for stats in providers.values():
+            stats['cached_ratio'] = stats['cached_tokens'] / stats['input_tokens'] if stats['input_tokens'] else 0.0
+            stats['avg_latency'] = stats['total_latency'] / stats['requests'] if stats['requests'] else 0.0
+            attempts = stats['requests'] + stats['errors']
+            stats['error_rate'] = stats['errors'] / attempts if attempts else 0.0
+        return providers
+
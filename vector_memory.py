@@ -0,0 +1,222 @@
+"""
+OG-AI Vector Memory - Find relevant older turns of a long conversation
+Messages are embedded with a hashing embedder (no model download, no API call),
+stored in one NumPy matrix, and searched with a single batched cosine product
+"""
+
+import json
+import os
+import threading
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from search_index import tokenize
+
+
+class HashingEmbedder:
+    """
+    Lightweight local text embeddings via the hashing trick
+
+    Words and word pairs are hashed into a fixed number of buckets with a
+    random-looking sign, then the vector is L2-normalized. Texts that share
+    words end up with high cosine similarity.
+    """
+
+    def __init__(self, dim: int = 512):
+        """
+        Initialize embedder
+
+        Args:
+            dim: Embedding size (number of hash buckets)
+        """
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        """Words plus adjacent word pairs"""
+        tokens = tokenize(text)
+        return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    def embed(self, text: str) -> np.ndarray:
+        """Embed one text as a float32 unit vector"""
+        return self.embed_batch([text])[0]
+
+    def embed_batch(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Embed many texts at once
+
+        Returns:
+            Array of shape (len(texts), dim), each row unit length (or all zeros)
+        """
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                h = zlib.crc32(feature.encode('utf-8'))
+                vectors[row, h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+
+class VectorMemory:
+    """
+    Append-only vector store for one conversation
+
+    Vectors live in a preallocated matrix that doubles when full, so appending
+    is amortized O(1) and a search is one matrix-vector product. Safe to share
+    between threads: rows and their metadata are always added together.
+    """
+
+    def __init__(self, dim: int = 512, embedder: Optional[HashingEmbedder] = None, capacity: int = 64):
+        """
+        Initialize vector memory
+
+        Args:
+            dim: Embedding size
+            embedder: Embedder to use (default: HashingEmbedder(dim))
+            capacity: Initial number of rows to allocate
+        """
+        self.embedder = embedder or HashingEmbedder(dim)
+        self.dim = self.embedder.dim
+        self._vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+        self._items: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """The stored vectors (a view, no copy)"""
+        return self._vectors[:len(self._items)]
+
+    def add(self, text: str, metadata: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Embed and store one text
+
+        Returns:
+            Row number of the new entry
+        """
+        return self.add_batch([text], [metadata or {}])[0]
+
+    def add_batch(self, texts: Sequence[str], metadata: Optional[Sequence[Dict[str, Any]]] = None) -> List[int]:
+        """
+        Embed and store many texts in one go
+
+        Returns:
+            Row numbers of the new entries
+        """
+        if not texts:
+            return []
+
+        metadata = metadata or [{} for _ in texts]
+        vectors = self.embedder.embed_batch(texts)
+        with self._lock:
+            start = len(self._items)
+            self._reserve(start + len(texts))
+            self._vectors[start:start + len(texts)] = vectors
+            self._items.extend(dict(meta) for meta in metadata)
+        return list(range(start, start + len(texts)))
+
+    def search(self, query: str, k: int = 3, min_score: float = 0.2,
+               limit: Optional[int] = None) -> List[Tuple[int, float, Dict[str, Any]]]:
+        """
+        Find the stored texts most similar to a query
+
+        Args:
+            query: Text to compare against
+            k: Most results to return
+            min_score: Lowest cosine similarity that counts as relevant
+            limit: Only search the first `limit` rows (e.g. skip recent turns)
+
+        Returns:
+            List of (row, score, metadata), best first
+        """
+        with self._lock:
+            # Rows below count never change, so they can be searched while others are added
+            items = self._items
+            count = len(items) if limit is None else max(0, min(limit, len(items)))
+            vectors = self._vectors[:count]
+        if not count or k <= 0:
+            return []
+
+        query_vector = self.embedder.embed(query)
+        if not query_vector.any():
+            return []
+
+        scores = vectors @ query_vector
+        if count > k:
+            top = np.argpartition(scores, -k)[-k:]
+        else:
+            top = np.arange(count)
+        top = top[np.argsort(scores[top])[::-1]]
+
+        return [(int(row), float(scores[row]), items[row])
+                for row in top if scores[row] >= min_score]
+
+    def clear(self) -> None:
+        """Forget everything"""
+        with self._lock:
+            self._vectors = np.zeros((64, self.dim), dtype=np.float32)
+            self._items = []
+
+    def save(self, path: str) -> None:
+        """
+        Save to `<path>.npy` (vectors) and `<path>.json` (metadata)
+
+        Both are written to temp files and swapped in, so saving over files
+        this (or another) memory has memory-mapped never truncates the mapping.
+
+        Args:
+            path: Path prefix for the two files
+        """
+        with self._lock:
+            vectors, items = self.vectors, list(self._items)
+        with open(f"{path}.npy.tmp", 'wb') as f:
+            np.save(f, vectors)
+        with open(f"{path}.json.tmp", 'w') as f:
+            json.dump({'dim': self.dim, 'items': items}, f)
+        os.replace(f"{path}.npy.tmp", f"{path}.npy")
+        os.replace(f"{path}.json.tmp", f"{path}.json")
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        """Check if save() files exist for a path prefix"""
+        return os.path.exists(f"{path}.npy") and os.path.exists(f"{path}.json")
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = False) -> "VectorMemory":
+        """
+        Load memory saved with save()
+
+        Args:
+            path: Path prefix used when saving
+            mmap: Memory-map the vectors instead of reading them (copied on the first append)
+
+        Returns:
+            The loaded VectorMemory
+        """
+        with open(f"{path}.json") as f:
+            data = json.load(f)
+
+        memory = cls(dim=data['dim'])
+        vectors = np.load(f"{path}.npy", mmap_mode='r' if mmap else None)
+        if vectors.shape != (len(data['items']), data['dim']):
+            raise ValueError(f"Vector file doesn't match metadata: {path}")
+
+        memory._vectors = vectors
+        memory._items = data['items']
+        return memory
+
+    def _reserve(self, rows: int) -> None:
+        """Grow the matrix (doubling) so it fits `rows` rows"""
+        capacity = self._vectors.shape[0]
+        if rows <= capacity and self._vectors.flags.writeable:
+            return
+
+        new_capacity = max(rows, capacity * 2, 64)
+        grown = np.zeros((new_capacity, self.dim), dtype=np.float32)
+        grown[:len(self._items)] = self._vectors[:len(self._items)]
+        self._vectors = grown
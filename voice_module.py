@@ -3,8 +3,16 @@ OG-AI Voice Module - Text-to-Speech with gangster personality
 Gives OG-AI a voice so it can talk out loud
 """
 
+import hashlib
+import io
 import os
-from typing import Optional
+import queue
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, Iterator, List, Optional, Union
 
 # Try different TTS engines
 TTS_ENGINE = None
@@ -26,20 +34,409 @@ except ImportError:
     pass
 
 
+# Sentence ends: ., ! or ? followed by whitespace, or a blank line
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+|\n\s*\n')
+CODE_BLOCK = re.compile(r'```[\s\S]*?```')
+MARKDOWN_LINK = re.compile(r'\[([^\]]+)\]\([^\)]+\)')
+
+
+class SentenceBuffer:
+    """
+    Turns a stream of text chunks (e.g. LLM tokens) into speakable sentences
+    
+    Complete sentences come out as soon as they're finished, fenced code is
+    swapped for "[code snippet]", and tiny fragments get merged so each clip
+    is worth synthesizing on its own.
+    """
+    
+    def __init__(self, min_chars: int = 20, max_chars: Optional[int] = None):
+        """
+        Initialize sentence buffer
+        
+        Args:
+            min_chars: Merge sentences shorter than this with the next one
+            max_chars: Stop after this many characters (None for no limit)
+        """
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self._buffer = ""
+        self._emitted = 0
+        self._truncated = False
+    
+    def feed(self, chunk: str) -> List[str]:
+        """Add a chunk of text and return any sentences it completed"""
+        self._buffer += chunk
+        return self._drain(final=False)
+    
+    def flush(self) -> List[str]:
+        """Return whatever is left once the stream is done"""
+        return self._drain(final=True)
+    
+    def iter_sentences(self, chunks: Iterable[str]) -> Iterator[str]:
+        """Yield sentences from a stream of chunks as soon as each one completes"""
+        for chunk in chunks:
+            yield from self.feed(chunk)
+            if self._truncated:
+                return
+        yield from self.flush()
+    
+    def _drain(self, final: bool) -> List[str]:
+        """Split complete sentences off the buffer"""
+        if self._truncated:
+            return []
+        
+        self._buffer = CODE_BLOCK.sub(' [code snippet] ', self._buffer)
+        
+        # Hold back an unfinished code block until it closes
+        open_fence = self._buffer.find('```')
+        if open_fence == -1:
+            speakable, held = self._buffer, ""
+        elif final:
+            speakable, held = self._buffer[:open_fence] + ' [code snippet] ', ""
+        else:
+            speakable, held = self._buffer[:open_fence], self._buffer[open_fence:]
+        
+        parts = SENTENCE_BOUNDARY.split(speakable)
+        tail = "" if final else parts.pop()
+        
+        sentences = []
+        pending = ""
+        for part in parts:
+            pending = f"{pending} {part}" if pending else part
+            if len(pending.strip()) >= self.min_chars:
+                sentences.append(pending)
+                pending = ""
+        
+        if pending and final:
+            sentences.append(pending)
+        elif pending:
+            tail = f"{pending} {tail}"
+        
+        self._buffer = tail + held
+        return self._limit([self._clean(sentence) for sentence in sentences if sentence.strip()])
+    
+    def _limit(self, sentences: List[str]) -> List[str]:
+        """Enforce max_chars across the whole stream"""
+        if self.max_chars is None:
+            return sentences
+        
+        allowed = []
+        for sentence in sentences:
+            if self._emitted + len(sentence) > self.max_chars:
+                self._truncated = True
+                allowed.append("... and more.")
+                break
+            self._emitted += len(sentence)
+            allowed.append(sentence)
+        return allowed
+    
+    @staticmethod
+    def _clean(sentence: str) -> str:
+        """Strip markdown links and extra whitespace"""
+        return ' '.join(MARKDOWN_LINK.sub(r'\1', sentence).split())
+
+
+class ChunkStream:
+    """
+    Text chunks one thread writes while the speech worker is already reading them
+    
+    The agent puts provider tokens in as they arrive and closes it when the
+    response is done; iterating blocks for the next chunk until then. If the
+    response breaks off, abort() ends it and marks it so whatever replaces the
+    response gets spoken instead.
+    """
+    
+    def __init__(self):
+        self._queue = queue.Queue()
+        self.written = False
+        self.aborted = False
+    
+    def put(self, chunk: str) -> None:
+        """Add a chunk (empty ones are ignored)"""
+        if chunk:
+            self.written = True
+            self._queue.put(chunk)
+    
+    def close(self) -> None:
+        """Mark the end of the stream"""
+        self._queue.put(None)
+    
+    def abort(self) -> None:
+        """End the stream early - what was written is only part of a response that failed"""
+        self.aborted = True
+        self._queue.put(None)
+    
+    def __iter__(self) -> Iterator[str]:
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                return
+            yield chunk
+
+
+class SpeechWorker:
+    """
+    Background speaker - plays utterances on its own thread so chat never waits on audio
+    
+    Pending utterances sit in a bounded queue. When it's full the oldest one gets
+    dropped, and anything that waited longer than max_age seconds is skipped as stale.
+    """
+    
+    def __init__(self, voice: 'VoiceGenerator', max_pending: int = 3, max_age: float = 30.0):
+        """
+        Initialize speech worker
+        
+        Args:
+            voice: VoiceGenerator that does the actual speaking
+            max_pending: Max utterances waiting to be spoken
+            max_age: Seconds after which a waiting utterance is stale
+        """
+        self.voice = voice
+        self.max_pending = max_pending
+        self.max_age = max_age
+        
+        self._pending = deque()
+        self._condition = threading.Condition()
+        self._running = True
+        self._speaking = False
+        # Cancellation token of the utterance being spoken
+        self._current: Optional[threading.Event] = None
+        
+        self.stats = {
+            'submitted': 0,
+            'spoken': 0,
+            'dropped': 0,
+            'stale': 0,
+            'cancelled': 0,
+            'failed': 0
+        }
+        
+        self._thread = threading.Thread(target=self._run, name="og-ai-speech", daemon=True)
+        self._thread.start()
+    
+    def submit(self, text: Union[str, Iterable[str]], interrupt: bool = False,
+               max_chars: Optional[int] = None) -> bool:
+        """
+        Queue text to be spoken - returns right away
+        
+        Args:
+            text: Text to speak, or a stream of text chunks (spoken sentence by sentence)
+            interrupt: Cancel everything pending (and the current utterance) first
+            max_chars: Stop a stream after this many characters
+            
+        Returns:
+            True if queued, False if the worker is stopped
+        """
+        if interrupt:
+            self.cancel()
+        
+        with self._condition:
+            if not self._running:
+                return False
+            
+            if len(self._pending) >= self.max_pending:
+                self._pending.popleft()[2].set()
+                self.stats['dropped'] += 1
+            
+            # Each utterance gets its own token, so a cancel can't be undone by the next one starting
+            self._pending.append((time.monotonic(), text, threading.Event(), max_chars))
+            self.stats['submitted'] += 1
+            self._condition.notify()
+        
+        return True
+    
+    def cancel(self) -> int:
+        """
+        Cancel pending utterances and cut off the one currently playing
+        
+        Returns:
+            Number of pending utterances cancelled
+        """
+        with self._condition:
+            cancelled = len(self._pending)
+            for _, _, token, _ in self._pending:
+                token.set()
+            self._pending.clear()
+            self.stats['cancelled'] += cancelled
+            speaking = self._speaking
+            if self._current is not None:
+                self._current.set()
+            self._condition.notify_all()
+        
+        if speaking:
+            self.voice.stop()
+        
+        return cancelled
+    
+    def pending_count(self) -> int:
+        """Number of utterances waiting to be spoken"""
+        with self._condition:
+            return len(self._pending)
+    
+    def wait_until_idle(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until nothing is pending or playing
+        
+        Returns:
+            True if idle, False on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._pending or self._speaking:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+    
+    def stop(self, timeout: float = 1.0) -> None:
+        """Cancel everything and shut down the worker thread"""
+        self.cancel()
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        self._thread.join(timeout)
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Counters for submitted, spoken, dropped, stale, cancelled and failed utterances"""
+        with self._condition:
+            stats = dict(self.stats)
+            stats['pending'] = len(self._pending)
+        return stats
+    
+    def _run(self):
+        """Worker loop - speak utterances one at a time"""
+        while True:
+            with self._condition:
+                while self._running and not self._pending:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                
+                queued_at, text, token, max_chars = self._pending.popleft()
+                if time.monotonic() - queued_at > self.max_age:
+                    self.stats['stale'] += 1
+                    self._condition.notify_all()
+                    continue
+                self._speaking = True
+                self._current = token
+            
+            try:
+                if token.is_set():
+                    spoken = False
+                elif isinstance(text, str):
+                    spoken = self.voice.speak(text)
+                else:
+                    spoken = self.voice.speak_stream(text, max_chars=max_chars, cancelled=token)
+            except Exception as e:
+                print(f"⚠️  Background speech failed: {e}")
+                spoken = False
+            
+            with self._condition:
+                self._speaking = False
+                self._current = None
+                self.stats['spoken' if spoken else 'failed'] += 1
+                self._condition.notify_all()
+
+
+class AudioCache:
+    """
+    LRU cache of synthesized audio keyed by a hash of engine + text
+    Repeated phrases get served from memory instead of being synthesized again
+    """
+    
+    def __init__(self, max_entries: int = 128, max_bytes: int = 32 * 1024 * 1024):
+        """
+        Initialize audio cache
+        
+        Args:
+            max_entries: Max number of cached clips
+            max_bytes: Max total size of cached audio
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def make_key(engine: str, text: str) -> str:
+        """Content hash used as the cache key (and as the ETag for /speech)"""
+        return hashlib.sha256(f"{engine}:{text}".encode('utf-8')).hexdigest()
+    
+    def get(self, key: str) -> Optional[bytes]:
+        """Get cached audio and mark it as recently used"""
+        with self._lock:
+            audio = self._entries.get(key)
+            if audio is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return audio
+    
+    def put(self, key: str, audio: bytes) -> None:
+        """Cache audio, evicting least recently used clips to stay in budget"""
+        if len(audio) > self.max_bytes:
+            return
+        
+        with self._lock:
+            if key in self._entries:
+                self._size -= len(self._entries.pop(key))
+            self._entries[key] = audio
+            self._size += len(audio)
+            
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+    
+    def clear(self) -> None:
+        """Drop all cached audio"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Cache size and hit/miss counters"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
 class VoiceGenerator:
     """
     Gives OG-AI a voice - can speak responses out loud
     """
     
-    def __init__(self, engine: str = None):
+    def __init__(self, engine: str = None, max_pending: int = 3, max_age: float = 30.0):
         """
         Initialize voice generator
         
         Args:
             engine: 'pyttsx3' (offline) or 'gtts' (online) or None (auto-detect)
+            max_pending: Max utterances queued by speak_async before the oldest is dropped
+            max_age: Seconds after which a queued utterance is too stale to speak
         """
         self.engine = engine or TTS_ENGINE
         self.pyttsx3_engine = None
+        self.max_pending = max_pending
+        self.max_age = max_age
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        
+        # pyttsx3 engines aren't thread-safe - the speech worker and synthesize() share this
+        self._engine_lock = threading.RLock()
+        self.audio_cache = AudioCache()
+        
+        # Cancellation token of the sentence pipeline playing now - stop() sets it so it
+        # quits between sentences
+        self._stream_cancelled = threading.Event()
         
         if self.engine == 'pyttsx3':
             self._init_pyttsx3()
@@ -104,20 +501,221 @@ class VoiceGenerator:
             if self.engine == 'pyttsx3':
                 return self._speak_pyttsx3(text, save_to_file)
             elif self.engine == 'gtts':
-                return self._speak_gtts(text, save_to_file)
+                if save_to_file:
+                    return self._speak_gtts(text, save_to_file)
+                return self.speak_stream([text])
         except Exception as e:
             print(f"⚠️  Speech failed: {e}")
             return False
     
+    # Sentences rendered ahead of the one playing
+    PIPELINE_DEPTH = 2
+    
+    def speak_stream(self, chunks: Iterable[str], max_chars: Optional[int] = None,
+                     cancelled: Optional[threading.Event] = None) -> bool:
+        """
+        Speak a stream of text sentence by sentence
+        
+        Chunks can be LLM tokens - speech starts as soon as the first sentence
+        is complete. With gTTS the next sentence is synthesized while the
+        current one plays.
+        
+        Args:
+            chunks: Text chunks, e.g. tokens from a streaming LLM response
+            max_chars: Stop speaking after this many characters
+            cancelled: Token that stops the stream when set (stop() sets it too)
+            
+        Returns:
+            True if anything was spoken
+        """
+        if not self.engine:
+            return False
+        
+        cancelled = cancelled if cancelled is not None else threading.Event()
+        self._stream_cancelled = cancelled
+        sentences = SentenceBuffer(max_chars=max_chars).iter_sentences(chunks)
+        
+        if self.engine == 'gtts':
+            return self._play_pipelined(sentences, cancelled)
+        
+        spoken = False
+        for sentence in sentences:
+            if cancelled.is_set():
+                break
+            spoken = self._speak_pyttsx3(sentence) or spoken
+        return spoken
+    
+    def speak_stream_async(self, chunks: Iterable[str], interrupt: bool = True,
+                           max_chars: Optional[int] = None) -> bool:
+        """
+        Queue a stream of text chunks on the background speech worker
+        
+        Args:
+            chunks: Text chunks, e.g. tokens from a streaming LLM response (a
+                ChunkStream can still be written to while it's being spoken)
+            interrupt: Drop whatever is still queued or playing from earlier responses
+            max_chars: Stop speaking after this many characters
+            
+        Returns:
+            True if queued, False if no TTS engine is available
+        """
+        if not self.engine:
+            return False
+        
+        return self._get_worker().submit(chunks, interrupt=interrupt, max_chars=max_chars)
+    
+    def _play_pipelined(self, sentences: Iterator[str], cancelled: threading.Event) -> bool:
+        """Synthesize sentence N+1 on a helper thread while sentence N plays"""
+        ready = queue.Queue(maxsize=self.PIPELINE_DEPTH)
+        
+        def render():
+            try:
+                for sentence in sentences:
+                    if cancelled.is_set():
+                        break
+                    ready.put(self.synthesize(sentence))
+            except Exception as e:
+                print(f"⚠️  Speech synthesis failed: {e}")
+            finally:
+                ready.put(None)
+        
+        threading.Thread(target=render, name="og-ai-speech-render", daemon=True).start()
+        
+        played = False
+        while True:
+            audio = ready.get()
+            if audio is None:
+                break
+            if audio and not cancelled.is_set():
+                played = self.play_audio(audio) or played
+        return played
+    
+    def play_audio(self, audio: bytes) -> bool:
+        """Play synthesized mp3 audio from memory and wait for it to finish"""
+        try:
+            pygame.mixer.music.load(io.BytesIO(audio), 'mp3')
+            pygame.mixer.music.play()
+            
+            # Wait for audio to finish
+            while pygame.mixer.music.get_busy():
+                pygame.time.Clock().tick(10)
+            
+            return True
+        except Exception as e:
+            print(f"⚠️  Audio playback failed: {e}")
+            return False
+    
+    def speak_async(self, text: str, interrupt: bool = True) -> bool:
+        """
+        Queue text on the background speech worker and return right away
+        
+        Args:
+            text: Text to speak
+            interrupt: Drop whatever is still queued or playing from earlier responses
+            
+        Returns:
+            True if queued, False if no TTS engine is available
+        """
+        if not self.engine:
+            return False
+        
+        return self._get_worker().submit(text, interrupt=interrupt)
+    
+    def _get_worker(self) -> SpeechWorker:
+        """Start the speech worker on first use"""
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = SpeechWorker(self, max_pending=self.max_pending, max_age=self.max_age)
+            return self._worker
+    
+    def stop(self) -> None:
+        """Cut off whatever is playing right now"""
+        self._stream_cancelled.set()
+        try:
+            if self.engine == 'pyttsx3' and self.pyttsx3_engine:
+                self.pyttsx3_engine.stop()
+            elif self.engine == 'gtts':
+                pygame.mixer.music.stop()
+        except Exception as e:
+            print(f"⚠️  Failed to stop speech: {e}")
+    
+    def shutdown(self) -> None:
+        """Stop the background speech worker"""
+        with self._worker_lock:
+            worker, self._worker = self._worker, None
+        if worker:
+            worker.stop()
+    
+    def synthesize(self, text: str) -> Optional[bytes]:
+        """
+        Render text to audio bytes without playing it
+        
+        Audio is cached by content hash, so repeated phrases skip synthesis.
+        
+        Args:
+            text: Text to synthesize
+            
+        Returns:
+            Audio bytes (see get_audio_mime_type) or None if synthesis failed
+        """
+        if not self.engine:
+            return None
+        
+        key = self.cache_key(text)
+        audio = self.audio_cache.get(key)
+        if audio is not None:
+            return audio
+        
+        try:
+            if self.engine == 'pyttsx3':
+                audio = self._synthesize_pyttsx3(text)
+            elif self.engine == 'gtts':
+                audio = self._synthesize_gtts(text)
+        except Exception as e:
+            print(f"⚠️  Speech synthesis failed: {e}")
+            return None
+        
+        if audio:
+            self.audio_cache.put(key, audio)
+        return audio
+    
+    def cache_key(self, text: str) -> str:
+        """Content hash identifying the audio synthesize() returns for this text"""
+        return AudioCache.make_key(self.engine, text)
+    
+    def get_audio_mime_type(self) -> str:
+        """MIME type of the audio returned by synthesize()"""
+        return 'audio/mpeg' if self.engine == 'gtts' else 'audio/wav'
+    
+    def _synthesize_pyttsx3(self, text: str) -> bytes:
+        """Render with pyttsx3 into a unique temp file and read it back"""
+        fd, path = tempfile.mkstemp(prefix='og_ai_speech_', suffix='.wav')
+        os.close(fd)
+        try:
+            with self._engine_lock:
+                self.pyttsx3_engine.save_to_file(text, path)
+                self.pyttsx3_engine.runAndWait()
+            with open(path, 'rb') as f:
+                return f.read()
+        finally:
+            os.remove(path)
+    
+    def _synthesize_gtts(self, text: str) -> bytes:
+        """Render with Google TTS straight into memory"""
+        buffer = io.BytesIO()
+        gTTS(text=text, lang='en', slow=False).write_to_fp(buffer)
+        return buffer.getvalue()
+    
     def _speak_pyttsx3(self, text: str, save_to_file: Optional[str] = None) -> bool:
         """Speak using pyttsx3"""
         try:
-            if save_to_file:
-                self.pyttsx3_engine.save_to_file(text, save_to_file)
-                self.pyttsx3_engine.runAndWait()
-            else:
-                self.pyttsx3_engine.say(text)
-                self.pyttsx3_engine.runAndWait()
+            with self._engine_lock:
+                if save_to_file:
+                    self.pyttsx3_engine.save_to_file(text, save_to_file)
+                    self.pyttsx3_engine.runAndWait()
+                else:
+                    self.pyttsx3_engine.say(text)
+                    self.pyttsx3_engine.runAndWait()
             return True
         except Exception as e:
             print(f"⚠️  pyttsx3 speech failed: {e}")
@@ -126,24 +724,16 @@ class VoiceGenerator:
     def _speak_gtts(self, text: str, save_to_file: Optional[str] = None) -> bool:
         """Speak using Google TTS"""
         try:
-            tts = gTTS(text=text, lang='en', slow=False)
-            
-            audio_file = save_to_file or 'temp_speech.mp3'
-            tts.save(audio_file)
+            audio = self.synthesize(text)
+            if not audio:
+                return False
             
-            # Play the audio
-            pygame.mixer.music.load(audio_file)
-            pygame.mixer.music.play()
-            
-            # Wait for audio to finish
-            while pygame.mixer.music.get_busy():
-                pygame.time.Clock().tick(10)
-            
-            # Clean up temp file if not saving
-            if not save_to_file and os.path.exists('temp_speech.mp3'):
-                os.remove('temp_speech.mp3')
+            if save_to_file:
+                with open(save_to_file, 'wb') as f:
+                    f.write(audio)
             
-            return True
+            # Play straight from memory - no shared temp file to clobber
+            return self.play_audio(audio)
         except Exception as e:
             print(f"⚠️  gTTS speech failed: {e}")
             return False
@@ -0,0 +1,132 @@
+"""
+OG-AI Warm-up - Gets a worker ready before its first /chat
+Builds the agent, loads the Ollama model and opens provider connections at
+startup, and tracks whether that's done so /ready can report it (separately
+from /health, which only says the process is alive)
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from ollama_dispatcher import get_ollama_dispatcher
+
+logger = logging.getLogger(__name__)
+
+
+class Warmup:
+    """
+    Runs the startup warm-up steps once and remembers how each went
+
+    Steps that fail are recorded but don't stop the warm-up - a provider being
+    down at boot shouldn't keep the worker out of rotation, since chats fall back
+    to other providers anyway. Only failing to build the agent does.
+    """
+
+    def __init__(self):
+        """Initialize warm-up state"""
+        self.status = 'pending'
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    @property
+    def ready(self) -> bool:
+        """Whether the warm-up finished and the agent exists (or warm-up is off)"""
+        return self.status in ('ready', 'skipped')
+
+    def skip(self) -> None:
+        """Mark the warm-up as turned off - the worker counts as ready straight away"""
+        with self._lock:
+            if self.status == 'pending':
+                self.status = 'skipped'
+        self._done.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the warm-up to finish - returns False on timeout"""
+        return self._done.wait(timeout)
+
+    def run(self, agent_factory: Callable[[], Any]) -> Dict[str, Any]:
+        """
+        Run the warm-up (blocking - call it from a worker thread)
+
+        Args:
+            agent_factory: Returns the agent, building it on the first call (app.get_agent)
+
+        Returns:
+            The warm-up report
+        """
+        with self._lock:
+            started = self.status != 'pending'
+            if not started:
+                self.status = 'running'
+                self.started_at = datetime.now().isoformat()
+        if started:
+            return self.get_report()
+
+        agent = self._step('agent', agent_factory)
+        if agent is None:
+            self._finish('failed')
+            return self.get_report()
+
+        provider = getattr(agent, 'ai_provider', None)
+        if provider == 'ollama':
+            self._step('ollama_model', self._load_ollama_model)
+        for name in ('openai_client', 'anthropic_client'):
+            client = getattr(agent, name, None)
+            if client is not None:
+                self._step(name, self._prime_client, client)
+
+        self._finish('ready')
+        return self.get_report()
+
+    def get_report(self) -> Dict[str, Any]:
+        """Status plus per-step outcome and timings"""
+        with self._lock:
+            return {
+                'status': self.status,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'steps': {name: dict(step) for name, step in self.steps.items()}
+            }
+
+    def _step(self, name: str, func: Callable, *args) -> Any:
+        """Run one step, recording its duration and any error"""
+        start = time.perf_counter()
+        result, error = None, None
+        try:
+            result = func(*args)
+        except Exception as e:
+            error = str(e)
+            logger.warning(f"Warm-up step {name} failed: {e}")
+
+        with self._lock:
+            self.steps[name] = {
+                'ok': error is None,
+                'seconds': round(time.perf_counter() - start, 3),
+                'error': error
+            }
+        return result
+
+    def _finish(self, status: str):
+        """Mark the warm-up done"""
+        with self._lock:
+            self.status = status
+            self.finished_at = datetime.now().isoformat()
+        self._done.set()
+        logger.info(f"Warm-up {status}: {self.steps}")
+
+    @staticmethod
+    def _load_ollama_model():
+        """Load OLLAMA_MODEL into memory - a chat with no messages loads it without generating"""
+        return get_ollama_dispatcher().chat(model=os.getenv("OLLAMA_MODEL", "llama3.2"), messages=[])
+
+    @staticmethod
+    def _prime_client(client: Any):
+        """Open the SDK client's HTTP connection (DNS, TCP, TLS) with a cheap models list"""
+        return client.models.list()